@@ -4,7 +4,6 @@ Integrates the Python compression pipeline with REST API
 """
 
 import sys
-import time
 from pathlib import Path
 from contextlib import asynccontextmanager
 
@@ -19,6 +18,7 @@ from src.agents.nurse_agent import NurseAgent
 from src.agents.triage_agent import TriageAgent
 from src.agents.doctor_agent import DoctorAgent
 from src.core.models import PatientState
+from src.core.pipeline import build_clinical_pipeline
 
 
 class ProcessRequest(BaseModel):
@@ -56,6 +56,7 @@ class PipelineResponse(BaseModel):
 nurse_agent = NurseAgent()
 triage_agent = TriageAgent()
 doctor_agent = DoctorAgent()
+clinical_pipeline = build_clinical_pipeline(nurse_agent, triage_agent, doctor_agent)
 
 
 @asynccontextmanager
@@ -113,30 +114,17 @@ async def process_patient_case(request: ProcessRequest):
     3. Clinical Recommendation (Doctor Agent)
     """
     try:
-        total_start = time.time()
-
-        # Step 1: Compression (Nurse Agent)
-        compression_start = time.time()
-        patient_state = nurse_agent.intake(request.clinical_text)
-        compression_time = (time.time() - compression_start) * 1000
+        # Compression → (Triage ∥ Doctor), timed per stage
+        run = clinical_pipeline.run(request.clinical_text)
+        patient_state = run["compression"]
+        triage_result = run["triage"]
 
         # Token counting (simple approximation)
         original_tokens = len(request.clinical_text.split())
-        compressed_json = patient_state.to_compressed_json()
-        compressed_tokens = len(str(compressed_json).split())
+        compressed_json = patient_state.model_dump(exclude_none=True)
+        compressed_tokens = len(patient_state.to_compressed_json().split())
         reduction_percentage = ((original_tokens - compressed_tokens) / original_tokens * 100)
 
-        # Step 2: Triage Assessment
-        triage_result = triage_agent.assess(patient_state)
-
-        # Step 3: Doctor Recommendation
-        doctor_start = time.time()
-        patient_dict = patient_state.model_dump(exclude_none=True)
-        doctor_recommendation = doctor_agent.diagnose(patient_dict)
-        doctor_time = (time.time() - doctor_start) * 1000
-
-        total_time = (time.time() - total_start) * 1000
-
         return PipelineResponse(
             compression=CompressionResponse(
                 original_text=request.clinical_text,
@@ -144,18 +132,18 @@ async def process_patient_case(request: ProcessRequest):
                 original_token_count=original_tokens,
                 compressed_token_count=compressed_tokens,
                 reduction_percentage=max(0, reduction_percentage),
-                compression_time_ms=compression_time,
+                compression_time_ms=run.timings_ms["compression"],
             ),
             triage=TriageResponse(
-                priority_level=triage_result["priority_level"],
-                priority_name=triage_result["priority_name"],
-                reason=triage_result["reason"],
+                priority_level=triage_result.priority_level,
+                priority_name=triage_result.priority_name,
+                reason=triage_result.reason,
             ),
             doctor=DoctorResponse(
-                recommendation=doctor_recommendation,
-                processing_time_ms=doctor_time,
+                recommendation=run["diagnosis"],
+                processing_time_ms=run.timings_ms["diagnosis"],
             ),
-            total_time_ms=total_time,
+            total_time_ms=run.total_ms,
         )
 
     except Exception as e:
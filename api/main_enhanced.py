@@ -3,29 +3,52 @@ FastAPI Backend for MedGemma × CompText Showcase - PRODUCTION ENHANCED
 Implements comprehensive API design with monitoring, rate limiting, and error handling
 """
 
+import os
 import sys
+import math
+import sqlite3
 import time
+import asyncio
+import contextvars
+import hmac
 import logging
+import threading
 from pathlib import Path
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, nullcontext
+from abc import ABC, abstractmethod
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 from enum import Enum
 import json
 
-from fastapi import FastAPI, HTTPException, Request, Depends, Header
+from fastapi import FastAPI, HTTPException, Request, Response, Depends, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field, field_validator, ConfigDict
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field, field_validator, ConfigDict, ValidationError
 import uvicorn
 
+try:
+    import orjson
+    _ORJSON_AVAILABLE = True
+except ImportError:
+    _ORJSON_AVAILABLE = False
+
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.agents.nurse_agent import NurseAgent
 from src.agents.triage_agent import TriageAgent
-from src.agents.doctor_agent import DoctorAgent
+from src.agents.doctor_agent import (
+    DoctorAgent,
+    get_model_status,
+    warm_up_transformers_doctor,
+)
+from src.core.cache_manager import ResultCache
+from src.core.metrics import LatencyHistogram, ProcessSampler, render_prometheus_histograms
 from src.core.models import PatientState
+from src.core.pipeline import PIPELINE_VERSION, PipelineResult, build_clinical_pipeline
+from src.core.profiling import ProfileRecorder, to_pstats_bytes, to_pstats_text, to_speedscope
+from src.core.tracing import tracer
 
 # ============================================================================
 # LOGGING CONFIGURATION
@@ -55,6 +78,19 @@ class PriorityLevel(str, Enum):
 
 RATE_LIMIT_REQUESTS = 1000
 RATE_LIMIT_WINDOW = 3600  # 1 hour
+RATE_LIMIT_DB_DEFAULT = "/tmp/medgemma_rate_limits.db"
+
+# Batch endpoint: items per request, and items per pipeline.run_batch call
+BATCH_MAX_ITEMS = 100
+BATCH_CHUNK_SIZE = 16
+
+# Result cache: entries kept for identical re-submissions (0 disables)
+RESULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", "1024"))
+
+# Profiling: fraction of /api/process requests sampled, and how many of the
+# slowest profiles are kept for /admin/profiles
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_RING_SIZE = int(os.environ.get("PROFILE_RING_SIZE", "20"))
 
 # ============================================================================
 # REQUEST/RESPONSE MODELS - Pydantic v2
@@ -168,6 +204,15 @@ class HealthResponse(BaseModel):
     compression_avg_ms: float
     cpu_usage_percent: float
     memory_usage_mb: float
+    model_state: str
+    model_detail: Optional[str] = None
+
+class ReadinessResponse(BaseModel):
+    ready: bool
+    model_state: str
+    model_progress: float
+    doctor_mode: str
+    detail: Optional[str] = None
 
 class ErrorDetail(BaseModel):
     field: Optional[str] = None
@@ -202,71 +247,328 @@ class ExamplesResponse(BaseModel):
 # RATE LIMITING
 # ============================================================================
 
-class RateLimiter:
+class RateLimitBackend(ABC):
+    """Storage for sliding-window counters.
+
+    Implementations keep, per client, the index of the current fixed window
+    and the request counts of the current and previous windows, and must
+    apply :meth:`hit` atomically — across threads and, for shared backends,
+    across worker processes.
+    """
+
+    @abstractmethod
+    def hit(self, client_id: str, index: int, weight: float, limit: int, cost: int = 1) -> tuple:
+        """Roll counters forward to window *index* and count *cost* requests
+        if ``previous * weight + current + cost - 1 < limit`` (all or none).
+
+        Returns:
+            ``(allowed, current, previous)`` after the update.
+        """
+
+    @abstractmethod
+    def peek(self, client_id: str, index: int) -> Optional[tuple]:
+        """Return ``(current, previous)`` rolled forward to *index*, or
+        ``None`` for an unknown client. Never modifies state."""
+
+    @abstractmethod
+    def evict_before(self, index: int) -> None:
+        """Drop clients whose last window is older than *index*."""
+
+    @property
+    @abstractmethod
+    def tracked_clients(self) -> int:
+        """Number of clients currently holding counters."""
+
+    @staticmethod
+    def _roll(window_index: int, current: int, previous: int, index: int) -> tuple:
+        # One window later the current count becomes the previous one;
+        # two or more windows later both have expired.
+        if window_index == index:
+            return current, previous
+        return 0, (current if index - window_index == 1 else 0)
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Per-process counters in a dict; three integers per client."""
+
     def __init__(self):
-        self.requests: Dict[str, list] = {}
-    
-    def is_allowed(self, client_id: str) -> bool:
-        now = time.time()
-        if client_id not in self.requests:
-            self.requests[client_id] = []
-        
-        # Remove old requests outside window
-        self.requests[client_id] = [
-            req_time for req_time in self.requests[client_id]
-            if now - req_time < RATE_LIMIT_WINDOW
-        ]
-        
-        if len(self.requests[client_id]) >= RATE_LIMIT_REQUESTS:
-            return False
-        
-        self.requests[client_id].append(now)
-        return True
+        # client_id -> [window_index, current_count, previous_count]
+        self._clients: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def hit(self, client_id: str, index: int, weight: float, limit: int, cost: int = 1) -> tuple:
+        with self._lock:
+            entry = self._clients.get(client_id)
+            if entry is None:
+                entry = self._clients[client_id] = [index, 0, 0]
+            current, previous = self._roll(*entry, index)
+            allowed = previous * weight + current + cost - 1 < limit
+            if allowed:
+                current += cost
+            entry[:] = [index, current, previous]
+            return allowed, current, previous
+
+    def peek(self, client_id: str, index: int) -> Optional[tuple]:
+        entry = self._clients.get(client_id)
+        return None if entry is None else self._roll(*entry, index)
+
+    def evict_before(self, index: int) -> None:
+        with self._lock:
+            idle = [cid for cid, e in self._clients.items() if e[0] < index]
+            for cid in idle:
+                del self._clients[cid]
+
+    @property
+    def tracked_clients(self) -> int:
+        return len(self._clients)
+
+
+class SQLiteRateLimitBackend(RateLimitBackend):
+    """Counters in a SQLite file shared by all workers on a host.
+
+    Each hit is a single ``INSERT ... ON CONFLICT DO UPDATE ... RETURNING``
+    statement, so roll-over, limit check and increment are atomic across
+    processes without an explicit transaction. WAL mode keeps readers and
+    the single writer from blocking each other.
+    """
+
+    _HIT_SQL = """
+        INSERT INTO rate_limits (client_id, window_index, current, previous, allowed)
+        VALUES (:client_id, :index, (:cost <= :limit) * :cost, 0, :cost <= :limit)
+        ON CONFLICT (client_id) DO UPDATE SET
+            previous = CASE
+                WHEN window_index = :index THEN previous
+                WHEN :index - window_index = 1 THEN current
+                ELSE 0 END,
+            allowed = (CASE
+                WHEN window_index = :index THEN previous
+                WHEN :index - window_index = 1 THEN current
+                ELSE 0 END) * :weight
+                + (CASE WHEN window_index = :index THEN current ELSE 0 END) + :cost - 1 < :limit,
+            current = (CASE WHEN window_index = :index THEN current ELSE 0 END)
+                + ((CASE
+                    WHEN window_index = :index THEN previous
+                    WHEN :index - window_index = 1 THEN current
+                    ELSE 0 END) * :weight
+                   + (CASE WHEN window_index = :index THEN current ELSE 0 END) + :cost - 1 < :limit)
+                  * :cost,
+            window_index = :index
+        RETURNING allowed, current, previous
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(
+            path, timeout=5.0, isolation_level=None, check_same_thread=False
+        )
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits ("
+                " client_id TEXT PRIMARY KEY,"
+                " window_index INTEGER NOT NULL,"
+                " current INTEGER NOT NULL,"
+                " previous INTEGER NOT NULL,"
+                " allowed INTEGER NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS rate_limits_window"
+                " ON rate_limits (window_index)"
+            )
+
+    def hit(self, client_id: str, index: int, weight: float, limit: int, cost: int = 1) -> tuple:
+        params = {
+            "client_id": client_id, "index": index, "weight": weight, "limit": limit, "cost": cost
+        }
+        with self._lock:
+            allowed, current, previous = self._conn.execute(self._HIT_SQL, params).fetchone()
+        return bool(allowed), current, previous
+
+    def peek(self, client_id: str, index: int) -> Optional[tuple]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT window_index, current, previous FROM rate_limits"
+                " WHERE client_id = ?",
+                (client_id,),
+            ).fetchone()
+        return None if row is None else self._roll(*row, index)
+
+    def evict_before(self, index: int) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM rate_limits WHERE window_index < ?", (index,))
+
+    @property
+    def tracked_clients(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RateLimiter:
+    """Sliding-window-counter rate limiter with O(1) memory per client.
+
+    Instead of every request timestamp, each client keeps three numbers:
+    the index of the current fixed window, the count in it, and the count
+    in the previous window. The sliding-window total is estimated as
+    ``previous * (1 - elapsed_fraction) + current``. Clients idle for two
+    full windows have an estimate of zero and are evicted by a sweep that
+    runs at most once per window. Counters live in a
+    :class:`RateLimitBackend`; use the SQLite backend to enforce one limit
+    across ``uvicorn --workers N`` processes.
+    """
+
+    def __init__(
+        self,
+        limit: int = RATE_LIMIT_REQUESTS,
+        window: float = RATE_LIMIT_WINDOW,
+        clock=time.time,
+        backend: Optional[RateLimitBackend] = None,
+    ):
+        self.limit = limit
+        self.window = window
+        self.backend = backend or InMemoryRateLimitBackend()
+        self._clock = clock
+        self._next_sweep = clock() + window
+
+    def _position(self, now: float) -> tuple:
+        """Return (window index, weight of the previous window) at *now*."""
+        return int(now // self.window), 1.0 - (now % self.window) / self.window
+
+    def is_allowed(self, client_id: str, cost: int = 1) -> bool:
+        """Count *cost* requests for *client_id* if they all fit the limit."""
+        now = self._clock()
+        index, weight = self._position(now)
+        if now >= self._next_sweep:
+            self._next_sweep = now + self.window
+            self.backend.evict_before(index - 1)
+        allowed, _, _ = self.backend.hit(client_id, index, weight, self.limit, cost)
+        return allowed
     
     def get_remaining(self, client_id: str) -> int:
-        now = time.time()
-        if client_id not in self.requests:
-            return RATE_LIMIT_REQUESTS
-        
-        valid_requests = [
-            req_time for req_time in self.requests[client_id]
-            if now - req_time < RATE_LIMIT_WINDOW
-        ]
-        return max(0, RATE_LIMIT_REQUESTS - len(valid_requests))
+        index, weight = self._position(self._clock())
+        counts = self.backend.peek(client_id, index)
+        if counts is None:
+            return self.limit
+        current, previous = counts
+        return max(0, self.limit - math.ceil(previous * weight + current))
+
+    @property
+    def tracked_clients(self) -> int:
+        """Number of clients currently holding counters."""
+        return self.backend.tracked_clients
+
+
+def create_rate_limit_backend() -> RateLimitBackend:
+    """Build the backend selected by ``RATE_LIMIT_BACKEND`` (memory|sqlite).
+
+    The SQLite file (``RATE_LIMIT_DB``) must be on a local filesystem shared
+    by all workers of this host.
+    """
+    kind = os.environ.get("RATE_LIMIT_BACKEND", "memory").lower()
+    if kind == "sqlite":
+        return SQLiteRateLimitBackend(os.environ.get("RATE_LIMIT_DB", RATE_LIMIT_DB_DEFAULT))
+    if kind != "memory":
+        raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {kind!r} (expected 'memory' or 'sqlite')")
+    return InMemoryRateLimitBackend()
 
-rate_limiter = RateLimiter()
+rate_limiter = RateLimiter(backend=create_rate_limit_backend())
 
 # ============================================================================
 # MONITORING
 # ============================================================================
 
 class APIMetrics:
+    """Request counters plus a fixed-memory latency histogram per stage."""
+
+    STAGES = ("compression", "triage", "diagnosis", "total")
+
     def __init__(self):
         self.start_time = time.time()
         self.requests_processed = 0
-        self.compression_times: list = []
         self.errors = 0
+        self.stage_latency: Dict[str, LatencyHistogram] = {
+            stage: LatencyHistogram() for stage in self.STAGES
+        }
+        self.process = ProcessSampler()
     
     def get_uptime_seconds(self) -> int:
         return int(time.time() - self.start_time)
     
+    def observe(self, stage: str, ms: float):
+        histogram = self.stage_latency.get(stage)
+        if histogram is None:
+            histogram = self.stage_latency.setdefault(stage, LatencyHistogram())
+        histogram.record(ms)
+
     def add_compression_time(self, ms: float):
-        self.compression_times.append(ms)
+        self.observe("compression", ms)
     
     def get_avg_compression_time(self) -> float:
-        if not self.compression_times:
-            return 0.0
-        return sum(self.compression_times[-100:]) / len(self.compression_times[-100:])
+        return round(self.stage_latency["compression"].mean_ms, 3)
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition (format 0.0.4) of all API metrics."""
+        lines = [
+            "# HELP medgemma_requests_processed_total Pipeline requests completed",
+            "# TYPE medgemma_requests_processed_total counter",
+            f"medgemma_requests_processed_total {self.requests_processed}",
+            "# HELP medgemma_request_errors_total Pipeline requests that failed",
+            "# TYPE medgemma_request_errors_total counter",
+            f"medgemma_request_errors_total {self.errors}",
+            "# HELP medgemma_uptime_seconds Seconds since API startup",
+            "# TYPE medgemma_uptime_seconds gauge",
+            f"medgemma_uptime_seconds {self.get_uptime_seconds()}",
+            "# HELP medgemma_process_cpu_percent Process CPU usage since the last scrape",
+            "# TYPE medgemma_process_cpu_percent gauge",
+            f"medgemma_process_cpu_percent {self.process.cpu_percent('metrics')}",
+            "# HELP medgemma_process_resident_memory_mb Process resident memory",
+            "# TYPE medgemma_process_resident_memory_mb gauge",
+            f"medgemma_process_resident_memory_mb {self.process.memory_mb()}",
+        ]
+        lines += render_prometheus_histograms(
+            "medgemma_stage_latency_seconds",
+            self.stage_latency,
+            help_text="Pipeline stage latency",
+        )
+        return "\n".join(lines) + "\n"
 
 metrics = APIMetrics()
 
+result_cache = ResultCache(max_entries=RESULT_CACHE_SIZE)
+
+def render_result_cache_metrics(cache: ResultCache) -> str:
+    """Prometheus lines for the /api/process result cache"""
+    stats = cache.stats()
+    lines = []
+    for name, kind, value, help_text in (
+        ("hits_total", "counter", stats["hits"], "Result cache hits"),
+        ("misses_total", "counter", stats["misses"], "Result cache misses"),
+        ("evictions_total", "counter", stats["evictions"], "Result cache LRU evictions"),
+        ("entries", "gauge", stats["size"], "Results currently cached"),
+    ):
+        lines += [
+            f"# HELP medgemma_result_cache_{name} {help_text}",
+            f"# TYPE medgemma_result_cache_{name} {kind}",
+            f"medgemma_result_cache_{name} {value}",
+        ]
+    return "\n".join(lines) + "\n"
+
+# Requests run serially on the handler thread while profiled, so cProfile
+# sees compression, triage and diagnosis together.
+profiler = ProfileRecorder(capacity=PROFILE_RING_SIZE, sample_rate=PROFILE_SAMPLE_RATE)
+
 # ============================================================================
 # MIDDLEWARE
 # ============================================================================
 
-async def check_rate_limit(request: Request) -> None:
+async def check_rate_limit(request: Request, cost: int = 1) -> None:
     client_id = request.client.host if request.client else "unknown"
-    if not rate_limiter.is_allowed(client_id):
+    if not rate_limiter.is_allowed(client_id, cost):
         raise HTTPException(
             status_code=429,
             detail={
@@ -280,32 +582,72 @@ async def check_rate_limit(request: Request) -> None:
             }
         )
 
+def is_admin(token: Optional[str]) -> bool:
+    """Admin access requires ADMIN_API_TOKEN; without it admin is disabled."""
+    expected = os.environ.get("ADMIN_API_TOKEN")
+    return bool(expected) and token is not None and hmac.compare_digest(token, expected)
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    if not is_admin(x_admin_token):
+        raise HTTPException(
+            status_code=403,
+            detail={
+                "error": {
+                    "code": "FORBIDDEN",
+                    "message": "Valid X-Admin-Token header required"
+                }
+            }
+        )
+
 # ============================================================================
 # LIFECYCLE
 # ============================================================================
 
+# The doctor never blocks on model loading: it answers in rule-based mode
+# until the background warm-up started in lifespan() has finished.
 nurse_agent = NurseAgent()
 triage_agent = TriageAgent()
-doctor_agent = DoctorAgent()
+doctor_agent = DoctorAgent(load_model=False)
+clinical_pipeline = build_clinical_pipeline(nurse_agent, triage_agent, doctor_agent)
+
+# "unavailable" (no GPU) and "failed" are final: the doctor keeps answering
+# in rule-based mode, so the instance is ready to take traffic, degraded.
+MODEL_READY_STATES = ("ready", "unavailable", "failed")
+MODEL_HEALTHY_STATES = ("ready", "unavailable")
+
+def model_status_detail(status: Dict[str, Any]) -> Optional[str]:
+    if status["state"] == "failed":
+        return f"Model load failed, serving in rule-based mode: {status['detail']}"
+    return status["detail"]
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup/shutdown lifecycle"""
-    global nurse_agent, triage_agent, doctor_agent
+    global nurse_agent, triage_agent, doctor_agent, clinical_pipeline
     
     logger.info("🏥 MedGemma × CompText API Starting...")
     try:
         nurse_agent = NurseAgent()
         triage_agent = TriageAgent()
-        doctor_agent = DoctorAgent()
+        doctor_agent = DoctorAgent(load_model=False)
+        clinical_pipeline = build_clinical_pipeline(nurse_agent, triage_agent, doctor_agent)
         logger.info("✓ Nurse Agent initialized")
         logger.info("✓ Triage Agent initialized")
-        logger.info("✓ Doctor Agent initialized")
+        logger.info("✓ Doctor Agent initialized (model warm-up in background)")
     except Exception as e:
         logger.error(f"Failed to initialize agents: {e}")
         raise
     
+    # Daemon thread rather than asyncio.to_thread: the executor is joined at
+    # loop shutdown, which would block until the model finished loading.
+    warmup_thread = threading.Thread(
+        target=warm_up_transformers_doctor, name="model-warmup", daemon=True
+    )
+    warmup_thread.start()
     yield
+    if warmup_thread.is_alive():
+        # The loader cannot be interrupted; it is left to die with the process.
+        logger.warning("Model warm-up still running at shutdown; abandoning the load")
     logger.info("🛑 API Shutdown")
 
 # ============================================================================
@@ -335,6 +677,273 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Stamp arrival time (for validation_ms) and open the root trace span"""
+    request.state.received_at = time.perf_counter()
+    with tracer.span("http.request", method=request.method, path=request.url.path) as span:
+        response = await call_next(request)
+        span.set_attribute("http.status_code", response.status_code)
+    return response
+
+# ============================================================================
+# RESPONSE BUILDING
+# ============================================================================
+
+# Response fields that depend only on the input text (and pipeline version /
+# doctor mode), and so can be replayed from the result cache
+CACHEABLE_FIELDS = ("compression", "triage", "diagnosis", "compression_ratio", "compressed_text")
+
+def response_metadata(request_data: ProcessRequest, doctor_mode: str) -> Dict[str, Any]:
+    return {
+        "patient_id": request_data.patient_id,
+        "document_source": request_data.document_source.value,
+        "batch_id": request_data.batch_id,
+        "user_id": request_data.request_metadata.user_id if request_data.request_metadata else None,
+        "doctor_mode": doctor_mode
+    }
+
+def token_counts(clinical_text: str, compressed_tokens: int) -> Dict[str, Any]:
+    """Length-dependent compression figures for *clinical_text* as sent"""
+    # Token count: chars/4 is standard LLM token approximation
+    original_tokens = max(len(clinical_text) // 4, 1)
+    reduction_percentage = (original_tokens - compressed_tokens) / original_tokens * 100
+    return {
+        "original_tokens": original_tokens,
+        "compressed_tokens": compressed_tokens,
+        "compression_ratio": round(1.0 - (compressed_tokens / original_tokens), 3),
+        "compression_ratio_percent": int(reduction_percentage),
+        "tokens_saved": original_tokens - compressed_tokens,
+    }
+
+def build_pipeline_response(
+    request_data: ProcessRequest,
+    run: PipelineResult,
+    request_id: str,
+    doctor_mode: str,
+    validation_time: float
+) -> Dict[str, Any]:
+    """
+    Map one pipeline run to a PipelineResponse-shaped dict
+
+    Built directly from the PatientState / TriageResult fields: no JSON
+    round-trip and no intermediate Pydantic models. Render it with
+    render_json(); PipelineResponse remains the documented schema.
+    Shared by /api/process and /api/process/batch; total time is the
+    pipeline time plus serialization (for batch items, the per-item share).
+    """
+    patient_state = run["compression"]
+    triage = run["triage"]
+    compression_time = run.timings_ms["compression"]
+    triage_time = run.timings_ms["triage"]
+    diagnosis_time = run.timings_ms["diagnosis"]
+
+    # ===== SERIALIZATION: token counting + response payload =====
+    serialization_start = time.perf_counter()
+    with tracer.span("api.serialization"):
+        compressed_json_str = patient_state.to_compressed_json()
+        # Use ultra-compact CompText notation to measure true token savings
+        counts = token_counts(
+            request_data.clinical_text, max(len(patient_state.to_comptext()) // 4, 1)
+        )
+
+        logger.info(f"[{request_id}] Compression: {counts['original_tokens']} → {counts['compressed_tokens']} tokens ({counts['compression_ratio_percent']}%)")
+        logger.info(f"[{request_id}] Triage: {triage.priority_level} - {triage.priority_name}")
+
+        vitals = patient_state.vitals
+        compression_data = {
+            "chief_complaint": patient_state.chief_complaint,
+            "vital_signs": {
+                "heart_rate": int(vitals.hr) if vitals.hr is not None else None,
+                "blood_pressure": vitals.bp,
+                "temperature": vitals.temp,
+                "respiratory_rate": None
+            },
+            "symptoms": list(patient_state.symptoms),
+            "medications": patient_state.medications,
+            "oxygen": None
+        }
+        serialization_time = (time.perf_counter() - serialization_start) * 1000
+        total_time = round(run.total_ms + serialization_time, 2)
+
+        result = {
+            "request_id": request_id,
+            "status": "success",
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "processing_stage": "complete",
+            "compression": {
+                **counts,
+                "compression_time_ms": round(compression_time, 2),
+                "compressed_data": compression_data
+            },
+            "triage": {
+                "priority_level": triage.priority_level,
+                "priority_name": triage.priority_name,
+                "confidence": 0.90,
+                "reason": TriageAgent.label(triage),
+                "escalation_indicators": [],
+                "triage_time_ms": round(triage_time, 2)
+            },
+            "diagnosis": {
+                "primary_assessment": run["diagnosis"],
+                "differential": [],
+                "recommendations": [],
+                "model_version": "MedGemma-v5",
+                "processing_time_ms": round(diagnosis_time, 2)
+            },
+            "metadata": response_metadata(request_data, doctor_mode),
+            "performance": {
+                "total_time_ms": total_time,
+                "stages": {
+                    "validation_ms": round(validation_time, 2),
+                    "compression_ms": round(compression_time, 2),
+                    "triage_ms": round(triage_time, 2),
+                    "diagnosis_ms": round(diagnosis_time, 2),
+                    "serialization_ms": round(serialization_time, 2)
+                }
+            },
+            "compression_ratio": counts["compression_ratio"],
+            "processing_time_ms": total_time,
+            "compressed_text": compressed_json_str
+        }
+
+    for stage, stage_ms in run.timings_ms.items():
+        metrics.observe(stage, stage_ms)
+    metrics.observe("total", total_time)
+    return result
+
+def build_cached_response(
+    request_data: ProcessRequest,
+    cached: Dict[str, Any],
+    request_id: str,
+    doctor_mode: str,
+    validation_time: float,
+    lookup_time: float
+) -> Dict[str, Any]:
+    """
+    Rebuild a PipelineResponse-shaped dict around cached pipeline output
+
+    Stage timings inside compression/triage/diagnosis are those of the
+    original run; performance reflects this (cached) request. The cache
+    key is the normalised text, so the length-dependent token figures are
+    recomputed for the text actually sent.
+    """
+    total_time = round(lookup_time, 2)
+    compression = {
+        **cached["compression"],
+        **token_counts(request_data.clinical_text, cached["compression"]["compressed_tokens"]),
+    }
+    return {
+        "request_id": request_id,
+        "status": "success",
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "processing_stage": "complete",
+        "compression": compression,
+        "triage": cached["triage"],
+        "diagnosis": cached["diagnosis"],
+        "metadata": response_metadata(request_data, doctor_mode),
+        "performance": {
+            "total_time_ms": total_time,
+            "stages": {
+                "validation_ms": round(validation_time, 2),
+                "cache_lookup_ms": total_time
+            }
+        },
+        "compression_ratio": compression["compression_ratio"],
+        "processing_time_ms": total_time,
+        "compressed_text": cached["compressed_text"]
+    }
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak If-None-Match comparison (RFC 9110 §13.1.2)"""
+    if not if_none_match:
+        return False
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate == "*" or candidate.removeprefix("W/") == opaque
+        for candidate in (part.strip() for part in if_none_match.split(","))
+    )
+
+def render_json(payload: Any) -> bytes:
+    """Serialise a response payload (orjson when installed, else stdlib json)"""
+    if _ORJSON_AVAILABLE:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def parse_batch_body(body: bytes) -> list:
+    """
+    Split a batch body into (payload, error) pairs
+
+    Accepts a JSON array or NDJSON (one JSON object per line). A malformed
+    NDJSON line becomes an error item; a malformed array fails the batch.
+    """
+    text = body.decode("utf-8").strip()
+    if text.startswith("["):
+        try:
+            items = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON array: {e}")
+        return [(item, None) for item in items]
+    parsed = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            parsed.append((json.loads(line), None))
+        except json.JSONDecodeError as e:
+            parsed.append((None, f"Invalid JSON: {e}"))
+    return parsed
+
+def format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'body'}: {err['msg']}"
+        for err in error.errors()
+    )
+
+def process_batch_chunk(chunk: list, batch_id: str, doctor_mode: str, validation_time: float) -> list:
+    """
+    Run one chunk of validated (index, ProcessRequest) items through the
+    batched pipeline and return NDJSON lines
+
+    If the batched run fails, items are retried one by one so a single bad
+    item only fails itself.
+    """
+    texts = [item.clinical_text for _, item in chunk]
+    with tracer.span("api.process_batch.chunk", batch_id=batch_id, items=len(chunk)):
+        try:
+            runs = clinical_pipeline.run_batch(texts)
+        except Exception as e:
+            logger.warning(f"[{batch_id}] Batched run failed ({e}); retrying items individually")
+            runs = []
+            for text in texts:
+                try:
+                    runs.append(clinical_pipeline.run(text))
+                except Exception as item_error:
+                    runs.append(item_error)
+
+        lines = []
+        for (index, item), run in zip(chunk, runs):
+            request_id = f"{batch_id}_{index}"
+            try:
+                if isinstance(run, Exception):
+                    raise run
+                payload = build_pipeline_response(item, run, request_id, doctor_mode, validation_time)
+                metrics.requests_processed += 1
+            except Exception as e:
+                metrics.errors += 1
+                logger.error(f"[{request_id}] Processing error: {str(e)}", exc_info=True)
+                payload = {
+                    "request_id": request_id,
+                    "status": "error",
+                    "error": {
+                        "code": "INTERNAL_ERROR",
+                        "message": "An unexpected error occurred during processing",
+                        "details": str(e)
+                    }
+                }
+            lines.append(render_json({"index": index, **payload}) + b"\n")
+    return lines
+
 # ============================================================================
 # ENDPOINTS
 # ============================================================================
@@ -358,17 +967,62 @@ async def health_check(request: Request) -> HealthResponse:
     """
     await check_rate_limit(request)
     
+    model_status = get_model_status()
     return HealthResponse(
-        status="healthy",
+        status="healthy" if model_status["state"] in MODEL_HEALTHY_STATES else "degraded",
         service="MedGemma × CompText API",
         version="1.0.0",
         timestamp=datetime.utcnow().isoformat() + "Z",
         uptime_seconds=metrics.get_uptime_seconds(),
         requests_processed=metrics.requests_processed,
         compression_avg_ms=metrics.get_avg_compression_time(),
-        cpu_usage_percent=15.2,  # Placeholder
-        memory_usage_mb=256.0  # Placeholder
+        cpu_usage_percent=metrics.process.cpu_percent("health"),
+        memory_usage_mb=metrics.process.memory_mb(),
+        model_state=model_status["state"],
+        model_detail=model_status_detail(model_status)
+    )
+
+@app.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    tags=["Monitoring"],
+    summary="Prometheus Metrics",
+    description="Per-stage latency histograms (p50/p95/p99), request counters and process CPU/RSS"
+)
+async def prometheus_metrics() -> PlainTextResponse:
+    """Prometheus scrape endpoint (text exposition format 0.0.4)"""
+    return PlainTextResponse(
+        metrics.render_prometheus() + render_result_cache_metrics(result_cache),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+@app.get(
+    "/ready",
+    response_model=ReadinessResponse,
+    tags=["Monitoring"],
+    summary="Readiness Check",
+    description="Report model loading progress; 503 while the model is loading",
+    responses={503: {"description": "Model still loading (rule-based mode)"}}
+)
+async def readiness_check() -> JSONResponse:
+    """
+    Readiness probe for rolling deploys
+
+    Returns 200 once the model is loaded and warmed up, or when rule-based
+    mode is final (no GPU, or the load failed; `detail` says which), 503
+    while loading. Requests to /api/process are served in rule-based mode
+    in the meantime.
+    """
+    status = get_model_status()
+    ready = status["state"] in MODEL_READY_STATES
+    body = ReadinessResponse(
+        ready=ready,
+        model_state=status["state"],
+        model_progress=status["progress"],
+        doctor_mode=doctor_agent.mode,
+        detail=model_status_detail(status),
     )
+    return JSONResponse(status_code=200 if ready else 503, content=body.model_dump())
 
 @app.post(
     "/api/process",
@@ -378,6 +1032,7 @@ async def health_check(request: Request) -> HealthResponse:
     description="Full pipeline: compression + triage + diagnosis",
     responses={
         200: {"description": "Successful processing"},
+        304: {"description": "Not modified (If-None-Match matched the ETag)"},
         400: {"description": "Validation error"},
         401: {"description": "Authentication failed"},
         429: {"description": "Rate limit exceeded"},
@@ -386,8 +1041,11 @@ async def health_check(request: Request) -> HealthResponse:
 )
 async def process_clinical_text(
     request_data: ProcessRequest,
-    request: Request
-) -> PipelineResponse:
+    request: Request,
+    x_profile: Optional[str] = Header(None),
+    x_admin_token: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None)
+) -> Response:
     """
     Process clinical text through the complete pipeline:
     1. Compression (Nurse Agent) - Extract and compress clinical data
@@ -396,7 +1054,20 @@ async def process_clinical_text(
     
     Performance: <100ms typical
     Compression: 92-95% token reduction
+
+    Identical re-submissions (after Unicode NFC / line-ending / whitespace
+    normalization) are answered from an LRU result cache (`X-Cache: HIT`).
+    Every response carries an `ETag` derived from the normalized text,
+    pipeline version and doctor mode; send it back as `If-None-Match` to
+    get `304 Not Modified` without a body.
+
+    Send `X-Profile: 1` with a valid `X-Admin-Token` (ADMIN_API_TOKEN must be
+    configured; otherwise the header is ignored) to capture a cProfile of this request; the response then carries
+    `X-Profile-Id` for /admin/profiles/{id}. Profiled requests bypass the
+    cache.
     """
+    # Body parsing + Pydantic validation happen before the handler runs
+    validation_time = (time.perf_counter() - getattr(request.state, "received_at", time.perf_counter())) * 1000
     try:
         # Rate limiting
         await check_rate_limit(request)
@@ -406,128 +1077,54 @@ async def process_clinical_text(
         
         # Generate request ID
         request_id = f"req_{int(time.time() * 1000)}"
-        total_start = time.time()
         
         logger.info(f"[{request_id}] Processing clinical text ({len(request_data.clinical_text)} chars)")
         
-        # ===== STAGE 1: COMPRESSION =====
-        compression_start = time.time()
-        patient_state = nurse_agent.intake(request_data.clinical_text)
-        compression_time = (time.time() - compression_start) * 1000
-        
-        # Token counting
-        # Token count: chars/4 is standard LLM token approximation
-        original_tokens = max(len(request_data.clinical_text) // 4, 1)
-        compressed_json_str = patient_state.to_compressed_json()
-        # Use ultra-compact CompText notation to measure true token savings
-        comptext_notation = patient_state.to_comptext()
-        compressed_tokens = max(len(comptext_notation) // 4, 1)
-        reduction_percentage = ((original_tokens - compressed_tokens) / max(original_tokens, 1) * 100)
-        
-        # Parse compressed JSON to dict for data extraction
-        compressed_json = json.loads(compressed_json_str) if isinstance(compressed_json_str, str) else compressed_json_str
-        
-        metrics.add_compression_time(compression_time)
-        logger.info(f"[{request_id}] Compression: {original_tokens} → {compressed_tokens} tokens ({reduction_percentage:.1f}%)")
-        
-        # ===== STAGE 2: TRIAGE =====
-        triage_start = time.time()
-        triage_string = triage_agent.assess(patient_state)
-        triage_time = (time.time() - triage_start) * 1000
-        # Parse triage string: "🔴 P1 - CRITICAL" -> extract priority
-        triage_parts = triage_string.split(' - ')
-        priority_with_emoji = triage_parts[0].strip()  # "🔴 P1"
-        priority_name = triage_parts[1].strip() if len(triage_parts) > 1 else "UNKNOWN"
-        priority_level = priority_with_emoji.split()[-1]  # "P1"
-        triage_result = {
-            'priority_level': priority_level,
-            'priority_name': priority_name,
-            'reason': triage_string,
-            'confidence': 0.90,
-            'escalation_indicators': [],
-            'differential': []
-        }
-        logger.info(f"[{request_id}] Triage: {priority_level} - {priority_name}")
-        
-        # ===== STAGE 3: DIAGNOSIS =====
-        diagnosis_start = time.time()
-        # Convert PatientState to dict for doctor_agent.diagnose()
-        patient_dict = patient_state.model_dump(exclude_none=True)
-        doctor_recommendation = doctor_agent.diagnose(patient_dict)
-        diagnosis_time = (time.time() - diagnosis_start) * 1000
-        
-        total_time = (time.time() - total_start) * 1000
-        
-        # Build compression data
-        compression_data = CompressionData(
-            chief_complaint=compressed_json.get('chief_complaint'),
-            vital_signs=VitalSigns(
-                heart_rate=compressed_json.get('vital_signs', {}).get('heart_rate'),
-                blood_pressure=compressed_json.get('vital_signs', {}).get('blood_pressure'),
-                temperature=compressed_json.get('vital_signs', {}).get('temperature'),
-                respiratory_rate=compressed_json.get('vital_signs', {}).get('respiratory_rate')
-            ),
-            symptoms=compressed_json.get('symptoms', []),
-            medications=compressed_json.get('medications', []),
-            oxygen=compressed_json.get('oxygen')
-        )
-        
-        # Build response
-        response = PipelineResponse(
-            request_id=request_id,
-            status="success",
-            timestamp=datetime.utcnow().isoformat() + "Z",
-            processing_stage="complete",
-            compression=CompressionResponse(
-                original_tokens=original_tokens,
-                compressed_tokens=compressed_tokens,
-                compression_ratio=round(1.0 - (compressed_tokens / original_tokens), 3),
-                compression_ratio_percent=int(reduction_percentage),
-                tokens_saved=original_tokens - compressed_tokens,
-                compression_time_ms=round(compression_time, 2),
-                compressed_data=compression_data
-            ),
-            triage=TriageResponse(
-                priority_level=triage_result['priority_level'],
-                priority_name=triage_result['priority_name'],
-                confidence=triage_result.get('confidence', 0.90),
-                reason=triage_result['reason'],
-                escalation_indicators=triage_result.get('escalation_indicators', []),
-                triage_time_ms=round(triage_time, 2)
-            ),
-            diagnosis=DiagnosisResponse(
-                primary_assessment=doctor_recommendation,
-                differential=triage_result.get('differential', []),
-                recommendations=triage_result.get('recommendations', []),
-                model_version="MedGemma-v5",
-                processing_time_ms=round(diagnosis_time, 2)
-            ),
-            metadata={
-                "patient_id": request_data.patient_id,
-                "document_source": request_data.document_source.value,
-                "batch_id": request_data.batch_id,
-                "user_id": request_data.request_metadata.user_id if request_data.request_metadata else None
-            },
-            performance=PerformanceMetrics(
-                total_time_ms=round(total_time, 2),
-                stages={
-                    "validation_ms": 2.0,
-                    "compression_ms": round(compression_time, 2),
-                    "triage_ms": round(triage_time, 2),
-                    "diagnosis_ms": round(diagnosis_time, 2),
-                    "serialization_ms": 2.0
-                }
-            ),
-            compression_ratio=round(1.0 - (compressed_tokens / original_tokens), 3),
-            processing_time_ms=round(total_time, 2),
-            compressed_text=compressed_json_str,
-        )
-        
+        doctor_mode = doctor_agent.mode
+        cache_key = ResultCache.key(request_data.clinical_text, PIPELINE_VERSION, doctor_mode)
+        headers = {"ETag": f'W/"{cache_key[:32]}"'}
+        if etag_matches(if_none_match, headers["ETag"]):
+            # Same input, pipeline version and doctor mode → same result
+            metrics.requests_processed += 1
+            logger.info(f"[{request_id}] Not modified (ETag match)")
+            return Response(status_code=304, headers=headers)
+
+        forced = (x_profile or "").lower() in ("1", "true", "yes") and is_admin(x_admin_token)
+        trigger = profiler.trigger_for(forced)
+        use_cache = result_cache.enabled and trigger is None
+
+        lookup_start = time.perf_counter()
+        cached = result_cache.get(cache_key) if use_cache else None
+        if cached is not None:
+            result = build_cached_response(
+                request_data, cached, request_id, doctor_mode, validation_time,
+                (time.perf_counter() - lookup_start) * 1000
+            )
+            metrics.observe("total", result["processing_time_ms"])
+            headers["X-Cache"] = "HIT"
+        else:
+            # ===== PIPELINE: COMPRESSION → (TRIAGE ∥ DIAGNOSIS) =====
+            capture = profiler.capture(request_id, trigger) if trigger else nullcontext({})
+            with capture as profile, tracer.span("api.process", request_id=request_id) as span:
+                span.set_attribute("validation_ms", validation_time)
+                run = clinical_pipeline.run(request_data.clinical_text, concurrent=trigger is None)
+                result = build_pipeline_response(
+                    request_data, run, request_id, doctor_mode, validation_time
+                )
+            result_cache.put(cache_key, {field: result[field] for field in CACHEABLE_FIELDS})
+            headers["X-Cache"] = "MISS" if use_cache else "BYPASS"
+            if profile.get("profile_id"):
+                headers["X-Profile-Id"] = profile["profile_id"]
+
         metrics.requests_processed += 1
-        logger.info(f"[{request_id}] Complete in {total_time:.0f}ms (Remaining: {remaining})")
+        logger.info(f"[{request_id}] Complete in {result['processing_time_ms']:.0f}ms (Remaining: {remaining})")
         
-        return response
+        # Rendered here once; returning a Response skips FastAPI's
+        # response_model re-validation and jsonable_encoder pass
+        return Response(render_json(result), media_type="application/json", headers=headers)
         
+    except HTTPException:
+        raise  # e.g. 429 from the rate limit, raised before request_id exists
     except ValueError as e:
         logger.error(f"[{request_id}] Validation error: {str(e)}")
         raise HTTPException(
@@ -555,6 +1152,108 @@ async def process_clinical_text(
             }
         )
 
+@app.post(
+    "/api/process/batch",
+    response_class=StreamingResponse,
+    tags=["Processing"],
+    summary="Process Clinical Text Batch",
+    description="Batched pipeline over a JSON array or NDJSON of ProcessRequests; streams NDJSON results",
+    responses={
+        200: {"description": "NDJSON stream, one line per item", "content": {"application/x-ndjson": {}}},
+        400: {"description": "Malformed or empty batch"},
+        413: {"description": f"More than {BATCH_MAX_ITEMS} items"},
+        429: {"description": "Rate limit exceeded"}
+    }
+)
+async def process_clinical_batch(request: Request) -> StreamingResponse:
+    """
+    Process a whole census in one request
+
+    The body is a JSON array or NDJSON (`application/x-ndjson`) of
+    ProcessRequest objects. Every item uses one request of the client's
+    rate-limit quota, as if it had been sent alone; a batch that does not
+    fit the remaining quota is rejected whole with 429. Items are run
+    through the batched compression/triage path in chunks of
+    BATCH_CHUNK_SIZE, and each result is streamed as one NDJSON line:
+
+    - success: the PipelineResponse plus `index` (position in the batch)
+    - failure: `{"index", "request_id", "status": "error", "error": {...}}`
+
+    Invalid items fail individually and are reported first.
+    """
+    received_at = getattr(request.state, "received_at", time.perf_counter())
+    await check_rate_limit(request)
+
+    batch_id = f"batch_{int(time.time() * 1000)}"
+    try:
+        raw_items = parse_batch_body(await request.body())
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(
+            status_code=400,
+            detail={"error": {"code": "VALIDATION_ERROR", "message": str(e), "request_id": batch_id}}
+        )
+    if not raw_items:
+        raise HTTPException(
+            status_code=400,
+            detail={"error": {"code": "VALIDATION_ERROR", "message": "Batch is empty", "request_id": batch_id}}
+        )
+    if len(raw_items) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail={
+                "error": {
+                    "code": "BATCH_TOO_LARGE",
+                    "message": f"Batch has {len(raw_items)} items; the limit is {BATCH_MAX_ITEMS}",
+                    "request_id": batch_id
+                }
+            }
+        )
+    if len(raw_items) > 1:
+        # the request itself was charged above; charge the other items
+        await check_rate_limit(request, cost=len(raw_items) - 1)
+
+    valid = []
+    invalid = []
+    for index, (payload, error) in enumerate(raw_items):
+        if error is None:
+            try:
+                valid.append((index, ProcessRequest.model_validate(payload)))
+                continue
+            except ValidationError as e:
+                error = format_validation_error(e)
+        invalid.append((index, error))
+    validation_time = (time.perf_counter() - received_at) * 1000 / len(raw_items)
+    doctor_mode = doctor_agent.mode
+    logger.info(f"[{batch_id}] Processing batch of {len(raw_items)} items ({len(invalid)} invalid)")
+
+    async def stream():
+        for index, message in invalid:
+            yield render_json({
+                "index": index,
+                "request_id": f"{batch_id}_{index}",
+                "status": "error",
+                "error": {"code": "VALIDATION_ERROR", "message": message}
+            }) + b"\n"
+        for start in range(0, len(valid), BATCH_CHUNK_SIZE):
+            # The request span has closed once streaming starts, so each
+            # chunk runs in a fresh context and is traced as its own root
+            lines = await asyncio.to_thread(
+                contextvars.Context().run,
+                process_batch_chunk,
+                valid[start:start + BATCH_CHUNK_SIZE],
+                batch_id,
+                doctor_mode,
+                validation_time
+            )
+            for line in lines:
+                yield line
+
+    return StreamingResponse(
+        stream(),
+        media_type="application/x-ndjson",
+        headers={"X-Batch-Id": batch_id}
+    )
+
 @app.get(
     "/api/examples",
     response_model=None,
@@ -621,6 +1320,64 @@ async def get_example_cases(request: Request) -> list:
     # Return list directly — tests access examples[0].get("clinical_text")
     return [e.model_dump() for e in examples]
 
+@app.get(
+    "/admin/profiles",
+    tags=["Admin"],
+    summary="List Request Profiles",
+    description="Slowest profiled /api/process requests with their top functions by self time",
+    dependencies=[Depends(require_admin)]
+)
+async def list_profiles() -> dict:
+    """List retained profiles, slowest first"""
+    return {
+        "capacity": profiler.capacity,
+        "sample_rate": profiler.sample_rate,
+        "profiles": [record.summary() for record in profiler.records()]
+    }
+
+@app.get(
+    "/admin/profiles/{profile_id}",
+    tags=["Admin"],
+    summary="Download Request Profile",
+    description="Export one profile as pstats (binary), a pstats text table, or speedscope JSON",
+    dependencies=[Depends(require_admin)],
+    responses={404: {"description": "Unknown or evicted profile"}}
+)
+async def get_profile(
+    profile_id: str,
+    format: str = Query("speedscope", pattern="^(pstats|text|speedscope)$")
+) -> Response:
+    """
+    Download a profile
+
+    - pstats: load with `pstats.Stats("<id>.prof")` or snakeviz
+    - text: cumulative-time table
+    - speedscope: open in https://www.speedscope.app
+    """
+    record = profiler.get(profile_id)
+    if record is None:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "error": {
+                    "code": "PROFILE_NOT_FOUND",
+                    "message": f"No retained profile with id {profile_id}"
+                }
+            }
+        )
+    if format == "pstats":
+        return Response(
+            to_pstats_bytes(record),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="{profile_id}.prof"'}
+        )
+    if format == "text":
+        return PlainTextResponse(to_pstats_text(record))
+    return JSONResponse(
+        to_speedscope(record),
+        headers={"Content-Disposition": f'attachment; filename="{profile_id}.speedscope.json"'}
+    )
+
 # ============================================================================
 # ERROR HANDLING
 # ============================================================================
@@ -660,8 +1417,12 @@ async def root():
         "openapi_schema": "/openapi.json",
         "endpoints": {
             "health": "/health",
+            "ready": "/ready",
+            "metrics": "/metrics",
             "process": "/api/process",
-            "examples": "/api/examples"
+            "process_batch": "/api/process/batch",
+            "examples": "/api/examples",
+            "profiles": "/admin/profiles"
         }
     }
 
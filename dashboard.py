@@ -17,9 +17,16 @@ import time
 from src.agents.doctor_agent import DoctorAgent
 from src.agents.nurse_agent import NurseAgent
 from src.agents.triage_agent import TriageAgent
+from src.core.pipeline import build_clinical_pipeline
 
 _enc = tiktoken.get_encoding("cl100k_base")
 
+
+@st.cache_resource
+def _clinical_pipeline():
+    """One shared Nurse → (Triage ∥ Doctor) pipeline per dashboard process."""
+    return build_clinical_pipeline(NurseAgent(), TriageAgent(), DoctorAgent())
+
 st.set_page_config(page_title="MedGemma x CompText", page_icon="🏥", layout="wide")
 
 # ---------------------------------------------------------------------------
@@ -244,8 +251,8 @@ if st.button("Compress & Analyze", type="primary") and raw_text.strip():
     # PHASE 1: INTAKE (with skeleton loader)
     # =========================================================================
     skeleton_intake = show_skeleton_loader(2, "Intake processing...")
-    nurse = NurseAgent()
-    patient_state = nurse.intake(raw_text)
+    run = _clinical_pipeline().run(raw_text)
+    patient_state = run["compression"]
     state_dict = patient_state.model_dump()
     replace_skeleton(skeleton_intake, "✅ Intake complete")
     
@@ -272,8 +279,7 @@ if st.button("Compress & Analyze", type="primary") and raw_text.strip():
     # PHASE 3: TRIAGE (with skeleton loader)
     # =========================================================================
     skeleton_triage = show_skeleton_loader(1, "Triage assessment...")
-    triage_agent = TriageAgent()
-    priority_score = triage_agent.assess(patient_state)
+    priority_score = TriageAgent.label(run["triage"])
     replace_skeleton(skeleton_triage, f"✅ Triage complete: {priority_score}")
 
     if "P1 - CRITICAL" in priority_score:
@@ -379,8 +385,7 @@ if st.button("Compress & Analyze", type="primary") and raw_text.strip():
     with col2:
         st.subheader("Doctor Agent Recommendation")
         skeleton_doctor = show_skeleton_loader(4, "Doctor analyzing...")
-        doctor = DoctorAgent()
-        recommendation = doctor.diagnose(state_dict)
+        recommendation = run["diagnosis"]
         st.code(recommendation, language="text")
         replace_skeleton(skeleton_doctor, "✅ Analysis complete")
 
@@ -14,6 +14,8 @@ from rich.table import Table
 
 from src.agents.doctor_agent import DoctorAgent
 from src.agents.nurse_agent import NurseAgent
+from src.agents.triage_agent import TriageAgent
+from src.core.pipeline import build_clinical_pipeline
 
 console = Console()
 
@@ -40,8 +42,9 @@ def main() -> None:
         console.print("[red]No input provided. Exiting.[/red]")
         return
 
-    # Step 1 — Nurse agent compresses the input
-    nurse = NurseAgent()
+    # Step 1 — Nurse agent compresses the input; triage and doctor run
+    # alongside it in the shared pipeline
+    pipeline = build_clinical_pipeline(NurseAgent(), TriageAgent(), DoctorAgent())
 
     with Progress(console=console, transient=True) as progress:
         task = progress.add_task(
@@ -51,8 +54,9 @@ def main() -> None:
             time.sleep(0.01)
             progress.advance(task)
 
-    patient_state = nurse.intake(raw_text)
-    compressed_json = json.dumps(patient_state, indent=2)
+    run = pipeline.run(raw_text)
+    patient_state = run["compression"]
+    compressed_json = json.dumps(patient_state.model_dump(exclude_none=True), indent=2)
 
     # Step 2 — Token comparison table
     raw_tokens = _estimate_tokens(raw_text)
@@ -74,12 +78,13 @@ def main() -> None:
         Panel(compressed_json, title="Compressed Patient State", border_style="green")
     )
 
-    # Step 4 — Doctor agent diagnosis
-    doctor = DoctorAgent()
-    recommendation = doctor.diagnose(patient_state)
+    # Step 4 — Triage priority and doctor agent diagnosis
+    console.print(f"[bold]Triage:[/bold] {TriageAgent.label(run['triage'])}")
     console.print(
-        Panel(recommendation, title="Doctor Agent Response", border_style="blue")
+        Panel(run["diagnosis"], title="Doctor Agent Response", border_style="blue")
     )
+    timings = ", ".join(f"{name} {ms:.2f} ms" for name, ms in run.timings_ms.items())
+    console.print(f"[dim]Stage timings: {timings}[/dim]")
 
 
 if __name__ == "__main__":
@@ -3,7 +3,10 @@
 from __future__ import annotations
 
 import logging
-from typing import Any
+import threading
+from typing import Any, Sequence
+
+from src.core.image_cache import ImageTensorCache
 
 logger = logging.getLogger(__name__)
 
@@ -19,26 +22,86 @@ except ImportError:
 # ---------------------------------------------------------------------------
 
 _transformers_doctor_instance: TransformersDoctor | None = None
+_load_lock = threading.Lock()
+
+# Loading progress of the singleton, reported by ``/ready``.  ``state`` is one
+# of: idle, loading, warming_up, ready, unavailable (no GPU), failed.
+_model_status: dict[str, Any] = {"state": "idle", "progress": 0.0, "detail": None}
+
+
+def _set_model_status(state: str, progress: float, detail: str | None = None) -> None:
+    _model_status.update(state=state, progress=progress, detail=detail)
+
+
+def get_model_status() -> dict[str, Any]:
+    """Return a snapshot of the model loading status."""
+    return dict(_model_status)
 
 
-def get_transformers_doctor() -> TransformersDoctor | None:
-    """Return a singleton TransformersDoctor if a GPU is available, else None."""
+def get_transformers_doctor(wait: bool = True) -> TransformersDoctor | None:
+    """Return a singleton TransformersDoctor if a GPU is available, else None.
+
+    Args:
+        wait: When ``False``, never load (or wait for) the model — return the
+              instance only if it is already loaded, otherwise ``None``.
+    """
     global _transformers_doctor_instance
-    if _transformers_doctor_instance is not None:
+    if _transformers_doctor_instance is not None or not wait:
         return _transformers_doctor_instance
 
     if not _TORCH_AVAILABLE or not torch.cuda.is_available():
+        _set_model_status("unavailable", 1.0, "No GPU or ML libraries missing")
         return None
 
-    _transformers_doctor_instance = TransformersDoctor()
+    with _load_lock:
+        if _transformers_doctor_instance is None:
+            _set_model_status("loading", 0.1)
+            try:
+                _transformers_doctor_instance = TransformersDoctor()
+            except Exception as exc:
+                _set_model_status("failed", 0.0, str(exc))
+                raise
+            _set_model_status("ready", 1.0)
     return _transformers_doctor_instance
 
 
+def warm_up_transformers_doctor() -> TransformersDoctor | None:
+    """Load the singleton and run one warm-up generation.
+
+    Blocking; intended to run in a worker thread during API startup while
+    requests are served by the rule-based fallback.  Failures are recorded
+    in the model status instead of being raised.
+    """
+    global _transformers_doctor_instance
+    if not _TORCH_AVAILABLE or not torch.cuda.is_available():
+        _set_model_status("unavailable", 1.0, "No GPU or ML libraries missing")
+        return None
+
+    with _load_lock:
+        if _transformers_doctor_instance is not None:
+            return _transformers_doctor_instance
+        try:
+            _set_model_status("loading", 0.1)
+            doctor = TransformersDoctor()
+            _set_model_status("warming_up", 0.8)
+            doctor.warm_up()
+        except Exception as exc:
+            logger.error("Model warm-up failed: %s", exc, exc_info=True)
+            _set_model_status("failed", 0.0, str(exc))
+            return None
+        _transformers_doctor_instance = doctor
+        _set_model_status("ready", 1.0)
+    logger.info("%s ready", TransformersDoctor.MODEL_ID)
+    return doctor
+
+
 class TransformersDoctor:
     """Real AI doctor using google/paligemma-3b-pt-224 (multimodal).
 
     Only instantiated when ``torch.cuda.is_available()`` is True.
     Uses 4-bit quantisation via *bitsandbytes* when the library is present.
+    Preprocessed images are cached by content hash (``image_cache``), so
+    re-querying a study with new symptom text skips decode and resize.
     """
 
     MODEL_ID = "google/paligemma-3b-pt-224"
@@ -67,6 +130,17 @@ class TransformersDoctor:
             quantization_config=quantization_config,
             device_map="auto",
         )
+        self.image_cache = ImageTensorCache()
+
+    def warm_up(self) -> None:
+        """Run a one-token generation so CUDA kernels and caches are
+        initialised before the first real request."""
+        inputs = self.processor(
+            text="Patient presents with chest pain.",
+            return_tensors="pt",
+        ).to(self.model.device)
+        with torch.inference_mode():
+            self.model.generate(**inputs, max_new_tokens=1)
 
     def diagnose(
         self, context_text: str, image_path: str | None = None
@@ -80,15 +154,13 @@ class TransformersDoctor:
         Returns:
             Generated text from the model.
         """
-        from PIL import Image
-
-        image = None
         if image_path:
-            image = Image.open(image_path).convert("RGB")
+            return self.generate_batch(
+                [context_text], [self.prepare_image(image_path)]
+            )[0]
 
         inputs = self.processor(
             text=context_text,
-            images=image,
             return_tensors="pt",
         ).to(self.model.device)
 
@@ -97,6 +169,61 @@ class TransformersDoctor:
 
         return self.processor.decode(output_ids[0], skip_special_tokens=True)
 
+    def diagnose_batch(
+        self,
+        context_texts: Sequence[str],
+        image_paths: Sequence[str],
+        max_workers: int = 4,
+    ) -> list[str]:
+        """Run batched inference over (prompt, image) pairs.
+
+        All images are preprocessed in a thread pool first, then the whole
+        batch goes through a single ``generate`` call.
+        """
+        pixel_values = self.prepare_images(image_paths, max_workers=max_workers)
+        return self.generate_batch(context_texts, pixel_values)
+
+    def prepare_image(self, image_path: str) -> Any:
+        """Return the preprocessed pixel array for *image_path* (cached)."""
+        return self.image_cache.get_or_compute(image_path, self._preprocess_image)
+
+    def prepare_images(
+        self, image_paths: Sequence[str], max_workers: int = 4
+    ) -> list[Any]:
+        """Preprocess many images concurrently (cached), preserving order."""
+        return self.image_cache.preprocess_many(
+            image_paths, self._preprocess_image, max_workers=max_workers
+        )
+
+    def generate_batch(
+        self, context_texts: Sequence[str], pixel_values: Sequence[Any]
+    ) -> list[str]:
+        """Generate from already-preprocessed images.
+
+        The cached arrays are resized and normalised already, so the
+        processor is told to skip those steps and only tokenise the text.
+        """
+        inputs = self.processor(
+            text=list(context_texts),
+            images=list(pixel_values),
+            do_resize=False,
+            do_rescale=False,
+            do_normalize=False,
+            do_convert_rgb=False,
+            padding=True,
+            return_tensors="pt",
+        ).to(self.model.device)
+
+        with torch.inference_mode():
+            output_ids = self.model.generate(**inputs, max_new_tokens=256)
+
+        return self.processor.batch_decode(output_ids, skip_special_tokens=True)
+
+    def _preprocess_image(self, image: Any) -> Any:
+        return self.processor.image_processor(image, return_tensors="np")[
+            "pixel_values"
+        ][0]
+
 
 # ---------------------------------------------------------------------------
 # Mock / Edge Doctor (CPU fallback)
@@ -110,16 +237,31 @@ class DoctorAgent:
     When a GPU is available and ML dependencies are installed the agent
     delegates to ``TransformersDoctor``; otherwise it falls back to
     deterministic rule-based logic (Edge Simulation Mode).
+
+    With ``load_model=False`` the agent never blocks on model loading: it
+    serves the rule-based fallback until a background
+    ``warm_up_transformers_doctor()`` call has finished, then switches over.
     """
 
-    def __init__(self) -> None:
-        self._ai_doctor = get_transformers_doctor()
-        if self._ai_doctor is None:
+    def __init__(self, load_model: bool = True) -> None:
+        self._load_model = load_model
+        self._ai_doctor = get_transformers_doctor(wait=load_model)
+        if self._ai_doctor is None and load_model:
             logger.warning(
                 "Running in Edge Simulation Mode – no GPU detected or ML "
                 "libraries missing.  Using rule-based fallback."
             )
 
+    @property
+    def mode(self) -> str:
+        """``"model"`` when backed by TransformersDoctor, else ``"rule_based"``."""
+        return "model" if self._resolve_ai_doctor() is not None else "rule_based"
+
+    def _resolve_ai_doctor(self) -> TransformersDoctor | None:
+        if self._ai_doctor is None and not self._load_model:
+            self._ai_doctor = get_transformers_doctor(wait=False)
+        return self._ai_doctor
+
     def diagnose(self, state: dict) -> str:
         """Generate a medical recommendation from a compressed state.
 
@@ -130,9 +272,10 @@ class DoctorAgent:
             A string containing the clinical recommendation.
         """
         # --- AI path (GPU) ---
-        if self._ai_doctor is not None:
+        ai_doctor = self._resolve_ai_doctor()
+        if ai_doctor is not None:
             context = self._build_prompt(state)
-            return self._ai_doctor.diagnose(context)
+            return ai_doctor.diagnose(context)
 
         # --- Fallback mock path (CPU / Edge) ---
         return self._mock_diagnose(state)
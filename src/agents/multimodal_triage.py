@@ -6,12 +6,33 @@ twice in GPU-constrained environments.
 
 from __future__ import annotations
 
+import csv
+import json
 import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Iterator, Sequence
 
 from src.agents.doctor_agent import get_transformers_doctor
+from src.core.image_cache import ImageTensorCache
 
 logger = logging.getLogger(__name__)
 
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+
+_END = object()  # end-of-stream sentinel passed between pipeline stages
+
+
+def _build_prompt(symptoms: str) -> str:
+    return (
+        f"Analyze this medical image. Patient symptoms: {symptoms}. "
+        "Provide observations and a preliminary assessment."
+    )
+
 
 def analyze_xray(image_path: str, symptoms: str) -> str:
     """Analyze a medical image alongside symptom text.
@@ -36,8 +57,256 @@ def analyze_xray(image_path: str, symptoms: str) -> str:
             f"Image: {image_path}. Manual review required."
         )
 
-    prompt = (
-        f"Analyze this medical image. Patient symptoms: {symptoms}. "
-        "Provide observations and a preliminary assessment."
+    return doctor.diagnose(_build_prompt(symptoms), image_path=image_path)
+
+
+# ---------------------------------------------------------------------------
+# Batch processing (overnight backlog)
+# ---------------------------------------------------------------------------
+
+
+class EdgeStubBackend:
+    """CPU stand-in for TransformersDoctor used when no GPU is available.
+
+    Reads and content-hashes each image through the same cache as the real
+    backend (no Pillow needed) and returns the Edge Simulation message.
+    """
+
+    def __init__(self) -> None:
+        self.image_cache = ImageTensorCache(decoder=lambda stream: stream.read())
+
+    def prepare_image(self, image_path: str) -> Any:
+        return self.image_cache.get_or_compute(image_path, len)
+
+    def generate_batch(
+        self, context_texts: Sequence[str], pixel_values: Sequence[Any]
+    ) -> list[str]:
+        return [
+            "[Edge Simulation] Multimodal analysis not available (no GPU). "
+            "Manual review required."
+            for _ in context_texts
+        ]
+
+
+@dataclass
+class XrayBatchReport:
+    """Summary of an ``analyze_xray_batch`` run."""
+
+    processed: int
+    failed: int
+    skipped: int
+    elapsed_s: float
+
+    @property
+    def images_per_sec(self) -> float:
+        """Throughput over the images handled in this run."""
+        done = self.processed + self.failed
+        return done / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+
+def iter_xray_manifest(
+    source: str, default_symptoms: str = ""
+) -> Iterator[dict[str, str]]:
+    """Yield ``{"image_path", "symptoms"}`` items from *source*.
+
+    *source* is a directory (walked recursively for image files, each using
+    *default_symptoms*) or a CSV / JSONL manifest with ``image_path`` and
+    ``symptoms`` columns. Relative manifest paths resolve against the
+    manifest's directory.
+    """
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    yield {
+                        "image_path": os.path.join(root, name),
+                        "symptoms": default_symptoms,
+                    }
+        return
+
+    base = os.path.dirname(os.path.abspath(source))
+    with open(source, newline="", encoding="utf-8") as fh:
+        if source.lower().endswith(".csv"):
+            rows: Iterator[dict[str, Any]] = csv.DictReader(fh)
+        elif source.lower().endswith((".jsonl", ".ndjson")):
+            rows = (json.loads(line) for line in fh if line.strip())
+        else:
+            raise ValueError(
+                f"Unsupported manifest {source!r}: expected a directory, "
+                ".csv or .jsonl file."
+            )
+        for row in rows:
+            yield {
+                "image_path": os.path.join(base, row["image_path"]),
+                "symptoms": row.get("symptoms") or default_symptoms,
+            }
+
+
+def _load_checkpoint(output_path: str) -> set[str]:
+    """Return image paths already analysed successfully in *output_path*."""
+    done: set[str] = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn last line from an interrupted run
+            if record.get("status") == "ok":
+                done.add(record["image_path"])
+    return done
+
+
+def _ends_with_newline(path: str) -> bool:
+    with open(path, "rb") as fh:
+        fh.seek(-1, os.SEEK_END)
+        return fh.read(1) == b"\n"
+
+
+def analyze_xray_batch(
+    source: str,
+    output_path: str,
+    *,
+    batch_size: int = 8,
+    decode_workers: int = 4,
+    queue_size: int = 32,
+    default_symptoms: str = "",
+    backend: Any = None,
+) -> XrayBatchReport:
+    """Analyze a directory or manifest of images, writing JSONL results.
+
+    Stages run concurrently with bounded queues between them, so memory
+    stays flat however large the backlog is:
+
+    1. decode + preprocess — a thread pool feeding the image cache,
+    2. batched inference — one ``generate_batch`` call per *batch_size*,
+    3. result writing — one JSON line per image, flushed per batch.
+
+    *output_path* doubles as the checkpoint: a rerun skips images already
+    recorded with ``"status": "ok"`` and retries failed ones.
+
+    Args:
+        source: Image directory, or CSV/JSONL manifest (see
+            :func:`iter_xray_manifest`).
+        output_path: JSONL file to append results to.
+        batch_size: Images per inference call.
+        decode_workers: Threads used for decode/preprocess.
+        queue_size: Bound of each inter-stage queue.
+        default_symptoms: Symptom text for items without their own.
+        backend: Object with ``prepare_image`` / ``generate_batch``;
+            defaults to the GPU TransformersDoctor or ``EdgeStubBackend``.
+
+    Returns:
+        An :class:`XrayBatchReport` with counts and throughput.
+
+    Raises:
+        ValueError: If *source* is not a directory or supported manifest.
+        OSError: If the manifest cannot be read.
+        KeyError: If a manifest row has no ``image_path``.
+
+        Items read before a manifest error are still analysed and written.
+    """
+    if backend is None:
+        backend = get_transformers_doctor() or EdgeStubBackend()
+
+    done = _load_checkpoint(output_path)
+    skipped = 0
+    prepared_q: queue.Queue = queue.Queue(maxsize=queue_size)
+    results_q: queue.Queue = queue.Queue(maxsize=queue_size)
+    start = time.perf_counter()
+    manifest_error: list[Exception] = []
+
+    def produce(pool: ThreadPoolExecutor) -> None:
+        nonlocal skipped
+        try:
+            for item in iter_xray_manifest(source, default_symptoms):
+                if item["image_path"] in done:
+                    skipped += 1
+                    continue
+                future = pool.submit(backend.prepare_image, item["image_path"])
+                prepared_q.put((item, future))  # blocks when inference lags
+        except Exception as exc:
+            # re-raised by the caller once the items read so far are written
+            manifest_error.append(exc)
+        finally:
+            prepared_q.put(_END)
+
+    def infer() -> None:
+        batch: list[tuple[dict[str, str], Any]] = []
+
+        def flush() -> None:
+            try:
+                analyses = backend.generate_batch(
+                    [_build_prompt(item["symptoms"]) for item, _ in batch],
+                    [pixels for _, pixels in batch],
+                )
+                for (item, _), analysis in zip(batch, analyses):
+                    results_q.put({**item, "status": "ok", "analysis": analysis})
+            except Exception as exc:
+                logger.error("Batch inference failed: %s", exc, exc_info=True)
+                for item, _ in batch:
+                    results_q.put({**item, "status": "error", "error": str(exc)})
+            batch.clear()
+
+        try:
+            while True:
+                entry = prepared_q.get()
+                if entry is _END:
+                    break
+                item, future = entry
+                try:
+                    batch.append((item, future.result()))
+                except Exception as exc:
+                    results_q.put({**item, "status": "error", "error": str(exc)})
+                    continue
+                if len(batch) >= batch_size:
+                    flush()
+            if batch:
+                flush()
+        finally:
+            results_q.put(_END)
+
+    processed = failed = 0
+    with ThreadPoolExecutor(max_workers=decode_workers) as pool:
+        producer = threading.Thread(target=produce, args=(pool,), daemon=True)
+        inferrer = threading.Thread(target=infer, daemon=True)
+        producer.start()
+        inferrer.start()
+
+        with open(output_path, "a", encoding="utf-8") as out:
+            if out.tell() > 0 and not _ends_with_newline(output_path):
+                out.write("\n")  # terminate a torn line before appending
+            while True:
+                record = results_q.get()
+                if record is _END:
+                    break
+                out.write(json.dumps(record) + "\n")
+                if record["status"] == "ok":
+                    processed += 1
+                else:
+                    failed += 1
+                if results_q.empty():
+                    out.flush()
+
+        producer.join()
+        inferrer.join()
+
+    if manifest_error:
+        raise manifest_error[0]
+
+    report = XrayBatchReport(
+        processed=processed,
+        failed=failed,
+        skipped=skipped,
+        elapsed_s=time.perf_counter() - start,
+    )
+    logger.info(
+        "X-ray batch: %d processed, %d failed, %d skipped (%.1f images/sec)",
+        report.processed,
+        report.failed,
+        report.skipped,
+        report.images_per_sec,
     )
-    return doctor.diagnose(prompt, image_path=image_path)
+    return report
@@ -21,3 +21,15 @@ class NurseAgent:
             A compressed PatientState Pydantic model.
         """
         return self._protocol.compress(raw_text)
+
+    def intake_batch(self, raw_texts: list[str]) -> list[PatientState]:
+        """Compress several patient inputs in one call (e.g. a ward census).
+
+        Args:
+            raw_texts: Free-form texts, one per patient.
+
+        Returns:
+            One PatientState per input, in order.
+        """
+        compress = self._protocol.compress
+        return [compress(text) for text in raw_texts]
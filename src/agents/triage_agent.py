@@ -113,9 +113,18 @@ class TriageAgent:
 
         return TriageResult("P3", "STANDARD", "All vitals within normal limits")
 
+    def triage_batch(self, patient_states: list[PatientState]) -> list[TriageResult]:
+        """Triage several patients in one call, preserving order."""
+        triage = self.triage
+        return [triage(state) for state in patient_states]
+
     def assess(self, patient_state: PatientState) -> str:
         """Legacy string interface — backward compatible with existing tests."""
-        result = self.triage(patient_state)
+        return self.label(self.triage(patient_state))
+
+    @staticmethod
+    def label(result: TriageResult) -> str:
+        """Format *result* as the legacy ``"🔴 P1 - CRITICAL"`` string."""
         icons = {"P1": "\U0001f534", "P2": "\U0001f7e1", "P3": "\U0001f7e2"}
         icon = icons.get(result.priority_level, "\U0001f7e2")
         return f"{icon} {result.priority_level} - {result.priority_name}"
@@ -0,0 +1,201 @@
+"""Boilerplate - Corpus-wide sentence dictionary for KVTC middle compression.
+
+Notes across records repeat the same consent paragraphs, billing
+disclaimers and template headers. :class:`BoilerplateBuilder` streams a
+corpus once and counts, per sentence fingerprint, how many records contain
+it; :meth:`BoilerplateBuilder.write` stores the frequent ones as an
+open-addressing hash table that :class:`BoilerplateDictionary` memory-maps,
+so a lookup is one hash and (almost always) one probe, however large the
+corpus was.
+
+Sentences are keyed exactly as ``MedicalKVTCStrategy`` keys its middle:
+NFC, whitespace collapsed, casefolded, split after ``.``, ``!`` or ``?``.
+
+File layout (little-endian): a 40-byte header (magic ``CTBP``, format
+version, table capacity, entry count, records seen, minimum count) and
+``capacity`` 16-byte slots of ``(fingerprint u64, count u32, padding)``.
+Fingerprint 0 marks an empty slot.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import re
+import struct
+from typing import IO, Iterable, Iterator
+
+from src.core.text import NormalizedText
+
+MAGIC = b"CTBP"
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<4sB3xQQQI4x")
+_SLOT = struct.Struct("<QI4x")
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?]) ")
+
+
+class BoilerplateError(ValueError):
+    """Raised for a malformed boilerplate dictionary file."""
+
+
+def fingerprint(key: str) -> int:
+    """Non-zero 64-bit fingerprint of a sentence key."""
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1
+
+
+def sentence_keys(text: str | NormalizedText) -> Iterator[str]:
+    """The sentence keys of *text*, split the way KVTC splits its middle."""
+    for key in _SENTENCE_BREAK.split(NormalizedText.of(text).collapsed_folded):
+        if key:
+            yield key
+
+
+# ---------------------------------------------------------------------------
+# building
+# ---------------------------------------------------------------------------
+
+
+class BoilerplateBuilder:
+    """Counts, in one streaming pass, how many records contain each sentence.
+
+    Args:
+        max_entries: Bound on the fingerprints held in memory. Past it, the
+            rarest are discarded (lossy counting): a rare sentence may be
+            undercounted, frequent boilerplate is not lost.
+    """
+
+    def __init__(self, max_entries: int = 10_000_000) -> None:
+        self.max_entries = max_entries
+        self.counts: dict[int, int] = {}
+        self.records = 0
+
+    def add(self, text: str | NormalizedText) -> None:
+        """Count the distinct sentences of one record."""
+        counts = self.counts
+        for fp in {fingerprint(key) for key in sentence_keys(text)}:
+            counts[fp] = counts.get(fp, 0) + 1
+        self.records += 1
+        if len(counts) > self.max_entries:
+            self._prune()
+
+    def add_all(self, texts: Iterable[str | NormalizedText]) -> BoilerplateBuilder:
+        """Count every record of *texts* (any iterable, consumed lazily)."""
+        for text in texts:
+            self.add(text)
+        return self
+
+    def _prune(self) -> None:
+        floor = 1
+        while len(self.counts) > self.max_entries // 2:
+            self.counts = {fp: n for fp, n in self.counts.items() if n > floor}
+            floor += 1
+
+    def to_bytes(self, min_count: int = 2) -> bytes:
+        """The dictionary of sentences found in at least *min_count* records."""
+        entries = [(fp, n) for fp, n in self.counts.items() if n >= min_count]
+        capacity = 8
+        while capacity < 2 * len(entries):
+            capacity *= 2
+        mask = capacity - 1
+        out = bytearray(_HEADER.size + capacity * _SLOT.size)
+        _HEADER.pack_into(
+            out, 0, MAGIC, FORMAT_VERSION, capacity, len(entries), self.records, min_count
+        )
+        occupied = bytearray(capacity)
+        for fp, n in entries:
+            index = fp & mask
+            while occupied[index]:
+                index = (index + 1) & mask
+            occupied[index] = 1
+            _SLOT.pack_into(out, _HEADER.size + index * _SLOT.size, fp, min(n, 0xFFFFFFFF))
+        return bytes(out)
+
+    def write(self, path: str, min_count: int = 2) -> int:
+        """Write the dictionary to *path*; return the number of entries."""
+        data = self.to_bytes(min_count)
+        with open(path, "wb") as handle:
+            handle.write(data)
+        return _HEADER.unpack_from(data)[3]
+
+
+# ---------------------------------------------------------------------------
+# lookup
+# ---------------------------------------------------------------------------
+
+
+class BoilerplateDictionary:
+    """Read-only sentence-frequency table over a built dictionary.
+
+    Construct from bytes, or memory-map a file with :meth:`open`.
+    """
+
+    def __init__(self, buffer: bytes | mmap.mmap) -> None:
+        if len(buffer) < _HEADER.size:
+            raise BoilerplateError("not a boilerplate dictionary")
+        magic, version, capacity, entries, records, min_count = _HEADER.unpack_from(buffer)
+        if magic != MAGIC:
+            raise BoilerplateError("not a boilerplate dictionary")
+        if version != FORMAT_VERSION:
+            raise BoilerplateError(f"unsupported format version {version}")
+        if capacity & (capacity - 1) or len(buffer) != _HEADER.size + capacity * _SLOT.size:
+            raise BoilerplateError("truncated or corrupt boilerplate dictionary")
+        self._buffer = buffer
+        self._mask = capacity - 1
+        self._file: IO[bytes] | None = None
+        self.entries = entries
+        self.records = records
+        self.min_count = min_count
+
+    @classmethod
+    def open(cls, path: str) -> BoilerplateDictionary:
+        """Memory-map the dictionary at *path*."""
+        handle = open(path, "rb")
+        try:
+            if os.fstat(handle.fileno()).st_size < _HEADER.size:
+                raise BoilerplateError("not a boilerplate dictionary")
+            buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            dictionary = cls(buffer)
+        except Exception:
+            handle.close()
+            raise
+        dictionary._file = handle
+        return dictionary
+
+    def close(self) -> None:
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self) -> BoilerplateDictionary:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.entries
+
+    def count(self, key: str | int) -> int:
+        """Number of records containing the sentence *key* (or fingerprint)."""
+        fp = key if isinstance(key, int) else fingerprint(key)
+        index = fp & self._mask
+        for _ in range(self._mask + 1):
+            slot_fp, n = _SLOT.unpack_from(self._buffer, _HEADER.size + index * _SLOT.size)
+            if slot_fp == fp:
+                return n
+            if slot_fp == 0:
+                return 0
+            index = (index + 1) & self._mask
+        return 0
+
+    def __contains__(self, key: str | int) -> bool:
+        return self.count(key) > 0
+
+    @staticmethod
+    def reference(key: str) -> str:
+        """Short stand-in for a boilerplate sentence."""
+        return f"[bp:{fingerprint(key) >> 32:08x}]"
@@ -1,8 +1,12 @@
-"""Cache Manager - Hash-based caching for CompText middle-section compression."""
+"""Cache Manager - Hash-based caching for CompText compression and results."""
 
 from __future__ import annotations
 
 import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any
 
 
 class CompTextCache:
@@ -37,3 +41,79 @@ class CompTextCache:
     def clear(self) -> None:
         """Remove all cached entries."""
         self._store.clear()
+
+
+def normalize_clinical_text(text: str) -> str:
+    """Canonical form used for content addressing: Unicode NFC, ``\\n``
+    line endings, no leading/trailing whitespace."""
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return unicodedata.normalize("NFC", text).strip()
+
+
+class ResultCache:
+    """Bounded LRU cache of pipeline results, safe to share across threads.
+
+    Keys are content addresses built by :meth:`key` from the normalised
+    input and anything else the result depends on (pipeline version,
+    model mode), so identical re-submissions map to the same entry.
+    """
+
+    def __init__(self, max_entries: int = 1024) -> None:
+        self.max_entries = max_entries
+        self._store: OrderedDict[str, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(text: str, *parts: str) -> str:
+        """SHA-256 over the normalised *text* and each of *parts*."""
+        digest = hashlib.sha256()
+        for part in (normalize_clinical_text(text), *parts):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, key: str) -> Any | None:
+        """Return the entry for *key* (marking it recently used), or ``None``."""
+        with self._lock:
+            value = self._store.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._store.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: Any) -> None:
+        """Store *value*, evicting the least recently used entry if full."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._store[key] = value
+            self._store.move_to_end(key)
+            while len(self._store) > self.max_entries:
+                self._store.popitem(last=False)
+                self.evictions += 1
+
+    @property
+    def size(self) -> int:
+        return len(self._store)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": self.size,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._store.clear()
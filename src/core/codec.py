@@ -0,0 +1,427 @@
+"""Codec - Compact, schema-versioned binary encoding of ``PatientState``.
+
+A record is a 4-byte header (magic, schema version, flags) followed by a
+sequence of ``(field id, value)`` pairs for the fields that are set:
+
+- vitals are varints: heart rate and temperature as zigzag tenths (with a
+  float64 escape for values that are not exact tenths), blood pressure as
+  systolic/diastolic varint pairs;
+- strings are either a reference into :data:`STRING_TABLE` (protocol
+  labels, symptom keywords, meta/specialist keys) or length-prefixed UTF-8;
+- ``meta``/``specialist_data`` values use a small MessagePack-like tagged
+  encoding.
+
+Single records are typically ~3x smaller than ``to_compressed_json()``.
+:func:`encode_block` packs many records into one frame with optional zlib
+(or zstd, when ``zstandard`` is installed) compression, which is where
+block compression pays off. Decoding ``encode(state)`` reproduces
+``state.to_compressed_dict()`` exactly.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import struct
+import zlib
+from typing import Any, Iterable
+
+from src.core.models import PatientState
+
+try:
+    import zstandard
+
+    _ZSTD_AVAILABLE = True
+except ImportError:
+    _ZSTD_AVAILABLE = False
+
+MAGIC = b"\xc7T"
+SCHEMA_VERSION = 1
+
+# Header flags: low nibble is the compression id, bit 4 marks a block.
+_COMPRESSION_IDS = {None: 0, "zlib": 1, "zstd": 2}
+_COMPRESSION_NAMES = {v: k for k, v in _COMPRESSION_IDS.items()}
+_FLAG_BLOCK = 0x10
+
+# Field ids (schema version 1). Never reuse or renumber an id; add new
+# fields with new ids and bump SCHEMA_VERSION.
+_F_CHIEF_COMPLAINT = 1
+_F_HR = 2
+_F_BP = 3
+_F_BP_TEXT = 4
+_F_TEMP = 5
+_F_MEDICATION = 6
+_F_SYMPTOM = 7
+_F_META = 8
+_F_SPECIALIST = 9
+
+# Value tags for meta/specialist_data entries.
+_T_TEXT = 0
+_T_INT = 1
+_T_FLOAT = 2
+_T_TRUE = 3
+_T_FALSE = 4
+_T_NULL = 5
+_T_LIST = 6
+_T_MAP = 7
+
+# Dictionary of frequent strings, referenced by index. Append-only: the
+# index of an existing entry is part of the on-disk format.
+STRING_TABLE: tuple[str, ...] = (
+    # protocol labels
+    "General",
+    "\U0001fac0 Cardiology Protocol",
+    "\U0001fab7 Respiratory Protocol",
+    "\U0001f9e0 Neurology Protocol",
+    "\U0001f691 Trauma Protocol",
+    # symptom keywords
+    "pain", "nausea", "vomiting", "fatigue", "fever", "headache", "dyspnea",
+    "shortness of breath", "chest pain", "dizziness", "weakness", "syncope",
+    "palpitations", "swelling", "cough", "confusion", "anxiety", "depression",
+    "insomnia", "rash", "bleeding", "diarrhea", "constipation",
+    # meta and specialist_data keys
+    "active_protocol", "diagnosis", "allergies", "radiation", "pain_quality",
+    "triggers", "breath_sounds", "symptoms_side", "time_last_known_well",
+    "mechanism_of_injury", "visible_injury",
+)
+_STRING_INDEX = {s: i for i, s in enumerate(STRING_TABLE)}
+
+_BP_PATTERN = re.compile(r"([1-9]\d{0,2})/([1-9]\d{0,2})")
+_F64 = struct.Struct("<d")
+
+
+class CodecError(ValueError):
+    """Raised for payloads that are not valid encoded records."""
+
+
+# ---------------------------------------------------------------------------
+# Primitive writers / readers
+# ---------------------------------------------------------------------------
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _zigzag(value: int) -> int:
+    return (value << 1) if value >= 0 else ((-value << 1) - 1)
+
+
+def _write_text(out: bytearray, text: str) -> None:
+    # low bit 1: dictionary reference; low bit 0: inline UTF-8 of that length
+    index = _STRING_INDEX.get(text)
+    if index is not None:
+        _write_varint(out, (index << 1) | 1)
+        return
+    data = text.encode("utf-8")
+    _write_varint(out, len(data) << 1)
+    out += data
+
+
+def _write_number(out: bytearray, value: float) -> None:
+    # even varint: zigzag tenths; 1: float64 follows
+    if math.isfinite(value) and round(value * 10) / 10 == value:
+        tenths = round(value * 10)
+        _write_varint(out, _zigzag(tenths) << 1)
+    else:
+        _write_varint(out, 1)
+        out += _F64.pack(value)
+
+
+def _write_value(out: bytearray, value: Any) -> None:
+    if isinstance(value, str):
+        out.append(_T_TEXT)
+        _write_text(out, value)
+    elif value is True:
+        out.append(_T_TRUE)
+    elif value is False:
+        out.append(_T_FALSE)
+    elif value is None:
+        out.append(_T_NULL)
+    elif isinstance(value, int):
+        out.append(_T_INT)
+        _write_varint(out, _zigzag(value))
+    elif isinstance(value, float):
+        out.append(_T_FLOAT)
+        out += _F64.pack(value)
+    elif isinstance(value, (list, tuple)):
+        out.append(_T_LIST)
+        _write_varint(out, len(value))
+        for item in value:
+            _write_value(out, item)
+    elif isinstance(value, dict):
+        out.append(_T_MAP)
+        _write_varint(out, len(value))
+        for key, item in value.items():
+            _write_text(out, str(key))
+            _write_value(out, item)
+    else:
+        raise TypeError(f"cannot encode value of type {type(value).__name__}")
+
+
+class _Reader:
+    __slots__ = ("data", "pos")
+
+    def __init__(self, data: bytes, pos: int = 0) -> None:
+        self.data = data
+        self.pos = pos
+
+    def varint(self) -> int:
+        data = self.data
+        result = shift = 0
+        while True:
+            try:
+                byte = data[self.pos]
+            except IndexError:
+                raise CodecError("truncated varint") from None
+            self.pos += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    def zigzag(self) -> int:
+        value = self.varint()
+        return (value >> 1) ^ -(value & 1)
+
+    def take(self, n: int) -> bytes:
+        end = self.pos + n
+        if end > len(self.data):
+            raise CodecError("truncated record")
+        chunk = self.data[self.pos:end]
+        self.pos = end
+        return chunk
+
+    def text(self) -> str:
+        n = self.varint()
+        if n & 1:
+            try:
+                return STRING_TABLE[n >> 1]
+            except IndexError:
+                raise CodecError(f"unknown string reference {n >> 1}") from None
+        try:
+            return self.take(n >> 1).decode("utf-8")
+        except UnicodeDecodeError as exc:
+            raise CodecError(f"invalid UTF-8 in record: {exc}") from None
+
+    def number(self) -> float:
+        n = self.varint()
+        if n == 1:
+            return _F64.unpack(self.take(8))[0]
+        z = n >> 1
+        return ((z >> 1) ^ -(z & 1)) / 10
+
+    def value(self) -> Any:
+        tag = self.take(1)[0]
+        if tag == _T_TEXT:
+            return self.text()
+        if tag == _T_INT:
+            return self.zigzag()
+        if tag == _T_FLOAT:
+            return _F64.unpack(self.take(8))[0]
+        if tag == _T_TRUE:
+            return True
+        if tag == _T_FALSE:
+            return False
+        if tag == _T_NULL:
+            return None
+        if tag == _T_LIST:
+            return [self.value() for _ in range(self.varint())]
+        if tag == _T_MAP:
+            return {self.text(): self.value() for _ in range(self.varint())}
+        raise CodecError(f"unknown value tag {tag}")
+
+
+# ---------------------------------------------------------------------------
+# Records
+# ---------------------------------------------------------------------------
+
+
+def _encode_body(state: PatientState, out: bytearray) -> None:
+    if state.chief_complaint:
+        out.append(_F_CHIEF_COMPLAINT)
+        _write_text(out, state.chief_complaint)
+    vitals = state.vitals
+    if vitals.hr is not None:
+        out.append(_F_HR)
+        _write_number(out, vitals.hr)
+    if vitals.bp is not None:
+        match = _BP_PATTERN.fullmatch(vitals.bp)
+        if match:
+            out.append(_F_BP)
+            _write_varint(out, int(match.group(1)))
+            _write_varint(out, int(match.group(2)))
+        else:
+            out.append(_F_BP_TEXT)
+            _write_text(out, vitals.bp)
+    if vitals.temp is not None:
+        out.append(_F_TEMP)
+        _write_number(out, vitals.temp)
+    if state.medication:
+        out.append(_F_MEDICATION)
+        _write_text(out, state.medication)
+    for symptom in state.symptoms:
+        out.append(_F_SYMPTOM)
+        _write_text(out, symptom)
+    for field_id, mapping in ((_F_META, state.meta), (_F_SPECIALIST, state.specialist_data)):
+        for key, value in mapping.items():
+            if value is not None:
+                out.append(field_id)
+                _write_text(out, key)
+                _write_value(out, value)
+
+
+def _decode_body(reader: _Reader, end: int) -> dict[str, Any]:
+    # Fields are written in to_compressed_dict() order, so building the
+    # dict in read order reproduces it key for key.
+    data: dict[str, Any] = {}
+    while reader.pos < end:
+        field_id = reader.varint()
+        if field_id == _F_CHIEF_COMPLAINT:
+            data["chief_complaint"] = reader.text()
+        elif field_id == _F_HR:
+            data.setdefault("vitals", {})["hr"] = reader.number()
+        elif field_id == _F_BP:
+            data.setdefault("vitals", {})["bp"] = f"{reader.varint()}/{reader.varint()}"
+        elif field_id == _F_BP_TEXT:
+            data.setdefault("vitals", {})["bp"] = reader.text()
+        elif field_id == _F_TEMP:
+            data.setdefault("vitals", {})["temp"] = reader.number()
+        elif field_id == _F_MEDICATION:
+            data["medication"] = reader.text()
+        elif field_id == _F_SYMPTOM:
+            data.setdefault("symptoms", []).append(reader.text())
+        elif field_id == _F_META:
+            key = reader.text()
+            data.setdefault("meta", {})[key] = reader.value()
+        elif field_id == _F_SPECIALIST:
+            key = reader.text()
+            data.setdefault("specialist_data", {})[key] = reader.value()
+        else:
+            raise CodecError(f"unknown field id {field_id}")
+    if reader.pos != end:
+        raise CodecError("record overruns its length")
+    return data
+
+
+def _header(flags: int) -> bytearray:
+    out = bytearray(MAGIC)
+    out.append(SCHEMA_VERSION)
+    out.append(flags)
+    return out
+
+
+def _read_header(data: bytes) -> int:
+    if len(data) < 4 or data[:2] != MAGIC:
+        raise CodecError("not an encoded patient record")
+    if data[2] != SCHEMA_VERSION:
+        raise CodecError(f"unsupported schema version {data[2]}")
+    return data[3]
+
+
+def is_encoded(payload: object) -> bool:
+    """Whether *payload* looks like output of :func:`encode`/:func:`encode_block`."""
+    return isinstance(payload, (bytes, bytearray, memoryview)) and bytes(payload[:2]) == MAGIC
+
+
+def encode(state: PatientState) -> bytes:
+    """Encode one *state* (uncompressed; records are too small to gain
+    from per-record compression — use :func:`encode_block`)."""
+    out = _header(0)
+    _encode_body(state, out)
+    return bytes(out)
+
+
+def decode_dict(data: bytes) -> dict[str, Any]:
+    """Decode a payload produced by :func:`encode` straight to the
+    ``to_compressed_dict()`` form, skipping model validation.
+
+    Raises:
+        CodecError: If *data* is not a valid single-record payload.
+    """
+    data = bytes(data)
+    flags = _read_header(data)
+    if flags != 0:
+        raise CodecError("payload is a compressed block; use decode_block()")
+    return _decode_body(_Reader(data, 4), len(data))
+
+
+def decode(data: bytes) -> PatientState:
+    """Decode a payload produced by :func:`encode` into a ``PatientState``."""
+    return PatientState(**decode_dict(data))
+
+
+# ---------------------------------------------------------------------------
+# Blocks
+# ---------------------------------------------------------------------------
+
+
+def _compress(body: bytes, compression: str | None) -> bytes:
+    if compression is None:
+        return body
+    if compression == "zlib":
+        return zlib.compress(body, 6)
+    if compression == "zstd":
+        if not _ZSTD_AVAILABLE:
+            raise RuntimeError("zstd compression requires the 'zstandard' package")
+        return zstandard.ZstdCompressor(level=3).compress(body)
+    raise ValueError(f"unknown compression {compression!r}")
+
+
+def _decompress(body: bytes, compression: str | None) -> bytes:
+    try:
+        if compression == "zlib":
+            return zlib.decompress(body)
+        if compression == "zstd":
+            if not _ZSTD_AVAILABLE:
+                raise RuntimeError("zstd decompression requires the 'zstandard' package")
+            return zstandard.ZstdDecompressor().decompress(body)
+    except zlib.error as exc:
+        raise CodecError(f"corrupt {compression} block: {exc}") from None
+    return body
+
+
+def encode_block(states: Iterable[PatientState], compression: str | None = "zlib") -> bytes:
+    """Encode many states into one frame, compressed as a whole.
+
+    Args:
+        states: Records to pack, in order.
+        compression: ``"zlib"`` (default), ``"zstd"`` or ``None``.
+    """
+    if compression not in _COMPRESSION_IDS:
+        raise ValueError(f"unknown compression {compression!r}")
+    body = bytearray()
+    record = bytearray()
+    count = 0
+    for state in states:
+        record.clear()
+        _encode_body(state, record)
+        _write_varint(body, len(record))
+        body += record
+        count += 1
+    prefix = bytearray()
+    _write_varint(prefix, count)
+    out = _header(_FLAG_BLOCK | _COMPRESSION_IDS[compression])
+    out += _compress(bytes(prefix + body), compression)
+    return bytes(out)
+
+
+def decode_block(data: bytes) -> list[PatientState]:
+    """Decode a frame produced by :func:`encode_block`."""
+    data = bytes(data)
+    flags = _read_header(data)
+    if not flags & _FLAG_BLOCK:
+        raise CodecError("payload is a single record; use decode()")
+    compression_id = flags & 0x0F
+    if compression_id not in _COMPRESSION_NAMES:
+        raise CodecError(f"unknown compression id {compression_id}")
+    body = _decompress(data[4:], _COMPRESSION_NAMES[compression_id])
+    reader = _Reader(body)
+    states = []
+    for _ in range(reader.varint()):
+        length = reader.varint()
+        states.append(PatientState(**_decode_body(reader, reader.pos + length)))
+    return states
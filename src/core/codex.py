@@ -4,8 +4,16 @@ from __future__ import annotations
 
 import re
 from abc import ABC, abstractmethod
+from typing import Iterable
 
+from src.core import regex_backend
+from src.core.boilerplate import BoilerplateDictionary
 from src.core.cache_manager import CompTextCache
+from src.core.regex_backend import Pattern
+from src.core.sections import DEFAULT_SEGMENTER, SectionSegmenter
+from src.core.text import NormalizedText
+from src.core.tokenizers import Tokenizer, TokenSpans, get_tokenizer
+from src.core.tracing import tracer
 
 
 class ClinicalModule(ABC):
@@ -27,11 +35,12 @@ class ClinicalModule(ABC):
         """Keywords that trigger this module."""
 
     @abstractmethod
-    def extract(self, text: str) -> dict:
+    def extract(self, text: str | NormalizedText) -> dict:
         """Extract domain-specific fields from clinical text.
 
         Args:
-            text: Raw clinical text.
+            text: Raw clinical text, or the record's shared
+                :class:`~src.core.text.NormalizedText`.
 
         Returns:
             A dictionary of extracted specialist fields.
@@ -41,13 +50,11 @@ class ClinicalModule(ABC):
 class CardiologyCodex(ClinicalModule):
     """Cardiology-specific clinical module."""
 
-    _RADIATION_PATTERN = re.compile(
-        r"(?:radiat(?:es?|ing|ion)\s*(?:to)?\s*)(.+?)(?:\.|,|;|$)",
-        re.IGNORECASE,
+    _RADIATION_PATTERN = regex_backend.compile(
+        r"(?:radiat(?:es?|ing|ion)\s*(?:to\s*)?)(.+?)(?:\.|,|;|$)",
     )
-    _PAIN_QUALITY_PATTERN = re.compile(
+    _PAIN_QUALITY_PATTERN = regex_backend.compile(
         r"(?:pain\s+(?:is\s+)?(?:described\s+as\s+)?)(sharp|dull|crushing|stabbing|burning|pressure|tight|squeezing|aching)",
-        re.IGNORECASE,
     )
 
     @property
@@ -62,7 +69,8 @@ class CardiologyCodex(ClinicalModule):
     def keywords(self) -> list[str]:
         return ["chest pain", "heart", "pressure"]
 
-    def extract(self, text: str) -> dict:
+    def extract(self, text: str | NormalizedText) -> dict:
+        text = NormalizedText.of(text)
         radiation = self._extract_first(self._RADIATION_PATTERN, text)
         pain_quality = self._extract_first(self._PAIN_QUALITY_PATTERN, text)
         return {
@@ -71,21 +79,18 @@ class CardiologyCodex(ClinicalModule):
         }
 
     @staticmethod
-    def _extract_first(pattern: re.Pattern, text: str) -> str | None:
-        match = pattern.search(text)
-        return match.group(1).strip() if match else None
+    def _extract_first(pattern: Pattern, text: NormalizedText) -> str | None:
+        return text.extract_first(pattern)
 
 
 class RespiratoryCodex(ClinicalModule):
     """Respiratory-specific clinical module."""
 
-    _TRIGGERS_PATTERN = re.compile(
+    _TRIGGERS_PATTERN = regex_backend.compile(
         r"(?:trigger(?:s|ed)?\s*(?:by|include|:)\s*)(.+?)(?:\.|,|;|$)",
-        re.IGNORECASE,
     )
-    _BREATH_SOUNDS_PATTERN = re.compile(
-        r"(?:breath sounds?\s*[:\-]?\s*)(clear|diminished|wheezes?|crackles?|rhonchi|stridor|absent)",
-        re.IGNORECASE,
+    _BREATH_SOUNDS_PATTERN = regex_backend.compile(
+        r"(?:breath sounds?\s*(?:[:\-]\s*)?)(clear|diminished|wheezes?|crackles?|rhonchi|stridor|absent)",
     )
 
     @property
@@ -100,7 +105,8 @@ class RespiratoryCodex(ClinicalModule):
     def keywords(self) -> list[str]:
         return ["breath", "asthma", "wheezing"]
 
-    def extract(self, text: str) -> dict:
+    def extract(self, text: str | NormalizedText) -> dict:
+        text = NormalizedText.of(text)
         triggers = self._extract_first(self._TRIGGERS_PATTERN, text)
         breath_sounds = self._extract_first(self._BREATH_SOUNDS_PATTERN, text)
         return {
@@ -109,21 +115,18 @@ class RespiratoryCodex(ClinicalModule):
         }
 
     @staticmethod
-    def _extract_first(pattern: re.Pattern, text: str) -> str | None:
-        match = pattern.search(text)
-        return match.group(1).strip() if match else None
+    def _extract_first(pattern: Pattern, text: NormalizedText) -> str | None:
+        return text.extract_first(pattern)
 
 
 class NeurologyCodex(ClinicalModule):
     """Neurology-specific clinical module."""
 
-    _TIME_LAST_KNOWN_WELL_PATTERN = re.compile(
+    _TIME_LAST_KNOWN_WELL_PATTERN = regex_backend.compile(
         r"(?:last\s+(?:known|seen)\s+(?:well|normal)\s*)(?:at\s+|was\s+)?(\d+\s*(?:hours?|minutes?|mins?|hrs?)\s*ago|\d{1,2}:\d{2})",
-        re.IGNORECASE,
     )
-    _SYMPTOMS_SIDE_PATTERN = re.compile(
+    _SYMPTOMS_SIDE_PATTERN = regex_backend.compile(
         r"\b(left|right)\b",
-        re.IGNORECASE,
     )
 
     @property
@@ -138,33 +141,31 @@ class NeurologyCodex(ClinicalModule):
     def keywords(self) -> list[str]:
         return ["stroke", "slurred", "weakness", "numbness", "face"]
 
-    def extract(self, text: str) -> dict:
+    def extract(self, text: str | NormalizedText) -> dict:
+        text = NormalizedText.of(text)
         time_last_known_well = self._extract_first(
             self._TIME_LAST_KNOWN_WELL_PATTERN, text
         )
-        side_match = self._SYMPTOMS_SIDE_PATTERN.search(text)
-        symptoms_side = side_match.group(1).lower() if side_match else None
+        side_match = self._SYMPTOMS_SIDE_PATTERN.search(text.folded)
+        symptoms_side = side_match.group(1) if side_match else None
         return {
             "time_last_known_well": time_last_known_well,
             "symptoms_side": symptoms_side,
         }
 
     @staticmethod
-    def _extract_first(pattern: re.Pattern, text: str) -> str | None:
-        match = pattern.search(text)
-        return match.group(1).strip() if match else None
+    def _extract_first(pattern: Pattern, text: NormalizedText) -> str | None:
+        return text.extract_first(pattern)
 
 
 class TraumaCodex(ClinicalModule):
     """Trauma-specific clinical module."""
 
-    _MECHANISM_PATTERN = re.compile(
+    _MECHANISM_PATTERN = regex_backend.compile(
         r"(?:(?:fall|fell)\s+from|hit\s+by|struck\s+by|crash\s+into|involved\s+in)\s+(.+?)(?:\.|,|;|$)",
-        re.IGNORECASE,
     )
-    _VISIBLE_INJURY_PATTERN = re.compile(
+    _VISIBLE_INJURY_PATTERN = regex_backend.compile(
         r"(bone\s+exposed|laceration|open\s+wound|deformity|swelling|bruising|abrasion)",
-        re.IGNORECASE,
     )
 
     @property
@@ -179,19 +180,18 @@ class TraumaCodex(ClinicalModule):
     def keywords(self) -> list[str]:
         return ["fall", "fell", "accident", "crash", "fracture", "bleed", "trauma"]
 
-    def extract(self, text: str) -> dict:
+    def extract(self, text: str | NormalizedText) -> dict:
+        text = NormalizedText.of(text)
         mechanism = self._extract_first(self._MECHANISM_PATTERN, text)
-        injury_match = self._VISIBLE_INJURY_PATTERN.search(text)
-        visible_injury = injury_match.group(1).strip() if injury_match else None
+        visible_injury = self._extract_first(self._VISIBLE_INJURY_PATTERN, text)
         return {
             "mechanism_of_injury": mechanism,
             "visible_injury": visible_injury,
         }
 
     @staticmethod
-    def _extract_first(pattern: re.Pattern, text: str) -> str | None:
-        match = pattern.search(text)
-        return match.group(1).strip() if match else None
+    def _extract_first(pattern: Pattern, text: NormalizedText) -> str | None:
+        return text.extract_first(pattern)
 
 
 class MedicalKVTCStrategy:
@@ -205,66 +205,255 @@ class MedicalKVTCStrategy:
                    disclaimers).
     - window_size: Preserve the last M chars verbatim (recent query /
                    symptom description).
-    - middle:      Aggressively compress the remaining history.
+    - middle:      Aggressively compress the remaining history; sections
+                   of a kind in *drop_kinds* are dropped from it (none by
+                   default; pass ``(sections.ADMIN,)`` to drop billing and
+                   admin fragments).
+
+    With a corpus-built *boilerplate* dictionary, middle sentences found in
+    it are dropped (``boilerplate_mode="drop"``) or replaced by a short
+    reference (``"reference"``); sentences containing digits are always
+    kept, since doses and values only look like template text.
     """
 
+    BOILERPLATE_MODES = ("drop", "reference")
+
     def __init__(
-        self, sink_size: int = 800, window_size: int = 1500
+        self,
+        sink_size: int = 800,
+        window_size: int = 1500,
+        segmenter: SectionSegmenter | None = DEFAULT_SEGMENTER,
+        drop_kinds: Iterable[str] = (),
+        boilerplate: BoilerplateDictionary | None = None,
+        boilerplate_mode: str = "drop",
     ) -> None:
+        if boilerplate_mode not in self.BOILERPLATE_MODES:
+            raise ValueError(
+                f"boilerplate_mode must be one of {self.BOILERPLATE_MODES}, got {boilerplate_mode!r}"
+            )
         self.sink_size = sink_size
         self.window_size = window_size
+        self.segmenter = segmenter
+        self.drop_kinds = frozenset(drop_kinds)
+        self.boilerplate = boilerplate
+        self.boilerplate_mode = boilerplate_mode
         self._cache = CompTextCache()
 
     # ------------------------------------------------------------------
     # public API
     # ------------------------------------------------------------------
 
-    def compress(self, text: str) -> str:
+    def compress(self, text: str | NormalizedText) -> str:
         """Apply the sandwich strategy to *text* and return the result.
 
-        If the text is short enough that sink + window cover everything,
-        the original text is returned unchanged.
+        The strategy works on the NFC form of the text. If the text is short
+        enough that sink + window cover everything, it is returned unchanged.
         """
-        total = len(text)
+        normalized = NormalizedText.of(text)
+        source = normalized.nfc
+        total = len(source)
         min_length = self.sink_size + self.window_size
 
         if total <= min_length:
-            return text
-
-        header = text[: self.sink_size]
-        recent = text[-self.window_size :]
-        middle_raw = text[self.sink_size : total - self.window_size]
-
-        cached = self._cache.get(middle_raw)
-        if cached is not None:
-            middle_compressed = cached
-        else:
-            middle_compressed = self._compress_middle(middle_raw)
-            self._cache.put(middle_raw, middle_compressed)
-
-        return header + middle_compressed + recent
+            return source
+
+        with tracer.span("kvtc.compress", chars=total) as span:
+            header = source[: self.sink_size]
+            recent = source[-self.window_size :]
+            middle = self._middle(normalized, self.sink_size, total - self.window_size)
+            middle_raw = middle.original
+            span.set_attribute("dropped_chars", total - min_length - len(middle_raw))
+
+            with tracer.span("kvtc.cache_lookup") as lookup:
+                cached = self._cache.get(middle_raw)
+                lookup.set_attribute("hit", cached is not None)
+            if cached is not None:
+                middle_compressed = cached
+            else:
+                with tracer.span("kvtc.compress_middle", chars=len(middle_raw)):
+                    middle_compressed = self._compress_middle(middle)
+                self._cache.put(middle_raw, middle_compressed)
+
+            result = header + middle_compressed + recent
+            span.set_attribute("output_chars", len(result))
+        return result
 
     # ------------------------------------------------------------------
     # internals
     # ------------------------------------------------------------------
 
-    @staticmethod
-    def _compress_middle(text: str) -> str:
+    def _kept_ranges(self, source: str, start: int, end: int) -> list[tuple[int, int]]:
+        """The ranges of ``source[start:end]`` outside sections of a dropped
+        kind."""
+        if self.segmenter is None or not self.drop_kinds:
+            return [(start, end)]
+        ranges = []
+        for section in self.segmenter.segment(source):
+            lo, hi = max(section.start, start), min(section.end, end)
+            if lo < hi and section.kind not in self.drop_kinds:
+                if ranges and ranges[-1][1] == lo:
+                    ranges[-1] = (ranges[-1][0], hi)
+                else:
+                    ranges.append((lo, hi))
+        return ranges
+
+    def _middle(self, normalized: NormalizedText, start: int, end: int) -> NormalizedText:
+        """``nfc[start:end]`` without the sections of a dropped kind."""
+        ranges = self._kept_ranges(normalized.nfc, start, end)
+        if ranges == [(start, end)]:
+            return normalized.slice(start, end)
+        kept = NormalizedText("".join(normalized.nfc[lo:hi] for lo, hi in ranges))
+        kept._nfc = kept.original
+        return kept
+
+    _SENTENCE_BREAK = re.compile(r"(?<=[.!?]) ")
+
+    _DIGIT = re.compile(r"\d")
+
+    def _is_boilerplate(self, sentence: str, key: str) -> bool:
+        """Whether *sentence* (keyed *key*) is known boilerplate to remove."""
+        return (
+            self.boilerplate is not None
+            and key in self.boilerplate
+            and self._DIGIT.search(sentence) is None
+        )
+
+    def _compress_middle(self, text: NormalizedText) -> str:
         """Compress the middle segment by collapsing whitespace and
         removing redundant lines while preserving medical keywords."""
-        # Collapse runs of whitespace into a single space
-        compressed = re.sub(r"\s+", " ", text).strip()
-        # Remove duplicate sentences (simple dedup)
+        # Whitespace runs are already collapsed to single spaces
+        collapsed = text.collapsed
+        folded = text.collapsed_folded
+        aligned = len(folded) == len(collapsed)
+        # Remove duplicate sentences (simple dedup, case-insensitive)
         seen: set[str] = set()
         unique_parts: list[str] = []
-        for sentence in re.split(r"(?<=[.!?])\s+", compressed):
-            normalized = sentence.strip().lower()
-            if normalized and normalized not in seen:
-                seen.add(normalized)
-                unique_parts.append(sentence.strip())
+        pos = 0
+        for sentence in self._SENTENCE_BREAK.split(collapsed):
+            key = folded[pos : pos + len(sentence)] if aligned else sentence.casefold()
+            pos += len(sentence) + 1
+            if sentence and key not in seen:
+                seen.add(key)
+                if self._is_boilerplate(sentence, key):
+                    if self.boilerplate_mode == "reference":
+                        unique_parts.append(BoilerplateDictionary.reference(key))
+                    continue
+                unique_parts.append(sentence)
         return " ".join(unique_parts)
 
 
+class TokenBudgetKVTCStrategy(MedicalKVTCStrategy):
+    """KVTC Sandwich Strategy sized in model tokens instead of characters.
+
+    - sink_tokens:   Preserve the first N tokens verbatim.
+    - window_tokens: Preserve the last M tokens verbatim.
+    - max_tokens:    Budget for the whole result. The middle is
+                     deduplicated as in :class:`MedicalKVTCStrategy`, then
+                     thinned sentence by sentence (sentences without digits
+                     first, oldest first) until the result fits.
+
+    Known boilerplate is always dropped here, never replaced by a
+    reference. Cuts fall on token boundaries of *tokenizer* (a
+    :class:`~src.core.tokenizers.Tokenizer` or a
+    :func:`~src.core.tokenizers.get_tokenizer` spec). All counts come from
+    one cached encode of the record; re-joining middle sentences can shift
+    a BPE merge at a seam, so leave a few tokens of headroom when the
+    budget is a hard model limit.
+    """
+
+    def __init__(
+        self,
+        tokenizer: str | Tokenizer = "regex",
+        sink_tokens: int = 200,
+        window_tokens: int = 400,
+        max_tokens: int = 2048,
+        segmenter: SectionSegmenter | None = DEFAULT_SEGMENTER,
+        drop_kinds: Iterable[str] = (),
+        boilerplate: BoilerplateDictionary | None = None,
+    ) -> None:
+        if max_tokens < sink_tokens + window_tokens:
+            raise ValueError("max_tokens must cover sink_tokens + window_tokens")
+        super().__init__(
+            0, 0, segmenter=segmenter, drop_kinds=drop_kinds, boilerplate=boilerplate
+        )
+        self.tokenizer = get_tokenizer(tokenizer)
+        self.sink_tokens = sink_tokens
+        self.window_tokens = window_tokens
+        self.max_tokens = max_tokens
+
+    def compress(self, text: str | NormalizedText) -> str:
+        """Apply the sandwich strategy to *text* and return the result.
+
+        The strategy works on the NFC form of the text, which is returned
+        unchanged if it already fits *max_tokens*.
+        """
+        source = NormalizedText.of(text).nfc
+        tokens = self.tokenizer.tokenize(source)
+        total = len(tokens)
+        if total <= self.max_tokens:
+            return source
+
+        with tracer.span("kvtc.compress", chars=len(source), tokens=total) as span:
+            head_end = tokens.boundary(self.sink_tokens)
+            tail_start = tokens.boundary(total - self.window_tokens)
+            budget = self.max_tokens - self.sink_tokens - self.window_tokens
+            with tracer.span("kvtc.compress_middle", chars=tail_start - head_end):
+                kept, used = self._fit_middle(
+                    tokens, self._kept_ranges(source, head_end, tail_start), budget
+                )
+            middle = " ".join(sentence for sentence, _, _ in kept)
+            if kept:
+                # keep words apart where the cut or a dropped sentence joins
+                if kept[0][1] != head_end and not source[head_end - 1 : head_end].isspace():
+                    middle = " " + middle
+                if kept[-1][2] != tail_start or source[tail_start - 1].isspace():
+                    middle += " "
+            result = source[:head_end] + middle + source[tail_start:]
+            span.set_attribute("output_tokens", self.sink_tokens + used + self.window_tokens)
+        return result
+
+    _SENTENCE_GAP = re.compile(r"(?<=[.!?])\s+")
+
+    def _fit_middle(
+        self, tokens: TokenSpans, ranges: list[tuple[int, int]], budget: int
+    ) -> tuple[list[tuple[str, int, int]], int]:
+        """The deduplicated middle sentences of *ranges*, thinned to
+        *budget* tokens, as ``(sentence, start, end)``, and their token
+        count."""
+        source = tokens.text
+        seen: set[str] = set()
+        sentences: list[tuple[str, int, int, int, bool]] = []
+        for lo, hi in ranges:
+            bounds = [lo]
+            for gap in self._SENTENCE_GAP.finditer(source, lo, hi):
+                bounds.append(gap.end())
+            bounds.append(hi)
+            for start, end in zip(bounds, bounds[1:]):
+                sentence = " ".join(source[start:end].split())
+                key = sentence.casefold()
+                if sentence and key not in seen:
+                    seen.add(key)
+                    if self._is_boilerplate(sentence, key):
+                        continue
+                    has_digit = self._DIGIT.search(sentence) is not None
+                    # a sentence's count includes the gap after it, which
+                    # BPE vocabularies fold into the next word's token
+                    count = tokens.count(start, end)
+                    sentences.append((sentence, start, end, count, has_digit))
+
+        used = sum(sentence[3] for sentence in sentences)
+        keep = [True] * len(sentences)
+        if used > budget:
+            order = sorted(range(len(sentences)), key=lambda i: (sentences[i][4], i))
+            for index in order:
+                if used <= budget:
+                    break
+                keep[index] = False
+                used -= sentences[index][3]
+        kept = [s[:3] for s, keep_it in zip(sentences, keep) if keep_it]
+        return kept, used
+
+
 class CodexRouter:
     """Selects the appropriate clinical module based on input text."""
 
@@ -276,16 +465,21 @@ class CodexRouter:
             TraumaCodex(),
         ]
 
-    def route(self, text: str) -> ClinicalModule | None:
+    @property
+    def modules(self) -> tuple[ClinicalModule, ...]:
+        """The registered clinical modules, in routing order."""
+        return tuple(self._modules)
+
+    def route(self, text: str | NormalizedText) -> ClinicalModule | None:
         """Return the first matching clinical module for the given text.
 
         Args:
-            text: Raw clinical text.
+            text: Raw clinical text, or the record's shared NormalizedText.
 
         Returns:
             The matched ClinicalModule, or None if no module matches.
         """
-        lower_text = text.lower()
+        lower_text = NormalizedText.of(text).folded
         for module in self._modules:
             for keyword in module.keywords:
                 if keyword in lower_text:
@@ -3,9 +3,16 @@
 from __future__ import annotations
 
 import re
+import time
+from typing import Any
 
+from src.core import regex_backend
 from src.core.codex import CodexRouter
 from src.core.models import PatientState, Vitals
+from src.core.regex_backend import Pattern
+from src.core.sections import DEFAULT_SEGMENTER, SectionSegmenter
+from src.core.text import NormalizedText
+from src.core.tracing import tracer
 
 
 class CompTextProtocol:
@@ -16,121 +23,217 @@ class CompTextProtocol:
     usage by ~94% while preserving clinically relevant information.
     """
 
-    # Patterns for extracting clinical data — explicit labels first, then fallback
-    _CHIEF_COMPLAINT_PRIMARY = re.compile(
-        r"(?:chief complaint|cc|complaint|presenting with|presents with)\s*[:\-]?\s*(.+?)(?:\.|,|;|$)",
-        re.IGNORECASE | re.MULTILINE,
+    # Patterns for extracting clinical data — explicit labels first, then fallback.
+    # They are lowercase and run case-sensitively on NormalizedText.folded.
+    _CHIEF_COMPLAINT_PRIMARY = regex_backend.compile(
+        r"(?:chief complaint|cc|complaint|presenting with|presents with)\s*(?:[:\-]\s*)?(.+?)(?:\.|,|;|$)",
+        re.MULTILINE,
     )
-    _CHIEF_COMPLAINT_FALLBACK = re.compile(
-        r"(?:patient has|presenting complaint)\s*[:\-]?\s*(.+?)(?:\.|,|;|$)",
-        re.IGNORECASE | re.MULTILINE,
+    _CHIEF_COMPLAINT_FALLBACK = regex_backend.compile(
+        r"(?:patient has|presenting complaint)\s*(?:[:\-]\s*)?(.+?)(?:\.|,|;|$)",
+        re.MULTILINE,
     )
-    _HR_PATTERN = re.compile(
-        r"(?:hr|heart rate)\s*[:\-]?\s*(\d+)", re.IGNORECASE
+    _HR_PATTERN = regex_backend.compile(
+        r"(?:hr|heart rate)\s*(?:[:\-]\s*)?(\d+)"
     )
-    _BP_PATTERN = re.compile(
-        r"(?:bp|blood pressure)\s*[:\-]?\s*(\d+/\d+)", re.IGNORECASE
+    _BP_PATTERN = regex_backend.compile(
+        r"(?:bp|blood pressure)\s*(?:[:\-]\s*)?(\d+/\d+)"
     )
-    _TEMP_PATTERN = re.compile(
-        r"(?:temp(?:erature)?|fever|\bT(?=\s))\s*[:\-]?\s*(\d+\.?\d*)\s*(?:°?\s*[CcFf])?",
-        re.IGNORECASE,
+    _TEMP_PATTERN = regex_backend.compile(
+        r"(?:temp(?:erature)?|fever|\bt\s)\s*(?:[:\-]\s*)?(\d+\.?\d*)(?:\s*(?:°\s*)?[cf])?",
     )
-    _MEDICATION_PATTERN = re.compile(
+    _MEDICATION_PATTERN = regex_backend.compile(
         r"(?:medications?|meds?|prescribed|taking)\s*[:\-]\s*([^\n]{2,80})",
-        re.IGNORECASE,
     )
-    _DIAGNOSIS_PATTERN = re.compile(
-        r"(?:diagnosis|impression|dx|assessment|diagnos(?:ed|tic))\s*[:\-]?\s*([^\n]{2,100})",
-        re.IGNORECASE,
+    _DIAGNOSIS_PATTERN = regex_backend.compile(
+        r"(?:diagnosis|impression|dx|assessment|diagnos(?:ed|tic))\s*(?:[:\-]\s*)?([^\n]{2,100})",
     )
-    _ALLERGY_PATTERN = re.compile(
-        r"(?:allerg(?:y|ies|ic)|nkda)\s*[:\-]?\s*([^\n]{2,100})",
-        re.IGNORECASE,
+    _ALLERGY_PATTERN = regex_backend.compile(
+        r"(?:allerg(?:y|ies|ic)|nkda)\s*(?:[:\-]\s*)?([^\n]{2,100})",
     )
 
-    def __init__(self) -> None:
+    # Single-value extractors in the order a time budget serves them:
+    # (field, trace span, patterns tried in turn). Vitals come first since
+    # they drive triage.
+    _FIELD_EXTRACTORS = (
+        ("hr", "vitals", (_HR_PATTERN,)),
+        ("bp", "vitals", (_BP_PATTERN,)),
+        ("temp", "vitals", (_TEMP_PATTERN,)),
+        ("chief_complaint", "chief_complaint", (_CHIEF_COMPLAINT_PRIMARY, _CHIEF_COMPLAINT_FALLBACK)),
+        ("medication", "medication", (_MEDICATION_PATTERN,)),
+        ("diagnosis", "diagnosis", (_DIAGNOSIS_PATTERN,)),
+        ("allergies", "allergies", (_ALLERGY_PATTERN,)),
+    )
+
+    def __init__(
+        self,
+        time_budget_ms: float | None = None,
+        segmenter: SectionSegmenter | None = DEFAULT_SEGMENTER,
+    ) -> None:
+        """
+        Args:
+            time_budget_ms: Optional per-record extraction budget, checked
+                before every extractor (vitals, chief complaint, medication,
+                diagnosis, allergies, symptoms, codex fields, in that
+                order). Once it is used up the remaining extractors are
+                skipped, ``meta["time_budget_exceeded"]`` is set and
+                ``meta["truncated_fields"]`` lists what was skipped.
+                Protocol routing always runs, so triage still sees the
+                active protocol.
+            segmenter: Splits off legal and admin sections so extraction
+                and routing only see the clinical text; None extracts from
+                the whole record.
+        """
         self._router = CodexRouter()
+        self.time_budget_ms = time_budget_ms
+        self.segmenter = segmenter
 
-    _SYMPTOM_KEYWORDS = re.compile(
+    _SYMPTOM_KEYWORDS = regex_backend.compile(
         r"\b(pain|nausea|vomiting|fatigue|fever|headache|dyspnea|shortness of breath|"
         r"chest pain|dizziness|weakness|syncope|palpitations|swelling|cough|"
         r"confusion|anxiety|depression|insomnia|rash|bleeding|diarrhea|constipation)\b",
-        re.IGNORECASE,
     )
 
-    def _extract_symptoms(self, text: str) -> list[str]:
+    def _extract_symptoms(self, text: NormalizedText) -> list[str]:
         """Extract unique symptom keywords from clinical text."""
-        return list({m.group(0).lower() for m in self._SYMPTOM_KEYWORDS.finditer(text)})
+        return list({m.group(0) for m in self._SYMPTOM_KEYWORDS.finditer(text.folded)})
 
-    def compress(self, raw_text: str) -> PatientState:
+    def compress(self, raw_text: str | NormalizedText) -> PatientState:
         """Compress raw clinical text into a structured PatientState model.
 
         Args:
-            raw_text: Free-form clinical text containing patient information.
+            raw_text: Free-form clinical text containing patient information,
+                or an already built NormalizedText for it. Extraction runs on
+                its NFC form, so extracted strings are NFC.
 
         Returns:
             A PatientState Pydantic model with extracted clinical fields.
         """
-        # Token count approximation: chars/4 is standard LLM token estimate
-        original_tokens = max(len(raw_text) // 4, 1)
-
-        chief_complaint = (
-            self._extract_first(self._CHIEF_COMPLAINT_PRIMARY, raw_text)
-            or self._extract_first(self._CHIEF_COMPLAINT_FALLBACK, raw_text)
-        )
-        hr = self._extract_first(self._HR_PATTERN, raw_text)
-        bp = self._extract_first(self._BP_PATTERN, raw_text)
-        temp = self._extract_first(self._TEMP_PATTERN, raw_text)
-        medication = self._extract_first(self._MEDICATION_PATTERN, raw_text)
+        text = NormalizedText.of(raw_text)
+        with tracer.span("comptext.compress", chars=len(text)) as compress_span:
+            deadline = (
+                None
+                if self.time_budget_ms is None
+                else time.perf_counter() + self.time_budget_ms / 1000
+            )
+            # Token count approximation: chars/4 is standard LLM token estimate
+            original_tokens = max(len(text) // 4, 1)
+
+            if self.segmenter is not None:
+                with tracer.span("comptext.segment"):
+                    clinical = self.segmenter.clinical(text)
+                compress_span.set_attribute("skipped_chars", len(text.nfc) - len(clinical.nfc))
+                text = clinical
+
+            fields = self.extract_fields(text, deadline)
+            if fields["meta"].get("time_budget_exceeded"):
+                compress_span.set_attribute("time_budget_exceeded", True)
+
+            with tracer.span("comptext.build_state"):
+                state = PatientState(
+                    chief_complaint=fields["chief_complaint"],
+                    vitals=Vitals(hr=fields["hr"], bp=fields["bp"], temp=fields["temp"]),
+                    medication=fields["medication"],
+                    symptoms=fields["symptoms"],
+                    meta=fields["meta"],
+                    specialist_data=fields["specialist_data"],
+                )
+
+                # Store token counts so compression_ratio property works accurately
+                compressed_tokens = max(len(state.to_compressed_json()) // 4, 1)
+                state._original_token_count = original_tokens
+                state._compressed_token_count = compressed_tokens
+
+        return state
+
+    def extract_fields(
+        self, text: str | NormalizedText, deadline: float | None = None
+    ) -> dict[str, Any]:
+        """Run the extractors over *text* as is (no segmentation).
+
+        Args:
+            text: Clinical text, or its NormalizedText.
+            deadline: ``time.perf_counter()`` value after which the remaining
+                extractors are skipped (see *time_budget_ms*).
+
+        Returns:
+            The PatientState fields: ``chief_complaint``, ``hr``, ``bp``,
+            ``temp``, ``medication``, ``symptoms``, ``meta`` and
+            ``specialist_data``.
+        """
+        text = NormalizedText.of(text)
+
+        def expired() -> bool:
+            return deadline is not None and time.perf_counter() > deadline
+
+        values: dict[str, str | None] = dict.fromkeys(f for f, _, _ in self._FIELD_EXTRACTORS)
+        truncated: list[str] = []
+        for field, span, patterns in self._FIELD_EXTRACTORS:
+            if expired():
+                truncated.append(field)
+                continue
+            with tracer.span(f"comptext.extract.{span}"):
+                for pattern in patterns:
+                    values[field] = self._extract_first(pattern, text)
+                    if values[field]:
+                        break
+
+        symptoms: list[str] = []
+        if expired():
+            truncated.append("symptoms")
+        else:
+            with tracer.span("comptext.extract.symptoms"):
+                symptoms = self._extract_symptoms(text)
+        if expired():
+            truncated.append("specialist_data")
+            codex = self._codex_fields(text, extract=False)
+        else:
+            codex = self._codex_fields(text)
+        if truncated:
+            codex["meta"]["time_budget_exceeded"] = True
+            codex["meta"]["truncated_fields"] = truncated
+
+        medication, hr, temp = values["medication"], values["hr"], values["temp"]
         if medication:
             medication = medication.strip().rstrip(".,:;)")
-        diagnosis = self._extract_first(self._DIAGNOSIS_PATTERN, raw_text)
-        allergies = self._extract_first(self._ALLERGY_PATTERN, raw_text)
-
-        symptoms = self._extract_symptoms(raw_text)
-        codex = self._codex_fields(raw_text)
 
         # Merge extracted diagnosis/allergies into specialist_data
-        if diagnosis:
-            codex["specialist_data"]["diagnosis"] = diagnosis.strip()
-        if allergies:
-            codex["specialist_data"]["allergies"] = allergies.strip()
-
-        state = PatientState(
-            chief_complaint=chief_complaint,
-            vitals=Vitals(
-                hr=float(hr) if hr else None,
-                bp=bp,
-                temp=float(temp) if temp else None,
-            ),
-            medication=medication,
-            symptoms=symptoms,
-            meta=codex["meta"],
-            specialist_data=codex["specialist_data"],
-        )
-
-        # Store token counts so compression_ratio property works accurately
-        compressed_tokens = max(len(state.to_compressed_json()) // 4, 1)
-        state._original_token_count = original_tokens
-        state._compressed_token_count = compressed_tokens
+        for field in ("diagnosis", "allergies"):
+            if values[field]:
+                codex["specialist_data"][field] = values[field].strip()
 
-        return state
+        return {
+            "chief_complaint": values["chief_complaint"],
+            "hr": float(hr) if hr else None,
+            "bp": values["bp"],
+            "temp": float(temp) if temp else None,
+            "medication": medication,
+            "symptoms": symptoms,
+            "meta": codex["meta"],
+            "specialist_data": codex["specialist_data"],
+        }
 
     @staticmethod
-    def _extract_first(pattern: re.Pattern, text: str) -> str | None:
+    def _extract_first(pattern: Pattern, text: NormalizedText) -> str | None:
         """Return the first capture group match or None."""
-        match = pattern.search(text)
-        return match.group(1).strip() if match else None
-
-    def _codex_fields(self, raw_text: str) -> dict:
-        """Return meta and specialist fields from the active codex module."""
-        module = self._router.route(raw_text)
+        return text.extract_first(pattern)
+
+    def _codex_fields(self, text: NormalizedText, extract: bool = True) -> dict:
+        """Return meta and specialist fields from the active codex module
+        (only the protocol label when *extract* is false)."""
+        with tracer.span("comptext.route") as span:
+            module = self._router.route(text)
+            span.set_attribute("module", module.name if module else "General")
         if module is None:
             return {
                 "meta": {"active_protocol": "General"},
                 "specialist_data": {},
             }
+        if not extract:
+            return {"meta": {"active_protocol": module.protocol_label}, "specialist_data": {}}
+        with tracer.span("comptext.codex_extract", module=module.name):
+            specialist_data = module.extract(text)
         return {
             "meta": {"active_protocol": module.protocol_label},
-            "specialist_data": module.extract(raw_text),
+            "specialist_data": specialist_data,
         }
@@ -0,0 +1,547 @@
+"""Dedup - Near-duplicate note detection and incremental re-extraction.
+
+Copy-forward documentation makes most notes for a patient near-copies of
+the previous one. :class:`IncrementalCompressor` finds, for each incoming
+note, a previously compressed near-duplicate and re-extracts only the lines
+that changed:
+
+- :class:`MinHasher` turns the note's clinical text into a MinHash
+  signature with one-permutation hashing (one hash per shingle, binned,
+  empty bins densified along fixed probe sequences); copy-forward edits are line edits, so
+  a line-structured note's shingles are its lines;
+- :class:`NearDuplicateIndex` buckets signatures by LSH bands, so a lookup
+  touches only notes sharing a band rather than every stored note, and
+  confirms candidates against a similarity threshold;
+- a line diff (``difflib``) against the matched note yields the changed
+  hunks, each widened by one non-blank line of context so labels and
+  values on neighbouring lines stay together; fields are extracted from
+  those alone and merged into the previous
+  :class:`~src.core.models.PatientState`.
+
+The merge is conservative. A field is updated only when it is clear which
+line it came from; any field whose source may have been removed, or that
+could now be matched earlier in the note, triggers a full extraction.
+Notes shorter than ``min_chars`` skip all of this: for them a plain
+extraction is cheaper than hashing and diffing.
+:class:`DedupStats` counts how much work was skipped.
+"""
+
+from __future__ import annotations
+
+import difflib
+import random
+import zlib
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from operator import eq
+from typing import Any, Hashable
+
+from src.core.codex import ClinicalModule, CodexRouter
+from src.core.comptext import CompTextProtocol
+from src.core.models import PatientState, Vitals
+from src.core.text import NormalizedText
+from src.core.tracing import tracer
+
+SCOPES = ("patient", "global")
+
+_MASK32 = 0xFFFFFFFF
+_EMPTY = 1 << 32
+
+
+def _hash(shingle: str) -> int:
+    """CRC-32 of *shingle*, mixed so that the high bits are uniform."""
+    return (zlib.crc32(shingle.encode()) * 0x9E3779B1) & _MASK32
+
+
+class MinHasher:
+    """One-permutation MinHash over line or word shingles.
+
+    Args:
+        num_perm: Signature length (number of bins).
+        shingle_size: Words per shingle for notes of fewer than
+            *min_lines* non-empty lines.
+        min_lines: Notes with at least this many non-empty lines are
+            shingled by line.
+    """
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 3, min_lines: int = 8) -> None:
+        if num_perm < 1 or shingle_size < 1:
+            raise ValueError("num_perm and shingle_size must be positive")
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.min_lines = min_lines
+        # a fixed probe order per bin for densification; seeded so that
+        # signatures are comparable across processes
+        rng = random.Random(num_perm)
+        self._probes = [rng.sample(range(num_perm), num_perm) for _ in range(num_perm)]
+
+    def shingles(self, text: str | NormalizedText) -> set[int]:
+        """32-bit hashes of the casefolded shingles of *text*."""
+        folded = NormalizedText.of(text).folded
+        lines = {line.strip() for line in folded.splitlines()}
+        lines.discard("")
+        if len(lines) >= self.min_lines:
+            return {_hash(line) for line in lines}
+        words = folded.split()
+        if len(words) < self.shingle_size:
+            return {_hash(" ".join(words))} if words else set()
+        shingles = zip(*(words[i:] for i in range(self.shingle_size)))
+        return {_hash(" ".join(shingle)) for shingle in shingles}
+
+    def signature(self, text: str | NormalizedText) -> tuple[int, ...]:
+        """The MinHash signature of *text*."""
+        bins = self.num_perm
+        values = [_EMPTY] * bins
+        # bin by the high bits; within a bin the smallest hash wins, so
+        # visiting hashes in descending order leaves each bin's minimum
+        for index, value in {
+            (value * bins) >> 32: value for value in sorted(self.shingles(text), reverse=True)
+        }.items():
+            values[index] = value
+        if _EMPTY not in values:
+            return tuple(values)
+        filled = [value != _EMPTY for value in values]
+        if not any(filled):
+            return tuple(values)
+        # densification: an empty bin copies the first filled bin in its
+        # probe order; the order depends on the bin only, so two notes
+        # agree on a densified bin with probability equal to their Jaccard
+        # similarity (rotation would correlate neighbouring empty bins)
+        for index in range(bins):
+            if not filled[index]:
+                values[index] = values[next(j for j in self._probes[index] if filled[j])]
+        return tuple(values)
+
+    @staticmethod
+    def similarity(a: tuple[int, ...], b: tuple[int, ...]) -> float:
+        """Estimated Jaccard similarity of two signatures."""
+        return sum(map(eq, a, b)) / len(a)
+
+
+class NearDuplicateIndex:
+    """LSH index of MinHash signatures.
+
+    Signatures are split into *bands* of ``num_perm // bands`` rows; two
+    notes become candidates when any band matches exactly, which happens
+    with probability ``1 - (1 - s**rows)**bands`` at similarity ``s``.
+    Candidates are kept only if their estimated similarity reaches
+    *threshold*. Entries are grouped by scope (a patient id, or None for
+    one global scope); past *max_entries* the oldest are evicted.
+    """
+
+    def __init__(
+        self,
+        num_perm: int = 128,
+        bands: int = 16,
+        threshold: float = 0.8,
+        max_entries: int = 100_000,
+    ) -> None:
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("threshold must be in (0, 1]")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._buckets: dict[tuple, list[Hashable]] = {}
+        self._entries: OrderedDict[Hashable, tuple[tuple[int, ...], list[tuple]]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def _band_keys(self, signature: tuple[int, ...], scope: Hashable) -> list[tuple]:
+        rows = self.rows
+        return [
+            (scope, band, hash(signature[band * rows : (band + 1) * rows]))
+            for band in range(self.bands)
+        ]
+
+    def add(self, key: Hashable, signature: tuple[int, ...], scope: Hashable = None) -> list[Hashable]:
+        """Index *signature* under *key*; return the keys evicted to make room."""
+        if key in self._entries:
+            self.remove(key)
+        band_keys = self._band_keys(signature, scope)
+        for band_key in band_keys:
+            self._buckets.setdefault(band_key, []).append(key)
+        self._entries[key] = (signature, band_keys)
+        evicted = []
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self.remove(oldest)
+            evicted.append(oldest)
+        return evicted
+
+    def remove(self, key: Hashable) -> None:
+        _, band_keys = self._entries.pop(key)
+        for band_key in band_keys:
+            bucket = self._buckets[band_key]
+            bucket.remove(key)
+            if not bucket:
+                del self._buckets[band_key]
+
+    def query(
+        self, signature: tuple[int, ...], scope: Hashable = None
+    ) -> tuple[Hashable, float] | None:
+        """The most similar indexed key at or above the threshold, with its
+        similarity, or None."""
+        best: tuple[Hashable, float] | None = None
+        seen: set[Hashable] = set()
+        for band_key in self._band_keys(signature, scope):
+            for key in self._buckets.get(band_key, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                similarity = MinHasher.similarity(signature, self._entries[key][0])
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (key, similarity)
+        return best
+
+
+@dataclass
+class DedupStats:
+    """Work done and skipped by an :class:`IncrementalCompressor`.
+
+    Attributes:
+        notes: Notes compressed.
+        reused: Near-duplicates with identical clinical text; the previous
+            state was reused as is.
+        incremental: Near-duplicates re-extracted from changed lines only.
+        fallbacks: Near-duplicates whose merge was ambiguous, so the note
+            was extracted in full.
+        full: Notes with no near-duplicate, extracted in full.
+        small: Notes under ``min_chars``, extracted in full without a
+            lookup.
+        chars_total: Clinical characters across all notes (all characters
+            of notes under ``min_chars``, which are not segmented here).
+        chars_extracted: Characters actually run through extraction.
+    """
+
+    notes: int = 0
+    reused: int = 0
+    incremental: int = 0
+    fallbacks: int = 0
+    full: int = 0
+    small: int = 0
+    chars_total: int = 0
+    chars_extracted: int = 0
+
+    @property
+    def skipped_ratio(self) -> float:
+        """Fraction of clinical characters not run through extraction."""
+        if not self.chars_total:
+            return 0.0
+        return 1.0 - self.chars_extracted / self.chars_total
+
+    def as_dict(self) -> dict[str, Any]:
+        return {**asdict(self), "skipped_ratio": round(self.skipped_ratio, 4)}
+
+
+def _fields(values: dict[str, Any]) -> dict[str, Any]:
+    """The scalar fields the merge reasons about, from
+    :meth:`CompTextProtocol.extract_fields`-style *values*."""
+    protocol = values["meta"].get("active_protocol")
+    fields = {
+        "chief_complaint": values["chief_complaint"],
+        "vitals.hr": values["hr"],
+        "vitals.bp": values["bp"],
+        "vitals.temp": values["temp"],
+        "medication": values["medication"],
+        "protocol": None if protocol == "General" else protocol,
+    }
+    for key, value in values["specialist_data"].items():
+        fields[f"specialist_data.{key}"] = value
+    return fields
+
+
+def _widen(lines: list[str], lo: int, hi: int) -> tuple[int, int]:
+    """``[lo, hi)`` extended by the nearest non-blank line on each side."""
+    while lo > 0:
+        lo -= 1
+        if lines[lo].strip():
+            break
+    while hi < len(lines):
+        hi += 1
+        if lines[hi - 1].strip():
+            break
+    return lo, hi
+
+
+def _changed_ranges(old: list[str], new: list[str]) -> list[tuple[int, int, int, int]]:
+    """The changed regions of *old* and *new* as line ranges
+    ``(old start, old end, new start, new end)``.
+
+    Each region is widened by the nearest non-blank line on either side:
+    the extraction patterns let a label and its value sit on neighbouring
+    lines ("Heart rate:" / "80"), so a changed value is only extracted
+    correctly together with its unchanged label, and vice versa.
+    """
+    # copy-forward edits are local: diff only what lies between the common
+    # prefix and suffix
+    start = 0
+    limit = min(len(old), len(new))
+    while start < limit and old[start] == new[start]:
+        start += 1
+    end = 0
+    while end < limit - start and old[-1 - end] == new[-1 - end]:
+        end += 1
+    middle_old, middle_new = old[start : len(old) - end], new[start : len(new) - end]
+    if not middle_old and not middle_new:
+        return []
+    if middle_old and middle_new:
+        matcher = difflib.SequenceMatcher(None, middle_old, middle_new, autojunk=False)
+        opcodes = [op for op in matcher.get_opcodes() if op[0] != "equal"]
+    else:
+        opcodes = [("replace", 0, len(middle_old), 0, len(middle_new))]
+    ranges: list[list[int]] = []
+    for _, i1, i2, j1, j2 in opcodes:
+        i1, i2 = _widen(old, start + i1, start + i2)
+        j1, j2 = _widen(new, start + j1, start + j2)
+        if ranges and (i1 < ranges[-1][1] or j1 < ranges[-1][3]):
+            ranges[-1][1] = max(ranges[-1][1], i2)
+            ranges[-1][3] = max(ranges[-1][3], j2)
+        else:
+            ranges.append([i1, i2, j1, j2])
+    return [(i1, i2, j1, j2) for i1, i2, j1, j2 in ranges]
+
+
+# Numeric fields and the CompText extractor that fills them.
+_NUMERIC_EXTRACTORS = {"vitals.hr": "hr", "vitals.temp": "temp"}
+
+
+def _state_fields(state: PatientState) -> dict[str, Any]:
+    return _fields(
+        {
+            "chief_complaint": state.chief_complaint,
+            "hr": state.vitals.hr,
+            "bp": state.vitals.bp,
+            "temp": state.vitals.temp,
+            "medication": state.medication,
+            "meta": state.meta,
+            "specialist_data": state.specialist_data,
+        }
+    )
+
+
+class IncrementalCompressor:
+    """CompText compression that reuses work across near-duplicate notes.
+
+    Args:
+        protocol: The protocol used for full extraction (a default
+            :class:`CompTextProtocol` when omitted). Its segmenter picks
+            the clinical text that is fingerprinted and diffed.
+        index: The LSH index (``NearDuplicateIndex()`` when omitted); its
+            threshold decides what counts as a near-duplicate.
+        hasher: Signature builder; must match ``index.num_perm``.
+        scope: ``"patient"`` compares a note with the same patient's notes
+            only; ``"global"`` with every stored note.
+        min_chars: Shorter notes are compressed in full without a lookup;
+            below about 4k characters hashing and diffing cost more than
+            the extraction they save.
+    """
+
+    def __init__(
+        self,
+        protocol: CompTextProtocol | None = None,
+        index: NearDuplicateIndex | None = None,
+        hasher: MinHasher | None = None,
+        scope: str = "patient",
+        min_chars: int = 4000,
+    ) -> None:
+        if scope not in SCOPES:
+            raise ValueError(f"scope must be one of {SCOPES}, got {scope!r}")
+        if min_chars < 0:
+            raise ValueError("min_chars must be non-negative")
+        self.protocol = protocol if protocol is not None else CompTextProtocol()
+        self.index = index if index is not None else NearDuplicateIndex()
+        self.hasher = hasher if hasher is not None else MinHasher(self.index.num_perm)
+        if self.hasher.num_perm != self.index.num_perm:
+            raise ValueError("hasher.num_perm must match index.num_perm")
+        self.scope = scope
+        self.min_chars = min_chars
+        self.stats = DedupStats()
+        self._modules = CodexRouter().modules
+        self._patterns = {field: patterns for field, _, patterns in self.protocol._FIELD_EXTRACTORS}
+        # key -> (clinical text, merge fields, symptoms) of stored notes
+        self._notes: dict[int, tuple[str, dict[str, Any], tuple[str, ...]]] = {}
+        self._next_key = 0
+
+    def compress(self, patient_id: str, raw_text: str | NormalizedText) -> PatientState:
+        """Compress one note of *patient_id*, reusing a near-duplicate's
+        state where that is safe."""
+        text = NormalizedText.of(raw_text)
+        with tracer.span("dedup.compress", chars=len(text)) as span:
+            self.stats.notes += 1
+            if len(text) < self.min_chars:
+                self.stats.small += 1
+                self.stats.chars_total += len(text)
+                self.stats.chars_extracted += len(text)
+                span.set_attribute("outcome", "small")
+                return self.protocol.compress(text)
+            segmenter = self.protocol.segmenter
+            clinical = segmenter.clinical(text).nfc if segmenter is not None else text.nfc
+            self.stats.chars_total += len(clinical)
+            signature = self.hasher.signature(clinical)
+            scope = patient_id if self.scope == "patient" else None
+
+            state = None
+            outcome = "full"
+            match = self.index.query(signature, scope)
+            if match is not None:
+                state, outcome = self._incremental(*self._notes[match[0]], clinical)
+            if state is None:
+                self.stats.chars_extracted += len(clinical)
+                state = self.protocol.compress(text)
+            setattr(self.stats, outcome, getattr(self.stats, outcome) + 1)
+            span.set_attribute("outcome", outcome)
+
+            state._original_token_count = max(len(text) // 4, 1)
+            state._compressed_token_count = max(len(state.to_compressed_json()) // 4, 1)
+            key = self._next_key
+            self._next_key += 1
+            self._notes[key] = (clinical, _state_fields(state), tuple(state.symptoms))
+            for evicted in self.index.add(key, signature, scope):
+                del self._notes[evicted]
+        return state
+
+    # ------------------------------------------------------------------
+    # incremental extraction
+    # ------------------------------------------------------------------
+
+    def _incremental(
+        self,
+        previous_text: str,
+        previous: dict[str, Any],
+        previous_symptoms: tuple[str, ...],
+        text: str,
+    ) -> tuple[PatientState | None, str]:
+        """Re-extract *text* from its diff against a near-duplicate; returns
+        ``(None, "fallbacks")`` when the merge would be ambiguous."""
+        if text == previous_text:
+            return self._build(previous, list(previous_symptoms)), "reused"
+        old_lines, new_lines = previous_text.splitlines(keepends=True), text.splitlines(keepends=True)
+        ranges = _changed_ranges(old_lines, new_lines)
+        hunks = [("".join(old_lines[i1:i2]), "".join(new_lines[j1:j2])) for i1, i2, j1, j2 in ranges]
+        self.stats.chars_extracted += sum(len(old) + len(new) for old, new in hunks)
+        # the previous note without its changed lines
+        bounds = [0] + [i for i1, i2, _, _ in ranges for i in (i1, i2)] + [len(old_lines)]
+        unchanged = NormalizedText(
+            "\n".join("".join(old_lines[lo:hi]) for lo, hi in zip(bounds[::2], bounds[1::2]))
+        )
+
+        module = self._module(previous["protocol"])
+        removed_fields, removed_symptoms = self._extract([old for old, _ in hunks], module)
+        added_fields, added_symptoms = self._extract([new for _, new in hunks], module)
+        merged = self._merge(previous, removed_fields, added_fields, unchanged)
+        if merged is None:
+            return None, "fallbacks"
+        if (set(removed_symptoms) - set(added_symptoms)).intersection(previous_symptoms):
+            return None, "fallbacks"  # may survive in an unchanged line, or not
+        symptoms = list(previous_symptoms)
+        symptoms.extend(s for s in added_symptoms if s not in symptoms)
+        return self._build(merged, symptoms), "incremental"
+
+    def _module(self, label: str | None) -> ClinicalModule | None:
+        for module in self._modules:
+            if module.protocol_label == label:
+                return module
+        return None
+
+    def _extract(
+        self, hunks: list[str], module: ClinicalModule | None
+    ) -> tuple[dict[str, Any], list[str]]:
+        """Merge fields and symptoms of *hunks*, each extracted on its own
+        (so a label at the end of one cannot pair with a value at the start
+        of the next); a field takes its first hunk's value. Specialist
+        fields come from *module* (the previous note's codex) whatever the
+        hunks alone would route to. The hunks are already clinical, so they
+        are not segmented again."""
+        fields: dict[str, Any] = {}
+        symptoms: list[str] = []
+        for text in hunks:
+            if not text:
+                continue
+            normalized = NormalizedText(text)
+            values = self.protocol.extract_fields(normalized)
+            specialist = {
+                key: values["specialist_data"][key]
+                for key in ("diagnosis", "allergies")
+                if key in values["specialist_data"]
+            }
+            if module is not None:
+                specialist.update(module.extract(normalized))
+            values["specialist_data"] = specialist
+            for name, value in _fields(values).items():
+                if fields.get(name) is None:
+                    fields[name] = value
+            symptoms.extend(s for s in values["symptoms"] if s not in symptoms)
+        return fields, symptoms
+
+    def _may_survive(self, name: str, value: Any, unchanged: NormalizedText) -> bool:
+        """Whether the lines outside the hunks could still supply *value*
+        for field *name*.
+
+        Extracted strings are copied from the text, so one that is absent
+        cannot come from it. Numbers are too short for that test ("80" is
+        in "BP 120/80"), so their field's patterns are searched instead;
+        any other value is assumed to survive.
+        """
+        if isinstance(value, str):
+            return value.casefold() in unchanged.folded
+        field = _NUMERIC_EXTRACTORS.get(name)
+        if field is not None:
+            return any(unchanged.search(pattern) for pattern in self._patterns[field])
+        return True
+
+    def _merge(
+        self,
+        previous: dict[str, Any],
+        removed: dict[str, Any],
+        added: dict[str, Any],
+        unchanged: NormalizedText,
+    ) -> dict[str, Any] | None:
+        """Previous fields updated by the hunks, or None when the result
+        depends on positions the hunks alone do not tell.
+
+        A previous value found again in a removed hunk is taken to come
+        from there only when the *unchanged* lines cannot supply it too.
+        """
+        merged = {}
+        for name in previous.keys() | removed.keys() | added.keys():
+            before, gone, new = previous.get(name), removed.get(name), added.get(name)
+            source_removed = gone is not None and gone == before
+            if source_removed and name != "protocol" and self._may_survive(name, before, unchanged):
+                return None  # an unchanged copy may be the source
+            if name == "protocol" and new not in (None, before):
+                return None  # routing follows module order, not position
+            if new is None:
+                if source_removed:
+                    return None  # may survive in an unchanged line, or not
+                merged[name] = before
+            elif before is None or source_removed:
+                merged[name] = new
+            elif new != before:
+                return None  # which occurrence comes first is unknown
+            else:
+                merged[name] = before
+        return merged
+
+    @staticmethod
+    def _build(fields: dict[str, Any], symptoms: list[str]) -> PatientState:
+        specialist = {
+            name.split(".", 1)[1]: value
+            for name, value in fields.items()
+            if name.startswith("specialist_data.")
+        }
+        return PatientState(
+            chief_complaint=fields["chief_complaint"],
+            vitals=Vitals(hr=fields["vitals.hr"], bp=fields["vitals.bp"], temp=fields["vitals.temp"]),
+            medication=fields["medication"],
+            symptoms=symptoms,
+            meta={"active_protocol": fields["protocol"] or "General"},
+            specialist_data=specialist,
+        )
@@ -0,0 +1,228 @@
+"""FHIR Bulk - Streaming FHIR Bulk Data (NDJSON) export of many PatientStates.
+
+``PatientState.to_fhir`` builds a nested dict Bundle per patient, calling
+``uuid4()`` and ``datetime.now()`` for every entry, and each Bundle is then
+``json.dumps``-ed. For bulk handoff this module writes the same
+Observations as NDJSON lines directly:
+
+- the ``code`` blocks and unit suffixes are serialised once at import;
+- one timestamp is taken per batch;
+- resource ids are ``<batch uuid>-<counter>`` instead of a uuid each;
+- only the variable values go through ``json.dumps``.
+
+:func:`export_bulk` writes one ``<ResourceType>.ndjson`` file per resource
+type, as in a FHIR Bulk Data ``$export``, and returns the manifest-style
+``output`` list with throughput in resources/sec.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import IO, Iterable, Iterator, Sequence
+
+from src.core.models import PatientState
+
+_dumps = json.dumps
+
+
+def _compact(value: object) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+
+def _code_block(code: str, display: str, text: str | None = None) -> str:
+    block: dict = {"coding": [{"system": "http://loinc.org", "code": code, "display": display}]}
+    if text is not None:
+        block["text"] = text
+    return _compact(block)
+
+
+# Precomputed fragments (same codes and units as PatientState.to_fhir).
+_CODE_CHIEF_COMPLAINT = _code_block("8661-1", "Chief complaint", "Chief complaint")
+_CODE_HEART_RATE = _code_block("8867-4", "Heart rate", "Heart rate")
+_CODE_BP_PANEL = _code_block("85354-9", "Blood pressure panel", "Blood pressure")
+_CODE_TEMPERATURE = _code_block("8310-5", "Body temperature", "Body temperature")
+_CODE_SYSTOLIC = _code_block("8480-6", "Systolic blood pressure")
+_CODE_DIASTOLIC = _code_block("8462-4", "Diastolic blood pressure")
+
+_UCUM = '"system":"http://unitsofmeasure.org"'
+_HR_UNIT = f',"unit":"beats/minute",{_UCUM},"code":"/min"}}'
+_MMHG_UNIT = f',"unit":"mmHg",{_UCUM},"code":"mm[Hg]"}}}}'
+_TEMP_UNIT = f',"unit":"degrees Celsius",{_UCUM},"code":"Cel"}}'
+
+_FLUSH_LINES = 1024
+
+
+@dataclass
+class BulkExportStats:
+    """Counts and timing of one bulk export."""
+
+    batch_id: str
+    timestamp: str
+    states: int = 0
+    resources: dict[str, int] = field(default_factory=dict)
+    bytes_written: int = 0
+    elapsed_s: float = 0.0
+    output: list[dict[str, object]] = field(default_factory=list)
+
+    @property
+    def total_resources(self) -> int:
+        return sum(self.resources.values())
+
+    @property
+    def resources_per_sec(self) -> float:
+        return self.total_resources / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+
+class ObservationWriter:
+    """Renders Observation NDJSON lines for one export batch.
+
+    Args:
+        timestamp: ``effectiveDateTime`` of every resource (now, if omitted).
+        batch_id: Id prefix (a fresh uuid hex, if omitted).
+    """
+
+    def __init__(self, timestamp: str | None = None, batch_id: str | None = None) -> None:
+        self.timestamp = timestamp or datetime.now(timezone.utc).isoformat()
+        self.batch_id = batch_id or uuid.uuid4().hex
+        self.count = 0
+        self._effective = f',"effectiveDateTime":{_dumps(self.timestamp)},'
+
+    def _head(self, code_block: str, subject: str | None) -> str:
+        self.count += 1
+        subject_part = (
+            f',"subject":{{"reference":{_dumps("Patient/" + subject)}}}' if subject else ""
+        )
+        return (
+            f'{{"resourceType":"Observation","id":"{self.batch_id}-{self.count}",'
+            f'"status":"final","code":{code_block}{subject_part}{self._effective}'
+        )
+
+    def lines(self, state: PatientState, subject: str | None = None) -> Iterator[str]:
+        """Yield one NDJSON line (with trailing newline) per Observation of
+        *state*, in ``to_fhir`` entry order."""
+        if state.chief_complaint:
+            yield (
+                self._head(_CODE_CHIEF_COMPLAINT, subject)
+                + f'"valueString":{_dumps(state.chief_complaint)}}}\n'
+            )
+        vitals = state.vitals
+        if vitals.hr is not None:
+            yield (
+                self._head(_CODE_HEART_RATE, subject)
+                + f'"valueQuantity":{{"value":{_dumps(vitals.hr)}{_HR_UNIT}}}\n'
+            )
+        if vitals.bp is not None:
+            yield (
+                self._head(_CODE_BP_PANEL, subject)
+                + f'"component":{_bp_components(vitals.bp)}}}\n'
+            )
+        if vitals.temp is not None:
+            yield (
+                self._head(_CODE_TEMPERATURE, subject)
+                + f'"valueQuantity":{{"value":{_dumps(vitals.temp)}{_TEMP_UNIT}}}\n'
+            )
+
+
+def _bp_components(bp: str) -> str:
+    # Same leniency as to_fhir: unparseable readings export no components.
+    parts = bp.split("/")
+    try:
+        components = [f'{{"code":{_CODE_SYSTOLIC},"valueQuantity":{{"value":{int(parts[0])}{_MMHG_UNIT}']
+        if len(parts) >= 2:
+            components.append(
+                f'{{"code":{_CODE_DIASTOLIC},"valueQuantity":{{"value":{int(parts[1])}{_MMHG_UNIT}'
+            )
+    except ValueError:
+        return "[]"
+    return "[" + ",".join(components) + "]"
+
+
+def _subjects(states: Sequence[PatientState], subjects: Sequence[str] | None) -> Sequence:
+    if subjects is None:
+        return [None] * len(states)
+    if len(subjects) != len(states):
+        raise ValueError("subjects must have one patient id per state")
+    return subjects
+
+
+def write_observations_ndjson(
+    states: Iterable[PatientState],
+    stream: IO[str],
+    subjects: Sequence[str] | None = None,
+    timestamp: str | None = None,
+    batch_id: str | None = None,
+) -> BulkExportStats:
+    """Write every Observation of *states* to *stream*, one per line.
+
+    Args:
+        states: Patient states to export.
+        stream: Text stream receiving the NDJSON.
+        subjects: Optional patient ids, one per state, added as
+            ``subject`` references (``Patient/<id>``).
+        timestamp: Batch ``effectiveDateTime`` (now, if omitted).
+        batch_id: Resource id prefix (a fresh uuid hex, if omitted).
+    """
+    states = list(states)
+    writer = ObservationWriter(timestamp, batch_id)
+    start = time.perf_counter()
+    buffer: list[str] = []
+    written = 0
+    for state, subject in zip(states, _subjects(states, subjects)):
+        buffer.extend(writer.lines(state, subject))
+        if len(buffer) >= _FLUSH_LINES:
+            chunk = "".join(buffer)
+            stream.write(chunk)
+            written += len(chunk)
+            buffer.clear()
+    if buffer:
+        chunk = "".join(buffer)
+        stream.write(chunk)
+        written += len(chunk)
+    return BulkExportStats(
+        batch_id=writer.batch_id,
+        timestamp=writer.timestamp,
+        states=len(states),
+        resources={"Observation": writer.count},
+        bytes_written=written,  # lines are ASCII (json.dumps escapes)
+        elapsed_s=time.perf_counter() - start,
+    )
+
+
+def export_bulk(
+    states: Iterable[PatientState],
+    directory: str,
+    subjects: Sequence[str] | None = None,
+    timestamp: str | None = None,
+    batch_id: str | None = None,
+) -> BulkExportStats:
+    """Write a Bulk Data style export of *states* into *directory*.
+
+    Produces ``Observation.ndjson`` and, when *subjects* are given,
+    ``Patient.ndjson`` with one minimal Patient per distinct id. The
+    returned stats' ``output`` mirrors the ``$export`` manifest entries.
+    """
+    os.makedirs(directory, exist_ok=True)
+    states = list(states)
+    start = time.perf_counter()
+    observation_path = os.path.join(directory, "Observation.ndjson")
+    with open(observation_path, "w", encoding="utf-8") as fh:
+        stats = write_observations_ndjson(states, fh, subjects, timestamp, batch_id)
+    stats.output.append(
+        {"type": "Observation", "url": observation_path, "count": stats.resources["Observation"]}
+    )
+    if subjects is not None:
+        patients = list(dict.fromkeys(subjects))
+        patient_path = os.path.join(directory, "Patient.ndjson")
+        chunk = "".join(f'{{"resourceType":"Patient","id":{_dumps(pid)}}}\n' for pid in patients)
+        with open(patient_path, "w", encoding="utf-8") as fh:
+            fh.write(chunk)
+        stats.resources["Patient"] = len(patients)
+        stats.bytes_written += len(chunk)
+        stats.output.append({"type": "Patient", "url": patient_path, "count": len(patients)})
+    stats.elapsed_s = time.perf_counter() - start
+    return stats
@@ -0,0 +1,391 @@
+"""FHIR Ingest - Structured FHIR Observations straight into PatientState.
+
+Inputs that are already FHIR need no prose round-trip through the
+CompText regexes: Observations are mapped by LOINC code (the codes
+``PatientState.to_fhir`` emits) directly onto fields.
+
+- chief complaint ``8661-1`` → ``chief_complaint``
+- heart rate ``8867-4`` → ``vitals.hr``
+- blood pressure panel ``85354-9``, or standalone systolic ``8480-6`` and
+  diastolic ``8462-4`` → ``vitals.bp``
+- body temperature ``8310-5`` → ``vitals.temp``
+
+When a patient has several Observations for a field, the one with the
+latest ``effectiveDateTime`` wins; instants are compared in UTC, so
+``+02:00`` and ``Z`` offsets order correctly. Large inputs are streamed:
+NDJSON line by line, and Bundles with an incremental parser that decodes
+one ``entry`` at a time, so memory stays bounded by the largest single
+resource. Several Bundles in one stream (one per NDJSON line, or simply
+concatenated) are read in turn.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import re
+from datetime import datetime, timezone
+from typing import IO, Any, Iterable, Iterator
+
+from src.core.models import PatientState, Vitals
+
+try:
+    import orjson
+
+    _ORJSON_AVAILABLE = True
+except ImportError:
+    _ORJSON_AVAILABLE = False
+
+# NDJSON lines are parsed with orjson when installed.
+_loads = orjson.loads if _ORJSON_AVAILABLE else json.loads
+
+LOINC_SYSTEM = "http://loinc.org"
+
+_CHIEF_COMPLAINT = "8661-1"
+_HEART_RATE = "8867-4"
+_BP_PANEL = "85354-9"
+_SYSTOLIC = "8480-6"
+_DIASTOLIC = "8462-4"
+_TEMPERATURE = "8310-5"
+_KNOWN_CODES = frozenset(
+    (_CHIEF_COMPLAINT, _HEART_RATE, _BP_PANEL, _SYSTOLIC, _DIASTOLIC, _TEMPERATURE)
+)
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_BUNDLE_HEAD = re.compile(r'\s*\{\s*"resourceType"\s*:\s*"Bundle"')
+
+
+# ---------------------------------------------------------------------------
+# Observation mapping
+# ---------------------------------------------------------------------------
+
+
+def _loinc_code(concept: Any) -> str | None:
+    if not isinstance(concept, dict):
+        return None
+    for coding in concept.get("coding") or ():
+        code = coding.get("code")
+        if code in _KNOWN_CODES and coding.get("system", LOINC_SYSTEM) == LOINC_SYSTEM:
+            return code
+    return None
+
+
+def _quantity(holder: dict) -> float | None:
+    quantity = holder.get("valueQuantity")
+    if isinstance(quantity, dict):
+        value = quantity.get("value")
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return value
+    return None
+
+
+def _mmhg(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else str(value)
+
+
+def _instant(value: Any) -> float:
+    """``effectiveDateTime`` as a UTC timestamp. Partial dates (``2026``,
+    ``2026-01``) stand for their start and times without an offset are
+    taken as UTC; missing or unparseable values sort before any instant."""
+    if not isinstance(value, str) or not value:
+        return float("-inf")
+    if len(value) == 4:
+        value += "-01-01"
+    elif len(value) == 7:
+        value += "-01"
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        return float("-inf")
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+class StateBuilder:
+    """Accumulates Observations for one patient into a :class:`PatientState`."""
+
+    __slots__ = ("_values", "_times")
+
+    def __init__(self) -> None:
+        self._values: dict[str, Any] = {}
+        self._times: dict[str, float] = {}
+
+    def _set(self, key: str, value: Any, effective: float) -> None:
+        if value is None:
+            return
+        if key not in self._values or effective >= self._times[key]:
+            self._values[key] = value
+            self._times[key] = effective
+
+    def add(self, resource: dict) -> bool:
+        """Apply one Observation; returns whether it mapped to a field."""
+        code = _loinc_code(resource.get("code"))
+        if code is None:
+            return False
+        effective = _instant(resource.get("effectiveDateTime"))
+        if code == _CHIEF_COMPLAINT:
+            text = resource.get("valueString")
+            if text is None:
+                text = (resource.get("valueCodeableConcept") or {}).get("text")
+            self._set("chief_complaint", text, effective)
+        elif code == _HEART_RATE:
+            self._set("hr", _quantity(resource), effective)
+        elif code == _TEMPERATURE:
+            self._set("temp", _quantity(resource), effective)
+        elif code == _BP_PANEL:
+            for component in resource.get("component") or ():
+                component_code = _loinc_code(component.get("code"))
+                if component_code == _SYSTOLIC:
+                    self._set("systolic", _quantity(component), effective)
+                elif component_code == _DIASTOLIC:
+                    self._set("diastolic", _quantity(component), effective)
+        elif code == _SYSTOLIC:
+            self._set("systolic", _quantity(resource), effective)
+        elif code == _DIASTOLIC:
+            self._set("diastolic", _quantity(resource), effective)
+        return True
+
+    def build(self) -> PatientState:
+        # Values are type-checked as they are collected, so the models are
+        # constructed without re-validation.
+        values = self._values
+        bp = None
+        if "systolic" in values:
+            bp = _mmhg(values["systolic"])
+            if "diastolic" in values:
+                bp += "/" + _mmhg(values["diastolic"])
+        hr, temp = values.get("hr"), values.get("temp")
+        chief_complaint = values.get("chief_complaint")
+        return PatientState.model_construct(
+            chief_complaint=chief_complaint if isinstance(chief_complaint, str) else None,
+            vitals=Vitals.model_construct(
+                hr=None if hr is None else float(hr),
+                bp=bp,
+                temp=None if temp is None else float(temp),
+            ),
+            symptoms=[],
+            meta={},
+            specialist_data={},
+        )
+
+
+def iter_observations(resource: Any) -> Iterator[dict]:
+    """Yield the Observations in *resource*: a Bundle, an Observation, or a
+    list of either."""
+    if isinstance(resource, list):
+        for item in resource:
+            yield from iter_observations(item)
+    elif isinstance(resource, dict):
+        kind = resource.get("resourceType")
+        if kind == "Observation":
+            yield resource
+        elif kind == "Bundle":
+            for entry in resource.get("entry") or ():
+                yield from iter_observations(entry.get("resource"))
+
+
+def state_from_fhir(resource: Any) -> PatientState:
+    """Map every Observation in *resource* onto one :class:`PatientState`."""
+    builder = StateBuilder()
+    for observation in iter_observations(resource):
+        builder.add(observation)
+    return builder.build()
+
+
+def states_from_resources(resources: Iterable[dict]) -> dict[str | None, PatientState]:
+    """Group Observations by ``subject.reference`` and build one state per
+    subject (``None`` for Observations without a subject)."""
+    builders: dict[str | None, StateBuilder] = {}
+    for resource in resources:
+        for observation in iter_observations(resource):
+            subject = (observation.get("subject") or {}).get("reference")
+            builder = builders.get(subject)
+            if builder is None:
+                builder = builders[subject] = StateBuilder()
+            builder.add(observation)
+    return {subject: builder.build() for subject, builder in builders.items()}
+
+
+# ---------------------------------------------------------------------------
+# Streaming readers
+# ---------------------------------------------------------------------------
+
+
+def iter_ndjson(stream: IO[str], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[dict]:
+    """Yield one resource per non-blank NDJSON line of *stream*."""
+    pending = ""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        lines = (pending + chunk).split("\n")
+        pending = lines.pop()
+        for line in lines:
+            if line.strip():
+                yield _loads(line)
+    if pending.strip():
+        yield _loads(pending)
+
+
+class _IncrementalDecoder:
+    """Decodes JSON values one at a time from a text stream using
+    ``JSONDecoder.raw_decode`` on a sliding buffer."""
+
+    _WHITESPACE = " \t\n\r"
+
+    def __init__(self, stream: IO[str], chunk_size: int) -> None:
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        chunk = self._stream.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character ("" at end of input)."""
+        while True:
+            buffer, pos = self._buffer, self._pos
+            while pos < len(buffer) and buffer[pos] in self._WHITESPACE:
+                pos += 1
+            self._pos = pos
+            if pos < len(buffer):
+                return buffer[pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError(f"expected {char!r} at offset {self._pos} of buffered input")
+        self._pos += 1
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number at the very end of the buffer may continue in the
+            # next chunk; only trust it once more input (or EOF) follows.
+            if end == len(self._buffer) and not self._eof and self._fill():
+                continue
+            self._pos = end
+            return value
+
+
+def iter_bundle_resources(
+    stream: IO[str], chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[dict]:
+    """Yield ``entry[].resource`` of each (possibly very large) Bundle on
+    *stream*, decoding one entry at a time. Top-level values are read until
+    the input ends, so NDJSON with one Bundle per line works too; a lone
+    non-Bundle resource is yielded as is, and anything other than a JSON
+    object raises :class:`ValueError`."""
+    reader = _IncrementalDecoder(stream, chunk_size)
+    while True:
+        yield from _object_resources(reader)
+        if not reader.peek():
+            return
+
+
+def _object_resources(reader: _IncrementalDecoder) -> Iterator[dict]:
+    """Resources of the next top-level object on *reader*."""
+    reader.expect("{")
+    fields: dict[str, Any] = {}
+    while reader.peek() != "}":
+        key = reader.value()
+        reader.expect(":")
+        if key == "entry" and reader.peek() == "[":
+            reader.expect("[")
+            if reader.peek() != "]":
+                while True:
+                    entry = reader.value()
+                    if isinstance(entry, dict) and entry.get("resource") is not None:
+                        yield entry["resource"]
+                    if reader.peek() != ",":
+                        break
+                    reader.expect(",")
+            reader.expect("]")
+        else:
+            fields[key] = reader.value()
+        if reader.peek() != ",":
+            break
+        reader.expect(",")
+    reader.expect("}")
+    if fields.get("resourceType") not in (None, "Bundle"):
+        yield fields  # a single non-Bundle resource
+
+
+def iter_fhir_resources(
+    stream: IO[str], chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[dict]:
+    """Yield resources from NDJSON or a single JSON Bundle/resource.
+
+    A Bundle whose ``resourceType`` comes first is recognised from the
+    first chunk; otherwise the first line decides (a complete non-Bundle
+    resource means NDJSON). Bundles are read one after another until the
+    input ends.
+    """
+    head = stream.read(chunk_size)
+    if _BUNDLE_HEAD.match(head):
+        yield from iter_bundle_resources(_Chained(head, stream), chunk_size)
+        return
+    while "\n" not in head:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        head += chunk
+    first_line = head.split("\n", 1)[0].strip()
+    rest = _Chained(head, stream)
+    try:
+        first = json.loads(first_line) if first_line else None
+    except json.JSONDecodeError:
+        first = None
+    if isinstance(first, dict) and first.get("resourceType") != "Bundle":
+        for resource in iter_ndjson(rest, chunk_size):
+            if resource.get("resourceType") == "Bundle":
+                for entry in resource.get("entry") or ():
+                    if isinstance(entry, dict) and entry.get("resource") is not None:
+                        yield entry["resource"]
+            else:
+                yield resource
+        return
+    for resource in iter_bundle_resources(rest, chunk_size):
+        yield resource
+
+
+class _Chained(io.TextIOBase):
+    """Replays an already-read *head* before the rest of *stream*."""
+
+    def __init__(self, head: str, stream: IO[str]) -> None:
+        self._head = head
+        self._stream = stream
+
+    def read(self, size: int | None = -1) -> str:
+        if self._head:
+            head, self._head = self._head, ""
+            return head
+        return self._stream.read(size)
+
+
+def ingest_fhir(stream: IO[str], chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict[str | None, PatientState]:
+    """Stream NDJSON or a Bundle from *stream* into one state per subject."""
+    return states_from_resources(iter_fhir_resources(stream, chunk_size))
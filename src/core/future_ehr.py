@@ -7,85 +7,308 @@ intake processing.
 
 from __future__ import annotations
 
+import functools
 import json
-from typing import Any
+import time
+from dataclasses import asdict
+from typing import Any, Iterable, Mapping, Sequence
 
+from src.agents.triage_agent import TriageAgent
+from src.core import codec as record_codec
+from src.core.codex import CodexRouter
 from src.core.comptext import CompTextProtocol
+from src.core.pipeline import PIPELINE_VERSION
+from src.core.record_store import (
+    InMemoryRecordStore,
+    Payload,
+    RecordMetrics,
+    RecordStore,
+    RecordVersion,
+)
+
+CODECS = ("json", "binary")
+
+
+@functools.lru_cache(maxsize=1)
+def _protocol_labels() -> dict[str, str]:
+    """Short protocol names ("cardiology") accepted by query(), mapped to
+    the meta.active_protocol labels the store indexes. Built on first use
+    so importing this module does not construct a router."""
+    labels = {module.name.lower(): module.protocol_label for module in CodexRouter().modules}
+    labels["general"] = "General"
+    return labels
 
 
 class AINativeRecord:
     """Simulates an AI-Native Electronic Health Record.
 
-    Records are compressed via CompText and stored as JSON in an in-memory
-    dictionary (simulating a shared database).
+    Records are compressed via CompText and stored in a
+    :class:`~src.core.record_store.RecordStore` — in memory by default, or
+    e.g. a ``SQLiteRecordStore`` shared across workers and restarts. Each
+    save appends a timestamped version indexed by active protocol and
+    triage priority, so :meth:`history` and :meth:`query` answer questions
+    like "P1 cardiology records in the last 6 hours" without decoding
+    unrelated records. Size and timing metrics are stored with each version,
+    so :meth:`get_stats` and :meth:`bulk_stats` need no raw text.
+
+    Args:
+        store: Backing store (in-memory when omitted).
+        codec: ``"json"`` stores compact JSON text; ``"binary"`` stores the
+            smaller :mod:`src.core.codec` encoding. Loads detect the format
+            per record, so a store may hold both.
     """
 
-    def __init__(self) -> None:
-        self._db: dict[str, str] = {}
+    def __init__(self, store: RecordStore | None = None, codec: str = "json") -> None:
+        if codec not in CODECS:
+            raise ValueError(f"codec must be one of {CODECS}, got {codec!r}")
+        self._store = store if store is not None else InMemoryRecordStore()
         self._protocol = CompTextProtocol()
+        self._triage = TriageAgent()
+        self.codec = codec
+
+    @property
+    def store(self) -> RecordStore:
+        """The backing record store."""
+        return self._store
 
-    def save_record(self, patient_id: str, raw_text: str) -> dict[str, Any]:
-        """Compress *raw_text* and persist it under *patient_id*.
+    def save_record(
+        self, patient_id: str, raw_text: str, recorded_at: float | None = None
+    ) -> dict[str, Any]:
+        """Compress *raw_text* and persist it as a new version of *patient_id*.
 
         Args:
             patient_id: Unique patient identifier.
             raw_text: Free-form clinical text.
+            recorded_at: Version timestamp (epoch seconds); defaults to now.
 
         Returns:
-            A dict with ``patient_id``, ``compressed_json``, and size
-            metrics (``raw_chars``, ``compressed_chars``).
+            A dict with ``patient_id``, ``compressed_json``, and the stored
+            metrics (``raw_chars``, ``raw_tokens``, ``compressed_chars``,
+            ``compressed_tokens``, ``compressed_bytes``, ``compression_ms``,
+            ``pipeline_version``).
         """
+        version, compressed_json = self._version(patient_id, raw_text, recorded_at)
+        self._store.put_version(version)
+        return self._save_result(version, compressed_json)
+
+    def save_many(
+        self, records: Mapping[str, str] | Iterable[tuple[str, str]]
+    ) -> list[dict[str, Any]]:
+        """Compress and persist many ``patient_id -> raw_text`` records
+        with a single bulk write.
+
+        Returns:
+            One :meth:`save_record`-style result per record, in order.
+        """
+        items = list(records.items() if isinstance(records, Mapping) else records)
+        now = time.time()
+        results = []
+        versions = []
+        for patient_id, raw_text in items:
+            version, compressed_json = self._version(patient_id, raw_text, now)
+            versions.append(version)
+            results.append(self._save_result(version, compressed_json))
+        self._store.put_many(versions)
+        return results
+
+    def _version(
+        self, patient_id: str, raw_text: str, recorded_at: float | None
+    ) -> tuple[RecordVersion, str]:
+        start = time.perf_counter()
         state = self._protocol.compress(raw_text)
         compressed_json = state.to_compressed_json()
-        self._db[patient_id] = compressed_json
+        if self.codec == "binary":
+            payload: Payload = record_codec.encode(state)
+        else:
+            payload = compressed_json
+        compression_ms = (time.perf_counter() - start) * 1000
+        metrics = RecordMetrics(
+            raw_chars=len(raw_text),
+            raw_tokens=_estimate_tokens(len(raw_text)),
+            compressed_chars=len(compressed_json),
+            compressed_tokens=_estimate_tokens(len(compressed_json)),
+            compressed_bytes=_stored_bytes(payload),
+            compression_ms=round(compression_ms, 4),
+            pipeline_version=PIPELINE_VERSION,
+        )
+        version = RecordVersion(
+            patient_id=patient_id,
+            recorded_at=time.time() if recorded_at is None else recorded_at,
+            payload=payload,
+            protocol=state.meta.get("active_protocol"),
+            priority=self._triage.triage(state).priority_level,
+            metrics=metrics,
+        )
+        return version, compressed_json
+
+    @staticmethod
+    def _decode(payload: Payload) -> dict[str, Any]:
+        if record_codec.is_encoded(payload):
+            return record_codec.decode_dict(payload)
+        return json.loads(payload)
 
+    @staticmethod
+    def _save_result(version: RecordVersion, compressed_json: str) -> dict[str, Any]:
         return {
-            "patient_id": patient_id,
+            "patient_id": version.patient_id,
             "compressed_json": compressed_json,
-            "raw_chars": len(raw_text),
-            "compressed_chars": len(compressed_json),
+            **asdict(version.metrics),
         }
 
     def load_record(self, patient_id: str) -> dict[str, Any] | None:
         """Retrieve the compressed record for *patient_id*.
 
         Returns:
-            Parsed JSON dict, or ``None`` if the patient is not found.
+            The compact record dict, or ``None`` if the patient is not found.
         """
-        stored = self._db.get(patient_id)
+        stored = self._store.get(patient_id)
         if stored is None:
             return None
-        return json.loads(stored)
+        return self._decode(stored)
+
+    def load_many(self, patient_ids: Sequence[str]) -> dict[str, dict[str, Any] | None]:
+        """Retrieve several records with one bulk lookup.
+
+        Returns:
+            ``{patient_id: record dict or None}`` for every requested id.
+        """
+        found = self._store.get_many(patient_ids)
+        return {
+            patient_id: self._decode(found[patient_id]) if patient_id in found else None
+            for patient_id in patient_ids
+        }
+
+    def history(
+        self, patient_id: str, since: float | None = None, until: float | None = None
+    ) -> list[dict[str, Any]]:
+        """Every saved version of *patient_id* in ``[since, until]``
+        (epoch seconds), oldest first."""
+        return [
+            self._version_result(v) for v in self._store.history(patient_id, since, until)
+        ]
 
-    def get_stats(self, patient_id: str, raw_text: str) -> dict[str, Any]:
+    def query(
+        self,
+        protocol: str | None = None,
+        priority: str | None = None,
+        since: float | None = None,
+        until: float | None = None,
+        limit: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """Record versions matching all given filters, newest first.
+
+        Args:
+            protocol: Active protocol, as its label (``meta.active_protocol``)
+                or short name such as ``"cardiology"``.
+            priority: Triage priority (``"P1"``, ``"P2"``, ``"P3"``).
+            since: Earliest ``recorded_at`` (epoch seconds), inclusive.
+            until: Latest ``recorded_at`` (epoch seconds), inclusive.
+            limit: Maximum number of versions returned.
+
+        Only matching payloads are decoded.
+        """
+        if protocol is not None:
+            protocol = _protocol_labels().get(protocol.lower(), protocol)
+        versions = self._store.query(
+            protocol=protocol, priority=priority, since=since, until=until, limit=limit
+        )
+        return [self._version_result(v) for v in versions]
+
+    def _version_result(self, version: RecordVersion) -> dict[str, Any]:
+        return {
+            "patient_id": version.patient_id,
+            "recorded_at": version.recorded_at,
+            "protocol": version.protocol,
+            "priority": version.priority,
+            "record": self._decode(version.payload),
+        }
+
+    def get_stats(self, patient_id: str, raw_text: str | None = None) -> dict[str, Any]:
         """Return comparison metrics for *patient_id*.
 
         Args:
             patient_id: Unique patient identifier (must already be saved).
-            raw_text: The original uncompressed text for comparison.
+            raw_text: The original uncompressed text for comparison. Optional:
+                by default the metrics stored with the latest version are
+                used; records saved without metrics still need it.
 
         Returns:
             A dict with storage and token savings metrics.
         """
-        stored = self._db.get(patient_id)
+        if raw_text is None:
+            version = self._store.latest(patient_id)
+            if version is None:
+                return {"error": "Patient not found"}
+            if version.metrics is None:
+                return {"error": "No stored metrics for patient; pass raw_text"}
+            metrics = asdict(version.metrics)
+            return {
+                "patient_id": patient_id,
+                "recorded_at": version.recorded_at,
+                **metrics,
+                **_savings(metrics),
+            }
+
+        stored = self._store.get(patient_id)
         if stored is None:
             return {"error": "Patient not found"}
 
         raw_chars = len(raw_text)
-        compressed_chars = len(stored)
-        raw_tokens = max(1, raw_chars // 4)
-        compressed_tokens = max(1, compressed_chars // 4)
-
-        return {
+        if isinstance(stored, str):
+            compressed_chars = len(stored)
+        else:
+            compressed_chars = len(json.dumps(self._decode(stored), separators=(",", ":")))
+        stats = {
             "patient_id": patient_id,
             "raw_chars": raw_chars,
             "compressed_chars": compressed_chars,
-            "storage_saved_pct": round(
-                (1 - compressed_chars / raw_chars) * 100, 1
-            ) if raw_chars > 0 else 0.0,
-            "raw_tokens": raw_tokens,
-            "compressed_tokens": compressed_tokens,
-            "tokens_saved_pct": round(
-                (1 - compressed_tokens / raw_tokens) * 100, 1
-            ) if raw_tokens > 0 else 0.0,
+            "compressed_bytes": _stored_bytes(stored),
+            "raw_tokens": _estimate_tokens(raw_chars),
+            "compressed_tokens": _estimate_tokens(compressed_chars),
+        }
+        stats.update(_savings(stats))
+        return stats
+
+    def bulk_stats(self) -> dict[str, Any]:
+        """Fleet-wide savings across every stored version.
+
+        Read from the store's running totals, so the cost does not grow
+        with the number of records.
+        """
+        totals = self._store.totals()
+        measured = totals["measured_versions"]
+        return {
+            "records": totals["versions"],
+            "measured_records": measured,
+            "raw_chars": totals["raw_chars"],
+            "compressed_chars": totals["compressed_chars"],
+            "compressed_bytes": totals["compressed_bytes"],
+            "raw_tokens": totals["raw_tokens"],
+            "compressed_tokens": totals["compressed_tokens"],
+            "avg_compression_ms": round(totals["compression_ms"] / measured, 4) if measured else 0.0,
+            **_savings(totals),
         }
+
+
+def _estimate_tokens(chars: int) -> int:
+    # chars/4 is the standard LLM token estimate
+    return max(1, chars // 4)
+
+
+def _savings(metrics: Mapping[str, Any]) -> dict[str, float]:
+    raw_chars, raw_tokens = metrics["raw_chars"], metrics["raw_tokens"]
+    return {
+        "storage_saved_pct": round(
+            (1 - metrics["compressed_chars"] / raw_chars) * 100, 1
+        ) if raw_chars > 0 else 0.0,
+        "bytes_saved_pct": round(
+            (1 - metrics["compressed_bytes"] / raw_chars) * 100, 1
+        ) if raw_chars > 0 else 0.0,
+        "tokens_saved_pct": round(
+            (1 - metrics["compressed_tokens"] / raw_tokens) * 100, 1
+        ) if raw_tokens > 0 else 0.0,
+    }
+
+
+def _stored_bytes(payload: Payload) -> int:
+    return len(payload) if isinstance(payload, bytes) else len(payload.encode("utf-8"))
@@ -0,0 +1,347 @@
+"""HL7 - Streaming HL7 v2 (ORU/ADT) ingestion into PatientState.
+
+Bedside monitors and lab systems send HL7 v2 messages, usually MLLP-framed
+over TCP. This module reads them without any regex-over-prose:
+
+- :class:`MLLPDecoder` splits an MLLP byte stream (socket or file) into
+  messages, across arbitrary chunk boundaries;
+- :func:`parse_message` splits one message into MSH/PID/OBX fields,
+  skipping every other segment;
+- :func:`message_to_state` maps OBX observations by LOINC code into
+  ``Vitals`` and ``specialist_data``.
+
+Other codes are kept in ``specialist_data["observations"]``, keyed by the
+OBX-3 text.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import IO, Iterator
+
+from src.core.models import PatientState, Vitals
+
+MLLP_START = b"\x0b"
+MLLP_END = b"\x1c\x0d"
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# OBX-3 coding systems treated as LOINC ("" when the component is absent).
+_LOINC_SYSTEMS = frozenset(("LN", "LOINC", "http://loinc.org", ""))
+
+_HEART_RATE = "8867-4"
+_SYSTOLIC = "8480-6"
+_DIASTOLIC = "8462-4"
+_BP_COMBINED = frozenset(("85354-9", "55284-4"))  # value "120/80"
+_TEMPERATURE = "8310-5"
+_CHIEF_COMPLAINT = "8661-1"
+
+# Other vital-sign LOINC codes mapped to named specialist_data keys.
+SPECIALIST_CODES = {
+    "9279-1": "respiratory_rate",
+    "2708-6": "oxygen_saturation",
+    "59408-5": "oxygen_saturation",
+    "8302-2": "body_height",
+    "29463-7": "body_weight",
+    "39156-5": "bmi",
+    "2339-0": "glucose",
+    "72514-3": "pain_score",
+}
+
+_FAHRENHEIT_UNITS = frozenset(("[degF]", "degF", "F", "°F"))
+
+
+@dataclass
+class OBXObservation:
+    """One OBX segment. ``observed_at`` is OBX-14, or MSH-7 when absent."""
+
+    set_id: str
+    value_type: str
+    code: str
+    text: str
+    coding_system: str
+    value: str
+    units: str
+    status: str
+    observed_at: str
+
+    @property
+    def numeric(self) -> float | None:
+        """OBX-5 as a number, if it parses as one."""
+        try:
+            return float(self.value)
+        except ValueError:
+            return None
+
+
+@dataclass
+class HL7Message:
+    """The MSH/PID/OBX content of one HL7 v2 message."""
+
+    message_type: str
+    control_id: str
+    sent_at: str = ""
+    patient_id: str | None = None
+    observations: list[OBXObservation] = field(default_factory=list)
+
+
+# ---------------------------------------------------------------------------
+# MLLP framing
+# ---------------------------------------------------------------------------
+
+
+class MLLPDecoder:
+    """Incremental MLLP deframer.
+
+    :meth:`feed` accepts bytes in any chunking and returns the complete
+    message payloads (without framing) found so far. Bytes outside a
+    ``<VT> ... <FS><CR>`` frame are discarded.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> list[bytes]:
+        buffer = self._buffer
+        buffer += data
+        messages = []
+        pos = 0
+        while True:
+            start = buffer.find(MLLP_START, pos)
+            if start < 0:
+                pos = len(buffer)
+                break
+            end = buffer.find(MLLP_END, start + 1)
+            if end < 0:
+                pos = start
+                break
+            messages.append(bytes(buffer[start + 1:end]))
+            pos = end + len(MLLP_END)
+        del buffer[:pos]
+        return messages
+
+    @property
+    def pending(self) -> int:
+        """Bytes of an incomplete frame still buffered."""
+        return len(self._buffer)
+
+
+def iter_mllp(stream: IO[bytes], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield message payloads from an MLLP byte stream.
+
+    *stream* is anything with ``read(n)``: an open file, or a socket via
+    ``sock.makefile("rb")``.
+    """
+    return _deframe(MLLPDecoder(), b"", stream, chunk_size)
+
+
+def _deframe(decoder: MLLPDecoder, head: bytes, stream: IO[bytes], chunk_size: int) -> Iterator[bytes]:
+    yield from decoder.feed(head)
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return
+        yield from decoder.feed(chunk)
+
+
+def _split_unframed(head: bytes, stream: IO[bytes], chunk_size: int) -> Iterator[bytes]:
+    # A new message starts at every segment beginning with MSH.
+    message: list[bytes] = []
+    pending = head
+    while True:
+        chunk = stream.read(chunk_size)
+        pending += chunk
+        segments = pending.replace(b"\r\n", b"\r").replace(b"\n", b"\r").split(b"\r")
+        pending = segments.pop() if chunk else b""
+        for segment in segments:
+            if segment.startswith(b"MSH") and message:
+                yield b"\r".join(message)
+                message = []
+            if segment.strip():
+                message.append(segment)
+        if not chunk:
+            break
+    if message:
+        yield b"\r".join(message)
+
+
+def iter_messages(stream: IO[bytes], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield messages from MLLP-framed input, or from an unframed file of
+    messages (each starting with an ``MSH`` segment)."""
+    head = stream.read(chunk_size)
+    if not head:
+        return
+    if head.lstrip(b" \t\r\n")[:1] == MLLP_START:
+        yield from _deframe(MLLPDecoder(), head, stream, chunk_size)
+    else:
+        yield from _split_unframed(head, stream, chunk_size)
+
+
+# ---------------------------------------------------------------------------
+# Segment parsing
+# ---------------------------------------------------------------------------
+
+
+def _unescape(value: str, escape: str, field_sep: str, component: str, repetition: str, sub: str) -> str:
+    if escape not in value:
+        return value
+    replacements = {"F": field_sep, "S": component, "R": repetition, "T": sub, "E": escape}
+    parts = value.split(escape)
+    out = [parts[0]]
+    # parts alternate: text, sequence, text, ...
+    for i in range(1, len(parts), 2):
+        sequence = parts[i]
+        out.append(replacements.get(sequence, "" if sequence[:1] in ("H", "N") else sequence))
+        if i + 1 < len(parts):
+            out.append(parts[i + 1])
+    return "".join(out)
+
+
+def parse_message(data: bytes | str) -> HL7Message:
+    """Parse the MSH, PID and OBX segments of one HL7 v2 message.
+
+    Raises:
+        ValueError: If the message does not start with an MSH segment.
+    """
+    text = data.decode("utf-8", errors="replace") if isinstance(data, bytes) else data
+    text = text.lstrip()
+    if not text.startswith("MSH") or len(text) < 8:
+        raise ValueError("HL7 message must start with an MSH segment")
+    field_sep = text[3]
+    encoding = text[4:text.find(field_sep, 4)] if field_sep in text[4:] else text[4:8]
+    component, repetition, escape, sub = (encoding + "^~\\&"[len(encoding):])[:4]
+
+    message = HL7Message(message_type="", control_id="")
+    for segment in text.replace("\n", "\r").split("\r"):
+        kind = segment[:3]
+        if kind == "OBX":
+            f = segment.split(field_sep)
+            f += [""] * (15 - len(f))
+            identifier = f[3].split(component)
+            identifier += [""] * (3 - len(identifier))
+            message.observations.append(
+                OBXObservation(
+                    set_id=f[1],
+                    value_type=f[2],
+                    code=identifier[0],
+                    text=_unescape(identifier[1], escape, field_sep, component, repetition, sub),
+                    coding_system=identifier[2],
+                    value=_unescape(f[5].split(repetition)[0], escape, field_sep, component, repetition, sub),
+                    units=f[6].split(component)[0],
+                    status=f[11],
+                    observed_at=f[14] or message.sent_at,
+                )
+            )
+        elif kind == "MSH":
+            # MSH-1 is the separator itself, so MSH-n is at index n - 1
+            f = segment.split(field_sep)
+            f += [""] * (10 - len(f))
+            message.sent_at = f[6]
+            message.message_type = f[8].replace(component, "^")
+            message.control_id = f[9]
+        elif kind == "PID":
+            f = segment.split(field_sep)
+            if len(f) > 3 and f[3]:
+                # first repetition, ID component of PID-3
+                message.patient_id = f[3].split(repetition)[0].split(component)[0] or None
+    return message
+
+
+# ---------------------------------------------------------------------------
+# Mapping to PatientState
+# ---------------------------------------------------------------------------
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if value.is_integer() else str(value)
+
+
+def message_to_state(message: HL7Message) -> PatientState:
+    """Map the OBX observations of *message* onto a :class:`PatientState`.
+
+    Later OBX segments for the same field win (or the newer OBX-14 time,
+    when both carry one). Temperatures reported in Fahrenheit are converted
+    to Celsius.
+    """
+    values: dict[str, object] = {}
+    times: dict[str, str] = {}
+    specialist: dict[str, object] = {}
+    others: dict[str, str] = {}
+
+    def put(key: str, value: object, observed_at: str) -> None:
+        if value is None:
+            return
+        previous = times.get(key)
+        if previous is None or not (observed_at and previous) or observed_at >= previous:
+            values[key] = value
+            times[key] = observed_at
+
+    for obx in message.observations:
+        if obx.status in ("X", "D", "W"):  # cannot obtain / deleted / wrong
+            continue
+        code = obx.code if obx.coding_system in _LOINC_SYSTEMS else ""
+        if code == _HEART_RATE:
+            put("hr", obx.numeric, obx.observed_at)
+        elif code == _TEMPERATURE:
+            temp = obx.numeric
+            if temp is not None and obx.units in _FAHRENHEIT_UNITS:
+                temp = round((temp - 32) * 5 / 9, 1)
+            put("temp", temp, obx.observed_at)
+        elif code == _SYSTOLIC:
+            put("systolic", obx.numeric, obx.observed_at)
+        elif code == _DIASTOLIC:
+            put("diastolic", obx.numeric, obx.observed_at)
+        elif code in _BP_COMBINED and "/" in obx.value:
+            put("bp", obx.value.strip(), obx.observed_at)
+        elif code == _CHIEF_COMPLAINT:
+            put("chief_complaint", obx.value or None, obx.observed_at)
+        elif code in SPECIALIST_CODES:
+            numeric = obx.numeric
+            specialist[SPECIALIST_CODES[code]] = numeric if numeric is not None else obx.value
+        elif obx.value:
+            label = obx.text or obx.code
+            others[label] = f"{obx.value} {obx.units}".rstrip()
+
+    bp = values.get("bp")
+    if bp is None and "systolic" in values:
+        bp = _number(values["systolic"])
+        if "diastolic" in values:
+            bp += "/" + _number(values["diastolic"])
+    if others:
+        specialist["observations"] = others
+    return PatientState(
+        chief_complaint=values.get("chief_complaint"),
+        vitals=Vitals(hr=values.get("hr"), bp=bp, temp=values.get("temp")),
+        specialist_data=specialist,
+    )
+
+
+def iter_hl7_states(
+    stream: IO[bytes], chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[tuple[HL7Message, PatientState]]:
+    """Stream ``(message, state)`` pairs from an MLLP or unframed HL7 byte
+    stream. Messages without an MSH segment are skipped."""
+    for payload in iter_messages(stream, chunk_size):
+        try:
+            message = parse_message(payload)
+        except ValueError:
+            continue
+        yield message, message_to_state(message)
+
+
+def ingest_hl7(stream: IO[bytes], chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict[str | None, PatientState]:
+    """Stream HL7 messages from *stream* into one state per PID-3 patient id
+    (``None`` for messages without a PID). Observations from every message
+    of a patient are merged, the newest winning per field."""
+    merged: dict[str | None, HL7Message] = {}
+    for payload in iter_messages(stream, chunk_size):
+        try:
+            message = parse_message(payload)
+        except ValueError:
+            continue
+        target = merged.get(message.patient_id)
+        if target is None:
+            merged[message.patient_id] = message
+        else:
+            target.observations.extend(message.observations)
+    return {patient_id: message_to_state(message) for patient_id, message in merged.items()}
@@ -0,0 +1,174 @@
+"""Image Cache - Content-addressed cache of preprocessed medical images.
+
+Radiology workflows re-query the same study with different symptom text.
+Decoding a large PNG and running the vision processor's resize/normalise
+step dominates those calls, so the preprocessed result is cached by the
+SHA-256 of the file *content* (renamed or copied studies still hit).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Any, Callable, Iterable
+
+
+def _decode_rgb(stream: IO[bytes]) -> Any:
+    """Default decoder: open *stream* with Pillow and convert to RGB."""
+    from PIL import Image
+
+    with Image.open(stream) as image:
+        return image.convert("RGB")
+
+
+class ImageTensorCache:
+    """Bounded LRU cache of preprocessed images keyed by content hash.
+
+    Files of at least *mmap_threshold* bytes are memory-mapped so hashing
+    and decoding share the same pages instead of reading the file twice.
+    A ``(path, size, mtime)`` memo lets repeated queries for an unchanged
+    file skip re-hashing entirely.
+
+    Use one cache per preprocessing function — entries are keyed by image
+    content only.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 64,
+        mmap_threshold: int = 1 << 20,
+        decoder: Callable[[IO[bytes]], Any] | None = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.mmap_threshold = mmap_threshold
+        self._decoder = decoder or _decode_rgb
+        self._store: OrderedDict[str, Any] = OrderedDict()
+        self._path_keys: OrderedDict[tuple, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # ------------------------------------------------------------------
+    # public API
+    # ------------------------------------------------------------------
+
+    def get_or_compute(
+        self, image_path: str, preprocess: Callable[[Any], Any]
+    ) -> Any:
+        """Return the preprocessed image for *image_path*.
+
+        On a miss the file is decoded and passed to *preprocess*; the
+        result is stored under the file's content hash.
+        """
+        stat_key = self._stat_key(image_path)
+        with self._lock:
+            key = self._path_keys.get(stat_key)
+            if key is not None and key in self._store:
+                self._store.move_to_end(key)
+                self.hits += 1
+                return self._store[key]
+
+        with self._open(image_path) as buffer:
+            key = hashlib.sha256(buffer).hexdigest()
+            with self._lock:
+                self._remember_path(stat_key, key)
+                if key in self._store:
+                    self._store.move_to_end(key)
+                    self.hits += 1
+                    return self._store[key]
+                self.misses += 1
+            stream = buffer if isinstance(buffer, mmap.mmap) else io.BytesIO(buffer)
+            result = preprocess(self._decoder(stream))
+
+        with self._lock:
+            self._store[key] = result
+            self._store.move_to_end(key)
+            while len(self._store) > self.max_entries:
+                self._store.popitem(last=False)
+                self.evictions += 1
+        return result
+
+    def preprocess_many(
+        self,
+        image_paths: Iterable[str],
+        preprocess: Callable[[Any], Any],
+        max_workers: int = 4,
+    ) -> list[Any]:
+        """Preprocess *image_paths* in a thread pool, preserving order.
+
+        Decoding (zlib inflate) and most numeric preprocessing release the
+        GIL, so a small pool overlaps I/O and CPU work across images.
+        """
+        paths = list(image_paths)
+        if len(paths) <= 1 or max_workers <= 1:
+            return [self.get_or_compute(p, preprocess) for p in paths]
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return list(pool.map(lambda p: self.get_or_compute(p, preprocess), paths))
+
+    @property
+    def size(self) -> int:
+        """Number of preprocessed images currently cached."""
+        return len(self._store)
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/miss/eviction counters."""
+        return {
+            "size": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def clear(self) -> None:
+        """Remove all cached entries."""
+        with self._lock:
+            self._store.clear()
+            self._path_keys.clear()
+
+    # ------------------------------------------------------------------
+    # internals
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _stat_key(image_path: str) -> tuple:
+        st = os.stat(image_path)
+        return (os.path.abspath(image_path), st.st_size, st.st_mtime_ns)
+
+    def _remember_path(self, stat_key: tuple, key: str) -> None:
+        self._path_keys[stat_key] = key
+        self._path_keys.move_to_end(stat_key)
+        while len(self._path_keys) > 4 * self.max_entries:
+            self._path_keys.popitem(last=False)
+
+    def _open(self, image_path: str) -> "_ImageBuffer":
+        return _ImageBuffer(image_path, self.mmap_threshold)
+
+
+class _ImageBuffer:
+    """Context manager yielding file content as ``mmap`` or ``bytes``."""
+
+    def __init__(self, path: str, mmap_threshold: int) -> None:
+        self._path = path
+        self._threshold = mmap_threshold
+        self._file: IO[bytes] | None = None
+        self._map: mmap.mmap | None = None
+
+    def __enter__(self) -> mmap.mmap | bytes:
+        self._file = open(self._path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size and size >= self._threshold:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            return self._map
+        return self._file.read()
+
+    def __exit__(self, *exc: object) -> None:
+        if self._map is not None:
+            self._map.close()
+        if self._file is not None:
+            self._file.close()
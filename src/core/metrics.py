@@ -0,0 +1,217 @@
+"""Metrics - Fixed-memory latency histograms and process resource sampling.
+
+``LatencyHistogram`` replaces unbounded lists of timings: it keeps a fixed
+array of log-spaced buckets (HDR-style, bounded *relative* error), so
+recording is O(1), memory never grows, and p50/p95/p99 are answered by one
+walk over the buckets.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import threading
+import time
+from typing import Iterable
+
+try:
+    import psutil
+
+    _PSUTIL_AVAILABLE = True
+except ImportError:
+    _PSUTIL_AVAILABLE = False
+
+# Prometheus bucket boundaries (milliseconds) for the exported histogram.
+DEFAULT_EXPORT_BOUNDS_MS = (
+    0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000,
+)
+
+
+class LatencyHistogram:
+    """Streaming latency histogram with log-spaced buckets.
+
+    Bucket *i* covers ``(min_ms * g**(i-1), min_ms * g**i]`` with growth
+    factor ``g = 1 + 2 * relative_error``; a quantile is reported as its
+    bucket's midpoint, so it is within *relative_error* of the true value.
+    Values below *min_ms* land in bucket 0, values above *max_ms* in the
+    last bucket (``max`` is still tracked exactly).
+    """
+
+    def __init__(
+        self,
+        min_ms: float = 0.001,
+        max_ms: float = 600_000.0,
+        relative_error: float = 0.01,
+    ) -> None:
+        self.min_ms = min_ms
+        self._gamma = 1.0 + 2.0 * relative_error
+        self._log_gamma = math.log(self._gamma)
+        self._counts = [0] * (self._index(max_ms) + 1)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.sum_ms = 0.0
+        self.min_seen_ms = math.inf
+        self.max_seen_ms = 0.0
+
+    def _index(self, value_ms: float) -> int:
+        if value_ms <= self.min_ms:
+            return 0
+        return math.ceil(math.log(value_ms / self.min_ms) / self._log_gamma)
+
+    def _upper_bound(self, index: int) -> float:
+        return self.min_ms * self._gamma ** index
+
+    def record(self, value_ms: float) -> None:
+        """Record one observation in milliseconds."""
+        index = min(self._index(value_ms), len(self._counts) - 1)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.sum_ms += value_ms
+            if value_ms < self.min_seen_ms:
+                self.min_seen_ms = value_ms
+            if value_ms > self.max_seen_ms:
+                self.max_seen_ms = value_ms
+
+    @property
+    def mean_ms(self) -> float:
+        """Mean of all observations (0.0 when empty)."""
+        return self.sum_ms / self.count if self.count else 0.0
+
+    def quantiles(self, qs: Iterable[float] = (0.5, 0.95, 0.99)) -> dict[float, float]:
+        """Return ``{q: value_ms}`` for each quantile in *qs* (one pass)."""
+        qs = sorted(qs)
+        result = {q: 0.0 for q in qs}
+        with self._lock:
+            if not self.count:
+                return result
+            targets = [(q, max(1, math.ceil(q * self.count))) for q in qs]
+            cumulative = 0
+            t = 0
+            last = len(self._counts) - 1
+            for index, n in enumerate(self._counts):
+                if not n:
+                    continue
+                cumulative += n
+                while t < len(targets) and cumulative >= targets[t][1]:
+                    if index == last:  # overflow bucket has no upper bound
+                        value = self.max_seen_ms
+                    else:
+                        midpoint = self._upper_bound(index) * 2 / (1 + self._gamma)
+                        value = min(max(midpoint, self.min_seen_ms), self.max_seen_ms)
+                    result[targets[t][0]] = value
+                    t += 1
+                if t == len(targets):
+                    break
+        return result
+
+    def percentile(self, q: float) -> float:
+        """Return a single quantile (``q`` in 0–1) in milliseconds."""
+        return self.quantiles((q,))[q]
+
+    def cumulative_counts(
+        self, bounds_ms: Iterable[float] = DEFAULT_EXPORT_BOUNDS_MS
+    ) -> list[tuple[float, int]]:
+        """Return ``[(le_ms, count <= le_ms), ...]`` for Prometheus export.
+
+        Counts are attributed by bucket upper bound, so each boundary is
+        accurate to within the histogram's relative error.
+        """
+        with self._lock:
+            counts = list(self._counts)
+        result: list[tuple[float, int]] = []
+        cumulative = 0
+        index = 0
+        for bound in sorted(bounds_ms):
+            while index < len(counts) and self._upper_bound(index) <= bound:
+                cumulative += counts[index]
+                index += 1
+            result.append((bound, cumulative))
+        return result
+
+    def reset(self) -> None:
+        """Clear all observations."""
+        with self._lock:
+            self._counts = [0] * len(self._counts)
+            self.count = 0
+            self.sum_ms = 0.0
+            self.min_seen_ms = math.inf
+            self.max_seen_ms = 0.0
+
+
+class ProcessSampler:
+    """Samples this process's CPU utilisation and resident memory.
+
+    CPU is computed from process CPU time between successive calls by the
+    same *consumer*, so the first call reports utilisation since the sampler
+    was created.  Each consumer (e.g. ``/health`` and the ``/metrics``
+    scrape) has its own window, so polling one does not shorten the other's.
+    """
+
+    def __init__(self) -> None:
+        self._process = psutil.Process() if _PSUTIL_AVAILABLE else None
+        self._lock = threading.Lock()
+        self._created = (time.process_time(), time.monotonic())
+        self._windows: dict[str, tuple[float, float]] = {}
+
+    def cpu_percent(self, consumer: str = "default") -> float:
+        """Process CPU usage (100 = one full core) since *consumer*'s last call."""
+        with self._lock:
+            cpu, wall = time.process_time(), time.monotonic()
+            last_cpu, last_wall = self._windows.get(consumer, self._created)
+            self._windows[consumer] = (cpu, wall)
+        elapsed = wall - last_wall
+        return round(100.0 * (cpu - last_cpu) / elapsed, 1) if elapsed > 0 else 0.0
+
+    def memory_mb(self) -> float:
+        """Current resident set size in MiB."""
+        if self._process is not None:
+            rss = self._process.memory_info().rss
+        else:
+            try:
+                with open("/proc/self/statm") as fh:
+                    rss = int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+            except (OSError, ValueError, IndexError):
+                import resource
+
+                # ru_maxrss is the peak, in KiB on Linux
+                rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        return round(rss / (1024 * 1024), 1)
+
+
+def _escape_label(value: object) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels.items()) + "}"
+
+
+def render_prometheus_histograms(
+    name: str,
+    histograms: dict[str, LatencyHistogram],
+    label: str = "stage",
+    help_text: str = "",
+) -> list[str]:
+    """Render *histograms* as a Prometheus text-format histogram family in
+    seconds, plus a ``<name>_quantile`` gauge family with p50/p95/p99."""
+    lines = [
+        f"# HELP {name} {help_text}".rstrip(),
+        f"# TYPE {name} histogram",
+    ]
+    for key, histogram in histograms.items():
+        for le_ms, n in histogram.cumulative_counts():
+            labels = _format_labels({label: key, "le": f"{le_ms / 1000:g}"})
+            lines.append(f"{name}_bucket{labels} {n}")
+        lines.append(f'{name}_bucket{_format_labels({label: key, "le": "+Inf"})} {histogram.count}')
+        lines.append(f"{name}_sum{_format_labels({label: key})} {histogram.sum_ms / 1000:.6f}")
+        lines.append(f"{name}_count{_format_labels({label: key})} {histogram.count}")
+    lines.append(f"# HELP {name}_quantile Streaming quantiles of {name}")
+    lines.append(f"# TYPE {name}_quantile gauge")
+    for key, histogram in histograms.items():
+        for q, value_ms in histogram.quantiles().items():
+            labels = _format_labels({label: key, "quantile": f"{q:g}"})
+            lines.append(f"{name}_quantile{labels} {value_ms / 1000:.6f}")
+    return lines
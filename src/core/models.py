@@ -83,18 +83,36 @@ class PatientState(BaseModel):
         compressed_size = len(self.to_compressed_json())
         return min(max(1.0 - (compressed_size / raw_size), 0.05), 0.99)
 
+    def to_compressed_dict(self) -> dict[str, Any]:
+        """Return the compact form as a dict, excluding None and empty fields.
+
+        Built straight from the fields (no ``model_dump``), so it is cheap
+        enough to call per request; ``to_compressed_json`` serialises it.
+        """
+        data: dict[str, Any] = {}
+        if self.chief_complaint:
+            data["chief_complaint"] = self.chief_complaint
+        vitals = self.vitals
+        vitals_data = {
+            key: value
+            for key, value in (("hr", vitals.hr), ("bp", vitals.bp), ("temp", vitals.temp))
+            if value is not None
+        }
+        if vitals_data:
+            data["vitals"] = vitals_data
+        if self.medication:
+            data["medication"] = self.medication
+        if self.symptoms:
+            data["symptoms"] = list(self.symptoms)
+        for key in ("meta", "specialist_data"):
+            values = {k: v for k, v in getattr(self, key).items() if v is not None}
+            if values:
+                data[key] = values
+        return data
+
     def to_compressed_json(self) -> str:
         """Dump the model as compact JSON, excluding None and empty fields."""
-        data = self.model_dump(exclude_none=True)
-        # Strip None values inside nested dicts
-        for key in ("specialist_data", "meta"):
-            if key in data and isinstance(data[key], dict):
-                data[key] = {k: v for k, v in data[key].items() if v is not None}
-        # Remove empty collections
-        for key in list(data.keys()):
-            if data[key] in ([], {}, ""):
-                del data[key]
-        return json.dumps(data, separators=(",", ":"))
+        return json.dumps(self.to_compressed_dict(), separators=(",", ":"))
 
     def to_comptext(self) -> str:
         """Ultra-compact CompText notation for maximum token reduction (~92-95%).
@@ -154,6 +172,18 @@ class PatientState(BaseModel):
         return "|".join(parts) if parts else "CT:e"
 
 
+    @classmethod
+    def from_fhir(cls, resource: dict | list) -> "PatientState":
+        """Build a state from FHIR Observations, mapped by LOINC code.
+
+        Accepts a Bundle (e.g. the output of :meth:`to_fhir`), a single
+        Observation, or a list of either. Streaming ingestion of large
+        Bundles/NDJSON lives in :mod:`src.core.fhir_ingest`.
+        """
+        from src.core.fhir_ingest import state_from_fhir
+
+        return state_from_fhir(resource)
+
     def to_fhir(self) -> dict:
         """Export patient state as a FHIR-compliant Bundle of Observations.
 
@@ -0,0 +1,222 @@
+"""Pipeline - DAG stage executor shared by every CompText entry point.
+
+The clinical flow is a small DAG rather than a chain::
+
+    input ──► compression ──┬──► triage
+                            └──► diagnosis
+
+Triage and diagnosis only depend on the compressed state, so they run
+concurrently (the doctor stage releases the GIL while the GPU generates).
+Every stage is timed uniformly, replacing hand-written ``time.time()``
+bookkeeping in the API, CLI, dashboard and MCP server.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Sequence
+
+from src.core.tracing import tracer
+
+INPUT = "input"
+
+# Bump whenever extraction, triage or diagnosis output changes for the same
+# input; it is part of every result-cache key and ETag.
+PIPELINE_VERSION = "3"
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One node of a pipeline DAG.
+
+    Attributes:
+        name: Unique stage name; its output is stored under this key.
+        func: Called with the outputs of ``depends_on`` (in order).
+        depends_on: Upstream stage names; ``"input"`` is the pipeline input.
+        batch_func: Optional batched implementation, called with one list
+            per dependency and returning a list of outputs.
+    """
+
+    name: str
+    func: Callable[..., Any]
+    depends_on: tuple[str, ...] = (INPUT,)
+    batch_func: Callable[..., list] | None = None
+
+
+@dataclass
+class PipelineResult:
+    """Outputs and per-stage wall-clock timings of one pipeline run."""
+
+    outputs: dict[str, Any] = field(default_factory=dict)
+    timings_ms: dict[str, float] = field(default_factory=dict)
+    total_ms: float = 0.0
+
+    def __getitem__(self, stage: str) -> Any:
+        return self.outputs[stage]
+
+
+class StagePipeline:
+    """Executes a DAG of :class:`Stage` objects level by level.
+
+    Stages whose dependencies are all satisfied form a level; stages in the
+    same level run concurrently on a shared thread pool.
+    """
+
+    def __init__(self, stages: Sequence[Stage], max_workers: int = 4) -> None:
+        self._stages = {stage.name: stage for stage in stages}
+        if len(self._stages) != len(stages):
+            raise ValueError("Duplicate stage names in pipeline")
+        self.levels = self._toposort(stages)
+        width = max((len(level) for level in self.levels), default=1)
+        self._pool = (
+            ThreadPoolExecutor(max_workers=min(max_workers, width - 1))
+            if width > 1 and max_workers > 1
+            else None
+        )
+
+    @property
+    def stage_names(self) -> list[str]:
+        """Stage names in execution order."""
+        return [stage.name for level in self.levels for stage in level]
+
+    # ------------------------------------------------------------------
+    # public API
+    # ------------------------------------------------------------------
+
+    def run(self, value: Any, concurrent: bool = True) -> PipelineResult:
+        """Run every stage for a single input *value*.
+
+        With ``concurrent=False`` every stage runs on the calling thread,
+        e.g. so a per-thread profiler sees the whole request.
+        """
+        result = PipelineResult(outputs={INPUT: value})
+        start = time.perf_counter()
+        for level in self.levels:
+            for stage, output, ms in self._run_level(
+                level, lambda s: self._call(s, result.outputs), concurrent
+            ):
+                result.outputs[stage.name] = output
+                result.timings_ms[stage.name] = ms
+        result.total_ms = (time.perf_counter() - start) * 1000
+        return result
+
+    def run_batch(self, values: Sequence[Any]) -> list[PipelineResult]:
+        """Run every stage over *values*, using ``batch_func`` where given.
+
+        Per-item stage timings are the batch time divided by the batch size.
+        """
+        results = [PipelineResult(outputs={INPUT: v}) for v in values]
+        if not results:
+            return results
+        start = time.perf_counter()
+        for level in self.levels:
+            for stage, outputs, ms in self._run_level(
+                level, lambda s: self._call_batch(s, results)
+            ):
+                for item, output in zip(results, outputs):
+                    item.outputs[stage.name] = output
+                    item.timings_ms[stage.name] = ms / len(results)
+        total_ms = (time.perf_counter() - start) * 1000
+        for item in results:
+            item.total_ms = total_ms / len(results)
+        return results
+
+    def close(self) -> None:
+        """Shut down the worker pool."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+
+    # ------------------------------------------------------------------
+    # internals
+    # ------------------------------------------------------------------
+
+    def _run_level(
+        self, level: list[Stage], call: Callable[[Stage], Any], concurrent: bool = True
+    ) -> list[tuple[Stage, Any, float]]:
+        """Run a level; the first stage runs inline, the rest on the pool."""
+
+        def timed(stage: Stage) -> tuple[Stage, Any, float]:
+            with tracer.span(f"stage.{stage.name}"):
+                t0 = time.perf_counter()
+                output = call(stage)
+                return stage, output, (time.perf_counter() - t0) * 1000
+
+        if self._pool is None or len(level) == 1 or not concurrent:
+            return [timed(stage) for stage in level]
+        # Copy the context so worker-thread spans nest under the caller's
+        futures = [
+            self._pool.submit(contextvars.copy_context().run, timed, stage)
+            for stage in level[1:]
+        ]
+        first = timed(level[0])
+        return [first] + [f.result() for f in futures]
+
+    @staticmethod
+    def _call(stage: Stage, outputs: dict[str, Any]) -> Any:
+        return stage.func(*(outputs[dep] for dep in stage.depends_on))
+
+    @staticmethod
+    def _call_batch(stage: Stage, results: list[PipelineResult]) -> list:
+        columns = [[r.outputs[dep] for r in results] for dep in stage.depends_on]
+        if stage.batch_func is not None:
+            outputs = stage.batch_func(*columns)
+            if len(outputs) != len(results):
+                raise ValueError(
+                    f"Stage {stage.name!r} returned {len(outputs)} outputs "
+                    f"for {len(results)} inputs"
+                )
+            return outputs
+        return [stage.func(*args) for args in zip(*columns)]
+
+    @staticmethod
+    def _toposort(stages: Sequence[Stage]) -> list[list[Stage]]:
+        names = {stage.name for stage in stages}
+        for stage in stages:
+            unknown = set(stage.depends_on) - names - {INPUT}
+            if unknown:
+                raise ValueError(
+                    f"Stage {stage.name!r} depends on unknown stage(s): "
+                    f"{', '.join(sorted(unknown))}"
+                )
+        done = {INPUT}
+        remaining = list(stages)
+        levels: list[list[Stage]] = []
+        while remaining:
+            level = [s for s in remaining if set(s.depends_on) <= done]
+            if not level:
+                cycle = ", ".join(s.name for s in remaining)
+                raise ValueError(f"Pipeline has a dependency cycle among: {cycle}")
+            levels.append(level)
+            done.update(s.name for s in level)
+            remaining = [s for s in remaining if s.name not in done]
+        return levels
+
+
+def build_clinical_pipeline(
+    nurse: Any, triage: Any, doctor: Any, max_workers: int = 2
+) -> StagePipeline:
+    """Return the Nurse → (Triage ∥ Doctor) pipeline for raw clinical text.
+
+    Stage outputs: ``compression`` (PatientState), ``triage``
+    (TriageResult) and ``diagnosis`` (recommendation string).
+    """
+    return StagePipeline(
+        [
+            Stage("compression", nurse.intake, batch_func=nurse.intake_batch),
+            Stage(
+                "triage",
+                triage.triage,
+                depends_on=("compression",),
+                batch_func=triage.triage_batch,
+            ),
+            Stage(
+                "diagnosis",
+                lambda state: doctor.diagnose(state.to_compressed_dict()),
+                depends_on=("compression",),
+            ),
+        ],
+        max_workers=max_workers,
+    )
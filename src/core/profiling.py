@@ -0,0 +1,243 @@
+"""Profiling - Opt-in per-request cProfile capture with a slowest-N buffer.
+
+Requests are profiled when explicitly asked for (e.g. an ``X-Profile``
+header) or by random sampling. Only the *N slowest* captures are kept, so
+an always-on low sample rate costs bounded memory. Captures export as
+pstats (binary, loadable with ``pstats.Stats``), a text table, or a
+speedscope JSON document for flame-graph viewing.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import heapq
+import io
+import itertools
+import marshal
+import pstats
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterator
+
+# cProfile key: (filename, line, function name)
+FuncKey = tuple[str, int, str]
+
+
+@dataclass
+class ProfileRecord:
+    """One captured request profile."""
+
+    profile_id: str
+    label: str
+    trigger: str
+    duration_ms: float
+    captured_at: str
+    stats: dict[FuncKey, tuple] = field(repr=False)
+
+    def summary(self, top: int = 10) -> dict[str, Any]:
+        """Return metadata plus the *top* functions by own (self) time."""
+        hottest = sorted(self.stats.items(), key=lambda kv: kv[1][2], reverse=True)
+        return {
+            "profile_id": self.profile_id,
+            "label": self.label,
+            "trigger": self.trigger,
+            "duration_ms": round(self.duration_ms, 3),
+            "captured_at": self.captured_at,
+            "hotspots": [
+                {
+                    "function": _frame_name(key),
+                    "calls": value[1],
+                    "self_ms": round(value[2] * 1000, 4),
+                    "cumulative_ms": round(value[3] * 1000, 4),
+                }
+                for key, value in hottest[:top]
+            ],
+        }
+
+
+class ProfileRecorder:
+    """Decides which requests to profile and keeps the slowest captures.
+
+    Args:
+        capacity: Number of slowest profiles retained.
+        sample_rate: Probability (0–1) of profiling an unforced request.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 20,
+        sample_rate: float = 0.0,
+        rng: Callable[[], float] = random.random,
+    ) -> None:
+        self.capacity = capacity
+        self.sample_rate = sample_rate
+        self._rng = rng
+        self._heap: list[tuple[float, int, ProfileRecord]] = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def trigger_for(self, forced: bool) -> str | None:
+        """Return ``"forced"``/``"sampled"`` if this request should be
+        profiled, else ``None``."""
+        if forced:
+            return "forced"
+        if self.sample_rate > 0 and self._rng() < self.sample_rate:
+            return "sampled"
+        return None
+
+    @contextmanager
+    def capture(self, label: str, trigger: str) -> Iterator[dict[str, Any]]:
+        """Profile the enclosed block; yields a dict receiving
+        ``profile_id`` once the capture is stored."""
+        profiler = cProfile.Profile()
+        info: dict[str, Any] = {"profile_id": None}
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            yield info
+        finally:
+            profiler.disable()
+            duration_ms = (time.perf_counter() - start) * 1000
+            profiler.create_stats()
+            record = ProfileRecord(
+                profile_id=uuid.uuid4().hex[:16],
+                label=label,
+                trigger=trigger,
+                duration_ms=duration_ms,
+                captured_at=datetime.now(timezone.utc).isoformat(),
+                stats=profiler.stats,  # type: ignore[attr-defined]
+            )
+            if self.add(record):
+                info["profile_id"] = record.profile_id
+
+    def add(self, record: ProfileRecord) -> bool:
+        """Keep *record* if it is among the slowest; return whether kept."""
+        entry = (record.duration_ms, next(self._counter), record)
+        with self._lock:
+            if len(self._heap) < self.capacity:
+                heapq.heappush(self._heap, entry)
+                return True
+            if record.duration_ms <= self._heap[0][0]:
+                return False
+            heapq.heapreplace(self._heap, entry)
+            return True
+
+    def records(self) -> list[ProfileRecord]:
+        """Retained profiles, slowest first."""
+        with self._lock:
+            return [r for _, _, r in sorted(self._heap, key=lambda e: e[0], reverse=True)]
+
+    def get(self, profile_id: str) -> ProfileRecord | None:
+        """Return the retained profile with *profile_id*, if any."""
+        with self._lock:
+            for _, _, record in self._heap:
+                if record.profile_id == profile_id:
+                    return record
+        return None
+
+    def clear(self) -> None:
+        """Drop all retained profiles."""
+        with self._lock:
+            self._heap.clear()
+
+
+# ---------------------------------------------------------------------------
+# Export formats
+# ---------------------------------------------------------------------------
+
+
+def to_pstats_bytes(record: ProfileRecord) -> bytes:
+    """Serialise *record* in the marshal format ``pstats.Stats`` loads."""
+    return marshal.dumps(record.stats)
+
+
+def to_pstats_text(record: ProfileRecord, sort: str = "cumulative", limit: int = 40) -> str:
+    """Render *record* as the familiar ``pstats`` text table."""
+    out = io.StringIO()
+    stats = pstats.Stats(_StatsSource(record.stats), stream=out)
+    stats.sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+
+def to_speedscope(record: ProfileRecord, max_depth: int = 64) -> dict[str, Any]:
+    """Convert *record* to a speedscope "sampled" profile.
+
+    cProfile records a call graph, not stacks, so stacks are reconstructed:
+    each caller→callee edge contributes the callee's self time on that edge,
+    under the heaviest caller chain above it.
+    """
+    stats = record.stats
+    frames: list[dict[str, Any]] = []
+    frame_index: dict[FuncKey, int] = {}
+
+    def index_of(key: FuncKey) -> int:
+        if key not in frame_index:
+            frame_index[key] = len(frames)
+            frames.append({"name": _frame_name(key), "file": key[0], "line": key[1]})
+        return frame_index[key]
+
+    def heaviest_chain(key: FuncKey) -> list[FuncKey]:
+        chain = [key]
+        seen = {key}
+        while len(chain) < max_depth:
+            callers = stats.get(chain[-1], (0, 0, 0, 0, {}))[4]
+            candidates = [c for c in callers if c not in seen]
+            if not candidates:
+                break
+            parent = max(candidates, key=lambda c: callers[c][3])
+            chain.append(parent)
+            seen.add(parent)
+        return chain
+
+    samples: list[list[int]] = []
+    weights: list[float] = []
+    for key, (_, _, tt, _, callers) in stats.items():
+        if tt <= 0:
+            continue
+        edges = [(c, edge[2]) for c, edge in callers.items() if edge[2] > 0] or [(None, tt)]
+        for caller, edge_tt in edges:
+            chain = [key] + (heaviest_chain(caller) if caller is not None else [])
+            samples.append([index_of(k) for k in reversed(chain)])
+            weights.append(round(edge_tt * 1000, 6))
+
+    total = sum(weights)
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": frames},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": f"{record.label} ({record.duration_ms:.1f} ms)",
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": total,
+                "samples": samples,
+                "weights": weights,
+            }
+        ],
+        "name": record.label,
+        "activeProfileIndex": 0,
+        "exporter": "medgemma-comptext",
+    }
+
+
+def _frame_name(key: FuncKey) -> str:
+    filename, line, name = key
+    if filename == "~":  # built-in
+        return name
+    return f"{name} ({filename.rsplit('/', 1)[-1]}:{line})"
+
+
+class _StatsSource:
+    """Adapter letting ``pstats.Stats`` load an in-memory stats dict."""
+
+    def __init__(self, stats: dict[FuncKey, tuple]) -> None:
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
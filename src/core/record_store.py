@@ -0,0 +1,647 @@
+"""Record Store - Pluggable persistence for AI-Native patient records.
+
+``AINativeRecord`` keeps compressed patient contexts in a
+:class:`RecordStore`. Stores keep every saved version, indexed by time,
+active protocol and triage priority, and return the latest on ``get``.
+:class:`InMemoryRecordStore` lives in process memory;
+:class:`SQLiteRecordStore` persists records in a WAL-mode SQLite file so
+they survive restarts and are shared by every worker on a host, and
+:class:`AsyncRecordStore` exposes any store to asyncio code without
+blocking the event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from operator import attrgetter
+from typing import Iterable, Sequence, Union
+
+# A stored record: compact JSON text, or bytes from ``src.core.codec``.
+Payload = Union[str, bytes]
+
+# SQLite's default SQLITE_MAX_VARIABLE_NUMBER is 999 on older builds.
+_MAX_SQL_PARAMS = 500
+
+
+@dataclass(frozen=True)
+class RecordMetrics:
+    """Size and timing measured when a record version was written."""
+
+    raw_chars: int
+    raw_tokens: int
+    compressed_chars: int
+    compressed_tokens: int
+    compressed_bytes: int
+    compression_ms: float
+    pipeline_version: str
+
+
+@dataclass(frozen=True)
+class RecordVersion:
+    """One stored version of a patient record plus its index attributes."""
+
+    patient_id: str
+    recorded_at: float
+    payload: Payload
+    protocol: str | None = None
+    priority: str | None = None
+    metrics: RecordMetrics | None = None
+
+
+# Store-wide running sums over every stored version (metrics fields sum
+# only versions that carry metrics).
+TOTAL_FIELDS = (
+    "versions", "measured_versions", "raw_chars", "raw_tokens", "compressed_chars",
+    "compressed_tokens", "compressed_bytes", "compression_ms",
+)
+_METRIC_SUM_FIELDS = TOTAL_FIELDS[2:]
+
+
+def _totals_delta(versions: Iterable[RecordVersion], sign: int = 1) -> dict[str, float]:
+    delta = dict.fromkeys(TOTAL_FIELDS, 0)
+    for version in versions:
+        delta["versions"] += sign
+        metrics = version.metrics
+        if metrics is not None:
+            delta["measured_versions"] += sign
+            for name in _METRIC_SUM_FIELDS:
+                delta[name] += sign * getattr(metrics, name)
+    return delta
+
+
+_RECORDED_AT = attrgetter("recorded_at")
+
+
+def _as_version(item: RecordVersion | tuple, now: float) -> RecordVersion:
+    if isinstance(item, RecordVersion):
+        return item
+    patient_id, payload = item
+    return RecordVersion(patient_id, now, payload)
+
+
+class RecordStore(ABC):
+    """Versioned storage of compressed record payloads by patient id.
+
+    Every :meth:`put` appends a version keyed by ``(patient_id,
+    recorded_at)``; :meth:`get` returns the latest one. Versions are
+    indexed by time, ``protocol`` (``meta.active_protocol``) and triage
+    ``priority`` so :meth:`query` never decodes non-matching payloads.
+    Versions may carry :class:`RecordMetrics`, which the store sums into
+    running :meth:`totals` as they are written and deleted.
+    """
+
+    def put(
+        self,
+        patient_id: str,
+        payload: Payload,
+        recorded_at: float | None = None,
+        protocol: str | None = None,
+        priority: str | None = None,
+    ) -> None:
+        """Append a version for *patient_id* (``recorded_at`` defaults to now)."""
+        if recorded_at is None:
+            recorded_at = time.time()
+        self.put_version(RecordVersion(patient_id, recorded_at, payload, protocol, priority))
+
+    @abstractmethod
+    def put_version(self, version: RecordVersion) -> None:
+        """Append a fully specified :class:`RecordVersion`."""
+
+    @abstractmethod
+    def get(self, patient_id: str) -> Payload | None:
+        """Return the latest payload for *patient_id*, or ``None``."""
+
+    @abstractmethod
+    def latest(self, patient_id: str) -> RecordVersion | None:
+        """Return the latest version (with metrics) of *patient_id*."""
+
+    @abstractmethod
+    def totals(self) -> dict[str, float]:
+        """Running sums over all stored versions, keyed by :data:`TOTAL_FIELDS`."""
+
+    def put_many(self, records: Iterable[RecordVersion | tuple[str, Payload]]) -> int:
+        """Append :class:`RecordVersion` items or ``(patient_id, payload)``
+        pairs; returns the number written."""
+        now = time.time()
+        count = 0
+        for item in records:
+            version = _as_version(item, now)
+            self.put_version(version)
+            count += 1
+        return count
+
+    def get_many(self, patient_ids: Sequence[str]) -> dict[str, Payload]:
+        """Return ``{patient_id: latest payload}`` for the ids that exist."""
+        found = {}
+        for patient_id in patient_ids:
+            stored = self.get(patient_id)
+            if stored is not None:
+                found[patient_id] = stored
+        return found
+
+    @abstractmethod
+    def history(
+        self, patient_id: str, since: float | None = None, until: float | None = None
+    ) -> list[RecordVersion]:
+        """Versions of *patient_id* recorded in ``[since, until]``, oldest first."""
+
+    @abstractmethod
+    def query(
+        self,
+        protocol: str | None = None,
+        priority: str | None = None,
+        since: float | None = None,
+        until: float | None = None,
+        limit: int | None = None,
+    ) -> list[RecordVersion]:
+        """Versions matching every given filter, newest first."""
+
+    @abstractmethod
+    def delete(self, patient_id: str) -> bool:
+        """Remove every version of *patient_id*; returns whether it existed."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of stored patients."""
+
+    def close(self) -> None:
+        """Release resources held by the store."""
+
+
+class _TimeIndex:
+    """Versions keyed by insertion sequence number, kept sorted by
+    ``(recorded_at, seq)`` on every write: in-order writes append, late
+    ones are inserted by bisection, and removals bisect to their slot, so
+    reads never sort."""
+
+    __slots__ = ("_versions", "_keys", "_sorted")
+
+    def __init__(self) -> None:
+        self._versions: dict[int, RecordVersion] = {}
+        # Parallel lists; ties on recorded_at keep write (seq) order.
+        self._keys: list[tuple[float, int]] = []
+        self._sorted: list[RecordVersion] = []
+
+    def add(self, seq: int, version: RecordVersion) -> None:
+        self._versions[seq] = version
+        key = (version.recorded_at, seq)
+        if not self._keys or key >= self._keys[-1]:
+            self._keys.append(key)
+            self._sorted.append(version)
+        else:
+            i = bisect_right(self._keys, key)
+            self._keys.insert(i, key)
+            self._sorted.insert(i, version)
+
+    def discard(self, seq: int) -> None:
+        version = self._versions.pop(seq, None)
+        if version is not None:
+            i = bisect_left(self._keys, (version.recorded_at, seq))
+            del self._keys[i]
+            del self._sorted[i]
+
+    def items(self) -> Iterable[tuple[int, RecordVersion]]:
+        return self._versions.items()
+
+    def ordered(self) -> list[RecordVersion]:
+        return self._sorted
+
+    def __len__(self) -> int:
+        return len(self._versions)
+
+
+class InMemoryRecordStore(RecordStore):
+    """Per-process dicts of versions, kept sorted by time as they are
+    written; records are lost on restart."""
+
+    def __init__(self) -> None:
+        self._seq = itertools.count()
+        self._latest: dict[str, RecordVersion] = {}
+        self._history: dict[str, _TimeIndex] = {}
+        self._all = _TimeIndex()
+        self._by_protocol: dict[str, _TimeIndex] = {}
+        self._by_priority: dict[str, _TimeIndex] = {}
+        self._totals = dict.fromkeys(TOTAL_FIELDS, 0)
+
+    def _add(self, version: RecordVersion) -> None:
+        for name, value in _totals_delta((version,)).items():
+            self._totals[name] += value
+        latest = self._latest.get(version.patient_id)
+        if latest is None or version.recorded_at >= latest.recorded_at:
+            self._latest[version.patient_id] = version
+        seq = next(self._seq)
+        self._history.setdefault(version.patient_id, _TimeIndex()).add(seq, version)
+        self._all.add(seq, version)
+        if version.protocol is not None:
+            self._by_protocol.setdefault(version.protocol, _TimeIndex()).add(seq, version)
+        if version.priority is not None:
+            self._by_priority.setdefault(version.priority, _TimeIndex()).add(seq, version)
+
+    def get(self, patient_id: str) -> Payload | None:
+        latest = self._latest.get(patient_id)
+        return None if latest is None else latest.payload
+
+    def latest(self, patient_id: str) -> RecordVersion | None:
+        return self._latest.get(patient_id)
+
+    def totals(self) -> dict[str, float]:
+        return dict(self._totals)
+
+    def put_version(self, version: RecordVersion) -> None:
+        self._add(version)
+
+    def put_many(self, records: Iterable[RecordVersion | tuple[str, Payload]]) -> int:
+        now = time.time()
+        count = 0
+        for item in records:
+            self._add(_as_version(item, now))
+            count += 1
+        return count
+
+    def get_many(self, patient_ids: Sequence[str]) -> dict[str, Payload]:
+        latest = self._latest
+        return {pid: latest[pid].payload for pid in patient_ids if pid in latest}
+
+    @staticmethod
+    def _window(
+        versions: list[RecordVersion], since: float | None, until: float | None
+    ) -> list[RecordVersion]:
+        lo = 0 if since is None else bisect_left(versions, since, key=_RECORDED_AT)
+        hi = len(versions) if until is None else bisect_right(versions, until, key=_RECORDED_AT)
+        return versions[lo:hi]
+
+    def history(
+        self, patient_id: str, since: float | None = None, until: float | None = None
+    ) -> list[RecordVersion]:
+        index = self._history.get(patient_id)
+        return [] if index is None else self._window(index.ordered(), since, until)
+
+    def query(
+        self,
+        protocol: str | None = None,
+        priority: str | None = None,
+        since: float | None = None,
+        until: float | None = None,
+        limit: int | None = None,
+    ) -> list[RecordVersion]:
+        # Scan the smallest applicable index and filter on the rest.
+        candidates = [self._all]
+        if protocol is not None:
+            candidates.append(self._by_protocol.get(protocol, _TimeIndex()))
+        if priority is not None:
+            candidates.append(self._by_priority.get(priority, _TimeIndex()))
+        index = min(candidates, key=len)
+        matches = []
+        for version in reversed(self._window(index.ordered(), since, until)):
+            if (protocol is None or version.protocol == protocol) and (
+                priority is None or version.priority == priority
+            ):
+                matches.append(version)
+                if limit is not None and len(matches) >= limit:
+                    break
+        return matches
+
+    def delete(self, patient_id: str) -> bool:
+        if self._latest.pop(patient_id, None) is None:
+            return False
+        history = self._history.pop(patient_id)
+        for name, value in _totals_delta((v for _, v in history.items()), sign=-1).items():
+            self._totals[name] += value
+        # Remove only this patient's entries; no index is rebuilt or scanned.
+        for seq, version in history.items():
+            self._all.discard(seq)
+            for key, indexes in (
+                (version.protocol, self._by_protocol),
+                (version.priority, self._by_priority),
+            ):
+                if key is not None:
+                    indexes[key].discard(seq)
+                    if not indexes[key]:
+                        del indexes[key]
+        return True
+
+    def __len__(self) -> int:
+        return len(self._latest)
+
+
+class SQLiteRecordStore(RecordStore):
+    """Records in a SQLite file shared by all processes on a host.
+
+    ``records`` holds the latest payload per patient (one primary-key
+    lookup per load); ``record_versions`` holds the full history with
+    indexes on ``(patient_id, recorded_at)``, ``(protocol, priority,
+    recorded_at)``, ``(priority, recorded_at)`` and ``recorded_at``, so
+    history and :meth:`query` are index range scans. Writes update both
+    tables in one transaction; bulk writes run as ``executemany`` and bulk
+    reads as chunked ``IN (...)`` queries.
+    """
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS records ("
+        " patient_id TEXT PRIMARY KEY,"
+        " payload BLOB NOT NULL,"
+        " updated_at REAL NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS record_versions ("
+        " id INTEGER PRIMARY KEY,"
+        " patient_id TEXT NOT NULL,"
+        " recorded_at REAL NOT NULL,"
+        " protocol TEXT,"
+        " priority TEXT,"
+        " payload BLOB NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS record_totals ("
+        " id INTEGER PRIMARY KEY CHECK (id = 0),"
+        + ",".join(f" {name} REAL NOT NULL DEFAULT 0" for name in TOTAL_FIELDS)
+        + ")",
+        "CREATE INDEX IF NOT EXISTS idx_versions_patient ON record_versions (patient_id, recorded_at)",
+        "CREATE INDEX IF NOT EXISTS idx_versions_protocol"
+        " ON record_versions (protocol, priority, recorded_at)",
+        "CREATE INDEX IF NOT EXISTS idx_versions_priority ON record_versions (priority, recorded_at)",
+        "CREATE INDEX IF NOT EXISTS idx_versions_time ON record_versions (recorded_at)",
+    )
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._conn = sqlite3.connect(
+            path, timeout=5.0, isolation_level=None, check_same_thread=False
+        )
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in self._SCHEMA:
+                self._conn.execute(statement)
+            self._migrate()
+
+    # Metric columns of record_versions (added after the first schema, so
+    # older files are migrated in place).
+    _METRIC_COLUMNS = (
+        ("raw_chars", "INTEGER"), ("raw_tokens", "INTEGER"),
+        ("compressed_chars", "INTEGER"), ("compressed_tokens", "INTEGER"),
+        ("compressed_bytes", "INTEGER"), ("compression_ms", "REAL"),
+        ("pipeline_version", "TEXT"),
+    )
+
+    def _migrate(self) -> None:
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(record_versions)")}
+        for column, kind in self._METRIC_COLUMNS:
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE record_versions ADD COLUMN {column} {kind}")
+        created = self._conn.execute(
+            "INSERT OR IGNORE INTO record_totals (id) VALUES (0)"
+        ).rowcount
+        if created:
+            # First open of a file written before the totals table existed.
+            measured = "CASE WHEN raw_chars IS NULL THEN 0 ELSE 1 END"
+            sums = ", ".join(
+                f"{name} = (SELECT COALESCE(SUM({name}), 0) FROM record_versions)"
+                for name in _METRIC_SUM_FIELDS
+            )
+            self._conn.execute(
+                "UPDATE record_totals SET"
+                " versions = (SELECT COUNT(*) FROM record_versions),"
+                f" measured_versions = (SELECT COALESCE(SUM({measured}), 0) FROM record_versions),"
+                f" {sums} WHERE id = 0"
+            )
+
+    # A backfilled (older) version must not replace the latest one.
+    _UPSERT_SQL = (
+        "INSERT INTO records (patient_id, payload, updated_at) VALUES (?, ?, ?)"
+        " ON CONFLICT (patient_id) DO UPDATE SET"
+        " payload = excluded.payload, updated_at = excluded.updated_at"
+        " WHERE excluded.updated_at >= records.updated_at"
+    )
+    _VERSION_COLUMNS = (
+        "patient_id, recorded_at, payload, protocol, priority, raw_chars, raw_tokens,"
+        " compressed_chars, compressed_tokens, compressed_bytes, compression_ms, pipeline_version"
+    )
+    _INSERT_VERSION_SQL = (
+        f"INSERT INTO record_versions ({_VERSION_COLUMNS})"
+        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+    )
+    _UPDATE_TOTALS_SQL = (
+        "UPDATE record_totals SET "
+        + ", ".join(f"{name} = {name} + ?" for name in TOTAL_FIELDS)
+        + " WHERE id = 0"
+    )
+
+    @staticmethod
+    def _version_row(v: RecordVersion) -> tuple:
+        m = v.metrics
+        metrics = (
+            (None,) * 7 if m is None else (
+                m.raw_chars, m.raw_tokens, m.compressed_chars, m.compressed_tokens,
+                m.compressed_bytes, m.compression_ms, m.pipeline_version,
+            )
+        )
+        return (v.patient_id, v.recorded_at, v.payload, v.protocol, v.priority, *metrics)
+
+    @staticmethod
+    def _from_row(row: tuple) -> RecordVersion:
+        metrics = None if row[5] is None else RecordMetrics(*row[5:])
+        return RecordVersion(*row[:5], metrics=metrics)
+
+    def _write(self, versions: list[RecordVersion]) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    self._INSERT_VERSION_SQL, [self._version_row(v) for v in versions]
+                )
+                self._conn.executemany(
+                    self._UPSERT_SQL,
+                    [(v.patient_id, v.payload, v.recorded_at) for v in versions],
+                )
+                self._conn.execute(
+                    self._UPDATE_TOTALS_SQL, tuple(_totals_delta(versions).values())
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def get(self, patient_id: str) -> Payload | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM records WHERE patient_id = ?", (patient_id,)
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def latest(self, patient_id: str) -> RecordVersion | None:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {self._VERSION_COLUMNS} FROM record_versions WHERE patient_id = ?"
+                " ORDER BY recorded_at DESC, id DESC LIMIT 1",
+                (patient_id,),
+            ).fetchone()
+        return None if row is None else self._from_row(row)
+
+    def totals(self) -> dict[str, float]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(TOTAL_FIELDS)} FROM record_totals WHERE id = 0"
+            ).fetchone()
+        totals = dict(zip(TOTAL_FIELDS, row))
+        for name in TOTAL_FIELDS:
+            if name != "compression_ms":
+                totals[name] = int(totals[name])
+        return totals
+
+    def put_version(self, version: RecordVersion) -> None:
+        self._write([version])
+
+    def put_many(self, records: Iterable[RecordVersion | tuple[str, Payload]]) -> int:
+        now = time.time()
+        versions = [_as_version(item, now) for item in records]
+        self._write(versions)
+        return len(versions)
+
+    def get_many(self, patient_ids: Sequence[str]) -> dict[str, Payload]:
+        ids = list(dict.fromkeys(patient_ids))
+        found: dict[str, Payload] = {}
+        with self._lock:
+            for start in range(0, len(ids), _MAX_SQL_PARAMS):
+                chunk = ids[start:start + _MAX_SQL_PARAMS]
+                placeholders = ",".join("?" * len(chunk))
+                found.update(
+                    self._conn.execute(
+                        "SELECT patient_id, payload FROM records"
+                        f" WHERE patient_id IN ({placeholders})",
+                        chunk,
+                    ).fetchall()
+                )
+        return found
+
+    def _select_versions(
+        self, filters: dict[str, object], since: float | None, until: float | None,
+        order: str, limit: int | None,
+    ) -> list[RecordVersion]:
+        clauses = [f"{column} = ?" for column in filters]
+        params = list(filters.values())
+        if since is not None:
+            clauses.append("recorded_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("recorded_at <= ?")
+            params.append(until)
+        sql = f"SELECT {self._VERSION_COLUMNS} FROM record_versions"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY recorded_at {order}, id {order}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def history(
+        self, patient_id: str, since: float | None = None, until: float | None = None
+    ) -> list[RecordVersion]:
+        return self._select_versions({"patient_id": patient_id}, since, until, "ASC", None)
+
+    def query(
+        self,
+        protocol: str | None = None,
+        priority: str | None = None,
+        since: float | None = None,
+        until: float | None = None,
+        limit: int | None = None,
+    ) -> list[RecordVersion]:
+        filters = {
+            column: value
+            for column, value in (("protocol", protocol), ("priority", priority))
+            if value is not None
+        }
+        return self._select_versions(filters, since, until, "DESC", limit)
+
+    def delete(self, patient_id: str) -> bool:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                removed = self._conn.execute(
+                    "SELECT COUNT(*), COUNT(raw_chars), "
+                    + ", ".join(f"COALESCE(SUM({name}), 0)" for name in _METRIC_SUM_FIELDS)
+                    + " FROM record_versions WHERE patient_id = ?",
+                    (patient_id,),
+                ).fetchone()
+                self._conn.execute(self._UPDATE_TOTALS_SQL, tuple(-value for value in removed))
+                self._conn.execute("DELETE FROM record_versions WHERE patient_id = ?", (patient_id,))
+                cursor = self._conn.execute("DELETE FROM records WHERE patient_id = ?", (patient_id,))
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return cursor.rowcount > 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class AsyncRecordStore:
+    """asyncio facade over a :class:`RecordStore`.
+
+    Each call runs in the default thread pool via :func:`asyncio.to_thread`,
+    so SQLite I/O never blocks the event loop.
+    """
+
+    def __init__(self, store: RecordStore) -> None:
+        self.store = store
+
+    async def put(
+        self,
+        patient_id: str,
+        payload: Payload,
+        recorded_at: float | None = None,
+        protocol: str | None = None,
+        priority: str | None = None,
+    ) -> None:
+        await asyncio.to_thread(
+            self.store.put, patient_id, payload, recorded_at, protocol, priority
+        )
+
+    async def get(self, patient_id: str) -> Payload | None:
+        return await asyncio.to_thread(self.store.get, patient_id)
+
+    async def put_many(self, records: Iterable[RecordVersion | tuple[str, Payload]]) -> int:
+        return await asyncio.to_thread(self.store.put_many, list(records))
+
+    async def get_many(self, patient_ids: Sequence[str]) -> dict[str, Payload]:
+        return await asyncio.to_thread(self.store.get_many, list(patient_ids))
+
+    async def history(
+        self, patient_id: str, since: float | None = None, until: float | None = None
+    ) -> list[RecordVersion]:
+        return await asyncio.to_thread(self.store.history, patient_id, since, until)
+
+    async def query(self, **filters) -> list[RecordVersion]:
+        return await asyncio.to_thread(self.store.query, **filters)
+
+    async def latest(self, patient_id: str) -> RecordVersion | None:
+        return await asyncio.to_thread(self.store.latest, patient_id)
+
+    async def totals(self) -> dict[str, float]:
+        return await asyncio.to_thread(self.store.totals)
+
+    async def delete(self, patient_id: str) -> bool:
+        return await asyncio.to_thread(self.store.delete, patient_id)
+
+    async def close(self) -> None:
+        await asyncio.to_thread(self.store.close)
+
+
+def open_record_store(path: str | None = None) -> RecordStore:
+    """Return a :class:`SQLiteRecordStore` at *path*, or an in-memory store
+    when *path* is ``None``."""
+    return SQLiteRecordStore(path) if path else InMemoryRecordStore()
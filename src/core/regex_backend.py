@@ -0,0 +1,198 @@
+r"""Regex Backend - Pluggable pattern engine for clinical text extraction.
+
+CompText and the codex modules compile their extraction patterns through
+:func:`compile`, which picks the engine:
+
+- ``"re2"``: Google RE2 (``pip install google-re2``), which matches in
+  time linear in the input whatever the pattern, so no note can make
+  extraction backtrack;
+- ``"re"``: the standard library engine;
+- ``"auto"`` (default): RE2 when installed and it matches exactly what
+  ``re`` would, ``re`` otherwise (RE2 has no lookaround or backreferences).
+  RE2's ``\b`` is ASCII-only, so patterns with word boundaries run on RE2
+  for ASCII text and on ``re`` for anything else.
+
+The default comes from the ``COMPTEXT_REGEX_ENGINE`` environment variable.
+The shipped patterns avoid nested or adjacent unbounded quantifiers over the
+same characters, so they stay linear on ``re`` too.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from typing import Any
+
+try:
+    import re2
+
+    _RE2_AVAILABLE = True
+    _RE2_OPTIONS = re2.Options()
+    _RE2_OPTIONS.log_errors = False  # unsupported syntax falls back quietly
+except ImportError:
+    _RE2_AVAILABLE = False
+
+ENGINES = ("auto", "re2", "re")
+
+# re flags that map onto RE2 inline flags; any other flag means ``re``.
+_RE2_INLINE_FLAGS = {re.IGNORECASE: "i", re.MULTILINE: "m", re.DOTALL: "s"}
+
+
+def default_engine() -> str:
+    """The engine named by ``COMPTEXT_REGEX_ENGINE`` (``"auto"`` if unset)."""
+    engine = os.environ.get("COMPTEXT_REGEX_ENGINE", "auto").lower()
+    if engine not in ENGINES:
+        raise ValueError(f"COMPTEXT_REGEX_ENGINE must be one of {ENGINES}, got {engine!r}")
+    return engine
+
+
+class Pattern:
+    """A compiled pattern bound to one engine.
+
+    Exposes the ``re.Pattern`` methods the extractors use (``search``,
+    ``match``, ``finditer``, ``findall``, ``sub``, ``split``), bound directly
+    to the engine's implementation.
+    """
+
+    __slots__ = ("pattern", "flags", "engine", "search", "match", "finditer", "findall", "sub", "split")
+
+    def __init__(self, pattern: str, flags: int, engine: str, compiled: Any) -> None:
+        self.pattern = pattern
+        self.flags = flags
+        self.engine = engine
+        self.search = compiled.search
+        self.match = compiled.match
+        self.finditer = compiled.finditer
+        self.findall = compiled.findall
+        self.sub = compiled.sub
+        self.split = compiled.split
+
+    def __repr__(self) -> str:
+        return f"Pattern({self.pattern!r}, engine={self.engine!r})"
+
+
+# Python's str patterns use Unicode \s and \d; RE2's are ASCII-only.
+_RE2_CLASS_ITEMS = {"s": r"\s\v\x1c-\x1f\x{85}\p{Z}", "d": r"\p{Nd}"}
+_TOKEN = re.compile(r"\\.|.", re.DOTALL)
+
+
+def _to_re2(pattern: str, multiline: bool) -> str:
+    r"""Rewrite *pattern* so RE2 matches what ``re`` would.
+
+    Widens ``\s``/``\d`` to their Unicode meaning and, without MULTILINE,
+    lets ``$`` also match before a final newline as Python's does (the
+    match then spans that newline; groups are unaffected). Word boundaries
+    are left as they are: see :func:`_has_word_boundary`.
+    """
+    out = []
+    in_class = False
+    for token in _TOKEN.findall(pattern):
+        if len(token) == 2 and token[1] in _RE2_CLASS_ITEMS:
+            items = _RE2_CLASS_ITEMS[token[1]]
+            out.append(items if in_class else f"[{items}]")
+        elif token == "[" and not in_class:
+            in_class = True
+            out.append(token)
+        elif token == "]" and in_class and out[-1] not in ("[", "[^"):
+            in_class = False
+            out.append(token)
+        elif token == "^" and in_class and out[-1] == "[":
+            out[-1] = "[^"
+        elif token == "$" and not in_class and not multiline:
+            out.append(r"(?:\n?\z)")
+        else:
+            out.append(token)
+    return "".join(out)
+
+
+def _has_word_boundary(pattern: str) -> bool:
+    r"""Whether *pattern* uses ``\b``/``\B`` outside a character class.
+
+    RE2's word characters are ``[0-9A-Za-z_]`` only, so such a pattern
+    matches like ``re`` on ASCII text alone.
+    """
+    in_class = False
+    last = ""
+    for token in _TOKEN.findall(pattern):
+        if not in_class:
+            if token in (r"\b", r"\B"):
+                return True
+            in_class = token == "["
+        elif token == "]" and last not in ("[", "[^"):
+            in_class = False
+        elif token == "^" and last == "[":
+            token = "[^"
+        last = token
+    return False
+
+
+class _AsciiDispatch:
+    """Runs RE2 on ASCII strings and ``re`` on the rest.
+
+    ``str.isascii`` is O(1) in CPython, so the dispatch costs nothing
+    measurable per call.
+    """
+
+    __slots__ = ("_re2", "_re")
+
+    def __init__(self, re2_compiled: Any, re_compiled: re.Pattern) -> None:
+        self._re2 = re2_compiled
+        self._re = re_compiled
+
+    def _for(self, string: str) -> Any:
+        return self._re2 if string.isascii() else self._re
+
+    def search(self, string: str, *args: Any) -> Any:
+        return self._for(string).search(string, *args)
+
+    def match(self, string: str, *args: Any) -> Any:
+        return self._for(string).match(string, *args)
+
+    def finditer(self, string: str, *args: Any) -> Any:
+        return self._for(string).finditer(string, *args)
+
+    def findall(self, string: str, *args: Any) -> Any:
+        return self._for(string).findall(string, *args)
+
+    def sub(self, repl: Any, string: str, *args: Any) -> Any:
+        return self._for(string).sub(repl, string, *args)
+
+    def split(self, string: str, *args: Any) -> Any:
+        return self._for(string).split(string, *args)
+
+
+def _compile_re2(pattern: str, flags: int) -> Any:
+    pattern = _to_re2(pattern, bool(flags & re.MULTILINE))
+    inline = ""
+    for flag, letter in _RE2_INLINE_FLAGS.items():
+        if flags & flag:
+            inline += letter
+            flags &= ~flag
+    if flags & ~re.UNICODE:
+        raise re.error(f"flags {flags!r} are not supported by RE2")
+    return re2.compile(f"(?{inline}){pattern}" if inline else pattern, _RE2_OPTIONS)
+
+
+def compile(pattern: str, flags: int = 0, engine: str | None = None) -> Pattern:
+    """Compile *pattern* on *engine* (the :func:`default_engine` if omitted).
+
+    Raises:
+        ValueError: If *engine* is unknown.
+        RuntimeError: If ``"re2"`` is requested but not installed.
+        re.error: If ``"re2"`` is requested and RE2 cannot compile *pattern*.
+    """
+    engine = engine or default_engine()
+    if engine not in ENGINES:
+        raise ValueError(f"engine must be one of {ENGINES}, got {engine!r}")
+    if engine == "re2" and not _RE2_AVAILABLE:
+        raise RuntimeError("the re2 engine requires the 'google-re2' package")
+    if engine != "re" and _RE2_AVAILABLE:
+        try:
+            compiled = _compile_re2(pattern, flags)
+            if engine == "auto" and _has_word_boundary(pattern):
+                compiled = _AsciiDispatch(compiled, re.compile(pattern, flags))
+            return Pattern(pattern, flags, "re2", compiled)
+        except (re.error, re2.error) as exc:
+            if engine == "re2":
+                raise re.error(f"RE2 cannot compile {pattern!r}: {exc}") from None
+    return Pattern(pattern, flags, "re", re.compile(pattern, flags))
@@ -0,0 +1,255 @@
+"""Sections - Single-pass clinical/admin/legal segmentation of EMR exports.
+
+EMR exports wrap the clinical core in legal disclaimers and billing or
+administrative fragments. :class:`SectionSegmenter` walks the lines once
+and starts a new section at
+
+- explicit markers such as ``[CLINICAL_CORE]``, ``=== BILLING ===`` or
+  ``BEGIN LEGAL`` / ``END LEGAL`` (configurable), and
+- header-like lines (``Title:``, ``# Title``, short ``ALL CAPS`` lines,
+  ``[Title]``) whose words name a legal, admin or clinical topic.
+
+Text before any header, and sections under unrecognised headers, count as
+clinical: segmentation only ever removes text it positively identified as
+noise. A header names a topic but nothing marks where its section ends, so
+a section opened by a legal or admin header also ends at the first line
+that looks clinical (a chief complaint, a vital sign with a value or a
+medication list, see :data:`CLINICAL_LINE`); inside explicitly marked
+blocks such lines are kept on their own. CompText extracts from clinical
+spans only, and the KVTC strategy drops admin spans from its compressed
+middle.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterable, Mapping
+
+from src.core import regex_backend
+from src.core.regex_backend import Pattern
+from src.core.text import NormalizedText
+
+CLINICAL = "clinical"
+ADMIN = "admin"
+LEGAL = "legal"
+KINDS = (CLINICAL, ADMIN, LEGAL)
+
+DEFAULT_MARKERS: dict[str, str] = {
+    "CLINICAL_CORE": CLINICAL,
+    "CLINICAL": CLINICAL,
+    "ADMIN": ADMIN,
+    "ADMINISTRATIVE": ADMIN,
+    "BILLING": ADMIN,
+    "LEGAL": LEGAL,
+    "LEGAL_NOTICE": LEGAL,
+    "DISCLAIMER": LEGAL,
+}
+
+# Header words per kind (casefolded substrings). Clinical words are checked
+# first, so "Medication administration:" stays clinical. English plus the
+# German terms of ePA-style exports.
+DEFAULT_KEYWORDS: dict[str, tuple[str, ...]] = {
+    LEGAL: (
+        "disclaimer", "legal", "confidential", "privacy", "copyright", "liability",
+        "terms of use", "gdpr", "hipaa", "datenschutz", "haftung", "rechtlich",
+        "vertraulich", "dsgvo",
+    ),
+    ADMIN: (
+        "billing", "invoice", "insurance", "payment", "account", "admin",
+        "address", "contact information", "contact details", "scheduling", "fax",
+        "abrechnung", "rechnung", "versicherung", "verwaltung", "kontaktdaten",
+        "anschrift", "kostenträger",
+    ),
+    CLINICAL: (
+        "clinical", "complaint", "history", "hpi", "assessment", "plan", "diagnos",
+        "vital", "medication", "allerg", "exam", "impression", "finding", "triage",
+        "befund", "anamnese", "diagnose", "medikation", "therapie", "klinisch",
+    ),
+}
+
+# Lines that are never dropped: the labels CompText extracts the chief
+# complaint, vitals and medication from (vitals only with a value).
+# Matched against the casefolded line.
+CLINICAL_LINE = regex_backend.compile(
+    # branches are grouped by first letter so long noise lines fail fast
+    # at most positions (no lookahead, which RE2 lacks)
+    r"\b(?:c(?:hief complaint|c\s*[:\-])"
+    r"|p(?:resent(?:ing (?:with|complaint)|s with)|atient has|rescribed\s*[:\-])"
+    r"|(?:hr|heart rate|bp|blood pressure|temp(?:erature)?|fever)\s*(?:[:\-]\s*)?\d"
+    r"|t(?:aking\s*[:\-]|\s+\d)"
+    r"|med(?:ication)?s?\s*[:\-])"
+)
+
+_HEADER_MAX_CHARS = 80
+_DECORATION = "#=*-_[]<>|:/ \t"
+_HEADER_OPENERS = "#=[<*"
+
+
+@dataclass(frozen=True)
+class Section:
+    """A ``[start, end)`` span of the segmented text and its kind."""
+
+    kind: str
+    start: int
+    end: int
+    header: str | None = None
+
+
+class SectionSegmenter:
+    """Classifies the spans of a document as clinical, admin or legal.
+
+    Args:
+        markers: Marker name (upper case, ``_`` for spaces) → kind; replaces
+            :data:`DEFAULT_MARKERS`.
+        keywords: Kind → header words; replaces :data:`DEFAULT_KEYWORDS`.
+        clinical_lines: Pattern for lines kept in any section; None
+            disables the check, so legal and admin sections run to the next
+            header or marker.
+    """
+
+    def __init__(
+        self,
+        markers: Mapping[str, str] | None = None,
+        keywords: Mapping[str, Iterable[str]] | None = None,
+        clinical_lines: Pattern | None = CLINICAL_LINE,
+    ) -> None:
+        self.markers = dict(DEFAULT_MARKERS if markers is None else markers)
+        keywords = DEFAULT_KEYWORDS if keywords is None else keywords
+        self.keywords = {kind: tuple(w.casefold() for w in keywords.get(kind, ())) for kind in KINDS}
+        for kind in self.markers.values():
+            if kind not in KINDS:
+                raise ValueError(f"unknown section kind {kind!r}")
+        # a marker line has at most this many spaces (BEGIN_/END_ included),
+        # so longer plain lines skip marker parsing
+        self._marker_spaces = max((name.count("_") + 1 for name in self.markers), default=0)
+        self.clinical_lines = clinical_lines
+
+    # ------------------------------------------------------------------
+    # classification
+    # ------------------------------------------------------------------
+
+    def _marker(self, line: str) -> tuple[str, bool] | None:
+        """``(kind, is_end)`` if *line* is an explicit marker."""
+        line = line.strip()
+        token = line.strip(_DECORATION).upper().replace(" ", "_")
+        is_end = False
+        if token.startswith("END_"):
+            token, is_end = token[4:], True
+        elif token.startswith("BEGIN_"):
+            token = token[6:]
+        elif line.lstrip(_DECORATION.replace("/", ""))[:1] == "/":
+            is_end = True  # </LEGAL>, [/BILLING]
+            token = token.lstrip("/")
+        kind = self.markers.get(token)
+        return (kind, is_end) if kind is not None else None
+
+    def _header_kind(self, line: str) -> str | None:
+        """The kind named by a header-like *line*, ``CLINICAL`` for an
+        unrecognised header, or None if *line* is not a header."""
+        stripped = line.strip()
+        if not (
+            stripped.endswith(":")
+            or stripped[:1] in _HEADER_OPENERS
+            or (
+                stripped.isupper()
+                and stripped[-1] not in ".!?"
+                and len(stripped.split()) <= 4
+                and not any(c.isdigit() for c in stripped)
+            )
+        ):
+            return None
+        title = stripped.strip(_DECORATION).casefold()
+        if not title:
+            return None
+        for kind in (CLINICAL, LEGAL, ADMIN):
+            if any(word in title for word in self.keywords[kind]):
+                return kind
+        return CLINICAL
+
+    # ------------------------------------------------------------------
+    # segmentation
+    # ------------------------------------------------------------------
+
+    def segment(self, text: str) -> list[Section]:
+        """Split *text* into contiguous sections covering all of it; adjacent
+        sections of the same kind are merged."""
+        sections: list[Section] = []
+        kind, header, start = CLINICAL, None, 0
+        marked = False  # the current noise section was opened by a marker
+
+        def switch(new_kind: str, new_header: str | None, at: int) -> None:
+            nonlocal kind, header, start
+            if at > start:
+                sections.append(Section(kind, start, at, header))
+            elif sections and sections[-1].kind == new_kind:
+                # the section being left is empty: reopen the one before it
+                previous = sections.pop()
+                kind, header, start = new_kind, previous.header, previous.start
+                return
+            kind, header, start = new_kind, new_header, at
+
+        pos = 0
+        for line in text.splitlines(keepends=True):
+            line_start = pos
+            pos += len(line)
+            stripped = line.strip()
+            if not stripped:
+                continue
+            header_like = len(line) <= _HEADER_MAX_CHARS and not (
+                stripped.count(" ") > self._marker_spaces
+                and stripped[-1] != ":"
+                and stripped[0] not in _HEADER_OPENERS
+                and not stripped.isupper()
+            )
+            new_kind = None
+            if header_like:
+                marker = self._marker(line)
+                if marker is not None:
+                    new_kind = CLINICAL if marker[1] else marker[0]
+                    marked = not marker[1]
+                else:
+                    new_kind = self._header_kind(line)
+                    if new_kind is not None:
+                        marked = False
+            if new_kind is not None:
+                if new_kind != kind:
+                    switch(new_kind, stripped, line_start)
+                continue
+            if (
+                kind != CLINICAL
+                and self.clinical_lines is not None
+                and self.clinical_lines.search(stripped.casefold())
+            ):
+                if marked:
+                    # keep the line, then resume the marked block
+                    noise_kind, noise_header = kind, header
+                    switch(CLINICAL, None, line_start)
+                    switch(noise_kind, noise_header, pos)
+                else:
+                    switch(CLINICAL, None, line_start)
+        if len(text) > start or not sections:
+            sections.append(Section(kind, start, len(text), header))
+        return sections
+
+    def keep(self, text: str, drop: Iterable[str]) -> str:
+        """*text* without the sections whose kind is in *drop*."""
+        drop = set(drop)
+        sections = self.segment(text)
+        if not any(section.kind in drop for section in sections):
+            return text
+        return "".join(text[s.start:s.end] for s in sections if s.kind not in drop)
+
+    def clinical(self, text: str | NormalizedText) -> NormalizedText:
+        """The clinical part of *text* as a NormalizedText (the same
+        instance when nothing was classified as noise, or when no clinical
+        text would remain)."""
+        text = NormalizedText.of(text)
+        kept = self.keep(text.nfc, (ADMIN, LEGAL))
+        if kept is text.nfc or not kept.strip():
+            return text
+        clinical = NormalizedText(kept)
+        clinical._nfc = kept
+        return clinical
+
+
+DEFAULT_SEGMENTER = SectionSegmenter()
@@ -0,0 +1,227 @@
+"""Text - One normalization pass per record, shared by every extractor.
+
+:class:`NormalizedText` wraps a record's raw text and derives, lazily and
+at most once each:
+
+- ``nfc``: the Unicode NFC form (the raw text itself when already NFC);
+- ``folded``: the casefolded ``nfc``, which extraction patterns search
+  case-sensitively instead of each re-folding under ``re.IGNORECASE``;
+- ``collapsed``: ``nfc`` with whitespace runs collapsed to one space and
+  the ends stripped, plus ``collapsed_folded``.
+
+Each view keeps an offset map back to ``nfc`` and from there to the raw
+text, so a span found in any view can be reported against the original.
+ASCII and already-normalized text take identity fast paths with no map.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+
+from src.core.regex_backend import Pattern
+
+_NON_SPACE = re.compile(r"\S+")
+
+
+def _is_joiner(char: str) -> bool:
+    # Combining marks and conjoining Hangul vowels/finals compose with the
+    # preceding character under NFC.
+    return unicodedata.combining(char) != 0 or "\u1160" <= char <= "\u11ff"
+
+
+def _clusters(text: str) -> list[tuple[int, int]]:
+    bounds = []
+    start = 0
+    for i in range(1, len(text)):
+        if not _is_joiner(text[i]):
+            bounds.append((start, i))
+            start = i
+    if text:
+        bounds.append((start, len(text)))
+    return bounds
+
+
+# An offset map gives, per character of a derived view, the [start, end)
+# span it came from in the source view.
+OffsetMap = tuple[list[int], list[int]]
+
+
+def _per_cluster_map(source: str, transform) -> tuple[str, OffsetMap]:
+    """Apply a (possibly length-changing) *transform* cluster by cluster."""
+    parts = []
+    starts: list[int] = []
+    ends: list[int] = []
+    for start, end in _clusters(source):
+        piece = transform(source[start:end])
+        parts.append(piece)
+        starts.extend([start] * len(piece))
+        ends.extend([end] * len(piece))
+    return "".join(parts), (starts, ends)
+
+
+def _map_span(offsets: OffsetMap | None, start: int, end: int, source_len: int) -> tuple[int, int]:
+    if offsets is None:
+        return start, end
+    starts, ends = offsets
+    mapped_start = starts[start] if start < len(starts) else source_len
+    if end <= start:
+        return mapped_start, mapped_start
+    return mapped_start, ends[end - 1]
+
+
+class NormalizedText:
+    """A record's raw text and its lazily derived normalized views.
+
+    Pass one instance through CompText, the router, the codex modules and
+    KVTC; ``NormalizedText.of`` accepts either a ``str`` or an instance.
+    """
+
+    __slots__ = (
+        "original",
+        "_nfc",
+        "_nfc_map",
+        "_folded",
+        "_folded_map",
+        "_collapsed",
+        "_collapsed_map",
+        "_collapsed_folded",
+    )
+
+    def __init__(self, text: str) -> None:
+        self.original = text
+        self._nfc: str | None = None
+        self._nfc_map: OffsetMap | None = None
+        self._folded: str | None = None
+        self._folded_map: OffsetMap | None = None
+        self._collapsed: str | None = None
+        self._collapsed_map: OffsetMap | None = None
+        self._collapsed_folded: str | None = None
+
+    @classmethod
+    def of(cls, text: str | NormalizedText) -> NormalizedText:
+        return text if isinstance(text, NormalizedText) else cls(text)
+
+    def __len__(self) -> int:
+        return len(self.original)
+
+    def __str__(self) -> str:
+        return self.original
+
+    def __repr__(self) -> str:
+        return f"NormalizedText({self.original!r})"
+
+    # ------------------------------------------------------------------
+    # views
+    # ------------------------------------------------------------------
+
+    @property
+    def nfc(self) -> str:
+        """NFC form of the raw text."""
+        if self._nfc is None:
+            text = self.original
+            if text.isascii() or unicodedata.is_normalized("NFC", text):
+                self._nfc = text
+            else:
+                nfc, offsets = _per_cluster_map(text, lambda s: unicodedata.normalize("NFC", s))
+                if nfc != unicodedata.normalize("NFC", text):
+                    # composition crossed a cluster boundary: coarse map
+                    nfc = unicodedata.normalize("NFC", text)
+                    offsets = ([0] * len(nfc), [len(text)] * len(nfc))
+                self._nfc = nfc
+                self._nfc_map = offsets
+        return self._nfc
+
+    @property
+    def folded(self) -> str:
+        """Casefolded ``nfc``; same length as ``nfc`` unless folding expands
+        characters (e.g. ``ß`` → ``ss``)."""
+        if self._folded is None:
+            nfc = self.nfc
+            if nfc.isascii():
+                self._folded = nfc.lower()
+            else:
+                folded = nfc.casefold()
+                if len(folded) != len(nfc):
+                    folded, self._folded_map = _per_cluster_map(nfc, str.casefold)
+                self._folded = folded
+        return self._folded
+
+    @property
+    def collapsed(self) -> str:
+        """``nfc`` with whitespace runs collapsed to one space, stripped."""
+        if self._collapsed is None:
+            nfc = self.nfc
+            words = [(m.start(), m.end()) for m in _NON_SPACE.finditer(nfc)]
+            starts: list[int] = []
+            ends: list[int] = []
+            for index, (start, end) in enumerate(words):
+                if index:
+                    # the single space stands for the whole whitespace run
+                    starts.append(words[index - 1][1])
+                    ends.append(start)
+                starts.extend(range(start, end))
+                ends.extend(range(start + 1, end + 1))
+            self._collapsed = " ".join(nfc[start:end] for start, end in words)
+            self._collapsed_map = (starts, ends)
+        return self._collapsed
+
+    @property
+    def collapsed_folded(self) -> str:
+        """Casefolded ``collapsed``."""
+        if self._collapsed_folded is None:
+            collapsed = self.collapsed
+            self._collapsed_folded = (
+                collapsed.lower() if collapsed.isascii() else collapsed.casefold()
+            )
+        return self._collapsed_folded
+
+    def slice(self, start: int, end: int) -> NormalizedText:
+        """A NormalizedText for ``nfc[start:end]``, reusing this record's
+        NFC and (when length-preserving) casefolded views."""
+        part = NormalizedText(self.nfc[start:end])
+        part._nfc = part.original
+        if self._folded is not None and self._folded_map is None:
+            part._folded = self._folded[start:end]
+        return part
+
+    # ------------------------------------------------------------------
+    # offsets
+    # ------------------------------------------------------------------
+
+    def nfc_to_original(self, start: int, end: int) -> tuple[int, int]:
+        """Map an ``nfc`` span to the raw text."""
+        self.nfc
+        return _map_span(self._nfc_map, start, end, len(self.original))
+
+    def folded_to_nfc(self, start: int, end: int) -> tuple[int, int]:
+        """Map a ``folded`` span to ``nfc``."""
+        self.folded
+        return _map_span(self._folded_map, start, end, len(self.nfc))
+
+    def collapsed_to_nfc(self, start: int, end: int) -> tuple[int, int]:
+        """Map a ``collapsed`` (or ``collapsed_folded``, when the lengths
+        agree) span to ``nfc``."""
+        self.collapsed
+        return _map_span(self._collapsed_map, start, end, len(self.nfc))
+
+    def folded_to_original(self, start: int, end: int) -> tuple[int, int]:
+        """Map a ``folded`` span all the way back to the raw text."""
+        return self.nfc_to_original(*self.folded_to_nfc(start, end))
+
+    # ------------------------------------------------------------------
+    # extraction
+    # ------------------------------------------------------------------
+
+    def search(self, pattern: Pattern, group: int = 1) -> tuple[int, int] | None:
+        """Search the ``folded`` view; return *group*'s span in ``nfc``."""
+        match = pattern.search(self.folded)
+        if match is None or match.start(group) < 0:
+            return None
+        return self.folded_to_nfc(match.start(group), match.end(group))
+
+    def extract_first(self, pattern: Pattern, group: int = 1) -> str | None:
+        """The stripped ``nfc`` text of *group* in the first match of the
+        (lowercase, case-sensitive) *pattern* on ``folded``, or None."""
+        span = self.search(pattern, group)
+        return self.nfc[span[0]:span[1]].strip() if span else None
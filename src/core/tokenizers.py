@@ -0,0 +1,174 @@
+"""Tokenizers - Token offset adapters for budgeting prompts in model tokens.
+
+Each adapter turns a text into the ``(start, end)`` character span of every
+token, which is all the token-budgeted KVTC strategy needs: spans give
+token counts for any slice of the text and the cut points that fall on
+token boundaries.
+
+- :class:`HFTokenizer`: a Hugging Face *fast* tokenizer (``transformers``),
+  e.g. the MedGemma tokenizer, via ``return_offsets_mapping``;
+- :class:`TiktokenTokenizer`: a ``tiktoken`` encoding;
+- :class:`RegexTokenizer`: a dependency-free approximation of a BPE
+  vocabulary (letters in runs of up to four, digits in runs of up to
+  three, each other symbol on its own).
+
+Adapters keep a small LRU of encoded texts, so budgeting a record costs
+one encode however often its slices are counted.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Any
+
+try:
+    import tiktoken
+
+    _TIKTOKEN_AVAILABLE = True
+except ImportError:
+    _TIKTOKEN_AVAILABLE = False
+
+try:
+    from transformers import AutoTokenizer
+
+    _TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    _TRANSFORMERS_AVAILABLE = False
+
+
+class TokenSpans:
+    """The token spans of one text, with counting helpers."""
+
+    __slots__ = ("text", "spans", "starts")
+
+    def __init__(self, text: str, spans: list[tuple[int, int]]) -> None:
+        self.text = text
+        self.spans = spans
+        self.starts = [start for start, _ in spans]
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+    def count(self, start: int, end: int) -> int:
+        """Number of tokens starting inside ``text[start:end]``."""
+        return bisect_left(self.starts, end) - bisect_left(self.starts, start)
+
+    def boundary(self, index: int) -> int:
+        """Character offset where token *index* starts (``len(text)`` past
+        the last token)."""
+        return self.spans[index][0] if index < len(self.spans) else len(self.text)
+
+
+class Tokenizer(ABC):
+    """Base class for tokenizer adapters.
+
+    Args:
+        cache_size: Number of encoded texts to keep.
+    """
+
+    name = "tokenizer"
+
+    def __init__(self, cache_size: int = 256) -> None:
+        self.cache_size = cache_size
+        self._cache: OrderedDict[str, TokenSpans] = OrderedDict()
+        self._lock = threading.Lock()
+        self.encodes = 0
+
+    @abstractmethod
+    def _spans(self, text: str) -> list[tuple[int, int]]:
+        """Character spans of the tokens of *text*, in order."""
+
+    def tokenize(self, text: str) -> TokenSpans:
+        """The (cached) token spans of *text*."""
+        with self._lock:
+            cached = self._cache.get(text)
+            if cached is not None:
+                self._cache.move_to_end(text)
+                return cached
+        spans = TokenSpans(text, self._spans(text))
+        with self._lock:
+            self.encodes += 1
+            if self.cache_size > 0:
+                self._cache[text] = spans
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return spans
+
+    def count(self, text: str) -> int:
+        """Number of tokens in *text*."""
+        return len(self.tokenize(text))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.name!r})"
+
+
+class RegexTokenizer(Tokenizer):
+    """Dependency-free approximation of a BPE tokenizer."""
+
+    name = "regex"
+    _TOKEN = re.compile(r"[^\W\d_]{1,4}|\d{1,3}|[^\w\s]|_")
+
+    def _spans(self, text: str) -> list[tuple[int, int]]:
+        return [m.span() for m in self._TOKEN.finditer(text)]
+
+
+class TiktokenTokenizer(Tokenizer):
+    """A ``tiktoken`` encoding, e.g. ``"cl100k_base"``."""
+
+    def __init__(self, encoding: str = "cl100k_base", cache_size: int = 256) -> None:
+        if not _TIKTOKEN_AVAILABLE:
+            raise RuntimeError("TiktokenTokenizer requires the 'tiktoken' package")
+        super().__init__(cache_size)
+        self.name = encoding
+        self._encoding = tiktoken.get_encoding(encoding)
+
+    def _spans(self, text: str) -> list[tuple[int, int]]:
+        tokens = self._encoding.encode(text, disallowed_special=())
+        _, starts = self._encoding.decode_with_offsets(tokens)
+        # a token holding part of a multi-byte character shares its start
+        return list(zip(starts, [*starts[1:], len(text)]))
+
+
+class HFTokenizer(Tokenizer):
+    """A Hugging Face fast tokenizer (an instance, or a model name to load
+    with ``AutoTokenizer.from_pretrained``)."""
+
+    def __init__(self, tokenizer: Any, cache_size: int = 256) -> None:
+        if isinstance(tokenizer, str):
+            if not _TRANSFORMERS_AVAILABLE:
+                raise RuntimeError("HFTokenizer requires the 'transformers' package")
+            tokenizer = AutoTokenizer.from_pretrained(tokenizer)
+        if not getattr(tokenizer, "is_fast", False):
+            raise ValueError("HFTokenizer needs a fast tokenizer for offset mappings")
+        super().__init__(cache_size)
+        self.name = getattr(tokenizer, "name_or_path", type(tokenizer).__name__)
+        self._tokenizer = tokenizer
+
+    def _spans(self, text: str) -> list[tuple[int, int]]:
+        encoded = self._tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+        return [tuple(span) for span in encoded["offset_mapping"]]
+
+
+def get_tokenizer(spec: str | Tokenizer = "regex") -> Tokenizer:
+    """Build a tokenizer from *spec*: ``"regex"``, ``"tiktoken"`` or
+    ``"tiktoken:<encoding>"``, ``"hf:<model name>"``, or an adapter, which
+    is returned as is.
+
+    Raises:
+        ValueError: If *spec* names no known tokenizer.
+        RuntimeError: If the tokenizer's package is not installed.
+    """
+    if isinstance(spec, Tokenizer):
+        return spec
+    kind, _, name = spec.partition(":")
+    if kind == "regex" and not name:
+        return RegexTokenizer()
+    if kind == "tiktoken":
+        return TiktokenTokenizer(name or "cl100k_base")
+    if kind == "hf" and name:
+        return HFTokenizer(name)
+    raise ValueError(f"unknown tokenizer {spec!r}")
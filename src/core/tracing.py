@@ -0,0 +1,224 @@
+"""Tracing - Lightweight spans exported as OpenTelemetry-compatible JSON.
+
+Spans nest through a context variable, so a span opened inside another
+becomes its child (also across :class:`~src.core.pipeline.StagePipeline`
+worker threads, which copy the context). When a root span ends, its whole
+trace is handed to the exporter as one OTLP/JSON ``resourceSpans`` document.
+
+With no exporter configured (the default), :meth:`Tracer.span` returns a
+shared no-op span, so instrumented code pays one method call per span.
+Set ``COMPTEXT_TRACE_FILE`` to append traces to a JSON-lines file.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Protocol
+
+
+class SpanExporter(Protocol):
+    """Receives every finished trace (root span plus descendants)."""
+
+    def export(self, spans: list["Span"]) -> None: ...
+
+
+class Span:
+    """One timed operation within a trace."""
+
+    __slots__ = (
+        "name", "trace_id", "span_id", "parent_id", "attributes",
+        "start_ns", "end_ns", "error", "_tracer", "_trace", "_perf_start", "_token",
+    )
+
+    def __init__(self, tracer: "Tracer", name: str, parent: "Span | None", attributes: dict) -> None:
+        self.name = name
+        self._tracer = tracer
+        self.span_id = f"{random.getrandbits(64):016x}"
+        if parent is None:
+            self.trace_id = f"{random.getrandbits(128):032x}"
+            self.parent_id: str | None = None
+            self._trace: list[Span] = []
+        else:
+            self.trace_id = parent.trace_id
+            self.parent_id = parent.span_id
+            self._trace = parent._trace
+        self.attributes = attributes
+        self.start_ns = 0
+        self.end_ns = 0
+        self.error: str | None = None
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self.start_ns = time.time_ns()
+        self._perf_start = time.perf_counter_ns()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.end_ns = self.start_ns + (time.perf_counter_ns() - self._perf_start)
+        _current_span.reset(self._token)
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        self._trace.append(self)
+        if self.parent_id is None:
+            self._tracer._export(self._trace)
+
+    def to_otlp(self) -> dict[str, Any]:
+        """Return this span in OTLP/JSON form."""
+        span: dict[str, Any] = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class _NoopSpan:
+    """Shared stand-in returned while tracing is disabled."""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: ContextVar[Span | None] = ContextVar("comptext_current_span", default=None)
+
+
+class Tracer:
+    """Creates spans and forwards finished traces to an exporter.
+
+    Args:
+        service_name: ``service.name`` resource attribute of exported traces.
+        exporter: Destination for finished traces; ``None`` disables tracing.
+    """
+
+    def __init__(self, service_name: str = "comptext", exporter: SpanExporter | None = None) -> None:
+        self.service_name = service_name
+        self.exporter = exporter
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def span(self, name: str, **attributes: Any) -> Span | _NoopSpan:
+        """Return a context manager timing *name* as a child of the
+        current span (or as a new trace root)."""
+        if self.exporter is None:
+            return NOOP_SPAN
+        return Span(self, name, _current_span.get(), attributes)
+
+    def configure(self, exporter: SpanExporter | None) -> None:
+        """Install *exporter* (``None`` disables tracing)."""
+        self.exporter = exporter
+
+    def _export(self, spans: list[Span]) -> None:
+        exporter = self.exporter
+        if exporter is not None:
+            exporter.export(spans)
+
+    def to_otlp(self, spans: list[Span]) -> dict[str, Any]:
+        """Wrap *spans* in an OTLP/JSON ``ExportTraceServiceRequest``."""
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [_otlp_attribute("service.name", self.service_name)]},
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "src.core.tracing"},
+                            "spans": [span.to_otlp() for span in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+
+
+def current_span() -> Span | None:
+    """The innermost active span in this context, if any."""
+    return _current_span.get()
+
+
+# ---------------------------------------------------------------------------
+# Exporters
+# ---------------------------------------------------------------------------
+
+
+class InMemoryExporter:
+    """Collector stand-in that keeps finished spans in memory."""
+
+    def __init__(self) -> None:
+        self.spans: list[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, spans: list[Span]) -> None:
+        with self._lock:
+            self.spans.extend(spans)
+
+    def names(self) -> list[str]:
+        """Names of all collected spans, in end order."""
+        return [span.name for span in self.spans]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.spans.clear()
+
+
+class JSONFileExporter:
+    """Appends one OTLP/JSON document per trace to *path* (JSON lines),
+    the format read by the OpenTelemetry Collector's ``otlpjsonfile``
+    receiver."""
+
+    def __init__(self, path: str, tracer: Tracer | None = None) -> None:
+        self.path = path
+        self._tracer = tracer
+        self._lock = threading.Lock()
+
+    def export(self, spans: list[Span]) -> None:
+        document = (self._tracer or tracer).to_otlp(spans)
+        line = json.dumps(document, separators=(",", ":")) + "\n"
+        with self._lock, open(self.path, "a", encoding="utf-8") as fh:
+            fh.write(line)
+
+
+def _otlp_attribute(key: str, value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        wrapped = {"boolValue": value}
+    elif isinstance(value, int):
+        wrapped = {"intValue": str(value)}
+    elif isinstance(value, float):
+        wrapped = {"doubleValue": value}
+    else:
+        wrapped = {"stringValue": str(value)}
+    return {"key": key, "value": wrapped}
+
+
+tracer = Tracer()
+if os.environ.get("COMPTEXT_TRACE_FILE"):
+    tracer.configure(JSONFileExporter(os.environ["COMPTEXT_TRACE_FILE"]))
@@ -2,7 +2,11 @@
 
 from __future__ import annotations
 
+from src.agents.doctor_agent import DoctorAgent
+from src.agents.nurse_agent import NurseAgent
+from src.agents.triage_agent import TriageAgent
 from src.core.codex import MedicalKVTCStrategy
+from src.core.pipeline import StagePipeline, build_clinical_pipeline
 
 
 def compress_content(text: str, *, mode: str = "medical_safe") -> str:
@@ -26,3 +30,33 @@ def compress_content(text: str, *, mode: str = "medical_safe") -> str:
         )
 
     return strategy.compress(text)
+
+
+_pipeline: StagePipeline | None = None
+
+
+def process_clinical_text(text: str) -> dict:
+    """Run the full Nurse → Triage / Doctor pipeline on *text*.
+
+    Uses the same stage executor as the REST API, CLI and dashboard.
+
+    Returns:
+        A dict with the compressed ``state``, ``triage`` priority,
+        ``diagnosis`` text and per-stage ``timings_ms``.
+    """
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = build_clinical_pipeline(NurseAgent(), TriageAgent(), DoctorAgent())
+
+    run = _pipeline.run(text)
+    triage = run["triage"]
+    return {
+        "state": run["compression"].model_dump(exclude_none=True),
+        "triage": {
+            "priority_level": triage.priority_level,
+            "priority_name": triage.priority_name,
+            "reason": triage.reason,
+        },
+        "diagnosis": run["diagnosis"],
+        "timings_ms": run.timings_ms,
+    }
@@ -0,0 +1,78 @@
+"""
+Record Codec Benchmark
+
+Compares storing PatientState records as compact JSON text against the
+binary codec in src/core/codec.py:
+
+- bytes per record: JSON, binary, and binary blocks (zlib / zstd when
+  installed) of 1000 records
+- encode and decode throughput (records/sec), where JSON decode is
+  json.loads and binary decode is codec.decode_dict (the same compact dict)
+
+Failing assertions report the measured figures.
+"""
+
+import json
+import time
+
+import pytest
+
+from src.core import codec
+from src.core.comptext import CompTextProtocol
+
+TEXTS = [
+    "Chief complaint: severe chest pain radiating to left arm for 2 hours. "
+    "HR 110, BP 160/95, Temp 38.2C. Medications: aspirin 325mg, metoprolol. "
+    "Allergies: penicillin.",
+    "Patient with shortness of breath and cough, wheezing triggered by exercise. "
+    "Breath sounds: diminished. HR 98, Temp 37.1",
+    "Sudden weakness on left side, slurred speech. Last known well 14:30. BP 180/100",
+    "Motor vehicle accident, laceration to forehead, bleeding. HR 120, BP 90/60",
+    "Fever and cough for three days, fatigue, headache. Temp 38.9, HR 102",
+]
+N_RECORDS = 1000
+
+
+def _rate(func, items, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        best = min(best, time.perf_counter() - start)
+    return len(items) / best
+
+
+@pytest.fixture(scope="module")
+def states():
+    protocol = CompTextProtocol()
+    return [
+        protocol.compress(f"{TEXTS[i % len(TEXTS)]} HR {60 + i % 90}, Temp {36 + (i % 40) / 10}")
+        for i in range(N_RECORDS)
+    ]
+
+
+@pytest.mark.performance
+def test_binary_codec_size_and_throughput(states):
+    json_payloads = [s.to_compressed_json() for s in states]
+    binary_payloads = [codec.encode(s) for s in states]
+
+    json_bytes = sum(len(p.encode("utf-8")) for p in json_payloads) / N_RECORDS
+    binary_bytes = sum(len(p) for p in binary_payloads) / N_RECORDS
+    block_sizes = {
+        name: len(codec.encode_block(states, compression=name)) / N_RECORDS
+        for name in ("zlib", "zstd")
+        if name != "zstd" or codec._ZSTD_AVAILABLE
+    }
+
+    json_encode = _rate(lambda s: s.to_compressed_json(), states)
+    binary_encode = _rate(codec.encode, states)
+    json_decode = _rate(json.loads, json_payloads)
+    binary_decode = _rate(codec.decode_dict, binary_payloads)
+
+    assert binary_bytes < json_bytes * 0.75, f"binary {binary_bytes:.1f} vs json {json_bytes:.1f} bytes/record"
+    for name, size in block_sizes.items():
+        assert size < binary_bytes, f"{name} block {size:.1f} vs binary {binary_bytes:.1f} bytes/record"
+    # pure-Python codec cannot match the C json scanner; keep it in range
+    assert binary_encode > json_encode / 10, f"encode: binary {binary_encode:,.0f} vs json {json_encode:,.0f} rec/s"
+    assert binary_decode > json_decode / 10, f"decode: binary {binary_decode:,.0f} vs json {json_decode:,.0f} rec/s"
@@ -0,0 +1,87 @@
+"""
+Near-Duplicate Dedup Benchmark
+
+Simulates copy-forward documentation: every patient gets a series of
+notes, each a copy of the previous one with the vitals line updated and a
+progress line appended. Compares plain CompText against the incremental
+compressor (MinHash/LSH lookup + line diff + partial re-extraction) and
+checks that both produce the same states. Short notes (under the
+compressor's ``min_chars``) are extracted in full without a lookup; long
+ones go through the incremental path, which pays off on the ``re`` engine
+as the copied history grows; on RE2 full extraction is cheaper than the
+lookup and diff, so the speed-up is only asserted on ``re``. Failing assertions report the measured figures.
+"""
+
+import random
+import time
+
+import pytest
+
+from src.core.comptext import CompTextProtocol
+from src.core.dedup import IncrementalCompressor
+
+NOTES_PER_PATIENT = 10
+
+
+def _series(rng, patient, history):
+    lines = [
+        "Chief complaint: chest pain radiating to left arm.",
+        f"HR {rng.randint(60, 120)}, BP {rng.randint(110, 170)}/{rng.randint(60, 100)}.",
+        "Medications: aspirin 325mg, metoprolol 25mg.",
+        "Allergies: penicillin.",
+        "Pain described as pressure.",
+    ] + [f"History item {i} for patient {patient}: documented and unchanged." for i in range(history)]
+    for day in range(NOTES_PER_PATIENT):
+        lines[1] = f"HR {rng.randint(60, 120)}, BP {rng.randint(110, 170)}/{rng.randint(60, 100)}."
+        lines.append(f"Day {day}: patient mobilizing, tolerating diet.")
+        yield "\n".join(lines) + "\n"
+
+
+def _best(func, repeat=3):
+    """Fastest of *repeat* runs of *func* and its last result."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _normalized(state):
+    data = state.to_compressed_dict()
+    data["symptoms"] = sorted(data.get("symptoms", []))
+    return data
+
+
+@pytest.mark.performance
+@pytest.mark.parametrize("history,patients", [(40, 100), (400, 20)])
+def test_incremental_compression_skips_work(history, patients):
+    rng = random.Random(11)
+    notes = [
+        (f"p{patient}", note)
+        for patient in range(patients)
+        for note in _series(rng, patient, history)
+    ]
+
+    protocol = CompTextProtocol()
+    full_s, full = _best(lambda: [protocol.compress(text) for _, text in notes])
+
+    def run_incremental():
+        compressor = IncrementalCompressor()
+        return compressor, [compressor.compress(patient, text) for patient, text in notes]
+
+    incremental_s, (compressor, incremental) = _best(run_incremental)
+
+    stats = compressor.stats.as_dict()
+    timing = f"{len(notes)} notes: full {full_s * 1000:.1f} ms, incremental {incremental_s * 1000:.1f} ms"
+
+    assert [_normalized(s) for s in incremental] == [_normalized(s) for s in full]
+    if len(notes[0][1]) < compressor.min_chars:
+        assert stats["small"] == len(notes), stats
+        # short notes skip the lookup, so cost stays close to plain CompText
+        assert incremental_s < full_s * 1.5, timing
+    else:
+        assert stats["incremental"] + stats["reused"] >= len(notes) - patients - stats["fallbacks"], stats
+        assert stats["skipped_ratio"] > 0.5, stats
+        if CompTextProtocol._HR_PATTERN.engine == "re":
+            assert incremental_s < full_s, timing
@@ -0,0 +1,59 @@
+"""
+FHIR Bulk Export Benchmark
+
+Compares exporting Observations as NDJSON:
+
+- before: PatientState.to_fhir() per state (uuid4 + datetime.now per
+  entry, nested dicts) and json.dumps per resource
+- after: fhir_bulk.write_observations_ndjson (precomputed code blocks,
+  one timestamp per batch, counter ids)
+
+Reports throughput in resources/sec.
+"""
+
+import io
+import json
+import time
+
+import pytest
+
+from src.core.fhir_bulk import write_observations_ndjson
+from src.core.models import PatientState, Vitals
+
+N_STATES = 5000
+
+
+def _states():
+    return [
+        PatientState(
+            chief_complaint=f"chest pain episode {i}",
+            vitals=Vitals(hr=60 + i % 90, bp=f"{100 + i % 80}/{60 + i % 40}", temp=36 + (i % 40) / 10),
+        )
+        for i in range(N_STATES)
+    ]
+
+
+def legacy_export(states, stream):
+    count = 0
+    for state in states:
+        for entry in state.to_fhir()["entry"]:
+            stream.write(json.dumps(entry["resource"], separators=(",", ":")) + "\n")
+            count += 1
+    return count
+
+
+@pytest.mark.performance
+def test_bulk_export_throughput():
+    states = _states()
+
+    start = time.perf_counter()
+    legacy_count = legacy_export(states, io.StringIO())
+    legacy_rate = legacy_count / (time.perf_counter() - start)
+
+    stats = write_observations_ndjson(states, io.StringIO())
+
+    assert stats.total_resources == legacy_count
+    assert stats.resources_per_sec > legacy_rate * 2, (
+        f"bulk NDJSON writer {stats.resources_per_sec:,.0f} vs "
+        f"to_fhir + json.dumps {legacy_rate:,.0f} resources/s"
+    )
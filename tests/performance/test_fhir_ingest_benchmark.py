@@ -0,0 +1,77 @@
+"""
+FHIR Ingest Benchmark
+
+Compares two ways of turning structured FHIR Observations into
+PatientStates:
+
+- prose: flatten each patient's Observations to clinical text and run
+  CompTextProtocol.compress (regex extraction, routing, KVTC)
+- direct: fhir_ingest.ingest_fhir streaming the NDJSON and mapping
+  Observations by LOINC code
+
+Reports patients/sec for both. Like timeit, the garbage collector is
+paused while timing so heap size left by earlier tests does not skew the
+comparison.
+"""
+
+import gc
+import io
+import logging
+import time
+
+import pytest
+
+from src.core.comptext import CompTextProtocol
+from src.core.fhir_bulk import write_observations_ndjson
+from src.core.fhir_ingest import ingest_fhir
+from src.core.models import PatientState, Vitals
+
+N_PATIENTS = 2000
+
+
+def _states():
+    return [
+        PatientState(
+            chief_complaint=f"chest pain for {1 + i % 12} hours",
+            vitals=Vitals(hr=60 + i % 90, bp=f"{100 + i % 80}/{60 + i % 40}", temp=36 + (i % 40) / 10),
+        )
+        for i in range(N_PATIENTS)
+    ]
+
+
+def _prose(state):
+    v = state.vitals
+    return f"Chief complaint: {state.chief_complaint}. HR {v.hr:g}, BP {v.bp}, Temp {v.temp}C."
+
+
+@pytest.mark.performance
+def test_direct_ingest_is_much_faster_than_text_extraction():
+    logging.disable(logging.INFO)
+    try:
+        states = _states()
+        subjects = [f"PT-{i}" for i in range(N_PATIENTS)]
+        out = io.StringIO()
+        write_observations_ndjson(states, out, subjects=subjects)
+        ndjson = out.getvalue()
+        notes = [_prose(s) for s in states]
+
+        protocol = CompTextProtocol()
+        gc.collect()
+        gc.disable()
+        start = time.perf_counter()
+        extracted = [protocol.compress(note) for note in notes]
+        prose_rate = N_PATIENTS / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        ingested = ingest_fhir(io.StringIO(ndjson))
+        direct_rate = N_PATIENTS / (time.perf_counter() - start)
+    finally:
+        gc.enable()
+        logging.disable(logging.NOTSET)
+
+    assert len(ingested) == N_PATIENTS
+    assert ingested["Patient/PT-7"].vitals == states[7].vitals
+    assert extracted[7].vitals.bp == states[7].vitals.bp
+    assert direct_rate > prose_rate, (
+        f"direct FHIR ingest {direct_rate:,.0f} vs prose + regex {prose_rate:,.0f} patients/s"
+    )
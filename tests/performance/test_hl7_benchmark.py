@@ -0,0 +1,64 @@
+"""
+HL7 v2 Ingestion Benchmark
+
+Streams MLLP-framed ORU^R01 vital-sign messages through src/core/hl7.py
+and compares it with the prose route, where each message would first be
+rendered as free text and parsed by the CompText regexes:
+
+- messages/sec for iter_hl7_states (deframe + parse + map to PatientState)
+- messages/sec for CompTextProtocol.compress on the equivalent note
+
+Failing assertions report the measured rates.
+"""
+
+import io
+import time
+
+import pytest
+
+from src.core import hl7
+from src.core.comptext import CompTextProtocol
+
+N_MESSAGES = 5000
+
+
+def _message(i: int) -> str:
+    return (
+        f"MSH|^~\\&|MONITOR|ICU|EHR|HOSP|20240101{i % 24:02d}0000||ORU^R01|MSG{i}|P|2.5\r"
+        f"PID|1||PT-{i % 500}^^^HOSP^MR\r"
+        "OBR|1|||vitals\r"
+        f"OBX|1|NM|8867-4^Heart rate^LN||{60 + i % 90}|/min|||||F\r"
+        f"OBX|2|NM|8480-6^Systolic BP^LN||{100 + i % 80}|mm[Hg]|||||F\r"
+        f"OBX|3|NM|8462-4^Diastolic BP^LN||{60 + i % 40}|mm[Hg]|||||F\r"
+        f"OBX|4|NM|8310-5^Body temperature^LN||{36 + (i % 40) / 10}|Cel|||||F\r"
+        f"OBX|5|NM|59408-5^SpO2^LN||{90 + i % 10}|%|||||F\r"
+    )
+
+
+def _note(i: int) -> str:
+    return (
+        f"HR {60 + i % 90}, BP {100 + i % 80}/{60 + i % 40}, "
+        f"Temp {36 + (i % 40) / 10}, SpO2 {90 + i % 10}%"
+    )
+
+
+@pytest.mark.performance
+def test_hl7_stream_throughput():
+    data = b"".join(
+        hl7.MLLP_START + _message(i).encode() + hl7.MLLP_END for i in range(N_MESSAGES)
+    )
+    notes = [_note(i) for i in range(N_MESSAGES)]
+    protocol = CompTextProtocol()
+
+    start = time.perf_counter()
+    count = sum(1 for _ in hl7.iter_hl7_states(io.BytesIO(data)))
+    hl7_rate = count / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for note in notes:
+        protocol.compress(note)
+    prose_rate = N_MESSAGES / (time.perf_counter() - start)
+
+    assert count == N_MESSAGES
+    assert hl7_rate > 2000, f"hl7 stream: {hl7_rate:,.0f} messages/s"
+    assert hl7_rate > prose_rate, f"hl7 stream {hl7_rate:,.0f} vs prose + regex {prose_rate:,.0f} messages/s"
@@ -0,0 +1,84 @@
+"""
+Adversarial Extraction Benchmark
+
+Measures worst-case CompTextProtocol.compress latency on inputs built to
+make backtracking regexes blow up: labels followed by long whitespace runs,
+long runs without any delimiter, and OCR-style noise. Each input is timed at
+growing sizes; a linear-time extractor grows ~4x from 10k to 40k chars, a
+quadratic one ~16x. The pre-hardening ``\\s*[:\\-]?\\s*`` label pattern is
+timed alongside for comparison. The RE2 check runs only when
+``google-re2`` is installed and the patterns actually compile on it.
+Failing assertions report the measured times.
+"""
+
+import re
+import time
+
+import pytest
+
+from src.core import regex_backend
+from src.core.codex import NeurologyCodex
+from src.core.comptext import CompTextProtocol
+from src.core.sections import CLINICAL_LINE
+
+SIZES = (10_000, 20_000, 40_000)
+
+ADVERSARIAL = {
+    "label + spaces": lambda n: "hr" + " " * n + "x",
+    "T + spaces": lambda n: "T" + "\t" * n + "x",
+    "breath sounds + spaces": lambda n: "breath sounds" + " " * n + "x",
+    "temp value + spaces": lambda n: "temp 38" + " " * n + "x",
+    "no delimiters": lambda n: "chief complaint " + "a" * n,
+    "ocr noise": lambda n: ("cc: ~|l1 radiating to T  hr " * (n // 28 + 1))[:n],
+}
+
+# The label separator before hardening; kept to show the quadratic blow-up.
+LEGACY_SIZES = (2_500, 5_000)
+LEGACY_LABEL = re.compile(r"(?:hr|heart rate)\s*[:\-]?\s*(\d+)", re.IGNORECASE)
+
+
+def _best(func, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@pytest.mark.performance
+def test_worst_case_latency_is_linear():
+    protocol = CompTextProtocol()
+    engine = CompTextProtocol._HR_PATTERN.engine
+    for name, build in ADVERSARIAL.items():
+        times = [_best(lambda text=build(n): protocol.compress(text)) for n in SIZES]
+        growth = times[-1] / max(times[0], 1e-6)
+        timing = ", ".join(f"{n // 1000}k: {t * 1000:.2f} ms" for n, t in zip(SIZES, times))
+        assert growth < 10, f"{name} grows super-linearly on {engine} ({timing})"
+        assert times[-1] < 0.25, f"{name} too slow on {engine} ({timing})"
+
+    for n in LEGACY_SIZES:
+        text = "hr" + " " * n + "x"
+        legacy = _best(lambda: LEGACY_LABEL.search(text), 1)
+        hardened = _best(lambda: CompTextProtocol._HR_PATTERN.search(text))
+        assert hardened < legacy, (
+            f"{n} chars: hardened {hardened * 1000:.2f} ms vs legacy {legacy * 1000:.2f} ms"
+        )
+
+
+@pytest.mark.performance
+@pytest.mark.skipif(not regex_backend._RE2_AVAILABLE, reason="google-re2 not installed")
+def test_word_boundary_patterns_run_on_re2():
+    patterns = {
+        "symptom keywords": CompTextProtocol._SYMPTOM_KEYWORDS,
+        "temp": CompTextProtocol._TEMP_PATTERN,
+        "neurology side": NeurologyCodex._SYMPTOMS_SIDE_PATTERN,
+        "clinical line": CLINICAL_LINE,
+    }
+    if CompTextProtocol._HR_PATTERN.engine != "re2":
+        pytest.skip("COMPTEXT_REGEX_ENGINE selects the re engine")
+    for name, pattern in patterns.items():
+        assert pattern.engine == "re2", f"{name} fell back to re"
+        for size in SIZES:
+            text = "t" + " " * size + "x"
+            assert _best(lambda: pattern.search(text)) < 0.05, f"{name} slow at {size} chars"
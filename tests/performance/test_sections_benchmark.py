@@ -0,0 +1,69 @@
+"""
+Section Segmentation Benchmark
+
+Compresses an EMR-style export (legal notice, ``CLINICAL_CORE`` block,
+billing and admin fragments) with and without the section segmenter and
+compares CompText CPU per record and KVTC output size. Failing
+assertions report the measured figures.
+"""
+
+import time
+
+import pytest
+
+from src.core.codex import MedicalKVTCStrategy
+from src.core.comptext import CompTextProtocol
+from src.core.sections import ADMIN
+
+LEGAL = (
+    "LEGAL NOTICE\n"
+    + "This export is confidential and intended for the treating team only. " * 30
+    + "\n\n"
+)
+CLINICAL = (
+    "[CLINICAL_CORE]\n"
+    "Chief complaint: chest pain radiating to left arm, diaphoresis.\n"
+    "HR 112, BP 165/98, Temp 37.4C. Medications: aspirin 325mg.\n"
+    + "Serial troponins pending, ECG shows ST elevation in II, III, aVF. " * 10
+    + "\n[/CLINICAL_CORE]\n\n"
+)
+BILLING = (
+    "Billing information:\n"
+    + "Invoice 4711 line item, DRG F60B, payer AOK, account 12-3456. " * 40
+    + "\n\nAdministrative contact details:\n"
+    + "Ward office, extension 2231, fax 2232, Mon-Fri 08:00-16:00. " * 20
+    + "\n\n"
+)
+RECENT = "Assessment:\nSuspected inferior STEMI, cath lab activated.\n"
+EMR_EXPORT = LEGAL + CLINICAL + BILLING + RECENT
+
+
+def _best(func, repeat=5, number=50):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+@pytest.mark.performance
+def test_segmentation_reduces_cpu_and_output():
+    whole = CompTextProtocol(segmenter=None)
+    segmented = CompTextProtocol()
+    assert (
+        segmented.compress(EMR_EXPORT).vitals == whole.compress(EMR_EXPORT).vitals
+    )
+    whole_ms = _best(lambda: whole.compress(EMR_EXPORT)) * 1000
+    segmented_ms = _best(lambda: segmented.compress(EMR_EXPORT)) * 1000
+
+    kvtc_chars = len(MedicalKVTCStrategy().compress(EMR_EXPORT))
+    kvtc_segmented_chars = len(MedicalKVTCStrategy(drop_kinds=(ADMIN,)).compress(EMR_EXPORT))
+
+    assert segmented_ms < whole_ms, (
+        f"comptext ms/record: segmented {segmented_ms:.3f} vs whole {whole_ms:.3f}"
+    )
+    assert kvtc_segmented_chars < kvtc_chars, (
+        f"kvtc output chars: segmented {kvtc_segmented_chars} vs whole {kvtc_chars}"
+    )
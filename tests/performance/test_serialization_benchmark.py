@@ -0,0 +1,151 @@
+"""
+Response Serialization Benchmark
+
+Compares the per-request cost of building and rendering the /api/process
+response before and after the direct state→response mapping:
+
+- before: PatientState → JSON string → json.loads → Pydantic response
+  models → FastAPI's jsonable_encoder + json.dumps
+- after: PatientState fields → dict → render_json (orjson when installed)
+
+Reports mean time (µs) and peak allocated bytes (tracemalloc).
+"""
+
+import json
+import logging
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "api"))
+
+import main_enhanced as api
+from src.agents.triage_agent import TriageAgent
+
+CLINICAL_TEXT = (
+    "Chief complaint: severe chest pain radiating to left arm for 2 hours. "
+    "HR 110, BP 160/95, Temp 38.2C. EKG shows ST elevation in V1-V4. "
+    "Medications: aspirin 325mg, metoprolol. Allergies: penicillin."
+)
+
+
+def _legacy_compressed_json(state) -> str:
+    """The pre-change PatientState.to_compressed_json (model_dump based)"""
+    data = state.model_dump(exclude_none=True)
+    for key in ("specialist_data", "meta"):
+        if key in data and isinstance(data[key], dict):
+            data[key] = {k: v for k, v in data[key].items() if v is not None}
+    for key in list(data.keys()):
+        if data[key] in ([], {}, ""):
+            del data[key]
+    return json.dumps(data, separators=(",", ":"))
+
+
+def legacy_render(request_data, run) -> bytes:
+    """The pre-change response path of process_clinical_text"""
+    state = run["compression"]
+    triage = run["triage"]
+    original_tokens = max(len(request_data.clinical_text) // 4, 1)
+    compressed_json_str = _legacy_compressed_json(state)
+    compressed_tokens = max(len(state.to_comptext()) // 4, 1)
+    compressed_json = json.loads(compressed_json_str)
+    state.model_dump(exclude_none=True)  # second dump, for the doctor stage
+    compression_data = api.CompressionData(
+        chief_complaint=compressed_json.get("chief_complaint"),
+        vital_signs=api.VitalSigns(
+            heart_rate=compressed_json.get("vital_signs", {}).get("heart_rate"),
+            blood_pressure=compressed_json.get("vital_signs", {}).get("blood_pressure"),
+            temperature=compressed_json.get("vital_signs", {}).get("temperature"),
+            respiratory_rate=compressed_json.get("vital_signs", {}).get("respiratory_rate"),
+        ),
+        symptoms=compressed_json.get("symptoms", []),
+        medications=compressed_json.get("medications", []),
+        oxygen=compressed_json.get("oxygen"),
+    )
+    response = api.PipelineResponse(
+        request_id="req_bench",
+        status="success",
+        timestamp="2026-01-01T00:00:00Z",
+        processing_stage="complete",
+        compression=api.CompressionResponse(
+            original_tokens=original_tokens,
+            compressed_tokens=compressed_tokens,
+            compression_ratio=round(1.0 - compressed_tokens / original_tokens, 3),
+            compression_ratio_percent=50,
+            tokens_saved=original_tokens - compressed_tokens,
+            compression_time_ms=1.0,
+            compressed_data=compression_data,
+        ),
+        triage=api.TriageResponse(
+            priority_level=triage.priority_level,
+            priority_name=triage.priority_name,
+            confidence=0.9,
+            reason=TriageAgent.label(triage),
+            triage_time_ms=1.0,
+        ),
+        diagnosis=api.DiagnosisResponse(
+            primary_assessment=run["diagnosis"],
+            model_version="MedGemma-v5",
+            processing_time_ms=1.0,
+        ),
+        metadata={"patient_id": None, "doctor_mode": "rule_based"},
+        performance=api.PerformanceMetrics(total_time_ms=1.0, stages={"compression_ms": 1.0}),
+        compressed_text=compressed_json_str,
+    )
+    # FastAPI's response_model path: dump, re-validate, encode, dumps
+    validated = api.PipelineResponse.model_validate(response.model_dump())
+    return json.dumps(jsonable_encoder(validated)).encode("utf-8")
+
+
+def direct_render(request_data, run) -> bytes:
+    return api.render_json(
+        api.build_pipeline_response(request_data, run, "req_bench", "rule_based", 1.0)
+    )
+
+
+def _measure(render, request_data, run, iterations=2000):
+    render(request_data, run)  # warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        render(request_data, run)
+    mean_us = (time.perf_counter() - start) / iterations * 1e6
+
+    tracemalloc.start()
+    render(request_data, run)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return mean_us, peak
+
+
+@pytest.mark.performance
+def test_direct_mapping_is_cheaper_than_json_round_trip():
+    logging.disable(logging.INFO)
+    try:
+        request_data = api.ProcessRequest(clinical_text=CLINICAL_TEXT)
+        run = api.clinical_pipeline.run(CLINICAL_TEXT)
+        legacy = _measure(legacy_render, request_data, run)
+        direct = _measure(direct_render, request_data, run)
+    finally:
+        logging.disable(logging.NOTSET)
+
+    assert direct[0] < legacy[0], (
+        f"direct {direct[0]:.1f} vs legacy {legacy[0]:.1f} µs/request (orjson={api._ORJSON_AVAILABLE})"
+    )
+    assert direct[1] < legacy[1], f"peak memory: direct {direct[1]} vs legacy {legacy[1]} B"
+
+
+def test_direct_payload_matches_response_schema():
+    request_data = api.ProcessRequest(clinical_text=CLINICAL_TEXT, patient_id="p1")
+    run = api.clinical_pipeline.run(CLINICAL_TEXT)
+    payload = api.build_pipeline_response(request_data, run, "req_1", "rule_based", 1.0)
+    validated = api.PipelineResponse.model_validate(payload)
+    assert validated.model_dump() == payload
+    assert json.loads(api.render_json(payload)) == payload
+    # vital signs are mapped from the state (previously always empty)
+    vitals = payload["compression"]["compressed_data"]["vital_signs"]
+    assert vitals == {"heart_rate": 110, "blood_pressure": "160/95", "temperature": 38.2, "respiratory_rate": None}
+    assert payload["compression"]["compressed_data"]["medications"][0] == "aspirin 325mg"
@@ -0,0 +1,104 @@
+"""Tests for the corpus-built boilerplate dictionary and its KVTC use."""
+
+import pytest
+
+from src.core.boilerplate import (
+    BoilerplateBuilder,
+    BoilerplateDictionary,
+    BoilerplateError,
+    fingerprint,
+    sentence_keys,
+)
+from src.core.codex import MedicalKVTCStrategy, TokenBudgetKVTCStrategy
+
+CONSENT = "The patient consented to treatment after discussion of risks."
+PRIVACY = "This note is subject to the privacy policy of the hospital."
+DOSE = "Standard dose of 5 mg given as per protocol."
+
+
+def _corpus(n=20):
+    for i in range(n):
+        yield f"{CONSENT} {PRIVACY} {DOSE} Note {i}: patient seen on ward round."
+
+
+@pytest.fixture
+def dictionary(tmp_path):
+    path = tmp_path / "boilerplate.bin"
+    BoilerplateBuilder().add_all(_corpus()).write(str(path), min_count=5)
+    with BoilerplateDictionary.open(str(path)) as built:
+        yield built
+
+
+class TestBuilder:
+    def test_sentence_keys_normalize(self):
+        assert list(sentence_keys("Chest   PAIN. Stable!  Ok")) == ["chest pain.", "stable!", "ok"]
+
+    def test_counts_records_not_occurrences(self):
+        builder = BoilerplateBuilder()
+        builder.add(f"{CONSENT} {CONSENT}")
+        builder.add(CONSENT)
+        assert builder.counts[fingerprint(CONSENT.lower())] == 2
+        assert builder.records == 2
+
+    def test_prune_keeps_frequent(self):
+        builder = BoilerplateBuilder(max_entries=10)
+        for i in range(50):
+            builder.add(f"{CONSENT} Unique sentence {i}.")
+        assert len(builder.counts) <= 10
+        assert builder.counts[fingerprint(CONSENT.lower())] >= 45
+
+
+class TestDictionary:
+    def test_lookup(self, dictionary):
+        assert dictionary.count(CONSENT.lower()) == 20
+        assert CONSENT.lower() in dictionary
+        assert "note 3: patient seen on ward round." not in dictionary
+        assert len(dictionary) == 3 and dictionary.records == 20 and dictionary.min_count == 5
+
+    def test_full_probe_chain(self):
+        builder = BoilerplateBuilder()
+        builder.add_all(f"Sentence {i}." for i in range(1000))
+        table = BoilerplateDictionary(builder.to_bytes(min_count=1))
+        assert all(f"sentence {i}." in table for i in range(1000))
+        assert "sentence 1000." not in table
+
+    def test_rejects_corrupt_files(self, tmp_path):
+        with pytest.raises(BoilerplateError):
+            BoilerplateDictionary(b"nope")
+        data = BoilerplateBuilder().to_bytes()
+        with pytest.raises(BoilerplateError):
+            BoilerplateDictionary(data[:-1])
+        path = tmp_path / "empty.bin"
+        path.write_bytes(b"")
+        with pytest.raises(BoilerplateError):
+            BoilerplateDictionary.open(str(path))
+
+
+class TestKVTC:
+    RECORD = "H" * 20 + " " + " ".join(_corpus(1)) + " Plan: discharge tomorrow. " + "W" * 20
+
+    def test_drops_boilerplate_but_keeps_digits(self, dictionary):
+        strategy = MedicalKVTCStrategy(sink_size=20, window_size=20, boilerplate=dictionary)
+        result = strategy.compress(self.RECORD)
+        assert CONSENT not in result and PRIVACY not in result
+        assert DOSE in result and "Plan: discharge tomorrow." in result
+
+    def test_reference_mode(self, dictionary):
+        strategy = MedicalKVTCStrategy(
+            sink_size=20, window_size=20, boilerplate=dictionary, boilerplate_mode="reference"
+        )
+        result = strategy.compress(self.RECORD)
+        assert BoilerplateDictionary.reference(CONSENT.lower()) in result
+        with pytest.raises(ValueError):
+            MedicalKVTCStrategy(boilerplate_mode="replace")
+
+    def test_without_dictionary_unchanged(self):
+        result = MedicalKVTCStrategy(sink_size=20, window_size=20).compress(self.RECORD)
+        assert CONSENT in result
+
+    def test_token_budget_strategy_drops_boilerplate(self, dictionary):
+        strategy = TokenBudgetKVTCStrategy(
+            "regex", sink_tokens=5, window_tokens=5, max_tokens=200, boilerplate=dictionary
+        )
+        result = strategy.compress(self.RECORD * 3)
+        assert PRIVACY not in result and DOSE in result
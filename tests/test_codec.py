@@ -0,0 +1,122 @@
+"""Tests for the binary PatientState codec and its AINativeRecord integration."""
+
+import json
+
+import pytest
+
+from src.core import codec
+from src.core.comptext import CompTextProtocol
+from src.core.future_ehr import AINativeRecord
+from src.core.models import PatientState, Vitals
+from src.core.record_store import SQLiteRecordStore
+
+SAMPLES = [
+    "Chief complaint: severe chest pain radiating to left arm. HR 110, BP 160/95, "
+    "Temp 38.2C. Medications: aspirin 325mg, metoprolol. Allergies: penicillin.",
+    "Patient with shortness of breath and cough, wheezing triggered by exercise. "
+    "Breath sounds: diminished. HR 98, Temp 37.1",
+    "Sudden weakness on left side, slurred speech. Last known well 14:30. BP 180/100",
+    "Motor vehicle accident, laceration to forehead, bleeding. HR 120, BP 90/60",
+    "",
+]
+
+
+class TestCodec:
+    def setup_method(self):
+        self.protocol = CompTextProtocol()
+
+    @pytest.mark.parametrize("text", SAMPLES)
+    def test_round_trip_matches_compressed_dict(self, text):
+        state = self.protocol.compress(text)
+        decoded = codec.decode(codec.encode(state))
+        assert decoded.to_compressed_dict() == state.to_compressed_dict()
+
+    def test_smaller_than_json(self):
+        state = self.protocol.compress(SAMPLES[0])
+        assert len(codec.encode(state)) < len(state.to_compressed_json().encode()) * 0.75
+
+    def test_unusual_values_round_trip(self):
+        state = PatientState(
+            chief_complaint="Ünïcode complaint ✓",
+            vitals=Vitals(hr=72.25, bp="120/80 sitting", temp=-1.5),
+            symptoms=["pain", "custom symptom"],
+            meta={"active_protocol": "Custom", "flags": [1, -2, 3.5, True, None], "nested": {"a": False}},
+            specialist_data={"diagnosis": "STEMI", "score": 10**12},
+        )
+        decoded = codec.decode(codec.encode(state))
+        assert decoded.to_compressed_dict() == state.to_compressed_dict()
+
+    def test_vitals_use_compact_encoding(self):
+        state = PatientState(vitals=Vitals(hr=110.0, bp="160/95", temp=38.2))
+        # header + 3 fields of (id + 2-byte varint) + bp (id + 2 + 1)
+        assert len(codec.encode(state)) == 4 + 3 + 3 + 4
+
+    @pytest.mark.parametrize("compression", [None, "zlib"])
+    def test_block_round_trip(self, compression):
+        states = [self.protocol.compress(text) for text in SAMPLES * 20]
+        block = codec.encode_block(states, compression=compression)
+        decoded = codec.decode_block(block)
+        assert [s.to_compressed_dict() for s in decoded] == [s.to_compressed_dict() for s in states]
+
+    def test_compressed_block_is_smaller(self):
+        states = [self.protocol.compress(text) for text in SAMPLES * 20]
+        raw = codec.encode_block(states, compression=None)
+        assert len(codec.encode_block(states, compression="zlib")) < len(raw) / 4
+
+    def test_zstd_requires_package(self):
+        if codec._ZSTD_AVAILABLE:
+            block = codec.encode_block([PatientState(chief_complaint="x")], compression="zstd")
+            assert codec.decode_block(block)[0].chief_complaint == "x"
+        else:
+            with pytest.raises(RuntimeError):
+                codec.encode_block([PatientState()], compression="zstd")
+
+    def test_rejects_invalid_payloads(self):
+        encoded = codec.encode(self.protocol.compress(SAMPLES[0]))
+        with pytest.raises(codec.CodecError):
+            codec.decode(b"{}")
+        with pytest.raises(codec.CodecError):
+            codec.decode(encoded[:2] + bytes([codec.SCHEMA_VERSION + 1]) + encoded[3:])
+        with pytest.raises(codec.CodecError):
+            codec.decode(encoded[:-3])
+        with pytest.raises(codec.CodecError):
+            codec.decode(codec.encode_block([]))
+        with pytest.raises(ValueError):
+            codec.encode_block([], compression="lz4")
+
+    def test_string_table_covers_protocol_labels(self):
+        from src.core.codex import CodexRouter
+
+        labels = {module.protocol_label for module in CodexRouter().modules}
+        assert labels <= set(codec.STRING_TABLE)
+
+
+class TestBinaryRecords:
+    def test_binary_codec_loads_same_dict_as_json(self, tmp_path):
+        json_ehr = AINativeRecord()
+        store = SQLiteRecordStore(str(tmp_path / "records.db"))
+        binary_ehr = AINativeRecord(store=store, codec="binary")
+        for i, text in enumerate(SAMPLES):
+            json_result = json_ehr.save_record(f"PT-{i}", text)
+            binary_result = binary_ehr.save_record(f"PT-{i}", text)
+            assert binary_result["compressed_bytes"] < json_result["compressed_bytes"] or not text
+            assert binary_ehr.load_record(f"PT-{i}") == json_ehr.load_record(f"PT-{i}")
+        assert isinstance(store.get("PT-0"), bytes)
+        ids = [f"PT-{i}" for i in range(len(SAMPLES))]
+        assert binary_ehr.load_many(ids) == json_ehr.load_many(ids)
+        store.close()
+
+    def test_mixed_store_and_stats(self):
+        ehr = AINativeRecord(codec="binary")
+        ehr.save_record("PT-B", SAMPLES[0])
+        ehr.store.put("PT-J", json.dumps({"chief_complaint": "legacy"}))
+        assert ehr.load_record("PT-J") == {"chief_complaint": "legacy"}
+        stats = ehr.get_stats("PT-B", SAMPLES[0])
+        assert stats["compressed_chars"] == len(
+            json.dumps(ehr.load_record("PT-B"), separators=(",", ":"))
+        )
+        assert stats["compressed_bytes"] < stats["compressed_chars"]
+
+    def test_unknown_codec(self):
+        with pytest.raises(ValueError):
+            AINativeRecord(codec="xml")
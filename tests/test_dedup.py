@@ -0,0 +1,190 @@
+"""Tests for MinHash/LSH near-duplicate detection and incremental compression."""
+
+import pytest
+
+from src.core.comptext import CompTextProtocol
+from src.core.dedup import IncrementalCompressor, MinHasher, NearDuplicateIndex
+
+BASE = (
+    "Chief complaint: chest pain radiating to left arm.\n"
+    "HR 110, BP 160/95.\n"
+    "Medications: aspirin 325mg.\n"
+    "Allergies: penicillin.\n"
+    "Pain described as crushing.\n"
+    + "".join(f"Day {i}: patient resting comfortably, no acute events overnight.\n" for i in range(20))
+)
+
+
+def _full(text):
+    return CompTextProtocol().compress(text).to_compressed_dict()
+
+
+def _same(state, text):
+    expected = _full(text)
+    actual = state.to_compressed_dict()
+    assert set(actual.pop("symptoms", [])) == set(expected.pop("symptoms", []))
+    assert actual == expected
+
+
+class TestMinHash:
+    def test_similarity_tracks_jaccard(self):
+        hasher = MinHasher()
+        edited = BASE.replace("HR 110", "HR 96")
+        a, b = hasher.shingles(BASE), hasher.shingles(edited)
+        jaccard = len(a & b) / len(a | b)
+        estimate = MinHasher.similarity(hasher.signature(BASE), hasher.signature(edited))
+        assert abs(estimate - jaccard) < 0.1
+
+    def test_identical_and_unrelated(self):
+        hasher = MinHasher()
+        assert MinHasher.similarity(hasher.signature(BASE), hasher.signature(BASE)) == 1.0
+        other = hasher.signature("Motor vehicle accident with open fracture of the left tibia.")
+        assert MinHasher.similarity(hasher.signature(BASE), other) < 0.2
+
+    def test_short_and_empty_text(self):
+        hasher = MinHasher(num_perm=16)
+        assert len(hasher.signature("")) == 16
+        assert hasher.signature("HR 110") == hasher.signature("hr   110")
+
+
+class TestIndex:
+    def test_query_finds_near_duplicate_only(self):
+        hasher = MinHasher()
+        index = NearDuplicateIndex()
+        index.add("base", hasher.signature(BASE), "p1")
+        key, similarity = index.query(hasher.signature(BASE + "Day 21: stable.\n"), "p1")
+        assert key == "base" and similarity >= index.threshold
+        assert index.query(hasher.signature("Fell from ladder, wrist pain."), "p1") is None
+        assert index.query(hasher.signature(BASE), "p2") is None
+
+    def test_eviction(self):
+        hasher = MinHasher()
+        index = NearDuplicateIndex(max_entries=2)
+        for key in "abc":
+            evicted = index.add(key, hasher.signature(f"{key} {BASE}"))
+        assert evicted == ["a"] and len(index) == 2 and "a" not in index
+
+    def test_validation(self):
+        with pytest.raises(ValueError):
+            NearDuplicateIndex(num_perm=100, bands=16)
+        with pytest.raises(ValueError):
+            NearDuplicateIndex(threshold=0)
+        with pytest.raises(ValueError):
+            IncrementalCompressor(scope="ward")
+        with pytest.raises(ValueError):
+            IncrementalCompressor(hasher=MinHasher(num_perm=64))
+        with pytest.raises(ValueError):
+            IncrementalCompressor(min_chars=-1)
+
+
+class TestIncrementalCompressor:
+    def test_vitals_update_is_incremental(self):
+        compressor = IncrementalCompressor(min_chars=0)
+        compressor.compress("p1", BASE)
+        edited = BASE.replace("HR 110, BP 160/95.", "HR 96, BP 140/85.")
+        _same(compressor.compress("p1", edited), edited)
+        assert compressor.stats.incremental == 1 and compressor.stats.full == 1
+
+    def test_appended_line(self):
+        compressor = IncrementalCompressor(min_chars=0)
+        compressor.compress("p1", BASE)
+        edited = BASE + "Day 21: nausea after breakfast.\n"
+        _same(compressor.compress("p1", edited), edited)
+        assert compressor.stats.incremental == 1
+
+    def test_removed_source_falls_back(self):
+        compressor = IncrementalCompressor(min_chars=0)
+        compressor.compress("p1", BASE)
+        edited = BASE.replace("Medications: aspirin 325mg.\n", "")
+        state = compressor.compress("p1", edited)
+        _same(state, edited)
+        assert state.medication is None
+        assert compressor.stats.fallbacks == 1
+
+    def test_earlier_occurrence_falls_back(self):
+        compressor = IncrementalCompressor(min_chars=0)
+        compressor.compress("p1", BASE)
+        edited = BASE + "Repeat HR 88.\n"
+        _same(compressor.compress("p1", edited), edited)
+        assert compressor.stats.fallbacks == 1
+
+    def test_removed_copy_of_surviving_value_falls_back(self):
+        # the last line also reads HR 80, but the first one is the source
+        base = BASE.replace("HR 110, BP 160/95.", "HR: 80") + "HR: 80 at rest\n"
+        edited = base.replace("HR: 80 at rest\n", "HR: 95\n")
+        compressor = IncrementalCompressor(min_chars=0)
+        compressor.compress("p1", base)
+        state = compressor.compress("p1", edited)
+        _same(state, edited)
+        assert state.vitals.hr == 80.0
+        assert compressor.stats.fallbacks == 1
+
+    def test_removed_copy_of_surviving_text_falls_back(self):
+        base = BASE + "Medications: aspirin 325mg.\n"
+        edited = BASE + "Medications: heparin.\n"
+        compressor = IncrementalCompressor(min_chars=0)
+        compressor.compress("p1", base)
+        state = compressor.compress("p1", edited)
+        _same(state, edited)
+        assert state.medication == "aspirin 325mg"
+
+    def test_label_and_value_on_separate_lines(self):
+        shared = "".join(f"Ward round {i}: patient comfortable, no events.\n" for i in range(60))
+        base = shared + "Heart rate:\n80\nAssessment:\nstable angina\n"
+        edited = shared + "Heart rate:\n150\nAssessment:\nSTEMI anterior wall\n"
+        compressor = IncrementalCompressor(min_chars=0)
+        compressor.compress("p1", base)
+        state = compressor.compress("p1", edited)
+        _same(state, edited)
+        assert state.vitals.hr == 150.0
+        assert state.specialist_data["diagnosis"] == "STEMI anterior wall"
+
+    def test_changed_label_keeps_its_value(self):
+        compressor = IncrementalCompressor(min_chars=0)
+        compressor.compress("p1", BASE.replace("HR 110, BP 160/95.", "BP 160/95.") + "Pulse:\n\n80\n")
+        edited = BASE.replace("HR 110, BP 160/95.", "BP 160/95.") + "Heart rate:\n\n80\n"
+        _same(compressor.compress("p1", edited), edited)
+        assert compressor.stats.incremental == 1
+
+    def test_identical_note_is_reused(self):
+        compressor = IncrementalCompressor(min_chars=0)
+        first = compressor.compress("p1", BASE)
+        second = compressor.compress("p1", BASE)
+        assert second.to_compressed_dict() == first.to_compressed_dict()
+        second.vitals.hr = 1
+        assert compressor.compress("p1", BASE).vitals.hr == 110
+        assert compressor.stats.reused == 2
+
+    def test_admin_only_change_is_reused(self):
+        compressor = IncrementalCompressor(min_chars=0)
+        compressor.compress("p1", BASE + "Billing information:\nInvoice 1.\n")
+        compressor.compress("p1", BASE + "Billing information:\nInvoice 2, amount due 999.\n")
+        assert compressor.stats.reused == 1
+
+    def test_scopes(self):
+        per_patient = IncrementalCompressor(min_chars=0)
+        per_patient.compress("p1", BASE)
+        per_patient.compress("p2", BASE)
+        assert per_patient.stats.full == 2
+
+        shared = IncrementalCompressor(scope="global", min_chars=0)
+        shared.compress("p1", BASE)
+        shared.compress("p2", BASE)
+        assert shared.stats.reused == 1
+
+    def test_short_notes_skip_lookup(self):
+        compressor = IncrementalCompressor()
+        compressor.compress("p1", BASE)
+        _same(compressor.compress("p1", BASE), BASE)
+        assert compressor.stats.small == 2 and compressor.stats.reused == 0
+        assert compressor.stats.skipped_ratio == 0.0
+        assert len(compressor.index) == 0
+
+    def test_stats(self):
+        compressor = IncrementalCompressor(min_chars=0)
+        compressor.compress("p1", BASE)
+        compressor.compress("p1", BASE + "Day 21: stable.\n")
+        stats = compressor.stats.as_dict()
+        assert stats["notes"] == 2
+        assert 0.4 < stats["skipped_ratio"] < 0.5
+        assert compressor.compress("p1", BASE)._original_token_count == len(BASE) // 4
@@ -0,0 +1,81 @@
+"""Tests for streaming FHIR Bulk Data NDJSON export."""
+
+import io
+import json
+import os
+
+import pytest
+
+from src.core.fhir_bulk import ObservationWriter, export_bulk, write_observations_ndjson
+from src.core.models import PatientState, Vitals
+
+STATES = [
+    PatientState(chief_complaint='chest "pain" – left', vitals=Vitals(hr=110, bp="160/95", temp=38.2)),
+    PatientState(vitals=Vitals(bp="120")),
+    PatientState(vitals=Vitals(bp="high")),
+    PatientState(),
+    PatientState(chief_complaint="cough", vitals=Vitals(temp=37.5)),
+]
+
+
+def _strip_volatile(resource):
+    resource = dict(resource)
+    resource.pop("id")
+    resource.pop("effectiveDateTime")
+    resource.pop("subject", None)
+    return resource
+
+
+class TestObservationNdjson:
+    def test_resources_match_to_fhir(self):
+        out = io.StringIO()
+        write_observations_ndjson(STATES, out)
+        lines = out.getvalue().splitlines()
+        expected = [
+            _strip_volatile(entry["resource"])
+            for state in STATES
+            for entry in state.to_fhir()["entry"]
+        ]
+        assert [_strip_volatile(json.loads(line)) for line in lines] == expected
+
+    def test_batch_ids_timestamp_and_subjects(self):
+        out = io.StringIO()
+        stats = write_observations_ndjson(
+            STATES[:2], out, subjects=["PT-1", "PT-2"],
+            timestamp="2026-01-01T00:00:00+00:00", batch_id="batch",
+        )
+        resources = [json.loads(line) for line in out.getvalue().splitlines()]
+        assert [r["id"] for r in resources] == ["batch-1", "batch-2", "batch-3", "batch-4", "batch-5"]
+        assert {r["effectiveDateTime"] for r in resources} == {"2026-01-01T00:00:00+00:00"}
+        assert [r["subject"]["reference"] for r in resources] == ["Patient/PT-1"] * 4 + ["Patient/PT-2"]
+        assert stats.resources == {"Observation": 5}
+        assert stats.bytes_written == len(out.getvalue())
+        assert stats.resources_per_sec > 0
+
+    def test_subjects_must_align(self):
+        with pytest.raises(ValueError):
+            write_observations_ndjson(STATES, io.StringIO(), subjects=["PT-1"])
+
+    def test_writer_counter_spans_states(self):
+        writer = ObservationWriter(batch_id="b")
+        first = list(writer.lines(STATES[0]))
+        second = list(writer.lines(STATES[4]))
+        assert len(first) == 4 and len(second) == 2
+        assert json.loads(second[-1])["id"] == "b-6"
+
+
+class TestExportBulk:
+    def test_writes_one_file_per_resource_type(self, tmp_path):
+        stats = export_bulk(STATES, str(tmp_path), subjects=["A", "B", "A", "C", "B"])
+        assert [o["type"] for o in stats.output] == ["Observation", "Patient"]
+        assert stats.resources == {"Observation": 8, "Patient": 3}
+        with open(tmp_path / "Patient.ndjson") as fh:
+            assert [json.loads(line)["id"] for line in fh] == ["A", "B", "C"]
+        with open(tmp_path / "Observation.ndjson") as fh:
+            assert sum(1 for _ in fh) == 8
+        assert stats.bytes_written == sum(os.path.getsize(o["url"]) for o in stats.output)
+
+    def test_without_subjects_only_observations(self, tmp_path):
+        stats = export_bulk(STATES, str(tmp_path))
+        assert stats.resources == {"Observation": 8}
+        assert not (tmp_path / "Patient.ndjson").exists()
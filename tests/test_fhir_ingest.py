@@ -0,0 +1,138 @@
+"""Tests for FHIR Observation ingestion into PatientState."""
+
+import io
+import json
+
+import pytest
+
+from src.core.fhir_bulk import write_observations_ndjson
+from src.core.fhir_ingest import (
+    ingest_fhir,
+    iter_bundle_resources,
+    iter_fhir_resources,
+    iter_ndjson,
+    states_from_resources,
+)
+from src.core.models import PatientState, Vitals
+
+FULL = PatientState(chief_complaint="chest pain", vitals=Vitals(hr=110, bp="160/95", temp=38.2))
+
+
+def _observation(code, effective, **value):
+    return {
+        "resourceType": "Observation",
+        "code": {"coding": [{"system": "http://loinc.org", "code": code}]},
+        "effectiveDateTime": effective,
+        **value,
+    }
+
+
+class TestFromFhir:
+    def test_round_trips_to_fhir(self):
+        state = PatientState.from_fhir(FULL.to_fhir())
+        assert state.to_compressed_dict() == FULL.to_compressed_dict()
+
+    def test_single_observation_and_list(self):
+        hr = _observation("8867-4", "2026-01-01", valueQuantity={"value": 72})
+        assert PatientState.from_fhir(hr).vitals.hr == 72
+        temp = _observation("8310-5", "2026-01-01", valueQuantity={"value": 37.5})
+        state = PatientState.from_fhir([hr, temp])
+        assert (state.vitals.hr, state.vitals.temp) == (72, 37.5)
+
+    def test_latest_effective_time_wins(self):
+        newer = _observation("8867-4", "2026-01-02T10:00:00Z", valueQuantity={"value": 90})
+        older = _observation("8867-4", "2026-01-01T10:00:00Z", valueQuantity={"value": 130})
+        assert PatientState.from_fhir([newer, older]).vitals.hr == 90
+
+    def test_effective_times_compared_as_instants(self):
+        # 11:30+02:00 is 09:30Z: earlier, though it sorts later as a string.
+        earlier = _observation("8867-4", "2026-01-01T11:30:00+02:00", valueQuantity={"value": 130})
+        later = _observation("8867-4", "2026-01-01T10:00:00Z", valueQuantity={"value": 90})
+        assert PatientState.from_fhir([later, earlier]).vitals.hr == 90
+        assert PatientState.from_fhir([earlier, later]).vitals.hr == 90
+        day = _observation("8867-4", "2026-01-02", valueQuantity={"value": 70})
+        assert PatientState.from_fhir([day, later]).vitals.hr == 70
+
+    def test_standalone_bp_components_and_unknown_codes(self):
+        resources = [
+            _observation("8480-6", "t", valueQuantity={"value": 120.0}),
+            _observation("8462-4", "t", valueQuantity={"value": 80}),
+            _observation("2708-6", "t", valueQuantity={"value": 97}),  # SpO2: not mapped
+            {"resourceType": "Patient", "id": "p"},
+        ]
+        state = PatientState.from_fhir(resources)
+        assert state.vitals.bp == "120/80"
+        assert state.to_compressed_dict() == {"vitals": {"bp": "120/80"}}
+
+    def test_other_code_systems_ignored(self):
+        obs = _observation("8867-4", "t", valueQuantity={"value": 72})
+        obs["code"]["coding"][0]["system"] = "http://snomed.info/sct"
+        assert PatientState.from_fhir(obs).vitals.hr is None
+
+
+class TestStreamingIngest:
+    STATES = [
+        FULL,
+        PatientState(chief_complaint="cough", vitals=Vitals(temp=37.9)),
+        PatientState(vitals=Vitals(hr=64, bp="118/76")),
+    ]
+
+    def _ndjson(self):
+        out = io.StringIO()
+        write_observations_ndjson(self.STATES, out, subjects=["A", "B", "C"])
+        return out.getvalue()
+
+    def test_ndjson_grouped_by_subject(self):
+        states = ingest_fhir(io.StringIO(self._ndjson()), chunk_size=37)
+        assert list(states) == ["Patient/A", "Patient/B", "Patient/C"]
+        for original, ingested in zip(self.STATES, states.values()):
+            assert ingested.to_compressed_dict() == original.to_compressed_dict()
+
+    def test_ndjson_reader_handles_chunk_boundaries(self):
+        text = self._ndjson()
+        expected = [json.loads(line) for line in text.splitlines()]
+        for chunk_size in (1, 7, 64, 10_000):
+            assert list(iter_ndjson(io.StringIO(text + "\n\n"), chunk_size)) == expected
+
+    @pytest.mark.parametrize("chunk_size", [1, 5, 64, 100_000])
+    def test_bundle_streamed_entry_by_entry(self, chunk_size):
+        resources = [json.loads(line) for line in self._ndjson().splitlines()]
+        bundle = {
+            "resourceType": "Bundle",
+            "id": "b1",
+            "meta": {"tags": [1, 2.5, None, True]},
+            "total": 123456,
+            "entry": [{"fullUrl": f"urn:{i}", "resource": r} for i, r in enumerate(resources)],
+            "link": [],
+        }
+        for text in (json.dumps(bundle), json.dumps(bundle, indent=2)):
+            assert list(iter_bundle_resources(io.StringIO(text), chunk_size)) == resources
+            grouped = states_from_resources(iter_fhir_resources(io.StringIO(text), chunk_size))
+            assert grouped["Patient/C"].vitals.bp == "118/76"
+
+    @pytest.mark.parametrize("chunk_size", [1, 64, 100_000])
+    def test_one_bundle_per_ndjson_line(self, chunk_size):
+        resources = [json.loads(line) for line in self._ndjson().splitlines()]
+        bundles = [
+            {"resourceType": "Bundle", "entry": [{"resource": r} for r in resources[i:i + 2]]}
+            for i in range(0, len(resources), 2)
+        ]
+        text = "\n".join(json.dumps(b) for b in bundles) + "\n"
+        assert list(iter_fhir_resources(io.StringIO(text), chunk_size)) == resources
+        # Bundle lines after a plain resource line are expanded as well.
+        text = json.dumps(resources[0]) + "\n" + text
+        assert list(iter_fhir_resources(io.StringIO(text), chunk_size)) == resources[:1] + resources
+
+    def test_trailing_garbage_after_bundle_raises(self):
+        with pytest.raises(ValueError):
+            list(iter_bundle_resources(io.StringIO('{"resourceType": "Bundle", "entry": []} [1]')))
+
+    def test_pretty_printed_single_resource(self):
+        obs = _observation("8867-4", "t", valueQuantity={"value": 72})
+        resources = list(iter_fhir_resources(io.StringIO(json.dumps(obs, indent=2))))
+        assert resources == [obs]
+
+    def test_empty_and_truncated_bundles(self):
+        assert list(iter_bundle_resources(io.StringIO('{"resourceType": "Bundle", "entry": []}'))) == []
+        with pytest.raises(ValueError):
+            list(iter_bundle_resources(io.StringIO('{"resourceType": "Bundle", "entry": [{"a": 1}')))
@@ -0,0 +1,120 @@
+"""Tests for streaming HL7 v2 ingestion."""
+
+import io
+
+import pytest
+
+from src.agents.triage_agent import TriageAgent
+from src.core import hl7
+
+ORU = (
+    "MSH|^~\\&|MONITOR|ICU|EHR|HOSP|20240101120000||ORU^R01|MSG0001|P|2.5\r"
+    "PID|1||PT-001^^^HOSP^MR||Doe^John\r"
+    "OBR|1|||vitals\r"
+    "OBX|1|NM|8867-4^Heart rate^LN||112|/min|||||F|||20240101115900\r"
+    "OBX|2|NM|8480-6^Systolic BP^LN||160|mm[Hg]|||||F\r"
+    "OBX|3|NM|8462-4^Diastolic BP^LN||95|mm[Hg]|||||F\r"
+    "OBX|4|NM|8310-5^Body temperature^LN||100.4|[degF]|||||F\r"
+    "OBX|5|NM|59408-5^SpO2^LN||94|%|||||F\r"
+    "OBX|6|ST|8661-1^Chief complaint^LN||Chest pain \\T\\ dyspnea||||||F\r"
+    "OBX|7|NM|2823-3^Potassium^LN||4.1|mmol/L|||||F\r"
+)
+ADT = (
+    "MSH|^~\\&|LAB|HOSP|EHR|HOSP|20240101130000||ORU^R01|MSG0002|P|2.5\r"
+    "PID|1||PT-001\r"
+    "OBX|1|NM|8867-4^Heart rate^LN||88|/min|||||F\r"
+    "OBX|2|NM|8867-4^Heart rate^LN||999|/min|||||W\r"
+)
+
+
+def _mllp(*messages: str) -> bytes:
+    return b"".join(hl7.MLLP_START + m.encode() + hl7.MLLP_END for m in messages)
+
+
+class TestParsing:
+    def test_parse_message_fields(self):
+        message = hl7.parse_message(ORU)
+        assert message.message_type == "ORU^R01"
+        assert message.control_id == "MSG0001"
+        assert message.patient_id == "PT-001"
+        assert len(message.observations) == 7
+        first = message.observations[0]
+        assert (first.code, first.value, first.units, first.observed_at) == (
+            "8867-4", "112", "/min", "20240101115900"
+        )
+        # OBX-14 missing: falls back to MSH-7
+        assert message.observations[1].observed_at == "20240101120000"
+        assert message.observations[5].value == "Chest pain & dyspnea"
+
+    def test_custom_separators(self):
+        message = hl7.parse_message("MSH#$~\\&#A#B#C#D#2024##ADT$A01#X1\rPID#1##PT-9$$$H\r")
+        assert message.message_type == "ADT^A01"
+        assert message.patient_id == "PT-9"
+
+    def test_rejects_non_hl7(self):
+        with pytest.raises(ValueError):
+            hl7.parse_message("PID|1||PT-001")
+
+
+class TestMapping:
+    def test_obx_maps_to_vitals_and_specialist_data(self):
+        state = hl7.message_to_state(hl7.parse_message(ORU))
+        assert state.vitals.hr == 112
+        assert state.vitals.bp == "160/95"
+        assert state.vitals.temp == 38.0
+        assert state.chief_complaint == "Chest pain & dyspnea"
+        assert state.specialist_data["oxygen_saturation"] == 94
+        assert state.specialist_data["observations"] == {"Potassium": "4.1 mmol/L"}
+
+    def test_state_is_triageable(self):
+        state = hl7.message_to_state(hl7.parse_message(ORU))
+        assert TriageAgent().triage(state).priority_level in ("P1", "P2", "P3")
+
+
+class TestStreaming:
+    @pytest.mark.parametrize("chunk_size", [1, 7, 64, 1 << 16])
+    def test_mllp_any_chunking(self, chunk_size):
+        data = b"noise" + _mllp(ORU, ADT) + hl7.MLLP_START + b"MSH|partial"
+        messages = list(hl7.iter_mllp(io.BytesIO(data), chunk_size))
+        assert [hl7.parse_message(m).control_id for m in messages] == ["MSG0001", "MSG0002"]
+
+    def test_decoder_keeps_incomplete_frame(self):
+        decoder = hl7.MLLPDecoder()
+        data = _mllp(ORU)
+        assert decoder.feed(data[:-1]) == []
+        assert decoder.pending == len(data) - 1
+        assert len(decoder.feed(data[-1:])) == 1
+        assert decoder.pending == 0
+
+    @pytest.mark.parametrize("chunk_size", [5, 1 << 16])
+    def test_unframed_file(self, chunk_size):
+        data = (ORU + "\n" + ADT).replace("\r", "\n").encode()
+        pairs = list(hl7.iter_hl7_states(io.BytesIO(data), chunk_size))
+        assert [message.control_id for message, _ in pairs] == ["MSG0001", "MSG0002"]
+        assert pairs[1][1].vitals.hr == 88
+
+    def test_framed_input_is_detected(self):
+        data = b"\r\n" + _mllp(ORU, ADT)
+        pairs = list(hl7.iter_hl7_states(io.BytesIO(data)))
+        assert [message.control_id for message, _ in pairs] == ["MSG0001", "MSG0002"]
+
+    def test_ingest_merges_messages_per_patient(self):
+        states = hl7.ingest_hl7(io.BytesIO(_mllp(ORU, ADT)))
+        assert list(states) == ["PT-001"]
+        state = states["PT-001"]
+        # newer message wins for hr; the wrong-status OBX is ignored
+        assert state.vitals.hr == 88
+        assert state.vitals.bp == "160/95"
+
+    def test_socket_stream(self):
+        import socket
+
+        left, right = socket.socketpair()
+        try:
+            right.sendall(_mllp(ORU, ADT))
+            right.close()
+            with left.makefile("rb") as stream:
+                states = hl7.ingest_hl7(stream, chunk_size=32)
+        finally:
+            left.close()
+        assert states["PT-001"].vitals.temp == 38.0
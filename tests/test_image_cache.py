@@ -0,0 +1,88 @@
+"""Tests for ImageTensorCache (content-addressed image preprocessing cache)."""
+
+import os
+
+import pytest
+
+from src.core.image_cache import ImageTensorCache
+
+
+def _bytes_decoder(stream):
+    """Decoder stand-in so tests don't need Pillow: returns the raw bytes."""
+    return stream.read()
+
+
+@pytest.fixture
+def images(tmp_path):
+    paths = {}
+    for name, content in (("a.png", b"A" * 64), ("b.png", b"B" * 64), ("c.png", b"C" * 64)):
+        path = tmp_path / name
+        path.write_bytes(content)
+        paths[name] = str(path)
+    return paths
+
+
+class TestImageTensorCache:
+    def setup_method(self):
+        self.calls = []
+
+    def _preprocess(self, decoded):
+        self.calls.append(decoded)
+        return len(decoded), decoded[:1]
+
+    def test_second_call_is_a_hit(self, images):
+        cache = ImageTensorCache(decoder=_bytes_decoder)
+        first = cache.get_or_compute(images["a.png"], self._preprocess)
+        second = cache.get_or_compute(images["a.png"], self._preprocess)
+        assert first == second == (64, b"A")
+        assert len(self.calls) == 1
+        assert cache.stats()["hits"] == 1
+
+    def test_keyed_by_content_not_path(self, images, tmp_path):
+        copy = tmp_path / "copy_of_a.png"
+        copy.write_bytes(b"A" * 64)
+        cache = ImageTensorCache(decoder=_bytes_decoder)
+        cache.get_or_compute(images["a.png"], self._preprocess)
+        cache.get_or_compute(str(copy), self._preprocess)
+        assert len(self.calls) == 1
+        assert cache.size == 1
+
+    def test_modified_file_is_recomputed(self, images):
+        cache = ImageTensorCache(decoder=_bytes_decoder)
+        cache.get_or_compute(images["a.png"], self._preprocess)
+        with open(images["a.png"], "wb") as fh:
+            fh.write(b"Z" * 10)
+        os.utime(images["a.png"], ns=(1, 1))
+        assert cache.get_or_compute(images["a.png"], self._preprocess) == (10, b"Z")
+        assert len(self.calls) == 2
+
+    def test_lru_eviction(self, images):
+        cache = ImageTensorCache(max_entries=2, decoder=_bytes_decoder)
+        cache.get_or_compute(images["a.png"], self._preprocess)
+        cache.get_or_compute(images["b.png"], self._preprocess)
+        cache.get_or_compute(images["a.png"], self._preprocess)  # a most recent
+        cache.get_or_compute(images["c.png"], self._preprocess)  # evicts b
+        assert cache.size == 2
+        assert cache.evictions == 1
+        cache.get_or_compute(images["a.png"], self._preprocess)
+        assert len(self.calls) == 3
+        cache.get_or_compute(images["b.png"], self._preprocess)
+        assert len(self.calls) == 4
+
+    def test_large_files_are_memory_mapped(self, images):
+        cache = ImageTensorCache(mmap_threshold=1, decoder=_bytes_decoder)
+        assert cache.get_or_compute(images["b.png"], self._preprocess) == (64, b"B")
+
+    def test_preprocess_many_preserves_order(self, images):
+        cache = ImageTensorCache(decoder=_bytes_decoder)
+        paths = [images["c.png"], images["a.png"], images["b.png"], images["a.png"]]
+        assert cache.preprocess_many(paths, lambda decoded: decoded[:1], max_workers=3) == [b"C", b"A", b"B", b"A"]
+        assert cache.size == 3
+
+    def test_clear(self, images):
+        cache = ImageTensorCache(decoder=_bytes_decoder)
+        cache.get_or_compute(images["a.png"], self._preprocess)
+        cache.clear()
+        assert cache.size == 0
+        cache.get_or_compute(images["a.png"], self._preprocess)
+        assert len(self.calls) == 2
@@ -0,0 +1,101 @@
+"""Tests for LatencyHistogram, ProcessSampler and Prometheus rendering."""
+
+import random
+
+import pytest
+
+from src.core.metrics import (
+    LatencyHistogram,
+    ProcessSampler,
+    render_prometheus_histograms,
+)
+
+
+class TestLatencyHistogram:
+    def test_empty_histogram(self):
+        histogram = LatencyHistogram()
+        assert histogram.count == 0
+        assert histogram.mean_ms == 0.0
+        assert histogram.quantiles() == {0.5: 0.0, 0.95: 0.0, 0.99: 0.0}
+
+    def test_quantiles_within_relative_error(self):
+        rng = random.Random(42)
+        values = [rng.lognormvariate(0, 1.5) for _ in range(20_000)]
+        histogram = LatencyHistogram(relative_error=0.01)
+        for v in values:
+            histogram.record(v)
+        ordered = sorted(values)
+        for q, estimate in histogram.quantiles((0.5, 0.95, 0.99)).items():
+            exact = ordered[int(q * len(ordered)) - 1]
+            assert estimate == pytest.approx(exact, rel=0.03)
+
+    def test_memory_is_fixed(self):
+        histogram = LatencyHistogram()
+        buckets = len(histogram._counts)
+        for i in range(50_000):
+            histogram.record(i * 0.01)
+        assert len(histogram._counts) == buckets
+        assert histogram.count == 50_000
+
+    def test_extremes_clamped_to_seen_range(self):
+        histogram = LatencyHistogram(max_ms=100)
+        histogram.record(0.0)
+        histogram.record(5_000.0)
+        assert histogram.max_seen_ms == 5_000.0
+        assert histogram.percentile(1.0) == 5_000.0
+        assert histogram.percentile(0.01) <= histogram.min_ms
+
+    def test_mean_and_sum(self):
+        histogram = LatencyHistogram()
+        for v in (1.0, 2.0, 3.0):
+            histogram.record(v)
+        assert histogram.mean_ms == pytest.approx(2.0)
+        assert histogram.sum_ms == pytest.approx(6.0)
+
+    def test_cumulative_counts(self):
+        histogram = LatencyHistogram()
+        for v in (0.05, 0.8, 3.0, 40.0, 40.0):
+            histogram.record(v)
+        counts = dict(histogram.cumulative_counts((0.1, 1, 10, 100)))
+        assert counts == {0.1: 1, 1: 2, 10: 3, 100: 5}
+
+    def test_reset(self):
+        histogram = LatencyHistogram()
+        histogram.record(1.0)
+        histogram.reset()
+        assert histogram.count == 0
+        assert histogram.percentile(0.5) == 0.0
+
+
+class TestProcessSampler:
+    def test_samples_are_real(self):
+        sampler = ProcessSampler()
+        sum(i * i for i in range(200_000))  # burn some CPU
+        assert sampler.cpu_percent() > 0
+        assert sampler.memory_mb() > 1
+
+    def test_consumers_have_separate_windows(self):
+        sampler = ProcessSampler()
+        sum(i * i for i in range(200_000))
+        assert sampler.cpu_percent("health") > 0
+        # a health poll right before the scrape must not reset its window
+        assert sampler.cpu_percent("metrics") > 0
+
+
+class TestPrometheusRendering:
+    def test_histogram_family(self):
+        histogram = LatencyHistogram()
+        histogram.record(2.0)
+        lines = render_prometheus_histograms(
+            "stage_latency_seconds", {"compression": histogram}, help_text="Latency"
+        )
+        assert "# TYPE stage_latency_seconds histogram" in lines
+        assert 'stage_latency_seconds_bucket{stage="compression",le="0.001"} 0' in lines
+        assert 'stage_latency_seconds_bucket{stage="compression",le="0.0025"} 1' in lines
+        assert 'stage_latency_seconds_bucket{stage="compression",le="+Inf"} 1' in lines
+        assert 'stage_latency_seconds_count{stage="compression"} 1' in lines
+        assert any(line.startswith('stage_latency_seconds_quantile{stage="compression",quantile="0.99"}') for line in lines)
+
+    def test_label_values_are_escaped(self):
+        lines = render_prometheus_histograms("m", {'we"ird': LatencyHistogram()})
+        assert 'm_count{stage="we\\"ird"} 0' in lines
@@ -0,0 +1,135 @@
+"""Tests for batch multimodal triage (analyze_xray_batch)."""
+
+import json
+
+import pytest
+
+from src.agents.multimodal_triage import (
+    EdgeStubBackend,
+    analyze_xray_batch,
+    iter_xray_manifest,
+)
+
+
+@pytest.fixture
+def image_dir(tmp_path):
+    studies = tmp_path / "studies"
+    (studies / "ward_b").mkdir(parents=True)
+    for i in range(5):
+        (studies / f"xray_{i}.png").write_bytes(bytes([i]) * 32)
+    (studies / "ward_b" / "xray_5.jpg").write_bytes(b"\x05" * 32)
+    (studies / "notes.txt").write_text("not an image")
+    return studies
+
+
+def _read_results(path):
+    with open(path) as fh:
+        return [json.loads(line) for line in fh]
+
+
+class RecordingBackend(EdgeStubBackend):
+    """Stub backend that records batch sizes and can fail on one image."""
+
+    def __init__(self, fail_on=None):
+        super().__init__()
+        self.batches = []
+        self.fail_on = fail_on
+
+    def prepare_image(self, image_path):
+        if self.fail_on and image_path.endswith(self.fail_on):
+            raise OSError("cannot identify image file")
+        return super().prepare_image(image_path)
+
+    def generate_batch(self, context_texts, pixel_values):
+        self.batches.append(len(context_texts))
+        return [f"analysis of {n} bytes" for n in pixel_values]
+
+
+class TestManifest:
+    def test_directory_walk_filters_images(self, image_dir):
+        items = list(iter_xray_manifest(str(image_dir), default_symptoms="cough"))
+        assert len(items) == 6
+        assert all(item["symptoms"] == "cough" for item in items)
+
+    def test_csv_manifest_resolves_relative_paths(self, image_dir):
+        manifest = image_dir / "manifest.csv"
+        manifest.write_text("image_path,symptoms\nxray_0.png,fever\nxray_1.png,\n")
+        items = list(iter_xray_manifest(str(manifest), default_symptoms="n/a"))
+        assert items[0] == {"image_path": str(image_dir / "xray_0.png"), "symptoms": "fever"}
+        assert items[1]["symptoms"] == "n/a"
+
+    def test_jsonl_manifest(self, image_dir):
+        manifest = image_dir / "manifest.jsonl"
+        manifest.write_text(json.dumps({"image_path": "xray_2.png", "symptoms": "dyspnea"}) + "\n")
+        assert list(iter_xray_manifest(str(manifest)))[0]["symptoms"] == "dyspnea"
+
+    def test_unknown_manifest_type(self, image_dir):
+        with pytest.raises(ValueError):
+            list(iter_xray_manifest(str(image_dir / "notes.txt")))
+
+
+class TestAnalyzeXrayBatch:
+    def test_bad_manifest_raises(self, image_dir, tmp_path):
+        out = tmp_path / "results.jsonl"
+        with pytest.raises(ValueError):
+            analyze_xray_batch(str(image_dir / "notes.txt"), str(out), backend=EdgeStubBackend())
+        with pytest.raises(FileNotFoundError):
+            analyze_xray_batch(str(tmp_path / "missing.csv"), str(out), backend=EdgeStubBackend())
+
+    def test_manifest_row_without_path_raises_after_earlier_rows(self, image_dir, tmp_path):
+        broken = image_dir / "broken.jsonl"
+        broken.write_text(
+            json.dumps({"image_path": "xray_0.png"}) + "\n" + json.dumps({"symptoms": "x"}) + "\n"
+        )
+        out = tmp_path / "results.jsonl"
+        with pytest.raises(KeyError):
+            analyze_xray_batch(str(broken), str(out), backend=EdgeStubBackend())
+        assert [json.loads(line)["status"] for line in out.read_text().splitlines()] == ["ok"]
+
+    def test_edge_stub_processes_directory(self, image_dir, tmp_path):
+        out = tmp_path / "results.jsonl"
+        report = analyze_xray_batch(str(image_dir), str(out), backend=EdgeStubBackend())
+        assert report.processed == 6
+        assert report.failed == 0
+        assert report.images_per_sec > 0
+        results = _read_results(out)
+        assert len(results) == 6
+        assert all("[Edge Simulation]" in r["analysis"] for r in results)
+
+    def test_batches_respect_batch_size(self, image_dir, tmp_path):
+        backend = RecordingBackend()
+        analyze_xray_batch(
+            str(image_dir), str(tmp_path / "out.jsonl"),
+            batch_size=4, queue_size=2, backend=backend,
+        )
+        assert backend.batches == [4, 2]
+
+    def test_results_keep_manifest_order(self, image_dir, tmp_path):
+        out = tmp_path / "out.jsonl"
+        analyze_xray_batch(str(image_dir), str(out), batch_size=2, backend=RecordingBackend())
+        expected = [item["image_path"] for item in iter_xray_manifest(str(image_dir))]
+        assert [r["image_path"] for r in _read_results(out)] == expected
+
+    def test_decode_failure_does_not_fail_batch(self, image_dir, tmp_path):
+        out = tmp_path / "out.jsonl"
+        report = analyze_xray_batch(
+            str(image_dir), str(out), backend=RecordingBackend(fail_on="xray_3.png")
+        )
+        assert report.processed == 5
+        assert report.failed == 1
+        errors = [r for r in _read_results(out) if r["status"] == "error"]
+        assert errors[0]["image_path"].endswith("xray_3.png")
+
+    def test_resume_skips_completed_and_retries_failed(self, image_dir, tmp_path):
+        out = tmp_path / "out.jsonl"
+        analyze_xray_batch(str(image_dir), str(out), backend=RecordingBackend(fail_on="xray_3.png"))
+        with open(out, "a") as fh:
+            fh.write('{"image_path": "torn')  # interrupted write
+
+        report = analyze_xray_batch(str(image_dir), str(out), backend=RecordingBackend())
+        assert report.skipped == 5
+        assert report.processed == 1
+
+        report = analyze_xray_batch(str(image_dir), str(out), backend=RecordingBackend())
+        assert report.skipped == 6
+        assert report.processed == 0
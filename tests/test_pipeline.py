@@ -0,0 +1,110 @@
+"""Tests for the DAG stage executor and the shared clinical pipeline."""
+
+import threading
+import time
+
+import pytest
+
+from src.agents.doctor_agent import DoctorAgent
+from src.agents.nurse_agent import NurseAgent
+from src.agents.triage_agent import TriageAgent, TriageResult
+from src.core.models import PatientState
+from src.core.pipeline import Stage, StagePipeline, build_clinical_pipeline
+from src.mcp_server import process_clinical_text
+
+
+class TestStagePipeline:
+    def test_levels_follow_dependencies(self):
+        pipeline = StagePipeline([
+            Stage("b", lambda a: a + 1, depends_on=("a",)),
+            Stage("a", lambda x: x * 2),
+            Stage("c", lambda a, b: a + b, depends_on=("a", "b")),
+        ])
+        assert pipeline.stage_names == ["a", "b", "c"]
+        result = pipeline.run(5)
+        assert result["c"] == 21
+        assert set(result.timings_ms) == {"a", "b", "c"}
+        assert result.total_ms >= 0
+
+    def test_independent_stages_run_concurrently(self):
+        barrier = threading.Barrier(2, timeout=2)
+
+        def wait_for_sibling(x):
+            barrier.wait()  # deadlocks (BrokenBarrierError) if run serially
+            return x
+
+        pipeline = StagePipeline([
+            Stage("left", wait_for_sibling),
+            Stage("right", wait_for_sibling),
+        ])
+        assert pipeline.run("ok").outputs["right"] == "ok"
+
+    def test_unknown_dependency_rejected(self):
+        with pytest.raises(ValueError, match="unknown"):
+            StagePipeline([Stage("a", len, depends_on=("missing",))])
+
+    def test_cycle_rejected(self):
+        with pytest.raises(ValueError, match="cycle"):
+            StagePipeline([
+                Stage("a", len, depends_on=("b",)),
+                Stage("b", len, depends_on=("a",)),
+            ])
+
+    def test_stage_errors_propagate(self):
+        pipeline = StagePipeline([Stage("a", lambda x: 1 / x)])
+        with pytest.raises(ZeroDivisionError):
+            pipeline.run(0)
+
+    def test_run_batch_uses_batch_func(self):
+        calls = []
+
+        def batch_double(values):
+            calls.append(list(values))
+            return [v * 2 for v in values]
+
+        pipeline = StagePipeline([
+            Stage("double", lambda v: v * 2, batch_func=batch_double),
+            Stage("inc", lambda v: v + 1, depends_on=("double",)),
+        ])
+        results = pipeline.run_batch([1, 2, 3])
+        assert calls == [[1, 2, 3]]
+        assert [r["inc"] for r in results] == [3, 5, 7]
+
+    def test_batch_func_length_mismatch(self):
+        pipeline = StagePipeline([Stage("a", len, batch_func=lambda v: [])])
+        with pytest.raises(ValueError, match="outputs"):
+            pipeline.run_batch(["x"])
+
+
+class TestClinicalPipeline:
+    TEXT = "Chief complaint: fever. HR 105, BP 150/90, Temp 38.6C."
+
+    def test_stages_and_outputs(self):
+        pipeline = build_clinical_pipeline(NurseAgent(), TriageAgent(), DoctorAgent())
+        run = pipeline.run(self.TEXT)
+        assert isinstance(run["compression"], PatientState)
+        assert isinstance(run["triage"], TriageResult)
+        assert "[MedGemma Assessment]" in run["diagnosis"]
+        assert set(run.timings_ms) == {"compression", "triage", "diagnosis"}
+
+    def test_matches_direct_agent_calls(self):
+        pipeline = build_clinical_pipeline(NurseAgent(), TriageAgent(), DoctorAgent())
+        state = NurseAgent().intake(self.TEXT)
+        run = pipeline.run(self.TEXT)
+        assert run["triage"] == TriageAgent().triage(state)
+        assert run["diagnosis"] == DoctorAgent().diagnose(state.model_dump(exclude_none=True))
+
+    def test_run_batch_matches_run(self):
+        pipeline = build_clinical_pipeline(NurseAgent(), TriageAgent(), DoctorAgent())
+        texts = [self.TEXT, "Cough for 3 days. HR 80, BP 120/80, Temp 37.0C."]
+        batch = pipeline.run_batch(texts)
+        for text, item in zip(texts, batch):
+            single = pipeline.run(text)
+            assert item["triage"] == single["triage"]
+            assert item["diagnosis"] == single["diagnosis"]
+
+    def test_mcp_tool_uses_pipeline(self):
+        result = process_clinical_text(self.TEXT)
+        assert result["triage"]["priority_level"] == "P1"
+        assert result["state"]["vitals"]["hr"] == 105
+        assert set(result["timings_ms"]) == {"compression", "triage", "diagnosis"}
@@ -0,0 +1,97 @@
+"""Tests for per-request profiling (slowest-N buffer and export formats)."""
+
+import io
+import marshal
+import pstats
+
+from src.core.profiling import (
+    ProfileRecord,
+    ProfileRecorder,
+    to_pstats_bytes,
+    to_pstats_text,
+    to_speedscope,
+)
+
+
+def _busy(n):
+    return sum(i * i for i in range(n))
+
+
+def _outer():
+    return _busy(20000) + _busy(10000)
+
+
+def _record(profile_id, duration_ms):
+    return ProfileRecord(profile_id, "req", "forced", duration_ms, "now", stats={})
+
+
+class TestProfileRecorder:
+    def test_trigger(self):
+        recorder = ProfileRecorder(sample_rate=0.5, rng=iter([0.9, 0.1]).__next__)
+        assert recorder.trigger_for(forced=True) == "forced"
+        assert recorder.trigger_for(forced=False) is None
+        assert recorder.trigger_for(forced=False) == "sampled"
+
+    def test_sampling_disabled_by_default(self):
+        assert ProfileRecorder().trigger_for(forced=False) is None
+
+    def test_keeps_slowest(self):
+        recorder = ProfileRecorder(capacity=3)
+        for i, ms in enumerate([5, 50, 1, 20, 30]):
+            recorder.add(_record(f"p{i}", ms))
+        assert [r.duration_ms for r in recorder.records()] == [50, 30, 20]
+        assert recorder.get("p2") is None
+        assert recorder.get("p1").duration_ms == 50
+
+    def test_rejects_faster_than_slowest_n(self):
+        recorder = ProfileRecorder(capacity=1)
+        assert recorder.add(_record("a", 10))
+        assert not recorder.add(_record("b", 5))
+
+    def test_capture(self):
+        recorder = ProfileRecorder()
+        with recorder.capture("req_1", "forced") as info:
+            _outer()
+        record = recorder.get(info["profile_id"])
+        assert record.label == "req_1"
+        assert record.duration_ms > 0
+        functions = [h["function"] for h in record.summary()["hotspots"]]
+        assert any(f.startswith("<genexpr>") or f.startswith("_busy") for f in functions)
+
+
+class TestExport:
+    def setup_method(self):
+        recorder = ProfileRecorder()
+        with recorder.capture("req_1", "forced") as info:
+            _outer()
+        self.record = recorder.get(info["profile_id"])
+
+    def test_pstats_bytes_round_trip(self, tmp_path):
+        path = tmp_path / "p.prof"
+        path.write_bytes(to_pstats_bytes(self.record))
+        stats = pstats.Stats(str(path), stream=io.StringIO())
+        assert any(name == "_outer" for _, _, name in stats.stats)
+        assert marshal.loads(path.read_bytes()) == self.record.stats
+
+    def test_pstats_text(self):
+        text = to_pstats_text(self.record)
+        assert "cumulative" in text
+        assert "_outer" in text
+
+    def test_speedscope(self):
+        doc = to_speedscope(self.record)
+        frames = doc["shared"]["frames"]
+        profile = doc["profiles"][0]
+        assert profile["type"] == "sampled"
+        assert len(profile["samples"]) == len(profile["weights"])
+        assert profile["endValue"] == sum(profile["weights"])
+        for stack in profile["samples"]:
+            assert all(0 <= i < len(frames) for i in stack)
+        names = [f["name"] for f in frames]
+        outer = next(i for i, n in enumerate(names) if n.startswith("_outer"))
+        busy = next(i for i, n in enumerate(names) if n.startswith("_busy"))
+        # _busy's time is attributed under its caller _outer
+        assert any(
+            outer in stack and busy in stack and stack.index(outer) < stack.index(busy)
+            for stack in profile["samples"]
+        )
@@ -0,0 +1,272 @@
+"""Tests for record store backends and AINativeRecord bulk operations."""
+
+import asyncio
+import json
+import sqlite3
+import time
+
+import pytest
+
+from src.core.future_ehr import AINativeRecord
+from src.core.pipeline import PIPELINE_VERSION
+from src.core.record_store import (
+    AsyncRecordStore,
+    InMemoryRecordStore,
+    RecordVersion,
+    SQLiteRecordStore,
+    open_record_store,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        s = InMemoryRecordStore()
+    else:
+        s = SQLiteRecordStore(str(tmp_path / "records.db"))
+    yield s
+    s.close()
+
+
+class TestRecordStore:
+    def test_put_get_replace(self, store):
+        assert store.get("PT-1") is None
+        store.put("PT-1", '{"a":1}')
+        store.put("PT-1", '{"a":2}')
+        assert store.get("PT-1") == '{"a":2}'
+        assert len(store) == 1
+
+    def test_bulk(self, store):
+        assert store.put_many((f"PT-{i}", f'{{"i":{i}}}') for i in range(1200)) == 1200
+        assert len(store) == 1200
+        found = store.get_many(["PT-5", "missing", "PT-1199", "PT-5"])
+        assert found == {"PT-5": '{"i":5}', "PT-1199": '{"i":1199}'}
+
+    def test_delete(self, store):
+        store.put("PT-1", "{}")
+        assert store.delete("PT-1")
+        assert not store.delete("PT-1")
+        assert store.get("PT-1") is None
+
+    def test_async_facade(self, store):
+        async def scenario():
+            facade = AsyncRecordStore(store)
+            await facade.put("PT-1", "{}")
+            await facade.put_many([("PT-2", "[]"), ("PT-3", "null")])
+            return await facade.get("PT-1"), await facade.get_many(["PT-2", "PT-3"])
+
+        single, many = asyncio.run(scenario())
+        assert single == "{}"
+        assert many == {"PT-2": "[]", "PT-3": "null"}
+
+
+class TestVersionedRecordStore:
+    def _fill(self, store):
+        store.put_many([
+            RecordVersion("PT-1", 100.0, "v1", "cardio", "P1"),
+            RecordVersion("PT-1", 200.0, "v2", "cardio", "P2"),
+            RecordVersion("PT-2", 150.0, "w1", "resp", "P1"),
+            RecordVersion("PT-3", 300.0, "x1", "cardio", "P1"),
+        ])
+
+    def test_history_keeps_every_version(self, store):
+        self._fill(store)
+        assert [v.payload for v in store.history("PT-1")] == ["v1", "v2"]
+        assert [v.payload for v in store.history("PT-1", since=150)] == ["v2"]
+        assert store.get("PT-1") == "v2"
+        assert len(store) == 3
+
+    def test_backfill_does_not_replace_latest(self, store):
+        self._fill(store)
+        store.put("PT-1", "v0", recorded_at=50.0)
+        assert store.get("PT-1") == "v2"
+        assert [v.payload for v in store.history("PT-1")] == ["v0", "v1", "v2"]
+
+    def test_query_by_indexes_and_time(self, store):
+        self._fill(store)
+        assert [v.payload for v in store.query(protocol="cardio", priority="P1")] == ["x1", "v1"]
+        assert [v.payload for v in store.query(priority="P1", since=120, until=310)] == ["x1", "w1"]
+        assert [v.payload for v in store.query(since=120, limit=2)] == ["x1", "v2"]
+        assert store.query(protocol="neuro") == []
+        assert store.query(protocol="cardio", priority="P1")[0] == RecordVersion(
+            "PT-3", 300.0, "x1", "cardio", "P1"
+        )
+
+    def test_delete_removes_history_and_index_entries(self, store):
+        self._fill(store)
+        assert store.delete("PT-1")
+        assert store.history("PT-1") == []
+        assert [v.patient_id for v in store.query(protocol="cardio")] == ["PT-3"]
+
+    def test_readd_after_delete(self, store):
+        self._fill(store)
+        store.delete("PT-1")
+        store.put("PT-1", "v3", recorded_at=250.0, protocol="cardio", priority="P1")
+        assert [v.payload for v in store.history("PT-1")] == ["v3"]
+        assert [v.payload for v in store.query(protocol="cardio", priority="P1")] == ["x1", "v3"]
+        assert [v.payload for v in store.query()] == ["x1", "v3", "w1"]
+
+    def test_out_of_order_writes_and_deletes_stay_sorted(self):
+        store = InMemoryRecordStore()
+        times = [5.0, 1.0, 3.0, 3.0, 9.0, 0.5, 3.0, 7.0]
+        for i, t in enumerate(times):
+            store.put(f"PT-{i % 3}", f"p{i}", recorded_at=t)
+        store.delete("PT-1")
+        kept = [(t, i) for i, t in enumerate(times) if i % 3 != 1]
+        expected = [f"p{i}" for _, i in sorted(kept)]
+        assert [v.payload for v in reversed(store.query())] == expected
+        assert [v.payload for v in store.history("PT-0", since=1, until=5)] == ["p3", "p6", "p0"]
+
+
+class TestSQLiteRecordStore:
+    def test_survives_reopen_and_is_shared(self, tmp_path):
+        path = str(tmp_path / "records.db")
+        writer = SQLiteRecordStore(path)
+        reader = SQLiteRecordStore(path)
+        writer.put("PT-1", '{"x":1}')
+        assert reader.get("PT-1") == '{"x":1}'
+        writer.close()
+        reader.close()
+        reopened = open_record_store(path)
+        assert reopened.get("PT-1") == '{"x":1}'
+        reopened.close()
+
+    def test_failed_bulk_insert_rolls_back(self, tmp_path):
+        store = SQLiteRecordStore(str(tmp_path / "records.db"))
+        with pytest.raises(sqlite3.IntegrityError):
+            store.put_many([("PT-1", "{}"), ("PT-2", None)])
+        assert len(store) == 0
+        store.close()
+
+    def test_open_without_path_is_in_memory(self):
+        assert isinstance(open_record_store(None), InMemoryRecordStore)
+
+
+class TestAINativeRecordBulk:
+    RECORDS = {
+        "PT-1": "Chief complaint: chest pain. HR 110, BP 130/85.",
+        "PT-2": "Chief complaint: cough. Temp 38.4C.",
+    }
+
+    def test_save_many_and_load_many(self, store):
+        ehr = AINativeRecord(store=store)
+        results = ehr.save_many(self.RECORDS)
+        assert [r["patient_id"] for r in results] == ["PT-1", "PT-2"]
+        assert results[0]["raw_chars"] == len(self.RECORDS["PT-1"])
+        loaded = ehr.load_many(["PT-2", "PT-1", "PT-9"])
+        assert list(loaded) == ["PT-2", "PT-1", "PT-9"]
+        assert loaded["PT-1"]["vitals"]["hr"] == 110
+        assert loaded["PT-9"] is None
+
+    def test_bulk_matches_single(self, store):
+        ehr = AINativeRecord(store=store)
+        single = AINativeRecord()
+        ehr.save_many(self.RECORDS.items())
+        for patient_id, raw in self.RECORDS.items():
+            single.save_record(patient_id, raw)
+            assert ehr.load_record(patient_id) == single.load_record(patient_id)
+
+    def test_records_visible_to_other_instances(self, tmp_path):
+        path = str(tmp_path / "records.db")
+        clinic_a = AINativeRecord(store=SQLiteRecordStore(path))
+        clinic_a.save_record("PT-1", self.RECORDS["PT-1"])
+        clinic_b = AINativeRecord(store=SQLiteRecordStore(path))
+        assert clinic_b.load_record("PT-1") == json.loads(clinic_a.store.get("PT-1"))
+        assert "storage_saved_pct" in clinic_b.get_stats("PT-1", self.RECORDS["PT-1"])
+
+
+class TestAINativeRecordQueries:
+    CARDIO = "Chief complaint: chest pain radiating to left arm. HR 110, BP 160/95."
+    RESP = "Chief complaint: cough. Temp 37.2C."
+
+    def test_history_and_time_window_query(self, store):
+        ehr = AINativeRecord(store=store)
+        now = time.time()
+        ehr.save_record("PT-1", self.CARDIO, recorded_at=now - 10 * 3600)
+        ehr.save_record("PT-1", self.CARDIO + " Temp 38.5C.", recorded_at=now - 3600)
+        ehr.save_record("PT-2", self.RESP, recorded_at=now - 600)
+        ehr.save_record("PT-3", self.CARDIO, recorded_at=now - 7 * 3600)
+
+        history = ehr.history("PT-1")
+        assert [h["recorded_at"] for h in history] == [now - 10 * 3600, now - 3600]
+        assert history[-1]["record"]["vitals"]["temp"] == 38.5
+        assert ehr.load_record("PT-1") == history[-1]["record"]
+
+        recent_p1 = ehr.query(protocol="cardiology", priority="P1", since=now - 6 * 3600)
+        assert [r["patient_id"] for r in recent_p1] == ["PT-1"]
+        assert recent_p1[0]["protocol"] == ehr.load_record("PT-1")["meta"]["active_protocol"]
+        assert [r["patient_id"] for r in ehr.query(protocol="General")] == ["PT-2"]
+        assert [r["priority"] for r in ehr.query(priority="P3")] == ["P3"]
+
+
+class TestRecordMetrics:
+    TEXTS = {
+        "PT-1": "Chief complaint: chest pain radiating to left arm. HR 110, BP 160/95.",
+        "PT-2": "Chief complaint: cough and fever for three days. Temp 38.4C. " * 3,
+    }
+
+    def test_save_stores_metrics_and_stats_need_no_raw_text(self, store):
+        ehr = AINativeRecord(store=store)
+        result = ehr.save_record("PT-1", self.TEXTS["PT-1"])
+        assert result["raw_chars"] == len(self.TEXTS["PT-1"])
+        assert result["compressed_bytes"] == len(result["compressed_json"].encode())
+        assert result["compression_ms"] > 0
+        assert result["pipeline_version"] == PIPELINE_VERSION
+
+        stored = ehr.get_stats("PT-1")
+        legacy = ehr.get_stats("PT-1", self.TEXTS["PT-1"])
+        for key in ("raw_chars", "compressed_chars", "raw_tokens", "compressed_tokens",
+                    "storage_saved_pct", "tokens_saved_pct", "compressed_bytes"):
+            assert stored[key] == legacy[key]
+        assert ehr.get_stats("PT-9") == {"error": "Patient not found"}
+
+    def test_record_without_metrics_needs_raw_text(self, store):
+        ehr = AINativeRecord(store=store)
+        store.put("PT-1", '{"chief_complaint":"x"}')
+        assert "error" in ehr.get_stats("PT-1")
+        assert ehr.get_stats("PT-1", "raw text here")["raw_chars"] == 13
+
+    def test_bulk_stats_track_writes_and_deletes(self, store):
+        ehr = AINativeRecord(store=store)
+        results = ehr.save_many(self.TEXTS)
+        ehr.save_record("PT-1", self.TEXTS["PT-1"])
+        stats = ehr.bulk_stats()
+        assert stats["records"] == stats["measured_records"] == 3
+        assert stats["raw_chars"] == sum(r["raw_chars"] for r in results) + len(self.TEXTS["PT-1"])
+        assert stats["storage_saved_pct"] == round(
+            (1 - stats["compressed_chars"] / stats["raw_chars"]) * 100, 1
+        )
+        assert stats["avg_compression_ms"] > 0
+
+        store.delete("PT-1")
+        stats = ehr.bulk_stats()
+        assert stats["records"] == 1
+        assert stats["raw_chars"] == len(self.TEXTS["PT-2"])
+        assert stats["compressed_bytes"] == results[1]["compressed_bytes"]
+
+    def test_sqlite_totals_persist_and_migrate(self, tmp_path):
+        path = str(tmp_path / "records.db")
+        conn = sqlite3.connect(path)
+        conn.executescript(
+            "CREATE TABLE records (patient_id TEXT PRIMARY KEY, payload BLOB NOT NULL,"
+            " updated_at REAL NOT NULL);"
+            "CREATE TABLE record_versions (id INTEGER PRIMARY KEY, patient_id TEXT NOT NULL,"
+            " recorded_at REAL NOT NULL, protocol TEXT, priority TEXT, payload BLOB NOT NULL);"
+            "INSERT INTO record_versions (patient_id, recorded_at, payload) VALUES ('OLD', 1, '{}');"
+            "INSERT INTO records VALUES ('OLD', '{}', 1);"
+        )
+        conn.commit()
+        conn.close()
+
+        ehr = AINativeRecord(store=SQLiteRecordStore(path))
+        assert ehr.store.totals()["versions"] == 1
+        ehr.save_record("PT-1", self.TEXTS["PT-1"])
+        ehr.store.close()
+
+        reopened = AINativeRecord(store=SQLiteRecordStore(path))
+        stats = reopened.bulk_stats()
+        assert stats["records"] == 2
+        assert stats["measured_records"] == 1
+        assert stats["raw_chars"] == len(self.TEXTS["PT-1"])
+        assert reopened.get_stats("PT-1")["pipeline_version"] == PIPELINE_VERSION
+        reopened.store.close()
@@ -0,0 +1,170 @@
+"""Tests for the pluggable regex backend and ReDoS-resistant extraction."""
+
+import re
+import time
+
+import pytest
+
+from src.core import regex_backend
+from src.core.comptext import CompTextProtocol
+
+SAMPLES = [
+    "Chief complaint: severe chest pain radiating to left arm. HR 110, BP 160/95, "
+    "Temp 38.2C. Medications: aspirin 325mg. Allergies: penicillin.",
+    "Patient with shortness of breath, wheezing triggered by exercise. Breath sounds: diminished.",
+    "Sudden weakness on left side. Last known well 14:30. T 37.9 BP 180/100\n",
+    "Motor vehicle accident, fell from ladder, laceration. HR\xa0120",
+]
+
+# Inputs that backtrack quadratically on the unhardened patterns.
+ADVERSARIAL = {
+    "label + whitespace run": "hr" + " " * 20_000 + "x",
+    "T + whitespace run": "T" + " " * 20_000 + "x",
+    "breath sounds + whitespace run": "breath sounds" + " " * 20_000 + "x",
+    "temp value + whitespace run": "temp 38" + " " * 20_000 + "x",
+}
+
+
+class TestCompile:
+    def test_re_engine(self):
+        pattern = regex_backend.compile(r"hr\s*(\d+)", re.IGNORECASE, engine="re")
+        assert pattern.engine == "re"
+        assert pattern.search("HR 110").group(1) == "110"
+        assert pattern.sub("#", "hr 1, hr 2") == "#, #"
+
+    def test_unknown_engine(self):
+        with pytest.raises(ValueError):
+            regex_backend.compile("a", engine="pcre")
+
+    def test_env_default(self, monkeypatch):
+        monkeypatch.setenv("COMPTEXT_REGEX_ENGINE", "re")
+        assert regex_backend.compile("a").engine == "re"
+        monkeypatch.setenv("COMPTEXT_REGEX_ENGINE", "bogus")
+        with pytest.raises(ValueError):
+            regex_backend.default_engine()
+
+    def test_auto_falls_back_for_unsupported_syntax(self):
+        # lookbehind is not RE2 syntax
+        assert regex_backend.compile(r"(?<=\.)\s+", engine="auto").engine == "re"
+
+    def test_word_boundaries_dispatch_on_ascii(self):
+        # stand-in for RE2: the same pattern with ASCII word characters
+        dispatch = regex_backend._AsciiDispatch(re.compile(r"\bx", re.ASCII), re.compile(r"\bx"))
+        assert dispatch.search("-x").start() == 1
+        assert dispatch.search("éx") is None  # é is a word character to re
+        assert dispatch.sub("#", "x éx") == "# éx"
+        assert regex_backend._has_word_boundary(r"\bpain\b")
+        assert not regex_backend._has_word_boundary(r"[\b]x")
+
+    def test_hot_patterns_are_re2_syntax(self):
+        from src.core.codex import NeurologyCodex
+        from src.core.sections import CLINICAL_LINE
+
+        for pattern in (
+            CompTextProtocol._SYMPTOM_KEYWORDS,
+            CompTextProtocol._TEMP_PATTERN,
+            NeurologyCodex._SYMPTOMS_SIDE_PATTERN,
+            CLINICAL_LINE,
+        ):
+            assert not re.search(r"\(\?<?[=!]", pattern.pattern)
+            if regex_backend._RE2_AVAILABLE and regex_backend.default_engine() != "re":
+                assert pattern.engine == "re2"
+
+    def test_re2_engine(self):
+        if not regex_backend._RE2_AVAILABLE:
+            with pytest.raises(RuntimeError):
+                regex_backend.compile("a", engine="re2")
+            return
+        assert regex_backend.compile(r"hr\s*(\d+)", engine="auto").engine == "re2"
+        with pytest.raises(re.error):
+            regex_backend.compile(r"(?<=\.)\s+", engine="re2")
+
+    @pytest.mark.skipif(not regex_backend._RE2_AVAILABLE, reason="google-re2 not installed")
+    def test_re2_matches_python_semantics(self):
+        for pattern, flags, text in [
+            (r"x\s*(\d+)", 0, "x\xa0٣"),  # Unicode \s and \d
+            (r"a(.+?)(?:,|$)", 0, "a bc\n"),  # $ before a final newline
+            (r"^b(.+)$", re.MULTILINE, "a\nbcd\ne"),
+            (r"[^\s]+", 0, "\xa0ab\xa0"),
+        ]:
+            expected = re.compile(pattern, flags).search(text)
+            found = regex_backend.compile(pattern, flags, engine="re2").search(text)
+            assert found.start() == expected.start() and found.groups() == expected.groups()
+
+    @pytest.mark.skipif(not regex_backend._RE2_AVAILABLE, reason="google-re2 not installed")
+    def test_auto_word_boundaries_match_python(self):
+        pattern = regex_backend.compile(r"\b(pain|fever)\b", engine="auto")
+        assert pattern.engine == "re2"
+        for text in ("chest pain, fever", "painful fevers", "café pain", "éfever", "pain_x fever"):
+            assert pattern.findall(text) == re.findall(r"\b(pain|fever)\b", text)
+
+
+class TestExtraction:
+    def test_engines_agree(self, monkeypatch):
+        reference = [CompTextProtocol().compress(text).to_compressed_dict() for text in SAMPLES]
+        monkeypatch.setenv("COMPTEXT_REGEX_ENGINE", "re")
+        for name in ("_HR_PATTERN", "_TEMP_PATTERN", "_CHIEF_COMPLAINT_PRIMARY"):
+            original = getattr(CompTextProtocol, name)
+            monkeypatch.setattr(
+                CompTextProtocol, name, regex_backend.compile(original.pattern, original.flags)
+            )
+        assert [CompTextProtocol().compress(t).to_compressed_dict() for t in SAMPLES] == reference
+
+    @pytest.mark.parametrize("text", list(ADVERSARIAL.values()), ids=list(ADVERSARIAL))
+    def test_adversarial_input_is_fast(self, text):
+        start = time.perf_counter()
+        CompTextProtocol().compress(text)
+        assert time.perf_counter() - start < 0.5
+
+    def test_exhausted_budget_skips_every_extractor(self):
+        state = CompTextProtocol(time_budget_ms=0).compress(SAMPLES[0])
+        assert state.meta["time_budget_exceeded"] is True
+        assert state.meta["truncated_fields"][0] == "hr"
+        assert state.meta["truncated_fields"][-2:] == ["symptoms", "specialist_data"]
+        assert state.meta["active_protocol"] == "\U0001fac0 Cardiology Protocol"
+        assert state.vitals.hr is None and state.chief_complaint is None
+        assert state.symptoms == [] and state.specialist_data == {}
+
+    def test_slow_backend_stops_early(self, monkeypatch):
+        calls = []
+
+        class SlowPattern:
+            """Wraps a pattern; every search takes 20 ms."""
+
+            def __init__(self, name, pattern):
+                self.name, self.pattern = name, pattern
+
+            def search(self, *args, **kwargs):
+                calls.append(self.name)
+                time.sleep(0.02)
+                return self.pattern.search(*args, **kwargs)
+
+        slow = {
+            id(pattern): SlowPattern(name, pattern)
+            for name, pattern in [
+                ("hr", CompTextProtocol._HR_PATTERN),
+                ("bp", CompTextProtocol._BP_PATTERN),
+                ("temp", CompTextProtocol._TEMP_PATTERN),
+            ]
+        }
+        monkeypatch.setattr(
+            CompTextProtocol,
+            "_FIELD_EXTRACTORS",
+            tuple(
+                (field, span, tuple(slow.get(id(p), p) for p in patterns))
+                for field, span, patterns in CompTextProtocol._FIELD_EXTRACTORS
+            ),
+        )
+        state = CompTextProtocol(time_budget_ms=30).compress(SAMPLES[0])
+        assert calls == ["hr", "bp"]
+        assert state.vitals.hr == 110 and state.vitals.bp == "160/95"
+        assert state.vitals.temp is None and state.medication is None
+        assert state.meta["truncated_fields"] == [
+            "temp", "chief_complaint", "medication", "diagnosis", "allergies",
+            "symptoms", "specialist_data",
+        ]
+
+    def test_generous_budget_changes_nothing(self):
+        text = SAMPLES[0]
+        budgeted = CompTextProtocol(time_budget_ms=10_000).compress(text)
+        assert budgeted.to_compressed_dict() == CompTextProtocol().compress(text).to_compressed_dict()
@@ -0,0 +1,153 @@
+"""Tests for section-aware segmentation of EMR exports."""
+
+import pytest
+
+from src.agents.triage_agent import TriageAgent
+from src.core.codex import MedicalKVTCStrategy
+from src.core.comptext import CompTextProtocol
+from src.core.sections import ADMIN, CLINICAL, LEGAL, SectionSegmenter
+
+EMR_EXPORT = (
+    "LEGAL NOTICE\n"
+    "Confidential. Disclosure of heart rate records is prosecuted.\n"
+    "\n"
+    "[CLINICAL_CORE]\n"
+    "Chief complaint: chest pain radiating to left arm.\n"
+    "HR 110, BP 160/95.\n"
+    "[/CLINICAL_CORE]\n"
+    "\n"
+    "Billing information:\n"
+    "Invoice 4711. Diagnosis code billed: I21.9, medication costs separately.\n"
+)
+
+
+def _kinds(text, segmenter=None):
+    segmenter = segmenter or SectionSegmenter()
+    return [(s.kind, text[s.start:s.end]) for s in segmenter.segment(text)]
+
+
+class TestSegmenter:
+    def test_markers_and_headers(self):
+        kinds = [kind for kind, _ in _kinds(EMR_EXPORT)]
+        assert kinds == [LEGAL, CLINICAL, ADMIN]
+
+    def test_sections_cover_text(self):
+        sections = SectionSegmenter().segment(EMR_EXPORT)
+        assert sections[0].start == 0 and sections[-1].end == len(EMR_EXPORT)
+        assert all(a.end == b.start for a, b in zip(sections, sections[1:]))
+
+    @pytest.mark.parametrize(
+        "marker",
+        ["=== BILLING ===", "BEGIN ADMIN", "<admin>", "[Billing]"],
+    )
+    def test_marker_forms(self, marker):
+        text = f"HR 80.\n{marker}\nAccount 12.\nEND ADMIN\nBP 120/80.\n"
+        assert [kind for kind, _ in _kinds(text)] == [CLINICAL, ADMIN, CLINICAL]
+
+    def test_unknown_header_is_clinical(self):
+        text = "Insurance:\nAOK.\nSocial situation:\nLives alone.\n"
+        kinds = _kinds(text)
+        assert kinds == [(ADMIN, "Insurance:\nAOK.\n"), (CLINICAL, "Social situation:\nLives alone.\n")]
+
+    def test_clinical_words_win(self):
+        assert _kinds("Medication administration:\nIV at 10:00.\n")[0][0] == CLINICAL
+
+    def test_caps_sentence_is_not_a_header(self):
+        text = "Billing:\nPaid.\nFALL FROM LADDER 2 WEEKS AGO\n"
+        assert len(_kinds(text)) == 1
+
+    def test_custom_markers_and_keywords(self):
+        segmenter = SectionSegmenter(markers={"FOOTER": LEGAL}, keywords={ADMIN: ["ward"]})
+        text = "Ward:\nB4.\n[FOOTER]\n(c) clinic\n"
+        assert [kind for kind, _ in _kinds(text, segmenter)] == [ADMIN, LEGAL]
+        with pytest.raises(ValueError):
+            SectionSegmenter(markers={"X": "billing"})
+
+    def test_clinical_line_ends_header_section(self):
+        text = (
+            "Patient arrived by ambulance.\n"
+            "INSURANCE\n"
+            "Medicare part B on file, spouse present\n"
+            "Chief complaint: crushing chest pain radiating to left arm\n"
+            "HR 135, BP 85/50, Temp 38.9C"
+        )
+        assert [kind for kind, _ in _kinds(text)] == [CLINICAL, ADMIN, CLINICAL]
+        assert _kinds(text)[1][1] == "INSURANCE\nMedicare part B on file, spouse present\n"
+
+    def test_clinical_lines_kept_inside_marked_blocks(self):
+        text = "BEGIN ADMIN\nAccount 12.\nHR 135 at transfer.\nBP 85/50.\nFax 3.\nEND ADMIN\n"
+        kinds = _kinds(text)
+        assert kinds[1] == (CLINICAL, "HR 135 at transfer.\nBP 85/50.\n")
+        assert [kind for kind, _ in kinds] == [ADMIN, CLINICAL, ADMIN, CLINICAL]
+        assert len(_kinds(text, SectionSegmenter(clinical_lines=None))) == 2
+
+    def test_plain_text_is_untouched(self):
+        text = "Patient presents with chest pain. HR 110."
+        segmenter = SectionSegmenter()
+        assert segmenter.keep(text, (ADMIN, LEGAL)) is text
+        assert segmenter.clinical("Billing:\nPaid in full.\n").nfc == "Billing:\nPaid in full.\n"
+
+
+class TestExtraction:
+    def test_extraction_ignores_legal_and_admin(self):
+        state = CompTextProtocol().compress(EMR_EXPORT)
+        assert state.vitals.hr == 110
+        assert state.chief_complaint == "chest pain radiating to left arm"
+        assert state.medication is None
+        assert "diagnosis" not in state.specialist_data
+
+    def test_without_segmenter(self):
+        state = CompTextProtocol(segmenter=None).compress(EMR_EXPORT)
+        assert state.specialist_data["diagnosis"].startswith("code billed")
+
+    def test_token_count_covers_whole_record(self):
+        state = CompTextProtocol().compress(EMR_EXPORT)
+        assert state._original_token_count == len(EMR_EXPORT) // 4
+
+    def test_admin_header_does_not_hide_vitals(self):
+        text = (
+            "Patient arrived by ambulance.\n"
+            "INSURANCE\n"
+            "Medicare part B on file, spouse present\n"
+            "Chief complaint: crushing chest pain radiating to left arm\n"
+            "HR 135, BP 85/50, Temp 38.9C"
+        )
+        state = CompTextProtocol().compress(text)
+        assert state.chief_complaint == "crushing chest pain radiating to left arm"
+        assert (state.vitals.hr, state.vitals.bp, state.vitals.temp) == (135, "85/50", 38.9)
+        assert TriageAgent().triage(state).priority_level == "P1"
+
+    def test_documents_without_headers_unchanged(self):
+        text = "Chief complaint: chest pain. HR 110, BP 160/95. Medications: aspirin."
+        assert (
+            CompTextProtocol().compress(text).to_compressed_dict()
+            == CompTextProtocol(segmenter=None).compress(text).to_compressed_dict()
+        )
+
+
+class TestKVTC:
+    def _document(self):
+        header = "S" * 100 + "\n"
+        history = "Stable on ward. " * 20 + "\n"
+        billing = "Billing:\n" + "Invoice line item 42. " * 20 + "\n"
+        clinical = "Assessment:\nImproving.\n"
+        recent = "R" * 100 + "\n"
+        return header, history + billing + clinical, recent
+
+    def test_drops_admin_from_middle(self):
+        header, middle, recent = self._document()
+        strategy = MedicalKVTCStrategy(sink_size=101, window_size=101, drop_kinds=(ADMIN,))
+        result = strategy.compress(header + middle + recent)
+        assert result.startswith(header) and result.endswith(recent)
+        assert "Invoice" not in result and "Billing" not in result
+        assert "Stable on ward." in result and "Improving." in result
+
+    def test_sink_and_window_stay_verbatim(self):
+        text = "Billing:\n" + "Invoice 1. " * 30 + "\nAssessment:\n" + "Stable. " * 30
+        result = MedicalKVTCStrategy(sink_size=40, window_size=40).compress(text)
+        assert result.startswith(text[:40]) and result.endswith(text[-40:])
+
+    def test_admin_kept_by_default(self):
+        header, middle, recent = self._document()
+        strategy = MedicalKVTCStrategy(sink_size=101, window_size=101)
+        assert "Invoice line item 42." in strategy.compress(header + middle + recent)
@@ -0,0 +1,91 @@
+"""Tests for the shared NormalizedText pass."""
+
+import unicodedata
+
+import pytest
+
+from src.core.codex import CardiologyCodex, CodexRouter, MedicalKVTCStrategy
+from src.core.comptext import CompTextProtocol
+from src.core.text import NormalizedText
+
+
+class TestViews:
+    def test_ascii_fast_path(self):
+        text = NormalizedText("Chief Complaint:  Chest PAIN\n\tHR 110")
+        assert text.nfc is text.original
+        assert text.folded == text.original.lower()
+        assert text.collapsed == "Chief Complaint: Chest PAIN HR 110"
+        assert text.collapsed_folded == text.collapsed.lower()
+        assert text._nfc_map is None and text._folded_map is None
+
+    def test_views_are_cached(self):
+        text = NormalizedText("Some Text")
+        assert text.folded is text.folded
+        assert text.collapsed is text.collapsed
+
+    def test_of_reuses_instance(self):
+        text = NormalizedText("x")
+        assert NormalizedText.of(text) is text
+        assert NormalizedText.of("x").original == "x"
+
+    def test_nfc_and_offsets(self):
+        raw = "Cafe\u0301 pain"  # decomposed é
+        text = NormalizedText(raw)
+        assert text.nfc == "Caf\u00e9 pain"
+        start = text.folded.index("café")
+        assert text.folded_to_original(start, start + 4) == (0, 5)
+        assert raw[slice(*text.folded_to_original(5, 9))] == "pain"
+
+    def test_casefold_expansion_maps_back(self):
+        text = NormalizedText("STRAßE Fieber")
+        assert text.folded == "strasse fieber"
+        start = text.folded.index("fieber")
+        assert text.original[slice(*text.folded_to_original(start, start + 6))] == "Fieber"
+        assert text.original[slice(*text.folded_to_original(0, 7))] == "STRAßE"
+
+    def test_collapsed_offsets(self):
+        text = NormalizedText("  a   bc \n d  ")
+        assert text.collapsed == "a bc d"
+        assert text.collapsed_to_nfc(2, 4) == (6, 8)
+        # the collapsed space covers the whole whitespace run
+        assert text.collapsed_to_nfc(1, 2) == (3, 6)
+
+    def test_slice_reuses_views(self):
+        text = NormalizedText("Header. Middle Part. Tail")
+        text.folded
+        part = text.slice(8, 20)
+        assert part.original == "Middle Part."
+        assert part.folded == "middle part."
+
+
+class TestThreading:
+    def test_compress_accepts_normalized_text(self):
+        raw = "Chief complaint: chest pain radiating to left arm. HR 110"
+        protocol = CompTextProtocol()
+        assert (
+            protocol.compress(NormalizedText(raw)).to_compressed_dict()
+            == protocol.compress(raw).to_compressed_dict()
+        )
+
+    def test_extracted_text_keeps_original_case(self):
+        state = CompTextProtocol().compress("CHIEF COMPLAINT: Crushing Chest Pain. HR 99")
+        assert state.chief_complaint == "Crushing Chest Pain"
+        assert state.vitals.hr == 99
+
+    def test_non_nfc_input_is_normalized(self):
+        decomposed = unicodedata.normalize("NFD", "Chief complaint: Übelkeit und Schwäche.")
+        state = CompTextProtocol().compress(decomposed)
+        assert state.chief_complaint == "Übelkeit und Schwäche"
+        assert unicodedata.is_normalized("NFC", state.chief_complaint)
+
+    def test_router_and_codex_share_instance(self):
+        text = NormalizedText("CHEST PAIN radiating to the Left Arm.")
+        assert isinstance(CodexRouter().route(text), CardiologyCodex)
+        assert CardiologyCodex().extract(text)["radiation"] == "the Left Arm"
+
+    @pytest.mark.parametrize("as_normalized", [False, True])
+    def test_kvtc_dedups_case_insensitively(self, as_normalized):
+        raw = "H" * 10 + "Pain at rest.  PAIN AT REST. New\n\nline." + "T" * 10
+        strategy = MedicalKVTCStrategy(sink_size=10, window_size=10)
+        result = strategy.compress(NormalizedText(raw) if as_normalized else raw)
+        assert result == "H" * 10 + "Pain at rest. New line." + "T" * 10
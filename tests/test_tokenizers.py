@@ -0,0 +1,110 @@
+"""Tests for tokenizer adapters and the token-budgeted KVTC strategy."""
+
+import pytest
+
+from src.core import tokenizers
+from src.core.codex import TokenBudgetKVTCStrategy
+from src.core.tokenizers import HFTokenizer, RegexTokenizer, get_tokenizer
+
+HISTORY = (
+    "Patient admitted with chest pain. "
+    + "Stable overnight. " * 10
+    + "Troponin 0.4 ng/ml at 06:00. Family visited today. Slept well after analgesia. " * 3
+    + "Current complaint: recurrent pain at rest, HR 118."
+)
+
+
+class FakeFastTokenizer:
+    """Whitespace 'fast tokenizer' returning HF-style offset mappings."""
+
+    is_fast = True
+    name_or_path = "fake"
+
+    def __call__(self, text, add_special_tokens=True, return_offsets_mapping=False):
+        assert not add_special_tokens and return_offsets_mapping
+        spans, start = [], None
+        for i, char in enumerate(text + " "):
+            if char.isspace() and start is not None:
+                spans.append((start, i))
+                start = None
+            elif not char.isspace() and start is None:
+                start = i
+        return {"input_ids": list(range(len(spans))), "offset_mapping": spans}
+
+
+class TestTokenizers:
+    def test_regex_tokenizer(self):
+        spans = RegexTokenizer().tokenize("Temperature 38.25C")
+        assert [spans.text[a:b] for a, b in spans.spans] == ["Temp", "erat", "ure", "38", ".", "25", "C"]
+        assert spans.count(0, 11) == 3
+        assert spans.boundary(3) == 12 and spans.boundary(99) == len(spans.text)
+
+    def test_encode_is_cached(self):
+        tokenizer = RegexTokenizer(cache_size=1)
+        tokenizer.count("a b")
+        tokenizer.count("a b")
+        assert tokenizer.encodes == 1
+        tokenizer.count("c d")
+        tokenizer.count("a b")
+        assert tokenizer.encodes == 3
+
+    def test_hf_adapter(self):
+        tokenizer = HFTokenizer(FakeFastTokenizer())
+        assert tokenizer.tokenize("HR  118 bpm").spans == [(0, 2), (4, 7), (8, 11)]
+        with pytest.raises(ValueError):
+            HFTokenizer(object())
+
+    def test_get_tokenizer(self):
+        assert isinstance(get_tokenizer("regex"), RegexTokenizer)
+        adapter = RegexTokenizer()
+        assert get_tokenizer(adapter) is adapter
+        with pytest.raises(ValueError):
+            get_tokenizer("sentencepiece")
+
+    @pytest.mark.skipif(tokenizers._TIKTOKEN_AVAILABLE, reason="tiktoken installed")
+    def test_missing_package(self):
+        with pytest.raises(RuntimeError):
+            get_tokenizer("tiktoken")
+
+
+class TestTokenBudgetKVTC:
+    def test_result_fits_budget(self):
+        tokenizer = RegexTokenizer()
+        strategy = TokenBudgetKVTCStrategy(tokenizer, sink_tokens=20, window_tokens=20, max_tokens=80)
+        result = strategy.compress(HISTORY)
+        assert tokenizer.count(HISTORY) > 80
+        assert tokenizer.count(result) <= 80
+
+    def test_sink_and_window_cut_on_token_boundaries(self):
+        tokenizer = RegexTokenizer()
+        strategy = TokenBudgetKVTCStrategy(tokenizer, sink_tokens=20, window_tokens=20, max_tokens=80)
+        spans = tokenizer.tokenize(HISTORY)
+        result = strategy.compress(HISTORY)
+        assert result.startswith(HISTORY[: spans.boundary(20)])
+        assert result.endswith(HISTORY[spans.boundary(len(spans) - 20) :])
+
+    def test_sentences_with_digits_outlive_others(self):
+        strategy = TokenBudgetKVTCStrategy("regex", sink_tokens=10, window_tokens=10, max_tokens=45)
+        result = strategy.compress(HISTORY)
+        assert "Troponin 0.4 ng/ml at 06:00." in result
+        assert "Family visited today." not in result
+
+    def test_no_words_run_together(self):
+        strategy = TokenBudgetKVTCStrategy("regex", sink_tokens=7, window_tokens=9, max_tokens=40)
+        result = strategy.compress(HISTORY)
+        assert set(result.split()) <= set(HISTORY.split())
+
+    def test_short_text_unchanged(self):
+        strategy = TokenBudgetKVTCStrategy("regex", max_tokens=2048)
+        assert strategy.compress(HISTORY) == HISTORY
+
+    def test_one_encode_per_record(self):
+        tokenizer = RegexTokenizer()
+        strategy = TokenBudgetKVTCStrategy(tokenizer, sink_tokens=20, window_tokens=20, max_tokens=80)
+        strategy.compress(HISTORY)
+        strategy.compress(HISTORY)
+        assert tokenizer.encodes == 1
+
+    def test_budget_must_cover_sink_and_window(self):
+        with pytest.raises(ValueError):
+            TokenBudgetKVTCStrategy("regex", sink_tokens=100, window_tokens=100, max_tokens=150)
@@ -0,0 +1,153 @@
+"""Tests for the lightweight tracing layer and CompText instrumentation."""
+
+import json
+import threading
+import time
+
+import pytest
+
+from src.core.codex import MedicalKVTCStrategy
+from src.core.comptext import CompTextProtocol
+from src.core.pipeline import Stage, StagePipeline
+from src.core.tracing import (
+    NOOP_SPAN,
+    InMemoryExporter,
+    JSONFileExporter,
+    Tracer,
+    current_span,
+    tracer,
+)
+
+
+@pytest.fixture
+def collector():
+    exporter = InMemoryExporter()
+    tracer.configure(exporter)
+    yield exporter
+    tracer.configure(None)
+
+
+class TestTracer:
+    def test_disabled_returns_noop(self):
+        local = Tracer()
+        assert not local.enabled
+        with local.span("x", a=1) as span:
+            span.set_attribute("b", 2)
+        assert span is NOOP_SPAN
+
+    def test_nesting_and_export_on_root_end(self):
+        exporter = InMemoryExporter()
+        local = Tracer(exporter=exporter)
+        with local.span("root") as root:
+            with local.span("child") as child:
+                assert current_span() is child
+            assert exporter.spans == []  # exported only when the root ends
+        assert exporter.names() == ["child", "root"]
+        assert child.parent_id == root.span_id
+        assert child.trace_id == root.trace_id
+        assert root.parent_id is None
+        assert root.duration_ms >= child.duration_ms >= 0
+        assert current_span() is None
+
+    def test_error_status(self):
+        exporter = InMemoryExporter()
+        local = Tracer(exporter=exporter)
+        with pytest.raises(ValueError):
+            with local.span("boom"):
+                raise ValueError("bad input")
+        otlp = exporter.spans[0].to_otlp()
+        assert otlp["status"] == {"code": 2, "message": "ValueError: bad input"}
+
+    def test_otlp_attributes(self):
+        exporter = InMemoryExporter()
+        local = Tracer(service_name="svc", exporter=exporter)
+        with local.span("s", n=3, ratio=0.5, hit=True, label="x"):
+            pass
+        document = local.to_otlp(exporter.spans)
+        resource = document["resourceSpans"][0]
+        assert resource["resource"]["attributes"][0] == {"key": "service.name", "value": {"stringValue": "svc"}}
+        span = resource["scopeSpans"][0]["spans"][0]
+        assert span["attributes"] == [
+            {"key": "n", "value": {"intValue": "3"}},
+            {"key": "ratio", "value": {"doubleValue": 0.5}},
+            {"key": "hit", "value": {"boolValue": True}},
+            {"key": "label", "value": {"stringValue": "x"}},
+        ]
+        assert int(span["endTimeUnixNano"]) >= int(span["startTimeUnixNano"])
+
+    def test_json_file_exporter(self, tmp_path):
+        path = tmp_path / "traces.jsonl"
+        local = Tracer()
+        local.configure(JSONFileExporter(str(path), tracer=local))
+        for _ in range(2):
+            with local.span("root"):
+                with local.span("child"):
+                    pass
+        lines = path.read_text().splitlines()
+        assert len(lines) == 2
+        spans = json.loads(lines[0])["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        assert [s["name"] for s in spans] == ["child", "root"]
+        assert spans[0]["parentSpanId"] == spans[1]["spanId"]
+
+    def test_threads_do_not_share_current_span(self):
+        local = Tracer(exporter=InMemoryExporter())
+        seen = []
+        with local.span("root"):
+            thread = threading.Thread(target=lambda: seen.append(current_span()))
+            thread.start()
+            thread.join()
+        assert seen == [None]
+
+    @pytest.mark.performance
+    def test_disabled_overhead_is_negligible(self):
+        local = Tracer()
+        n = 100_000
+        start = time.perf_counter()
+        for _ in range(n):
+            with local.span("x"):
+                pass
+        per_span_us = (time.perf_counter() - start) / n * 1e6
+        assert per_span_us < 5
+
+
+class TestInstrumentation:
+    def test_compress_spans(self, collector):
+        CompTextProtocol().compress("Chief complaint: chest pain. HR 110, BP 160/95. Troponin elevated.")
+        names = collector.names()
+        assert names[-1] == "comptext.compress"
+        for name in (
+            "comptext.extract.chief_complaint",
+            "comptext.extract.vitals",
+            "comptext.extract.symptoms",
+            "comptext.route",
+            "comptext.codex_extract",
+            "comptext.build_state",
+        ):
+            assert name in names
+        root = collector.spans[-1]
+        assert all(s.trace_id == root.trace_id for s in collector.spans)
+
+    def test_kvtc_spans(self, collector):
+        strategy = MedicalKVTCStrategy(sink_size=10, window_size=10)
+        text = "A" * 10 + " history. history. " * 5 + "B" * 10
+        strategy.compress(text)
+        strategy.compress(text)
+        lookups = [s for s in collector.spans if s.name == "kvtc.cache_lookup"]
+        assert [s.attributes["hit"] for s in lookups] == [False, True]
+        assert collector.names().count("kvtc.compress_middle") == 1
+
+    def test_pipeline_worker_spans_join_caller_trace(self, collector):
+        pipeline = StagePipeline(
+            [
+                Stage("a", lambda x: x + 1),
+                Stage("b", lambda a: a * 2, depends_on=("a",)),
+                Stage("c", lambda a: a * 3, depends_on=("a",)),
+            ],
+            max_workers=2,
+        )
+        with tracer.span("request") as root:
+            pipeline.run(1)
+        pipeline.close()
+        stages = [s for s in collector.spans if s.name.startswith("stage.")]
+        assert sorted(s.name for s in stages) == ["stage.a", "stage.b", "stage.c"]
+        assert all(s.parent_id == root.span_id for s in stages)
@@ -360,5 +360,28 @@ class TestHealthEndpointErrorHandling:
         assert elapsed < 50, f"Health check took {elapsed}ms"
 
 
+class TestMetricsEndpoint:
+    """Tests for /metrics and real resource figures in /health"""
+
+    def test_metrics_exposes_stage_histograms(self, client):
+        """[Test] /metrics serves Prometheus text with per-stage histograms"""
+        client.post("/api/process", json={"clinical_text": "Chest pain, HR 120, BP 150/90"})
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        body = response.text
+        assert "# TYPE medgemma_stage_latency_seconds histogram" in body
+        for stage in ("compression", "triage", "diagnosis", "total"):
+            assert f'medgemma_stage_latency_seconds_count{{stage="{stage}"}}' in body
+        assert 'quantile="0.95"' in body
+        assert "medgemma_process_resident_memory_mb" in body
+
+    def test_health_reports_sampled_resources(self, client):
+        """[Test] /health no longer reports placeholder CPU/memory figures"""
+        data = client.get("/health").json()
+        assert data["memory_usage_mb"] != 256.0
+        assert data["memory_usage_mb"] > 0
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v", "--tb=short"])
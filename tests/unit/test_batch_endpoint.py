@@ -0,0 +1,137 @@
+"""
+Batch Endpoint Tests
+Tests /api/process/batch: JSON array and NDJSON input, streamed NDJSON
+results, per-item errors and batch-level limits
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "api"))
+
+import main_enhanced
+from main_enhanced import app, parse_batch_body
+
+CARDIAC = "Chief complaint: chest pain radiating to left arm. HR 110, BP 160/95."
+ROUTINE = "Mild cough for 3 days. HR 78, BP 118/76, Temp 36.9C."
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+def _lines(response):
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+class TestBatchEndpoint:
+    def test_json_array(self, client):
+        response = client.post(
+            "/api/process/batch",
+            json=[{"clinical_text": CARDIAC, "patient_id": "p1"}, {"clinical_text": ROUTINE}],
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        results = sorted(_lines(response), key=lambda r: r["index"])
+        assert [r["status"] for r in results] == ["success", "success"]
+        assert results[0]["triage"]["priority_level"] == "P1"
+        assert results[0]["metadata"]["patient_id"] == "p1"
+        assert results[1]["triage"]["priority_level"] == "P3"
+        batch_id = response.headers["x-batch-id"]
+        assert results[1]["request_id"] == f"{batch_id}_1"
+
+    def test_ndjson_matches_single_endpoint(self, client):
+        body = "\n".join(json.dumps({"clinical_text": t}) for t in (CARDIAC, ROUTINE)) + "\n"
+        response = client.post(
+            "/api/process/batch", content=body, headers={"Content-Type": "application/x-ndjson"}
+        )
+        results = sorted(_lines(response), key=lambda r: r["index"])
+        for text, result in zip((CARDIAC, ROUTINE), results):
+            single = client.post("/api/process", json={"clinical_text": text}).json()
+            # triage_time_ms is measured per request; every other field must match
+            assert result["triage"].pop("triage_time_ms") >= 0
+            assert single["triage"].pop("triage_time_ms") >= 0
+            assert result["triage"] == single["triage"]
+            assert result["compression"]["compressed_tokens"] == single["compression"]["compressed_tokens"]
+            assert result["diagnosis"]["primary_assessment"] == single["diagnosis"]["primary_assessment"]
+
+    def test_invalid_items_fail_individually(self, client):
+        body = "\n".join([
+            json.dumps({"clinical_text": CARDIAC}),
+            "{not json",
+            json.dumps({"clinical_text": "short"}),
+            json.dumps({"clinical_text": ROUTINE}),
+        ])
+        response = client.post("/api/process/batch", content=body)
+        assert response.status_code == 200
+        results = {r["index"]: r for r in _lines(response)}
+        assert set(results) == {0, 1, 2, 3}
+        assert results[0]["status"] == results[3]["status"] == "success"
+        assert results[1]["error"]["code"] == "VALIDATION_ERROR"
+        assert "Invalid JSON" in results[1]["error"]["message"]
+        assert "clinical_text" in results[2]["error"]["message"]
+
+    def test_processing_error_fails_only_that_item(self, client, monkeypatch):
+        real_intake = main_enhanced.nurse_agent.intake
+
+        def flaky_intake(text):
+            if "EXPLODE" in text:
+                raise RuntimeError("boom")
+            return real_intake(text)
+
+        monkeypatch.setattr(main_enhanced.nurse_agent, "intake", flaky_intake)
+        monkeypatch.setattr(
+            main_enhanced.nurse_agent, "intake_batch", lambda texts: [flaky_intake(t) for t in texts]
+        )
+        monkeypatch.setattr(main_enhanced, "clinical_pipeline", main_enhanced.build_clinical_pipeline(
+            main_enhanced.nurse_agent, main_enhanced.triage_agent, main_enhanced.doctor_agent
+        ))
+        response = client.post(
+            "/api/process/batch",
+            json=[{"clinical_text": CARDIAC}, {"clinical_text": "EXPLODE this record please"}],
+        )
+        results = {r["index"]: r for r in _lines(response)}
+        assert results[0]["status"] == "success"
+        assert results[1]["status"] == "error"
+        assert results[1]["error"]["code"] == "INTERNAL_ERROR"
+
+    def test_chunking(self, client, monkeypatch):
+        monkeypatch.setattr(main_enhanced, "BATCH_CHUNK_SIZE", 2)
+        response = client.post("/api/process/batch", json=[{"clinical_text": ROUTINE}] * 5)
+        assert sorted(r["index"] for r in _lines(response)) == [0, 1, 2, 3, 4]
+
+    def test_batch_uses_quota_per_item(self, client, monkeypatch):
+        monkeypatch.setattr(main_enhanced, "rate_limiter", main_enhanced.RateLimiter(limit=10))
+        response = client.post("/api/process/batch", json=[{"clinical_text": ROUTINE}] * 10)
+        assert response.status_code == 200 and len(_lines(response)) == 10
+        assert client.post("/api/process", json={"clinical_text": ROUTINE}).status_code == 429
+
+    def test_batch_over_remaining_quota_is_rejected(self, client, monkeypatch):
+        monkeypatch.setattr(main_enhanced, "rate_limiter", main_enhanced.RateLimiter(limit=10))
+        response = client.post("/api/process/batch", json=[{"clinical_text": ROUTINE}] * 11)
+        assert response.status_code == 429
+        assert response.json()["error"]["code"] == "RATE_LIMIT_EXCEEDED"
+
+    def test_batch_limits(self, client, monkeypatch):
+        assert client.post("/api/process/batch", content="").status_code == 400
+        assert client.post("/api/process/batch", content="[{bad").status_code == 400
+        monkeypatch.setattr(main_enhanced, "BATCH_MAX_ITEMS", 2)
+        response = client.post("/api/process/batch", json=[{"clinical_text": ROUTINE}] * 3)
+        assert response.status_code == 413
+        assert response.json()["error"]["code"] == "BATCH_TOO_LARGE"
+
+
+class TestParseBatchBody:
+    def test_array_and_ndjson(self):
+        assert parse_batch_body(b' [{"a": 1}] ') == [({"a": 1}, None)]
+        assert parse_batch_body(b'{"a": 1}\n\n{"b": 2}\n') == [({"a": 1}, None), ({"b": 2}, None)]
+
+    def test_bad_ndjson_line_is_an_item_error(self):
+        (payload, error), = parse_batch_body(b"{oops")
+        assert payload is None and error.startswith("Invalid JSON")
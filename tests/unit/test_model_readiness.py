@@ -0,0 +1,131 @@
+"""
+Model Warm-up & Readiness Tests
+Tests background model loading, the /ready probe and degraded (rule-based)
+serving while the model is still loading
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "api"))
+
+import src.agents.doctor_agent as doctor_module
+from src.agents.doctor_agent import DoctorAgent, get_model_status
+from main_enhanced import app
+
+
+class FakeTransformersDoctor:
+    """Stand-in for the GPU model: records warm-up calls."""
+
+    MODEL_ID = "fake/paligemma"
+
+    def __init__(self):
+        self.warmed_up = False
+
+    def warm_up(self):
+        self.warmed_up = True
+
+    def diagnose(self, context_text, image_path=None):
+        return f"[model] {context_text}"
+
+
+@pytest.fixture
+def fake_gpu(monkeypatch):
+    """Pretend a GPU is available and reset the singleton around the test."""
+    monkeypatch.setattr(doctor_module, "_transformers_doctor_instance", None)
+    monkeypatch.setattr(
+        doctor_module, "_model_status", {"state": "idle", "progress": 0.0, "detail": None}
+    )
+    monkeypatch.setattr(doctor_module, "_TORCH_AVAILABLE", True)
+    monkeypatch.setattr(doctor_module, "TransformersDoctor", FakeTransformersDoctor)
+
+    class _Cuda:
+        @staticmethod
+        def is_available():
+            return True
+
+    class _Torch:
+        cuda = _Cuda
+
+    monkeypatch.setattr(doctor_module, "torch", _Torch, raising=False)
+
+
+class TestModelWarmup:
+
+    def test_lazy_agent_serves_rule_based_until_ready(self, fake_gpu):
+        """[Test] load_model=False never loads; agent switches once warm-up ends"""
+        agent = DoctorAgent(load_model=False)
+        assert agent.mode == "rule_based"
+        assert get_model_status()["state"] == "idle"
+        state = {"chief_complaint": "chest pain", "vitals": {"hr": 80}}
+        assert "[MedGemma Assessment]" in agent.diagnose(state)
+
+        doctor = doctor_module.warm_up_transformers_doctor()
+        assert doctor.warmed_up
+        assert get_model_status() == {"state": "ready", "progress": 1.0, "detail": None}
+        assert agent.mode == "model"
+        assert agent.diagnose(state).startswith("[model]")
+
+    def test_warmup_failure_is_recorded(self, fake_gpu, monkeypatch):
+        """[Test] A failing warm-up reports 'failed' instead of raising"""
+        def boom(self):
+            raise RuntimeError("CUDA out of memory")
+
+        monkeypatch.setattr(FakeTransformersDoctor, "warm_up", boom)
+        assert doctor_module.warm_up_transformers_doctor() is None
+        status = get_model_status()
+        assert status["state"] == "failed"
+        assert "out of memory" in status["detail"]
+        assert DoctorAgent(load_model=False).mode == "rule_based"
+
+
+class TestReadyEndpoint:
+
+    def test_ready_without_gpu_is_rule_based(self):
+        """[Test] Without a GPU rule-based mode is final, so /ready is 200"""
+        with TestClient(app) as client:
+            response = client.get("/ready")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["ready"] is True
+        assert data["model_state"] == "unavailable"
+        assert data["doctor_mode"] == "rule_based"
+
+    def test_ready_returns_503_while_loading(self, monkeypatch):
+        """[Test] /ready is 503 while loading and /health reports degraded"""
+        monkeypatch.setattr(
+            doctor_module,
+            "_model_status",
+            {"state": "loading", "progress": 0.1, "detail": None},
+        )
+        client = TestClient(app)  # no lifespan: warm-up does not run
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["model_progress"] == 0.1
+        assert client.get("/health").json()["status"] == "degraded"
+
+        process = client.post("/api/process", json={"clinical_text": "Chest pain, HR 120, BP 150/90"})
+        assert process.status_code == 200
+        assert process.json()["metadata"]["doctor_mode"] == "rule_based"
+
+    def test_failed_load_is_ready_but_degraded(self, monkeypatch):
+        """[Test] After a failed load rule-based mode is final: /ready 200, /health degraded"""
+        monkeypatch.setattr(
+            doctor_module,
+            "_model_status",
+            {"state": "failed", "progress": 0.0, "detail": "CUDA out of memory"},
+        )
+        client = TestClient(app)
+        response = client.get("/ready")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["ready"] is True and data["model_state"] == "failed"
+        assert "rule-based" in data["detail"] and "out of memory" in data["detail"]
+
+        health = client.get("/health").json()
+        assert health["status"] == "degraded"
+        assert health["model_state"] == "failed"
+        assert "out of memory" in health["model_detail"]
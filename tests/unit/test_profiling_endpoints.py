@@ -0,0 +1,93 @@
+"""
+Request Profiling Endpoint Tests
+Tests X-Profile capture on /api/process and the /admin/profiles exports
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "api"))
+
+import main_enhanced
+from main_enhanced import app
+
+CLINICAL_TEXT = "Chief complaint: chest pain. HR 110, BP 160/95, Temp 38.2C."
+TOKEN = "s3cret"
+ADMIN = {"X-Admin-Token": TOKEN}
+PROFILE = {"X-Profile": "1", **ADMIN}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("ADMIN_API_TOKEN", TOKEN)
+    main_enhanced.profiler.clear()
+    with TestClient(app, headers=ADMIN) as c:
+        yield c
+    main_enhanced.profiler.clear()
+
+
+class TestProfiling:
+    def test_unprofiled_request_has_no_profile_id(self, client):
+        response = client.post("/api/process", json={"clinical_text": CLINICAL_TEXT})
+        assert response.status_code == 200
+        assert "x-profile-id" not in response.headers
+        assert client.get("/admin/profiles").json()["profiles"] == []
+
+    def test_profiled_request_is_listed(self, client):
+        response = client.post(
+            "/api/process", json={"clinical_text": CLINICAL_TEXT}, headers=PROFILE
+        )
+        assert response.status_code == 200
+        profile_id = response.headers["x-profile-id"]
+
+        listing = client.get("/admin/profiles").json()
+        assert [p["profile_id"] for p in listing["profiles"]] == [profile_id]
+        assert listing["profiles"][0]["hotspots"]
+
+    def test_profile_covers_all_stages(self, client):
+        profile_id = client.post(
+            "/api/process", json={"clinical_text": CLINICAL_TEXT}, headers=PROFILE
+        ).headers["x-profile-id"]
+        frames = client.get(f"/admin/profiles/{profile_id}").json()["shared"]["frames"]
+        names = {frame["name"].split(" ")[0] for frame in frames}
+        for function in ("intake", "triage", "diagnose", "to_compressed_json", "to_comptext"):
+            assert function in names
+
+    def test_export_formats(self, client):
+        profile_id = client.post(
+            "/api/process", json={"clinical_text": CLINICAL_TEXT}, headers=PROFILE
+        ).headers["x-profile-id"]
+        speedscope = client.get(f"/admin/profiles/{profile_id}")
+        assert speedscope.json()["profiles"][0]["type"] == "sampled"
+        pstats_file = client.get(f"/admin/profiles/{profile_id}", params={"format": "pstats"})
+        assert pstats_file.headers["content-type"] == "application/octet-stream"
+        assert pstats_file.content
+        assert client.get(f"/admin/profiles/{profile_id}", params={"format": "svg"}).status_code == 422
+
+    def test_unknown_profile(self, client):
+        response = client.get("/admin/profiles/nope")
+        assert response.status_code == 404
+        assert response.json()["error"]["code"] == "PROFILE_NOT_FOUND"
+
+    def test_admin_token_required(self, client):
+        assert client.get("/admin/profiles", headers={"X-Admin-Token": ""}).status_code == 403
+        assert client.get("/admin/profiles", headers={"X-Admin-Token": "wrong"}).status_code == 403
+        assert client.get("/admin/profiles").status_code == 200
+        # X-Profile without the token is ignored rather than rejected
+        response = client.post(
+            "/api/process",
+            json={"clinical_text": CLINICAL_TEXT},
+            headers={"X-Profile": "1", "X-Admin-Token": ""},
+        )
+        assert response.status_code == 200
+        assert "x-profile-id" not in response.headers
+
+    def test_admin_disabled_without_configured_token(self, client, monkeypatch):
+        monkeypatch.delenv("ADMIN_API_TOKEN")
+        assert client.get("/admin/profiles").status_code == 403
+        response = client.post("/api/process", json={"clinical_text": CLINICAL_TEXT}, headers=PROFILE)
+        assert response.status_code == 200
+        assert "x-profile-id" not in response.headers
@@ -0,0 +1,133 @@
+"""
+Result Cache Tests
+Tests the content-addressed /api/process result cache, X-Cache header and
+the ETag / If-None-Match (304) contract
+"""
+
+import sys
+import unicodedata
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "api"))
+
+import main_enhanced
+from main_enhanced import app, etag_matches, result_cache
+from src.core.cache_manager import ResultCache, normalize_clinical_text
+
+CLINICAL_TEXT = "Chief complaint: chest pain. HR 110, BP 160/95, Temp 38.2C."
+
+
+@pytest.fixture
+def client():
+    result_cache.clear()
+    with TestClient(app) as c:
+        yield c
+    result_cache.clear()
+
+
+def _post(client, text=CLINICAL_TEXT, **kwargs):
+    return client.post("/api/process", json={"clinical_text": text, **kwargs.pop("body", {})}, **kwargs)
+
+
+class TestResultCacheEndpoint:
+    def test_miss_then_hit(self, client):
+        first = _post(client)
+        second = _post(client, body={"patient_id": "p2"})
+        assert first.headers["x-cache"] == "MISS"
+        assert second.headers["x-cache"] == "HIT"
+        a, b = first.json(), second.json()
+        for field in ("compression", "triage", "diagnosis", "compressed_text", "compression_ratio"):
+            assert a[field] == b[field]
+        # per-request fields are fresh
+        assert b["metadata"]["patient_id"] == "p2"
+        assert "cache_lookup_ms" in b["performance"]["stages"]
+
+    def test_hit_skips_pipeline(self, client, monkeypatch):
+        _post(client)
+        monkeypatch.setattr(main_enhanced.clinical_pipeline, "run", lambda *a, **k: pytest.fail("pipeline ran"))
+        assert _post(client).status_code == 200
+
+    def test_normalized_text_shares_entry(self, client):
+        text = CLINICAL_TEXT + "\nTransferred from Zürich."
+        _post(client, text)
+        assert _post(client, unicodedata.normalize("NFD", text)).headers["x-cache"] == "HIT"
+        assert _post(client, text.replace("\n", "\r\n")).headers["x-cache"] == "HIT"
+        assert _post(client, "  " + text).headers["x-cache"] == "HIT"
+
+    def test_hit_recounts_tokens_for_sent_text(self, client):
+        text = "\n".join([CLINICAL_TEXT] * 12)
+        variant = " " * 40 + text.replace("\n", "\r\n")
+        _post(client, text)
+        hit = _post(client, variant)
+        assert hit.headers["x-cache"] == "HIT"
+        result_cache.clear()
+        fresh = _post(client, variant)
+        assert fresh.headers["x-cache"] == "MISS"
+        a, b = hit.json(), fresh.json()
+        for field in ("original_tokens", "compressed_tokens", "compression_ratio",
+                      "compression_ratio_percent", "tokens_saved"):
+            assert a["compression"][field] == b["compression"][field]
+        assert a["compression_ratio"] == b["compression_ratio"]
+
+    def test_etag_round_trip(self, client):
+        first = _post(client)
+        etag = first.headers["etag"]
+        assert etag.startswith('W/"')
+        not_modified = _post(client, headers={"If-None-Match": etag})
+        assert not_modified.status_code == 304
+        assert not_modified.content == b""
+        assert not_modified.headers["etag"] == etag
+        assert _post(client, "Different text entirely, HR 80.", headers={"If-None-Match": etag}).status_code == 200
+
+    def test_etag_depends_on_doctor_mode(self, client, monkeypatch):
+        etag = _post(client).headers["etag"]
+        monkeypatch.setattr(type(main_enhanced.doctor_agent), "mode", property(lambda self: "model"))
+        response = _post(client, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+
+    def test_profiled_requests_bypass(self, client, monkeypatch):
+        monkeypatch.setenv("ADMIN_API_TOKEN", "s3cret")
+        _post(client)
+        assert _post(client, headers={"X-Profile": "1"}).headers["x-cache"] == "HIT"
+        profiled = _post(client, headers={"X-Profile": "1", "X-Admin-Token": "s3cret"})
+        assert profiled.headers["x-cache"] == "BYPASS"
+
+    def test_metrics_exposed(self, client):
+        _post(client)
+        _post(client)
+        body = client.get("/metrics").text
+        assert f"medgemma_result_cache_hits_total {result_cache.hits}" in body
+        assert "medgemma_result_cache_entries 1" in body
+
+
+class TestResultCache:
+    def test_lru_eviction(self):
+        cache = ResultCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        assert cache.get("a") == 1  # a most recent
+        cache.put("c", 3)  # evicts b
+        assert cache.get("b") is None
+        assert cache.stats() == {"size": 2, "max_entries": 2, "hits": 1, "misses": 1, "evictions": 1}
+
+    def test_disabled(self):
+        cache = ResultCache(max_entries=0)
+        cache.put("a", 1)
+        assert not cache.enabled
+        assert cache.size == 0
+
+    def test_key_normalization(self):
+        assert ResultCache.key("café\r\n", "v1") == ResultCache.key(" café\n", "v1")
+        assert ResultCache.key("text", "v1") != ResultCache.key("text", "v2")
+        assert normalize_clinical_text("a\r\nb\rc ") == "a\nb\nc"
+
+    def test_etag_matching(self):
+        assert etag_matches('"abc"', 'W/"abc"')
+        assert etag_matches('"x", W/"abc"', 'W/"abc"')
+        assert etag_matches("*", 'W/"abc"')
+        assert not etag_matches('"abd"', 'W/"abc"')
+        assert not etag_matches(None, 'W/"abc"')
@@ -0,0 +1,54 @@
+"""
+API Tracing Tests
+Tests measured validation/serialization timings and request trace spans
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "api"))
+
+from main_enhanced import app, result_cache
+from src.core.tracing import InMemoryExporter, tracer
+
+CLINICAL_TEXT = "Chief complaint: chest pain. HR 110, BP 160/95, Temp 38.2C."
+
+
+@pytest.fixture
+def client():
+    result_cache.clear()  # a cache hit would skip the pipeline spans
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def collector():
+    exporter = InMemoryExporter()
+    tracer.configure(exporter)
+    yield exporter
+    tracer.configure(None)
+
+
+class TestRequestTracing:
+    def test_stage_timings_are_measured(self, client):
+        stages = client.post("/api/process", json={"clinical_text": CLINICAL_TEXT}).json()["performance"]["stages"]
+        assert stages["validation_ms"] >= 0
+        assert stages["serialization_ms"] > 0
+        assert (stages["validation_ms"], stages["serialization_ms"]) != (2.0, 2.0)
+
+    def test_request_produces_one_trace(self, client, collector):
+        response = client.post("/api/process", json={"clinical_text": CLINICAL_TEXT})
+        assert response.status_code == 200
+        by_name = {s.name: s for s in collector.spans}
+        root = by_name["http.request"]
+        assert root.attributes["http.status_code"] == 200
+        assert {s.trace_id for s in collector.spans} == {root.trace_id}
+        for name in ("api.process", "stage.compression", "stage.triage", "stage.diagnosis",
+                     "comptext.compress", "api.serialization"):
+            assert name in by_name
+        assert by_name["api.process"].parent_id == root.span_id
+        assert by_name["comptext.compress"].parent_id == by_name["stage.compression"].span_id
+        assert "validation_ms" in by_name["api.process"].attributes